@@ -2,7 +2,8 @@
 
 from dash import Dash
 import dash_bootstrap_components as dbc
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
+import json
 import os
 from src.chatbot import gerar_resposta  # pyright: ignore[reportMissingImports]
 from config import DESIGN_CONFIG  # pyright: ignore[reportMissingImports]
@@ -82,13 +83,79 @@ def chatbot_responder():
         logging.error(f"Erro no chatbot_responder: {e}")
         return jsonify({"resposta": f"Erro interno: {str(e)}"}), 500
 
+@server.route("/chatbot_stream", methods=["POST"])
+def chatbot_stream():
+    """
+    Rota Flask que entrega a resposta do chatbot em streaming (Server-Sent Events).
+    
+    Cada trecho gerado pelo modelo é enviado assim que chega, então o tempo até
+    o primeiro trecho não depende do tamanho da resposta. Com workers gthread
+    (gunicorn.conf.py) a conexão ocupa uma thread, não o worker inteiro.
+    
+    Request JSON:
+        {
+            "mensagem": "texto da pergunta",
+            "session_id": "id_da_sessao" (opcional)
+        }
+    
+    Response (text/event-stream):
+        data: {"delta": "trecho da resposta"}   (um evento por trecho)
+        event: done                             (fim da resposta)
+    """
+    dados = request.get_json(silent=True) or {}
+    mensagem = dados.get("mensagem", "")
+    session_id = dados.get("session_id", "default")
+    
+    if not mensagem:
+        return jsonify({"resposta": "Por favor, envie uma mensagem válida."}), 400
+    
+    def eventos():
+        from src.chatbot import gerar_resposta_stream
+        try:
+            for trecho in gerar_resposta_stream(mensagem, session_id):
+                yield f"data: {json.dumps({'delta': trecho}, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            import logging
+            logging.error(f"Erro no chatbot_stream: {e}")
+            yield f"event: error\ndata: {json.dumps({'erro': str(e)}, ensure_ascii=False)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    
+    return Response(
+        stream_with_context(eventos()),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Desativa buffering em proxies (nginx)
+        }
+    )
+
+@server.route("/chatbot_cache_stats", methods=["GET"])
+def chatbot_cache_stats():
+    """Métricas do cache de respostas do chatbot (taxa de acerto e economia)"""
+    from src.chatbot import obter_metricas_cache
+    return jsonify(obter_metricas_cache())
+
+@server.route("/chatbot_session_stats", methods=["GET"])
+def chatbot_session_stats():
+    """Métricas do armazenamento de sessões do chatbot (ocupação e remoções)"""
+    from src.chatbot import obter_metricas_sessoes
+    return jsonify(obter_metricas_sessoes())
+
+@server.route("/chatbot_phase_stats", methods=["GET"])
+def chatbot_phase_stats():
+    """Tempo gasto em cada fase do atendimento do chatbot (percentis em ms)"""
+    from src.chatbot import obter_metricas_fases
+    return jsonify(obter_metricas_fases())
+
 @server.route("/clear_cache", methods=["POST"])
 def clear_cache_endpoint():
     """Endpoint para limpar o cache de dados via API"""
     try:
         from src.utils.data_cache import clear_cache, get_cache_info
+        from src.utils.tab_results import tab_results
         info_antes = get_cache_info()
         clear_cache()
+        tab_results.clear()
         info_depois = get_cache_info()
         return jsonify({
             "status": "success",
@@ -108,7 +175,8 @@ def clear_cache_endpoint():
 # -----------------------------------------------------------------------------
 # 🧩 Carregamento de dados e layout
 # -----------------------------------------------------------------------------
-# Limpa o cache para garantir dados atualizados
+# Limpa o cache em memória para garantir dados atualizados (os artefatos em
+# data/artifacts são reabertos do disco enquanto a origem e o código não mudarem)
 clear_cache()
 
 # Carrega metadados ao iniciar (usando caminho relativo - será convertido internamente)
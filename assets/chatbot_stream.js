@@ -0,0 +1,151 @@
+// assets/chatbot_stream.js - Envio de mensagens do chatbot com resposta em streaming
+//
+// O callback de envio roda no navegador (clientside): adiciona a mensagem do
+// usuário e um balão vazio para o bot, e lê a resposta de /chatbot_stream
+// (Server-Sent Events) escrevendo cada trecho no balão assim que chega.
+// Nenhum worker do servidor fica bloqueado esperando a resposta completa.
+
+(function () {
+    var contador = 0;
+
+    // ID de sessão persistente por navegador (mantém o histórico da conversa)
+    function sessionId() {
+        var chave = "chatbot_session_id";
+        try {
+            var id = window.localStorage.getItem(chave);
+            if (!id) {
+                id = "dash_" + Date.now().toString(36) + Math.random().toString(36).slice(2, 10);
+                window.localStorage.setItem(chave, id);
+            }
+            return id;
+        } catch (e) {
+            return "dash_session";
+        }
+    }
+
+    function mensagem(texto, classe, id) {
+        var props = {children: texto, className: classe};
+        if (id) {
+            props.id = id;
+        }
+        return {type: "Div", namespace: "dash_html_components", props: props};
+    }
+
+    function rolarParaFim() {
+        var corpo = document.getElementById("chatbot-body");
+        if (corpo) {
+            corpo.scrollTop = corpo.scrollHeight;
+        }
+    }
+
+    // O texto recebido por streaming só existe no DOM: copia para o estado do
+    // Dash antes de re-renderizar a lista de mensagens
+    function consolidar(mensagens) {
+        return (mensagens || []).map(function (item) {
+            var id = item && item.props && item.props.id;
+            var elemento = id ? document.getElementById(id) : null;
+            if (!elemento) {
+                return item;
+            }
+            var props = Object.assign({}, item.props, {children: elemento.textContent});
+            return Object.assign({}, item, {props: props});
+        });
+    }
+
+    function aguardarElemento(id, tentativas) {
+        return new Promise(function (resolve, reject) {
+            (function verificar(n) {
+                var elemento = document.getElementById(id);
+                if (elemento) {
+                    resolve(elemento);
+                } else if (n <= 0) {
+                    reject(new Error("elemento " + id + " não encontrado"));
+                } else {
+                    window.requestAnimationFrame(function () { verificar(n - 1); });
+                }
+            })(tentativas);
+        });
+    }
+
+    function processarEvento(bloco, elemento, estado) {
+        var evento = "message";
+        var dados = [];
+        bloco.split("\n").forEach(function (linha) {
+            if (linha.indexOf("event:") === 0) {
+                evento = linha.slice(6).trim();
+            } else if (linha.indexOf("data:") === 0) {
+                dados.push(linha.slice(5).trim());
+            }
+        });
+        if (!dados.length) {
+            return;
+        }
+        var conteudo = JSON.parse(dados.join("\n"));
+        if (evento === "message" && conteudo.delta) {
+            if (!estado.recebeu) {
+                elemento.textContent = "";
+                estado.recebeu = true;
+            }
+            elemento.textContent += conteudo.delta;
+            rolarParaFim();
+        } else if (evento === "error") {
+            elemento.textContent = "Erro interno do chatbot: " + conteudo.erro;
+        }
+    }
+
+    function transmitir(texto, idResposta) {
+        aguardarElemento(idResposta, 120).then(function (elemento) {
+            rolarParaFim();
+            return fetch("/chatbot_stream", {
+                method: "POST",
+                headers: {"Content-Type": "application/json"},
+                body: JSON.stringify({mensagem: texto, session_id: sessionId()})
+            }).then(function (resposta) {
+                if (!resposta.ok || !resposta.body) {
+                    throw new Error("HTTP " + resposta.status);
+                }
+                var leitor = resposta.body.getReader();
+                var decodificador = new TextDecoder("utf-8");
+                var pendente = "";
+                var estado = {recebeu: false};
+
+                function ler() {
+                    return leitor.read().then(function (parte) {
+                        if (parte.done) {
+                            return;
+                        }
+                        pendente += decodificador.decode(parte.value, {stream: true});
+                        var blocos = pendente.split("\n\n");
+                        pendente = blocos.pop();
+                        blocos.forEach(function (bloco) { processarEvento(bloco, elemento, estado); });
+                        return ler();
+                    });
+                }
+                return ler();
+            }).catch(function (erro) {
+                elemento.textContent = "Erro interno do chatbot: " + erro.message;
+            });
+        }).catch(function () {});
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        chatbot: {
+            send_message: function (sendClicks, submitClicks, texto, mensagensAtuais) {
+                var semEstilo = {display: "none"};
+                if (!texto || !texto.trim()) {
+                    return [window.dash_clientside.no_update, "", semEstilo];
+                }
+
+                contador += 1;
+                var idResposta = "chatbot-resposta-" + Date.now().toString(36) + "-" + contador;
+                var mensagens = consolidar(mensagensAtuais).concat([
+                    mensagem(texto, "user-message"),
+                    mensagem("…", "bot-message", idResposta)
+                ]);
+
+                transmitir(texto, idResposta);
+                return [mensagens, "", semEstilo];
+            }
+        }
+    });
+})();
@@ -0,0 +1,52 @@
+# gunicorn.conf.py - Configuração do gunicorn com plano de dados compartilhado
+#
+# O processo mestre carrega os dados processados uma única vez, publica um
+# snapshot colunar em memory-map (SHARED_DATA_DIR) e constrói índice e cubo.
+# Os workers herdam tudo pelo fork (preload_app) ou, se reiniciados, anexam o
+# mesmo snapshot sem copiar nem reprocessar o Parquet. Adicionar workers não
+# multiplica a memória ocupada pelos dados. Entre reinícios, o cubo, os índices
+# e a análise do chatbot são reabertos de data/artifacts (ARTIFACT_DIR) enquanto
+# o conteúdo dos dados e o código que os monta não mudarem.
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8050')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+
+# Workers com pool de threads: uma resposta do chatbot em streaming (/chatbot_stream)
+# ocupa uma thread durante a chamada ao OpenAI, não o worker inteiro, então os
+# callbacks do painel continuam sendo atendidos
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+
+# Carrega o app no mestre antes do fork (workers sobem sem reimportar o app)
+preload_app = os.environ.get("GUNICORN_PRELOAD", "True").lower() == "true"
+
+# Diretório do plano de dados compartilhado (herdado pelos workers via ambiente)
+os.environ.setdefault(
+    "SHARED_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "shared")
+)
+
+# Histórico do chatbot em SQLite: todos os workers veem as mesmas sessões
+os.environ.setdefault("CHATBOT_SESSION_BACKEND", "sqlite")
+os.environ.setdefault(
+    "CHATBOT_SESSION_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sessions.sqlite3")
+)
+
+CSV_PATH = "data/meu_arquivo.csv"
+
+def on_starting(server):
+    """Pré-carrega os dados no mestre, antes de criar os workers."""
+    from src.utils.data_loader import preload_data
+    try:
+        resumo = preload_data(CSV_PATH)
+        server.log.info(
+            f"Dados pré-carregados: {resumo['registros']:,} registros "
+            f"(plano compartilhado em {resumo['shared_data_dir']})"
+        )
+    except Exception as e:
+        # Sem pré-carregamento cada worker carrega os dados sob demanda
+        server.log.warning(f"Falha ao pré-carregar dados: {e}")
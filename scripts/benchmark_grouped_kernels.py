@@ -0,0 +1,90 @@
+"""
+Benchmark do cálculo de padronização por fluxo.
+Compara o laço antigo (uma máscara booleana sobre o DataFrame inteiro por
+fluxo, O(fluxos × linhas)) com o kernel agrupado de passada única usado por
+calculate_kpis, calculate_padronizacao_por_fluxo e pelo cubo de métricas.
+
+Uso:
+    python scripts/benchmark_grouped_kernels.py [--linhas 200000]
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.grouped_kernels import distinct_counts_by
+
+def _gerar_dados(n_fluxos: int, n_linhas: int, n_campos: int = 5000, seed: int = 42) -> pd.DataFrame:
+    """DataFrame sintético com o mesmo formato do processado (dimensões categóricas)."""
+    rng = np.random.default_rng(seed)
+    campos = np.array([f"{rng.choice(['TXT', 'CBO', 'LBL', 'XYZ'])}_{i}" for i in range(n_campos)])
+    codigos_campo = rng.integers(0, n_campos, n_linhas)
+    df = pd.DataFrame({
+        'fluxo': pd.Categorical.from_codes(rng.integers(0, n_fluxos, n_linhas),
+                                           categories=[f"FLUXO {i:05d}" for i in range(n_fluxos)]),
+        'nomeCampo': pd.Categorical.from_codes(codigos_campo, categories=campos)
+    })
+    df['is_padronizado'] = np.char.startswith(campos[codigos_campo].astype(str), 'TXT').astype(np.int8)
+    return df
+
+def _laco_por_fluxo(df: pd.DataFrame) -> pd.DataFrame:
+    """Implementação anterior: um filtro do DataFrame inteiro para cada fluxo."""
+    percentuais = []
+    for fluxo in df['fluxo'].unique():
+        df_fluxo = df[df['fluxo'] == fluxo]
+        total_campos_unicos = df_fluxo['nomeCampo'].nunique()
+        if total_campos_unicos > 0:
+            campos_padronizados_unicos = df_fluxo[df_fluxo['is_padronizado'] == 1]['nomeCampo'].nunique()
+            percentuais.append({'fluxo': fluxo,
+                                'pct_padronizacao': campos_padronizados_unicos / total_campos_unicos * 100})
+    return pd.DataFrame(percentuais)
+
+def _kernel_agrupado(df: pd.DataFrame) -> pd.DataFrame:
+    """Implementação atual: uma passada com o kernel agrupado."""
+    por_fluxo = distinct_counts_by(df, 'fluxo')
+    por_fluxo = por_fluxo[por_fluxo['distintos'] > 0]
+    return pd.DataFrame({'fluxo': por_fluxo['fluxo'].to_numpy(),
+                         'pct_padronizacao': (por_fluxo['padronizados'] / por_fluxo['distintos'] * 100).to_numpy()})
+
+def _medir(funcao, df: pd.DataFrame, repeticoes: int) -> float:
+    """Melhor tempo (em segundos) entre as repetições."""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(df)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=200000, help='Linhas do DataFrame sintético')
+    parser.add_argument('--fluxos', type=int, nargs='+', default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"BENCHMARK: PADRONIZAÇÃO POR FLUXO ({args.linhas:,} linhas)")
+    print("=" * 60)
+    print(f"\n{'fluxos':>8} | {'laço (ms)':>12} | {'kernel (ms)':>12} | {'ganho':>8}")
+    print("-" * 50)
+
+    for n_fluxos in args.fluxos:
+        df = _gerar_dados(n_fluxos, args.linhas)
+
+        # Os dois caminhos precisam produzir o mesmo resultado
+        antigo = _laco_por_fluxo(df).sort_values('fluxo').reset_index(drop=True)
+        novo = _kernel_agrupado(df).sort_values('fluxo').reset_index(drop=True)
+        assert antigo['fluxo'].astype(str).tolist() == novo['fluxo'].astype(str).tolist()
+        assert np.allclose(antigo['pct_padronizacao'].astype(float), novo['pct_padronizacao'])
+
+        tempo_laco = _medir(_laco_por_fluxo, df, repeticoes=1)
+        tempo_kernel = _medir(_kernel_agrupado, df, repeticoes=5)
+        print(f"{n_fluxos:>8,} | {tempo_laco * 1000:>12.1f} | {tempo_kernel * 1000:>12.1f} | "
+              f"{tempo_laco / tempo_kernel:>7.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark do orçamento de tokens do prompt do chatbot.
+Para um conjunto fixo de perguntas (geradas a partir dos dados, cada uma com
+os fatos que a resposta precisa citar), monta o prompt com orçamentos
+diferentes e mede:
+
+- tokens do prompt (médio e máximo) e tempo de montagem
+- cobertura: fração dos fatos necessários presentes no prompt
+- com --modelo (requer OPENAI_API_KEY): fração das respostas do modelo que
+  citam os fatos, tokens cobrados e latência por chamada
+
+Cada pergunta é feita com um histórico sintético de conversa para exercitar
+o resumo e o descarte de turnos antigos.
+
+Uso:
+    python scripts/benchmark_prompt.py [--orcamentos 600 1000 1500 2000 3000 0] [--modelo]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+# Adicionar diretório raiz ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+def _num(valor) -> str:
+    """Número como aparece no contexto (inteiros sem casas decimais)."""
+    return str(int(valor)) if float(valor).is_integer() else str(valor)
+
+def perguntas_fixas(analise: dict, indice) -> list:
+    """(pergunta, fatos esperados) derivados dos dados atuais."""
+    formularios = list(analise['formularios_mais_usados'])
+    campos = list(analise['campos_mais_comuns'])
+    fluxos = list(analise['fluxos_mais_ativos'])
+    detalhes_form = analise['formularios_detalhes']
+    # Entidades fora do top 10: só chegam ao prompt pelas fichas do catálogo
+    form_raro = indice.top('formulario', 60)[-1]
+    fluxo_raro = indice.top('fluxo', 40)[-1]
+
+    return [
+        ("Qual formulário tem mais campos?",
+         [analise['formulario_mais_campos'], _num(analise['max_campos_no_formulario'])]),
+        ("Quais são os 3 formulários mais usados?", formularios[:3]),
+        (f"Fale sobre o formulário {formularios[3]}",
+         [formularios[3], _num(detalhes_form[formularios[3]]['campos'])]),
+        ("Qual é o fluxo mais ativo e quantos formulários ele utiliza?",
+         [fluxos[0], _num(analise['fluxos_detalhes'][fluxos[0]]['formularios'])]),
+        (f"Em quantos formulários aparece o campo {campos[1]}?",
+         [campos[1], _num(analise['campos_detalhes'][campos[1]]['formularios'])]),
+        ("Qual a média de campos por formulário?", [_num(analise['media_campos_por_formulario'])]),
+        (f"Me explique o formulário {form_raro['nome']}", [form_raro['nome'], _num(form_raro['campos'])]),
+        (f"Quantos formulários o fluxo {fluxo_raro['nome']} utiliza?",
+         [fluxo_raro['nome'], _num(fluxo_raro['formularios'])]),
+    ]
+
+def historico_sintetico(turnos: int) -> list:
+    """Conversa anterior com respostas longas, como acontece no uso real."""
+    historico = []
+    for i in range(turnos):
+        historico.append({"role": "user", "content": f"Pergunta anterior {i + 1} sobre padronização de campos"})
+        historico.append({"role": "assistant",
+                          "content": "A padronização dos campos melhora a qualidade dos dados. " * 12})
+    return historico
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orcamentos", type=int, nargs="+", default=[600, 1000, 1500, 2000, 3000, 0],
+                        help="Orçamentos de tokens do prompt (0 = sem limite)")
+    parser.add_argument("--turnos", type=int, default=10, help="Turnos do histórico sintético")
+    parser.add_argument("--modelo", action="store_true", help="Chama o modelo configurado (OPENAI_API_KEY)")
+    args = parser.parse_args()
+
+    os.chdir(BASE_DIR)
+    logging.disable(logging.INFO)
+    from src import chatbot
+    from src.utils.entity_index import get_entity_index
+    from src.utils.prompt_builder import build_prompt, token_counter_name
+
+    if args.modelo and chatbot.client is None:
+        parser.error("--modelo requer OPENAI_API_KEY configurada")
+
+    analise = chatbot.analisar_dados_csv()
+    perguntas = perguntas_fixas(analise, get_entity_index(chatbot.CSV_PATH))
+    historico = historico_sintetico(args.turnos)
+
+    print("=" * 78)
+    print(f"ORÇAMENTO DO PROMPT ({len(perguntas)} perguntas, {args.turnos} turnos de histórico, "
+          f"contagem: {token_counter_name()})")
+    print("=" * 78)
+    cabecalho = f"{'orçamento':>10} | {'tokens méd':>10} | {'tokens máx':>10} | {'montagem':>9} | {'cobertura':>9}"
+    if args.modelo:
+        cabecalho += f" | {'acerto':>6} | {'tokens cobrados':>15} | {'latência':>8}"
+    print(cabecalho)
+    print("-" * len(cabecalho))
+
+    for orcamento in args.orcamentos:
+        limite = orcamento or 10 ** 9
+        tokens, tempos, cobertura, acertos, cobrados, latencias = [], [], [], [], [], []
+        for pergunta, fatos in perguntas:
+            dados_especificos = chatbot.buscar_dados_especificos(pergunta)
+            inicio = time.perf_counter()
+            secoes = chatbot.secoes_contexto_sistema(analise, chatbot._fatos_pergunta(pergunta))
+            mensagens, relatorio = build_prompt(secoes, pergunta, historico, dados_especificos,
+                                                max_tokens=limite,
+                                                fracao_historico=chatbot.PROMPT_FRACAO_HISTORICO)
+            tempos.append(time.perf_counter() - inicio)
+            tokens.append(relatorio['tokens'])
+
+            prompt = "\n".join(m['content'] for m in mensagens)
+            cobertura.append(sum(fato in prompt for fato in fatos) / len(fatos))
+
+            if args.modelo:
+                inicio = time.perf_counter()
+                resposta = chatbot.client.chat.completions.create(messages=mensagens,
+                                                                  **chatbot._parametros_modelo())
+                latencias.append(time.perf_counter() - inicio)
+                texto = resposta.choices[0].message.content or ""
+                acertos.append(sum(fato in texto for fato in fatos) / len(fatos))
+                cobrados.append(resposta.usage.prompt_tokens if resposta.usage else 0)
+
+        media = lambda valores: sum(valores) / len(valores)
+        linha = (f"{orcamento or 'sem limite':>10} | {media(tokens):>10,.0f} | {max(tokens):>10,} | "
+                 f"{media(tempos) * 1000:>7.2f}ms | {media(cobertura):>8.0%}")
+        if args.modelo:
+            linha += f" | {media(acertos):>6.0%} | {media(cobrados):>15,.0f} | {media(latencias):>7.2f}s"
+        print(linha)
+
+    if not args.modelo:
+        print("\nCobertura = fatos necessários presentes no prompt. Use --modelo para medir as respostas.")
+
+if __name__ == "__main__":
+    main()
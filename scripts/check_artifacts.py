@@ -0,0 +1,112 @@
+"""
+Mede o reinício do painel com e sem os artefatos derivados em disco
+(src/utils/artifact_store.py).
+
+Sobe o app em processos novos, como um deploy: o primeiro boot usa um
+diretório de artefatos vazio (tudo é construído e gravado) e os seguintes
+reabrem os artefatos. Para cada boot mede a importação do app (inclui os
+metadados do layout), a primeira aba renderizada (Visão Geral sem filtros) e
+o carregamento dos artefatos do chatbot; ao final confere que os artefatos
+reabertos são iguais aos construídos.
+
+Uso:
+    python scripts/check_artifacts.py [--boots N]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Adicionar diretório raiz ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+CSV_PATH = "data/meu_arquivo.csv"
+FILTROS = {"ano": None, "fluxo": None, "servico": None, "formulario": None}
+
+def _boot():
+    """Executado no processo filho: mede as fases do boot e imprime um JSON."""
+    inicio = time.perf_counter()
+    os.chdir(BASE_DIR)
+    import app  # noqa: F401 (layout e metadados)
+    importacao = time.perf_counter()
+
+    from src.utils.tab_results import tab_results
+    tab_results.get("visao-geral", FILTROS)
+    primeira_aba = time.perf_counter()
+
+    from src.utils.data_analysis import get_data_analysis
+    from src.utils.data_loader import preload_data
+    from src.utils.hierarchy_index import get_hierarchy_index
+    from src.utils.retrieval_index import get_retrieval_index
+    preload_data(CSV_PATH)
+    fim = time.perf_counter()
+
+    # Assinatura dos artefatos para comparar boots
+    from src.utils.data_cache import get_aggregate_cube, get_filter_index, get_metadata, load_processed_data
+    df = load_processed_data(CSV_PATH)
+    assinatura = {
+        "metadados": get_metadata(CSV_PATH),
+        "processados": [len(df), int(df["is_padronizado"].sum()) if "is_padronizado" in df else 0],
+        "cubo": int(get_aggregate_cube(CSV_PATH).celulas["qtd"].sum()),
+        "indice_filtros": int(get_filter_index(CSV_PATH).lookup(fluxo=get_metadata(CSV_PATH)["fluxos"][0]).sum()),
+        "hierarquia": [len(get_hierarchy_index(CSV_PATH)), get_hierarchy_index(CSV_PATH).total],
+        "analise": get_data_analysis(CSV_PATH),
+        "recuperacao": float(get_retrieval_index(CSV_PATH).pesos.sum()),
+    }
+    print(json.dumps({
+        "importacao": importacao - inicio,
+        "primeira_aba": primeira_aba - importacao,
+        "chatbot": fim - primeira_aba,
+        "assinatura": assinatura
+    }, default=str))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boots", type=int, default=3, help="Boots medidos (o primeiro sem artefatos)")
+    parser.add_argument("--_filho", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._filho:
+        _boot()
+        return
+
+    diretorio = tempfile.mkdtemp(prefix="artifacts-")
+    ambiente = dict(os.environ, ARTIFACT_DIR=diretorio, ARTIFACT_STORE="True")
+    ambiente.pop("SHARED_DATA_DIR", None)
+    try:
+        print("=" * 72)
+        print(f"REINÍCIO COM ARTEFATOS EM DISCO ({diretorio})")
+        print("=" * 72)
+        print(f"{'boot':<16} | {'import app':>10} | {'1ª aba':>8} | {'painel':>8} | {'chatbot':>8}")
+        print("-" * 72)
+
+        assinaturas = []
+        for boot in range(args.boots):
+            saida = subprocess.run([sys.executable, os.path.abspath(__file__), "--_filho"], env=ambiente,
+                                   capture_output=True, text=True, check=True)
+            resultado = json.loads(saida.stdout.strip().splitlines()[-1])
+            assinaturas.append(resultado["assinatura"])
+            nome = "frio (sem)" if boot == 0 else f"quente {boot}"
+            painel = resultado["importacao"] + resultado["primeira_aba"]
+            print(f"{nome:<16} | {resultado['importacao']:>9.2f}s | {resultado['primeira_aba']:>7.2f}s | "
+                  f"{painel:>7.2f}s | {resultado['chatbot']:>7.2f}s")
+
+        for assinatura in assinaturas[1:]:
+            for nome, valor in assinaturas[0].items():
+                assert assinatura[nome] == valor, f"artefato '{nome}' reaberto difere do construído"
+
+        from src.utils.artifact_store import ArtifactStore
+        print("-" * 72)
+        for artefato in ArtifactStore(diretorio).list():
+            print(f"  {artefato['nome']:<16} {artefato['bytes'] / 1024:>10,.0f} KB")
+        print("\nOK: artefatos reabertos iguais aos construídos")
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
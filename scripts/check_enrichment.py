@@ -0,0 +1,94 @@
+"""
+Verificação (golden) do enriquecimento vetorizado.
+Compara enrich_dataframe com as funções de referência is_padronizado e
+get_tipo_componente aplicadas linha a linha, sobre os dados reais e sobre
+casos de borda (nulos, 'nan', nomes curtos, todos os prefixos conhecidos).
+
+Uso:
+    python scripts/check_enrichment.py
+"""
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import data_processor as dp
+
+def _casos_de_borda() -> list:
+    """Nomes que exercitam cada ramo das regras de prefixo."""
+    prefixos = set(dp.PADRAO_PREFIXOS) | set(dp._PADRONIZADO_PREFIXOS_3) | set(dp._PADRONIZADO_PREFIXOS_5)
+    prefixos |= set(dp._TIPO_COMPONENTE_PREFIXO_3) | set(dp._TIPO_COMPONENTE_PREFIXO_4)
+    prefixos |= set(dp._TIPO_COMPONENTE_PREFIXO_GERAL)
+
+    casos = [None, np.nan, 'nan', '', 'T', 'TX', 'TXT', 'txt_nome', 'CPF', 'CPF_', 'CPF_X',
+             'TEL_', 'TELEFONE', 'EMA_contato', 'EML_', 'DT_', 'DAT_INICIO', ' TXT_', 'Nome']
+    for prefixo in sorted(prefixos):
+        casos += [prefixo, prefixo + 'CAMPO', prefixo[:-1], prefixo.lower() + 'x']
+    return casos
+
+def _verificar(nomes: pd.Series, titulo: str) -> bool:
+    """Compara as duas implementações para a série (object e category)."""
+    esperado_pad = nomes.apply(dp.is_padronizado).to_numpy()
+    esperado_tipo = nomes.apply(dp.get_tipo_componente).to_numpy()
+
+    ok = True
+    for rotulo, serie in [('object', nomes.astype(object)), ('category', nomes.astype('category'))]:
+        resultado = dp.enrich_dataframe(pd.DataFrame({'nomeCampo': serie}))
+        obtido_pad = resultado['is_padronizado'].to_numpy()
+        obtido_tipo = resultado['tipo_componente'].astype(object).to_numpy()
+
+        diff_pad = np.flatnonzero(obtido_pad != esperado_pad)
+        diff_tipo = np.flatnonzero(obtido_tipo != esperado_tipo)
+        if len(diff_pad) or len(diff_tipo):
+            ok = False
+            print(f"   ✗ {titulo} ({rotulo}): {len(diff_pad)} divergências em is_padronizado, "
+                  f"{len(diff_tipo)} em tipo_componente")
+            for i in list(diff_pad[:5]) + list(diff_tipo[:5]):
+                print(f"     {nomes.iloc[i]!r}: esperado ({esperado_pad[i]}, {esperado_tipo[i]!r}), "
+                      f"obtido ({obtido_pad[i]}, {obtido_tipo[i]!r})")
+        else:
+            print(f"   ✓ {titulo} ({rotulo}): {len(nomes):,} valores idênticos")
+    return ok
+
+def main() -> int:
+    print("=" * 60)
+    print("VERIFICAÇÃO DO ENRIQUECIMENTO VETORIZADO")
+    print("=" * 60)
+
+    print("\n1. Casos de borda...")
+    ok = _verificar(pd.Series(_casos_de_borda(), dtype=object), "casos de borda")
+
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parquet_path = os.path.join(base_dir, "data", "meu_arquivo_processed.parquet")
+    if os.path.exists(parquet_path):
+        print(f"\n2. Dados reais: {parquet_path}")
+        nomes = pd.read_parquet(parquet_path, columns=['nomeCampo'])['nomeCampo'].astype(object)
+        ok = _verificar(nomes, "nomeCampo") and ok
+
+        inicio = time.perf_counter()
+        nomes.apply(dp.is_padronizado)
+        nomes.apply(dp.get_tipo_componente)
+        tempo_linhas = time.perf_counter() - inicio
+
+        df = pd.DataFrame({'nomeCampo': nomes.astype('category')})
+        inicio = time.perf_counter()
+        dp.enrich_dataframe(df)
+        tempo_vetorizado = time.perf_counter() - inicio
+
+        print(f"   Linha a linha: {tempo_linhas * 1000:.1f} ms | "
+              f"vetorizado: {tempo_vetorizado * 1000:.1f} ms "
+              f"({nomes.nunique():,} nomes distintos em {len(nomes):,} linhas)")
+    else:
+        print(f"\n2. Dados reais não encontrados em {parquet_path}, etapa ignorada")
+
+    print("\n" + "=" * 60)
+    print("RESULTADO: " + ("OK" if ok else "DIVERGÊNCIAS ENCONTRADAS"))
+    print("=" * 60)
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
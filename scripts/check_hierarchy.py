@@ -0,0 +1,132 @@
+"""
+Verifica a hierarquia da Biblioteca (Fluxo > Serviço > Formulário > Campo).
+
+Confere as contagens da árvore com um groupby nos dados processados, e depois
+chama o callback do treemap pela rota do Dash (/_dash-update-component), como
+o navegador faz: carga inicial e cliques descendo até um campo e voltando,
+medindo nós, bytes e tempo de cada resposta e checando o orçamento de nós.
+
+Uso:
+    python scripts/check_hierarchy.py [--fluxo NOME] [--max-nos N]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Adicionar diretório raiz ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+CSV_PATH = "data/meu_arquivo.csv"
+GRAFICO = "biblioteca-hierarquia-tree"
+
+def _conferir_contagens(indice, filtros):
+    """Compara a contagem de cada nível com o groupby dos dados processados."""
+    from src.utils.data_cache import load_processed_data
+    from src.utils.hierarchy_index import NIVEIS, SEM_NOME
+
+    df = load_processed_data(CSV_PATH, columns=list(NIVEIS))
+    if filtros.get("fluxo"):
+        df = df[df["fluxo"] == filtros["fluxo"]]
+    df = df.astype(object).where(df.notna(), SEM_NOME).astype(str)
+
+    contagens = indice.counts(filtros)
+    for nivel in range(len(NIVEIS)):
+        esperado = df.groupby(list(NIVEIS[:nivel + 1])).size()
+        obtido = {}
+        for posicao in contagens[nivel].nonzero()[0]:
+            chave, p = [], posicao
+            for n in range(nivel, -1, -1):
+                chave.append(indice.label(n, p))
+                p = indice.pai[n][p]
+            obtido[tuple(reversed(chave)) if nivel else chave[0]] = int(contagens[nivel][posicao])
+        assert obtido == esperado.to_dict(), f"contagens divergentes no nível {NIVEIS[nivel]}"
+        print(f"  {NIVEIS[nivel]:<11} {len(obtido):>8,} nós  {sum(obtido.values()):>8,} registros  OK")
+
+def _chamar(cliente, filtros, click_data, disparo):
+    """(figura, bytes, segundos)"""
+    corpo = {
+        "output": f"{GRAFICO}.figure",
+        "outputs": {"id": GRAFICO, "property": "figure"},
+        "inputs": [
+            {"id": "filtered-data-store", "property": "data", "value": filtros},
+            {"id": GRAFICO, "property": "clickData", "value": click_data},
+        ],
+        "changedPropIds": [disparo],
+        "state": []
+    }
+    inicio = time.perf_counter()
+    resposta = cliente.post("/_dash-update-component", json=corpo)
+    segundos = time.perf_counter() - inicio
+    assert resposta.status_code == 200, resposta.data[:500]
+    return resposta.get_json()["response"][GRAFICO]["figure"], len(resposta.data), segundos
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fluxo", help="Filtro de fluxo do painel (padrão: sem filtro)")
+    parser.add_argument("--max-nos", type=int, default=None, help="Orçamento de nós (padrão: BIBLIOTECA_MAX_NOS)")
+    args = parser.parse_args()
+
+    os.chdir(BASE_DIR)
+    if args.max_nos:
+        os.environ["BIBLIOTECA_MAX_NOS"] = str(args.max_nos)
+    from app import server
+    from src.callbacks.biblioteca_callbacks import MAX_NOS
+    from src.utils.hierarchy_index import get_hierarchy_index
+    cliente = server.test_client()
+    filtros = {"ano": None, "fluxo": args.fluxo, "servico": None, "formulario": None}
+
+    print("=" * 78)
+    print(f"HIERARQUIA DA BIBLIOTECA (fluxo: {args.fluxo or 'todos'}, orçamento: {MAX_NOS:,} nós)")
+    print("=" * 78)
+    inicio = time.perf_counter()
+    indice = get_hierarchy_index(CSV_PATH)
+    print(f"Árvore: {len(indice):,} nós, {indice.total:,} registros ({time.perf_counter() - inicio:.2f}s)")
+    _conferir_contagens(indice, filtros)
+
+    print("-" * 78)
+    print(f"{'passo':<28} | {'raiz':<10} | {'nós':>6} | {'bytes':>9} | {'ms':>7}")
+    print("-" * 78)
+    figura, tamanho, segundos = _chamar(cliente, filtros, None, "filtered-data-store.data")
+    passos = [("carga inicial", figura, tamanho, segundos)]
+
+    # Desce clicando no maior filho do nó aberto até chegar a um campo
+    while True:
+        trace = figura["data"][0]
+        raiz = trace.get("level", "raiz")
+        filhos = [(v, i) for i, p, v in zip(trace["ids"], trace["parents"], trace["values"]) if p == raiz]
+        if not filhos:
+            break
+        _, alvo = max(filhos)
+        pai = dict(zip(trace["ids"], trace["parents"]))[alvo]
+        click = {"points": [{"id": alvo, "parent": pai, "entry": raiz, "label": ""}]}
+        figura, tamanho, segundos = _chamar(cliente, filtros, click, f"{GRAFICO}.clickData")
+        assert figura["data"][0]["level"] == alvo, (alvo, figura["data"][0].get("level"))
+        passos.append((f"clique em {alvo}", figura, tamanho, segundos))
+
+    # Clique no bloco do nó aberto volta um nível
+    trace = figura["data"][0]
+    pai = dict(zip(trace["ids"], trace["parents"]))[trace["level"]]
+    click = {"points": [{"id": trace["level"], "parent": pai, "entry": trace["level"], "label": ""}]}
+    figura, tamanho, segundos = _chamar(cliente, filtros, click, f"{GRAFICO}.clickData")
+    assert figura["data"][0].get("level") == pai, (pai, figura["data"][0].get("level"))
+    passos.append(("volta um nível", figura, tamanho, segundos))
+
+    for nome, figura, tamanho, segundos in passos:
+        trace = figura["data"][0]
+        assert len(trace["ids"]) <= MAX_NOS, (nome, len(trace["ids"]))
+        # branchvalues="total": cada pai soma pelo menos os filhos enviados
+        valores = dict(zip(trace["ids"], trace["values"]))
+        soma = {}
+        for pai, valor in zip(trace["parents"], trace["values"]):
+            if pai:
+                soma[pai] = soma.get(pai, 0) + valor
+        assert all(total <= valores[pai] for pai, total in soma.items()), nome
+        print(f"{nome:<28} | {trace.get('level', 'raiz'):<10} | {len(trace['ids']):>6,} | {tamanho:>9,} | "
+              f"{segundos * 1000:>7.1f}")
+
+    print(f"\nOK: contagens exatas e no máximo {MAX_NOS:,} nós por resposta")
+
+if __name__ == "__main__":
+    main()
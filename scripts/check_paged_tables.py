@@ -0,0 +1,93 @@
+"""
+Verifica as tabelas paginadas no servidor do painel pela rota de callbacks
+do Dash (/_dash-update-component), como o navegador faz.
+
+Para cada tabela mede o tamanho da resposta e o tempo do callback na carga
+inicial, em outra página, ordenada e filtrada, e confere que a resposta traz
+só as linhas da página pedida.
+
+Uso:
+    python scripts/check_paged_tables.py [--fluxo NOME]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Adicionar diretório raiz ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+# (id da tabela, linhas por página, coluna para ordenar, filtro de exemplo)
+TABELAS = [
+    ("tabela-detalhada", 15, "Qtd Srv por Fluxo", "{Serviço} contains a"),
+    ("padronizacao-por-fluxo-tabela", 15, "% Padronização", "{Campos do Formulário} > 50"),
+    ("formularios-utilizados-table", 20, "Campos", "{Formulário} contains a"),
+    ("tabela-autoria-dados", 10, "Campos Criados", None),
+]
+SAIDAS = ["data", "columns", "page_count", "page_current"]
+
+def _chamar(cliente, tabela, filtros, page_current, page_size, sort_by, filter_query, disparo):
+    """(resposta do callback, bytes, segundos)"""
+    saidas = [{"id": tabela, "property": p} for p in SAIDAS] + [{"id": f"{tabela}-resumo", "property": "children"}]
+    corpo = {
+        "output": ".." + "...".join(f"{s['id']}.{s['property']}" for s in saidas) + "..",
+        "outputs": saidas,
+        "inputs": [
+            {"id": "filtered-data-store", "property": "data", "value": filtros},
+            {"id": tabela, "property": "page_current", "value": page_current},
+            {"id": tabela, "property": "page_size", "value": page_size},
+            {"id": tabela, "property": "sort_by", "value": sort_by},
+            {"id": tabela, "property": "filter_query", "value": filter_query},
+        ],
+        "changedPropIds": [disparo],
+        "state": []
+    }
+    inicio = time.perf_counter()
+    resposta = cliente.post("/_dash-update-component", json=corpo)
+    segundos = time.perf_counter() - inicio
+    assert resposta.status_code == 200, resposta.data[:500]
+    return resposta.get_json()["response"], len(resposta.data), segundos
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fluxo", help="Filtro de fluxo do painel (padrão: sem filtro)")
+    args = parser.parse_args()
+
+    os.chdir(BASE_DIR)
+    from app import server
+    cliente = server.test_client()
+    filtros = {"ano": None, "fluxo": args.fluxo, "servico": None, "formulario": None}
+
+    print("=" * 84)
+    print(f"TABELAS PAGINADAS NO SERVIDOR (fluxo: {args.fluxo or 'todos'})")
+    print("=" * 84)
+    print(f"{'tabela':<30} | {'cenário':<10} | {'linhas':>6} | {'páginas':>7} | {'bytes':>7} | {'ms':>7}")
+    print("-" * 84)
+
+    for tabela, page_size, coluna, filtro in TABELAS:
+        cenarios = [
+            ("inicial", 0, [], "", "filtered-data-store.data"),
+            ("página 2", 1, [], "", f"{tabela}.page_current"),
+            ("ordenada", 0, [{"column_id": coluna, "direction": "desc"}], "", f"{tabela}.sort_by"),
+        ]
+        if filtro:
+            cenarios.append(("filtrada", 0, [], filtro, f"{tabela}.filter_query"))
+
+        for nome, pagina, sort_by, filter_query, disparo in cenarios:
+            resposta, tamanho, segundos = _chamar(cliente, tabela, filtros, pagina, page_size,
+                                                  sort_by, filter_query, disparo)
+            dados = resposta[tabela]["data"]
+            paginas = resposta[tabela]["page_count"]
+            assert len(dados) <= page_size, (tabela, nome, len(dados))
+            if sort_by and len(dados) > 1:
+                valores = [linha[coluna] for linha in dados]
+                assert valores == sorted(valores, reverse=True), (tabela, valores)
+            print(f"{tabela:<30} | {nome:<10} | {len(dados):>6} | {paginas:>7} | {tamanho:>7,} | "
+                  f"{segundos * 1000:>7.1f}")
+        print(f"{'':<30}   resumo: {resposta[f'{tabela}-resumo']['children']}")
+
+    print("\nOK: cada resposta traz só a página visível")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Verifica o motor de consultas estruturadas do chatbot (src/utils/query_engine.py).
+
+1. Perguntas agregadas conhecidas são respondidas direto dos dados, com o N
+   pedido pelo usuário.
+2. Perguntas que o motor não entenderia por inteiro vão para o modelo (None):
+   nome que não corresponde a nenhuma entidade, negação e números que não
+   são ano nem N de ranking. Respondê-las sem o filtro (ou a pergunta oposta)
+   entregaria números errados ao usuário.
+
+Uso:
+    python scripts/check_query_engine.py
+"""
+import os
+import sys
+import time
+
+# Adicionar diretório raiz ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+CSV_PATH = "data/meu_arquivo.csv"
+
+# (pergunta, início esperado da resposta)
+RESPONDIDAS = [
+    ("quantos formulários tem o fluxo APP CULTURA", "Total de formulários (fluxo 'APP CULTURA'): 2"),
+    ("quantos formulários usam o campo TXT_NOME", "Total de formulários (campo 'TXT_NOME'):"),
+    ("quantos fluxos temos", "Total de fluxos: 209"),
+    ("qual fluxo tem mais campos", "O fluxo com mais campos é"),
+    ("quais os 3 fluxos com menos formulários", "Top 3 fluxos com menos formulários"),
+    ("top 3 formulários do fluxo APP CULTURA em 2024", "Top 2 formulários com mais registros"),
+    ("os 4 serviços com mais formulários", "Top 4 serviços com mais formulários"),
+    ("média de campos por formulário", "Média de campos por formulário: 42,35"),
+    ("qual o percentual de padronização", "Padronização: 38,02%"),
+    ("5 fluxos com menor padronização", "Fluxos com menor padronização"),
+]
+
+# Perguntas que seguem para o modelo
+PARA_O_MODELO = [
+    "quantos campos tem o formulário FOR_SEPREF_MANUTENCAO_ABERT",
+    "quantos formulários tem o fluxo INEXISTENTE ABC",
+    "qual o formulário com mais campos no fluxo que não existe",
+    "quantos formulários não usam o campo TXT_NOME",
+    "quantos campos não padronizados temos",
+    "quais formulários sem campos padronizados",
+    "quais fluxos com mais de 10 formulários",
+    "quantos formulários tem 3 campos",
+    "explique como melhorar a padronização dos campos",
+]
+
+def main():
+    os.chdir(BASE_DIR)
+    from src.utils.query_engine import answer_question
+
+    answer_question("quantos fluxos temos", CSV_PATH)  # aquece os caches fora da medição
+
+    print("=" * 96)
+    print("MOTOR DE CONSULTAS ESTRUTURADAS")
+    print("=" * 96)
+    for pergunta, esperado in RESPONDIDAS:
+        inicio = time.perf_counter()
+        resposta = answer_question(pergunta, CSV_PATH)
+        ms = (time.perf_counter() - inicio) * 1000
+        primeira = (resposta or "None").splitlines()[0]
+        print(f"{pergunta:<58} | {ms:>6.1f} ms | {primeira[:60]}")
+        assert resposta is not None and resposta.startswith(esperado), (pergunta, resposta)
+
+    print("-" * 96)
+    for pergunta in PARA_O_MODELO:
+        resposta = answer_question(pergunta, CSV_PATH)
+        print(f"{pergunta:<58} | {'modelo' if resposta is None else resposta.splitlines()[0][:60]}")
+        assert resposta is None, (pergunta, resposta)
+
+    print("\nOK: agregações respondidas com o N pedido; nomes desconhecidos, negações e números "
+          "não entendidos vão para o modelo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Verifica o cache de respostas do chatbot (src/utils/response_cache.py).
+
+1. Quase iguais: perguntas que diferem só em palavras neutras ou na ordem
+   reaproveitam a resposta; perguntas com número, ano, negação, comparativo
+   ou quantificador diferente não (falsos positivos do Jaccard).
+2. Histórico: a mesma pergunta de acompanhamento em duas sessões com
+   conversas diferentes chama o modelo duas vezes (servidor mock do OpenAI,
+   sem chave nem rede); em sessões novas a resposta é reaproveitada.
+
+Uso:
+    python scripts/check_response_cache.py
+"""
+import os
+import sys
+
+# Adicionar diretório raiz ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from mock_openai_server import start_in_background
+
+BASE = "quais formularios tem mais campos nao padronizados em 2023"
+
+# (pergunta, deve reaproveitar a resposta de BASE)
+CASOS = [
+    ("quais sao os formularios que tem mais campos nao padronizados em 2023", True),
+    ("em 2023 quais formularios tem mais campos nao padronizados", True),
+    ("quais formularios tem menos campos nao padronizados em 2023", False),
+    ("quais formularios tem mais campos nao padronizados em 2024", False),
+    ("quais formularios tem mais campos padronizados em 2023", False),
+    ("quais cinco formularios tem mais campos nao padronizados em 2023", False),
+    ("quais formularios tem mais de 10 campos nao padronizados em 2023", False),
+    ("quais formularios tem maior numero de campos nao padronizados em 2023", False),
+]
+
+def _quase_iguais():
+    from src.utils.response_cache import ResponseCache
+
+    cache = ResponseCache(max_entries=50, ttl=60, similaridade_minima=0.8)
+    cache.put(cache.make_key(BASE, None, "v1"), "resposta base")
+    print(f"{'pergunta':<74} | {'cache':>5}")
+    print("-" * 84)
+    for pergunta, esperado in CASOS:
+        obtido = cache.get(cache.make_key(pergunta, None, "v1")) is not None
+        print(f"{pergunta:<74} | {'hit' if obtido else 'miss':>5}")
+        assert obtido == esperado, f"'{pergunta}': esperado {'hit' if esperado else 'miss'}"
+
+    # Mesma pergunta com histórico diferente nunca compartilha a resposta
+    historico = [{"role": "user", "content": "fale do formulario A"}, {"role": "assistant", "content": "..."}]
+    assert cache.get(cache.make_key(BASE, None, "v1", historico)) is None, "histórico ignorado na chave"
+
+def _historico():
+    mock = start_in_background(port=0, tokens=20, delay_ms=0, ttft_ms=0)
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{mock.server_address[1]}/v1"
+    os.environ["MAX_TOKENS"] = "20"
+    os.environ["CHATBOT_SESSION_BACKEND"] = "memory"
+
+    os.chdir(BASE_DIR)
+    from src.chatbot import cache_respostas, gerar_resposta
+
+    cache_respostas.clear()
+    gerar_resposta("Explique como melhorar a padronização dos campos do formulário de alvará", "sessao-a")
+    gerar_resposta("Explique como simplificar as etapas do fluxo de licenciamento", "sessao-b")
+    antes = mock.chamadas
+    gerar_resposta("e qual a principal dificuldade dele?", "sessao-a")
+    gerar_resposta("e qual a principal dificuldade dele?", "sessao-b")
+    print(f"acompanhamento em 2 sessões com históricos diferentes: {mock.chamadas - antes} chamadas ao modelo")
+    assert mock.chamadas - antes == 2, "resposta de uma sessão servida a outra"
+
+    antes = mock.chamadas
+    gerar_resposta("Explique como reduzir campos duplicados nos formulários", "sessao-c")
+    gerar_resposta("Explique como reduzir campos duplicados nos formulários", "sessao-d")
+    print(f"mesma pergunta em 2 sessões novas: {mock.chamadas - antes} chamada ao modelo")
+    assert mock.chamadas - antes == 1, "pergunta de sessão nova não reaproveitada"
+    mock.shutdown()
+
+def main():
+    print("=" * 84)
+    print("CACHE DE RESPOSTAS DO CHATBOT")
+    print("=" * 84)
+    _quase_iguais()
+    print("-" * 84)
+    _historico()
+    print("\nOK: sem falsos positivos e sem respostas compartilhadas entre históricos diferentes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Verifica a coalescência de perguntas simultâneas iguais do chatbot contra o
+servidor mock do OpenAI (sem chave nem rede).
+
+Cenários (N requisições ao mesmo tempo, sessões diferentes, mesma pergunta):
+1. /chatbot_responder: uma única chamada ao modelo, mesma resposta para todos
+2. /chatbot_stream: uma única chamada, todos recebem os mesmos trechos
+3. Erro do modelo: o erro do líder chega a todos (fallback), sem N chamadas
+4. Timeout: quem espera desiste após o timeout (fallback); o líder responde
+5. Históricos diferentes: a mesma pergunta de acompanhamento em sessões com
+   conversas diferentes não é coalescida (uma chamada por sessão)
+
+Uso:
+    python scripts/check_singleflight.py [--requisicoes 8]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+# Adicionar diretório raiz ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from mock_openai_server import PALAVRAS, start_in_background
+
+PERGUNTA = "Explique como melhorar a padronização dos campos"
+
+def _responder(cliente, session_id: str) -> str:
+    resposta = cliente.post("/chatbot_responder", json={"mensagem": PERGUNTA, "session_id": session_id})
+    return resposta.get_json()["resposta"]
+
+def _stream(cliente, session_id: str) -> str:
+    resposta = cliente.post("/chatbot_stream", json={"mensagem": PERGUNTA, "session_id": session_id},
+                            buffered=False)
+    texto, pendente = [], ""
+    for parte in resposta.response:
+        pendente += parte.decode("utf-8") if isinstance(parte, bytes) else parte
+        *blocos, pendente = pendente.split("\n\n")
+        texto.extend(json.loads(b[5:])["delta"] for b in blocos if b.startswith("data:"))
+    resposta.close()
+    return "".join(texto)
+
+def _simultaneas(server, chamada, n: int, prefixo: str = "sessao"):
+    """Dispara n chamadas ao mesmo tempo; retorna (respostas, segundos)."""
+    barreira = threading.Barrier(n)
+    respostas = [None] * n
+
+    def executar(i):
+        cliente = server.test_client()
+        barreira.wait()
+        respostas[i] = chamada(cliente, f"{prefixo}-{i}")
+
+    threads = [threading.Thread(target=executar, args=(i,)) for i in range(n)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return respostas, time.perf_counter() - inicio
+
+def _do_modelo(texto: str) -> bool:
+    """Resposta veio do mock (e não do modo fallback)."""
+    return texto.startswith(" ".join(PALAVRAS[:3]))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requisicoes", type=int, default=8, help="Requisições simultâneas por cenário")
+    args = parser.parse_args()
+    n = args.requisicoes
+
+    mock = start_in_background(port=0, tokens=60, delay_ms=10, ttft_ms=300)
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{mock.server_address[1]}/v1"
+    os.environ["MAX_TOKENS"] = "60"
+
+    os.chdir(BASE_DIR)
+    from app import server
+    from src.chatbot import cache_respostas, chamadas_em_andamento, contexto_sessoes
+
+    # Aquece caches de dados fora da medição
+    _responder(server.test_client(), "aquecimento")
+
+    def cenario(titulo, chamada, prefixo="sessao"):
+        cache_respostas.clear()
+        mock.chamadas = 0
+        antes = chamadas_em_andamento.stats()
+        respostas, segundos = _simultaneas(server, chamada, n, prefixo)
+        depois = chamadas_em_andamento.stats()
+        delta = {k: depois[k] - antes[k] for k in ("execucoes", "coalescidas", "timeouts", "erros")}
+        print(f"\n{titulo}: {n} requisições em {segundos * 1000:.0f} ms, "
+              f"{mock.chamadas} chamada(s) ao modelo, {delta}")
+        return respostas, delta
+
+    print("=" * 60)
+    print("COALESCÊNCIA DE PERGUNTAS SIMULTÂNEAS (mock OpenAI)")
+    print("=" * 60)
+
+    respostas, delta = cenario("1. /chatbot_responder", _responder)
+    assert mock.chamadas == 1, mock.chamadas
+    assert len(set(respostas)) == 1 and _do_modelo(respostas[0]), respostas
+    assert delta["coalescidas"] == n - 1, delta
+
+    respostas, delta = cenario("2. /chatbot_stream", _stream)
+    assert mock.chamadas == 1, mock.chamadas
+    assert len(set(respostas)) == 1 and _do_modelo(respostas[0]), respostas
+    assert delta["coalescidas"] == n - 1, delta
+
+    # O cliente do OpenAI tenta de novo em erros 500: até 3 chamadas, todas do líder
+    mock.RequestHandlerClass.falhar = True
+    respostas, delta = cenario("3. Erro do modelo", _responder)
+    mock.RequestHandlerClass.falhar = False
+    assert mock.chamadas <= 3, mock.chamadas
+    assert not any(_do_modelo(r) for r in respostas), respostas
+    assert delta["erros"] == 1 and delta["coalescidas"] == n - 1, delta
+
+    timeout_original = chamadas_em_andamento.timeout
+    chamadas_em_andamento.timeout = 0.1
+    respostas, delta = cenario("4. Timeout de quem espera (0.1 s)", _responder)
+    chamadas_em_andamento.timeout = timeout_original
+    assert mock.chamadas == 1, mock.chamadas
+    assert sum(_do_modelo(r) for r in respostas) == 1, respostas
+    assert delta["timeouts"] == n - 1, delta
+
+    # Cada sessão já conversou sobre um formulário diferente: "dele" muda de sentido
+    for i in range(n):
+        contexto_sessoes.append(f"historico-{i}", [
+            {"role": "user", "content": f"Fale sobre o formulário {i}"},
+            {"role": "assistant", "content": f"O formulário {i} tem {10 + i} campos."}
+        ])
+    respostas, delta = cenario("5. Históricos diferentes", _responder, "historico")
+    assert mock.chamadas == n, mock.chamadas
+    assert delta["coalescidas"] == 0 and delta["execucoes"] == n, delta
+
+    print("\nOK: perguntas simultâneas iguais compartilham uma única chamada ao modelo "
+          "(só entre sessões com o mesmo histórico)")
+    mock.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Verifica a rota de streaming do chatbot contra o servidor mock do OpenAI.
+Mede o tempo até o primeiro trecho e o tempo total de /chatbot_stream para
+respostas de tamanhos diferentes, comparando com a rota síncrona
+/chatbot_responder. O tempo até o primeiro trecho não deve crescer com o
+tamanho da resposta.
+
+Uso:
+    python scripts/check_streaming.py [--tamanhos 20 200 800] [--delay-ms 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Adicionar diretório raiz ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from mock_openai_server import start_in_background
+
+def _medir_stream(cliente, mensagem: str):
+    """(tempo até o primeiro trecho, tempo total, texto) de uma chamada a /chatbot_stream."""
+    inicio = time.perf_counter()
+    resposta = cliente.post("/chatbot_stream", json={"mensagem": mensagem, "session_id": "check"},
+                            buffered=False)
+    assert resposta.status_code == 200, resposta.status_code
+    assert resposta.mimetype == "text/event-stream"
+
+    primeiro, texto, pendente = None, [], ""
+    for parte in resposta.response:
+        pendente += parte.decode("utf-8") if isinstance(parte, bytes) else parte
+        *blocos, pendente = pendente.split("\n\n")
+        for bloco in blocos:
+            if bloco.startswith("data:"):
+                if primeiro is None:
+                    primeiro = time.perf_counter() - inicio
+                texto.append(json.loads(bloco[5:])["delta"])
+    resposta.close()
+    return primeiro, time.perf_counter() - inicio, "".join(texto)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[20, 200, 800], help="Palavras por resposta")
+    parser.add_argument("--delay-ms", type=float, default=5, help="Intervalo entre palavras do mock")
+    parser.add_argument("--ttft-ms", type=float, default=100, help="Latência inicial do mock")
+    args = parser.parse_args()
+
+    servidor = start_in_background(port=0, tokens=max(args.tamanhos),
+                                   delay_ms=args.delay_ms, ttft_ms=args.ttft_ms)
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{servidor.server_address[1]}/v1"
+
+    os.chdir(BASE_DIR)
+    from app import server
+    from src.chatbot import cache_respostas
+    cliente = server.test_client()
+
+    # Aquece caches de dados (análise e índice de entidades) fora da medição
+    _medir_stream(cliente, "aquecimento")
+
+    print("=" * 60)
+    print("STREAMING DO CHATBOT (mock OpenAI)")
+    print("=" * 60)
+    print(f"\n{'palavras':>8} | {'1º trecho (ms)':>14} | {'stream total':>12} | {'síncrono':>10}")
+    print("-" * 56)
+
+    primeiros = []
+    for tamanho in args.tamanhos:
+        os.environ["MAX_TOKENS"] = str(tamanho)
+        # Mede o modelo, não o cache de respostas
+        cache_respostas.clear()
+        primeiro, total, texto = _medir_stream(cliente, "Explique como melhorar a padronização dos campos")
+        assert len(texto.split()) == tamanho, (tamanho, len(texto.split()))
+
+        cache_respostas.clear()
+        inicio = time.perf_counter()
+        sincrono = cliente.post("/chatbot_responder", json={"mensagem": "Explique como melhorar a padronização dos campos",
+                                                            "session_id": "check"})
+        tempo_sincrono = time.perf_counter() - inicio
+        assert sincrono.get_json()["resposta"] == texto
+
+        primeiros.append(primeiro)
+        print(f"{tamanho:>8,} | {primeiro * 1000:>14.0f} | {total * 1000:>10.0f}ms | {tempo_sincrono * 1000:>8.0f}ms")
+
+    # Primeiro trecho independente do tamanho: variação pequena frente ao tempo total
+    assert max(primeiros) - min(primeiros) < 0.5 * args.ttft_ms / 1000 + 0.1, primeiros
+    print("\nOK: tempo até o primeiro trecho não depende do tamanho da resposta")
+    servidor.shutdown()
+
+if __name__ == "__main__":
+    main()
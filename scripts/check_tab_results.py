@@ -0,0 +1,105 @@
+"""
+Verifica a execução por aba do painel (src/utils/tab_results.py).
+
+Cenários:
+1. Mudança de filtro: só a função de cálculo da aba ativa roda
+2. Voltar para a aba com os mesmos filtros reaproveita o resultado
+3. Com o painel ocioso, as outras abas são pré-calculadas em segundo plano
+4. Um pedido novo durante a espera adia o pré-cálculo dos filtros antigos
+
+Uso:
+    python scripts/check_tab_results.py [--delay 0.5]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Adicionar diretório raiz ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+class _App:
+    """Registra os callbacks do painel sem subir o servidor Dash."""
+
+    def __init__(self):
+        self.callbacks = {}
+
+    def callback(self, *args, **kwargs):
+        def registrar(funcao):
+            self.callbacks[funcao.__name__] = funcao
+            return funcao
+        return registrar
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delay", type=float, default=0.5, help="Ociosidade (s) antes do pré-cálculo")
+    args = parser.parse_args()
+
+    os.chdir(BASE_DIR)
+    from src.callbacks import register_all
+    from src.utils.tab_results import tab_results
+
+    app = _App()
+    register_all(app)
+    tab_results.prefetch_delay = args.delay
+
+    # Conta as execuções das funções de cálculo de cada aba
+    execucoes = {}
+    for tab, (csv_path, compute) in list(tab_results._tabs.items()):
+        def contar(filtros, tab=tab, compute=compute):
+            execucoes[tab] = execucoes.get(tab, 0) + 1
+            return compute(filtros)
+        tab_results.register(tab, csv_path, contar)
+
+    import pandas as pd
+    fluxos = sorted(pd.read_parquet("data/meu_arquivo_processed.parquet", columns=["fluxo"])["fluxo"].unique())
+    filtros = {"ano": None, "fluxo": fluxos[3], "servico": None, "formulario": None}
+
+    print("=" * 60)
+    print("EXECUÇÃO POR ABA DO PAINEL")
+    print("=" * 60)
+
+    # 1. Mudança de filtro na aba Fluxos
+    tab_results.prefetch = False
+    inicio = time.perf_counter()
+    app.callbacks["update_fluxos"](filtros)
+    print(f"\n1. Filtro novo na aba ativa: {(time.perf_counter() - inicio) * 1000:.0f} ms, execuções {execucoes}")
+    assert execucoes == {"fluxos-servicos": 1}, execucoes
+
+    # 2. Troca de aba e volta
+    app.callbacks["update_overview_from_store"](filtros)
+    inicio = time.perf_counter()
+    app.callbacks["update_fluxos"](filtros)
+    print(f"2. Volta para a aba: {(time.perf_counter() - inicio) * 1000:.1f} ms, execuções {execucoes}")
+    assert execucoes == {"fluxos-servicos": 1, "visao-geral": 1}, execucoes
+
+    # 3. Pré-cálculo após ociosidade
+    tab_results.prefetch = True
+    outros = dict(filtros, fluxo=fluxos[5])
+    execucoes.clear()
+    app.callbacks["update_campos"](outros)
+    prazo = time.time() + 60
+    while len(execucoes) < len(tab_results._tabs) and time.time() < prazo:
+        time.sleep(0.1)
+    print(f"3. Pré-cálculo das outras abas: execuções {execucoes}, {tab_results.stats()}")
+    assert all(n == 1 for n in execucoes.values()) and len(execucoes) == len(tab_results._tabs), execucoes
+    execucoes.clear()
+    for nome in ("update_overview_from_store", "update_fluxos", "update_formularios"):
+        app.callbacks[nome](outros)
+    # O callback da Biblioteca lê o disparo (clique no treemap) do contexto do Dash: consulta a aba direto
+    tab_results.get("biblioteca", outros)
+    assert not execucoes, execucoes
+
+    # 4. Pedidos seguidos adiam o pré-cálculo
+    for fluxo in fluxos[6:9]:
+        app.callbacks["update_fluxos"](dict(filtros, fluxo=fluxo))
+        time.sleep(args.delay / 4)
+    time.sleep(args.delay / 2)
+    print(f"4. Pedidos seguidos: execuções {execucoes} (só a aba ativa)")
+    assert execucoes == {"fluxos-servicos": 3}, execucoes
+
+    print("\nOK: só a aba ativa é calculada; as demais saem do cache ou do pré-cálculo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Teste de carga do chatbot contra o servidor mock do OpenAI (sem chave nem rede).
+Sobe o app Flask/Dash em uma porta local, apontado para o mock com latência e
+tamanho de resposta configuráveis, e repete um corpus de perguntas em
+português com níveis diferentes de concorrência. Para cada nível informa:
+
+- vazão (req/s), erros e latência p50/p95/p99 de ponta a ponta
+- no streaming, também o tempo até o primeiro trecho
+- chamadas feitas ao modelo (o resto veio do cache, da consulta estruturada
+  ou de perguntas simultâneas iguais)
+- tempo gasto em cada fase do atendimento (consulta estruturada, análise da
+  pergunta, montagem do prompt e modelo), medido dentro do app
+
+Uso:
+    python scripts/load_test_chatbot.py [--concorrencia 1 4 16] [--requisicoes 100]
+        [--rota responder|stream] [--ttft-ms 200] [--delay-ms 5] [--tokens 120]
+        [--sem-cache] [--corpus perguntas.txt]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+# Adicionar diretório raiz ao path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
+
+from mock_openai_server import start_in_background
+
+# Corpus padrão: consultas agregadas (respondidas pelos dados), perguntas abertas
+# (vão ao modelo) e perguntas sobre entidades (acrescentadas a partir dos dados)
+CORPUS_PADRAO = [
+    "Quantos formulários temos?",
+    "Quantos fluxos existem no sistema?",
+    "Quais são os 5 formulários com mais campos?",
+    "Qual a média de campos por formulário?",
+    "Qual o percentual de campos padronizados?",
+    "Quantos serviços existem?",
+    "Explique como melhorar a padronização dos campos",
+    "Quais boas práticas de governança de dados você recomenda para os formulários?",
+    "Por que alguns campos não são padronizados?",
+    "Como o painel pode ajudar na qualidade dos dados?",
+    "Quais riscos de compliance existem em formulários com muitos campos?",
+    "O que significa um campo padronizado?",
+    "Me dê sugestões para reduzir campos duplicados entre formulários",
+    "Como priorizar a revisão dos fluxos de trabalho?",
+]
+
+def _corpus(caminho):
+    """Perguntas do arquivo (uma por linha) ou o corpus padrão com entidades dos dados."""
+    if caminho:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return [linha.strip() for linha in f if linha.strip()]
+
+    from src.chatbot import analisar_dados_csv
+    analise = analisar_dados_csv()
+    perguntas = list(CORPUS_PADRAO)
+    perguntas += [f"Fale sobre o formulário {nome}" for nome in list(analise.get("formularios_mais_usados", {}))[:4]]
+    perguntas += [f"Em quantos formulários aparece o campo {nome}?"
+                  for nome in list(analise.get("campos_mais_comuns", {}))[:3]]
+    perguntas += [f"Quais formulários o fluxo {nome} utiliza?" for nome in list(analise.get("fluxos_mais_ativos", {}))[:3]]
+    return perguntas
+
+def _iniciar_app():
+    """Sobe o servidor Flask do app em uma thread; retorna a URL base."""
+    from werkzeug.serving import make_server
+    from app import server
+
+    servidor = make_server("127.0.0.1", 0, server, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{servidor.server_port}"
+
+def _requisicao(sessao: requests.Session, url: str, rota: str, pergunta: str, session_id: str):
+    """(latência, tempo até o primeiro trecho ou None, ok?) de uma pergunta."""
+    corpo = {"mensagem": pergunta, "session_id": session_id}
+    inicio = time.perf_counter()
+    try:
+        if rota == "responder":
+            resposta = sessao.post(f"{url}/chatbot_responder", json=corpo, timeout=120)
+            ok = resposta.status_code == 200 and bool(resposta.json().get("resposta"))
+            return time.perf_counter() - inicio, None, ok
+
+        primeiro, ok = None, False
+        with sessao.post(f"{url}/chatbot_stream", json=corpo, stream=True, timeout=120) as resposta:
+            for linha in resposta.iter_lines(decode_unicode=True):
+                if linha.startswith("data:") and primeiro is None:
+                    primeiro = time.perf_counter() - inicio
+                elif linha.startswith("event: done"):
+                    ok = resposta.status_code == 200
+                elif linha.startswith("event: error"):
+                    ok = False
+        return time.perf_counter() - inicio, primeiro, ok
+    except requests.RequestException:
+        return time.perf_counter() - inicio, None, False
+
+def _percentis(valores) -> str:
+    if not valores:
+        return f"{'-':>7} {'-':>7} {'-':>7}"
+    p50, p95, p99 = np.percentile(np.array(valores) * 1000, [50, 95, 99])
+    return f"{p50:>7.0f} {p95:>7.0f} {p99:>7.0f}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concorrencia", type=int, nargs="+", default=[1, 4, 16], help="Clientes simultâneos")
+    parser.add_argument("--requisicoes", type=int, default=100, help="Requisições por nível de concorrência")
+    parser.add_argument("--rota", choices=["responder", "stream"], default="responder")
+    parser.add_argument("--ttft-ms", type=float, default=200, help="Latência inicial do mock")
+    parser.add_argument("--delay-ms", type=float, default=5, help="Intervalo entre palavras do mock")
+    parser.add_argument("--tokens", type=int, default=120, help="Palavras por resposta do mock")
+    parser.add_argument("--sem-cache", action="store_true", help="Desativa o cache de respostas")
+    parser.add_argument("--corpus", help="Arquivo com uma pergunta por linha")
+    args = parser.parse_args()
+
+    mock = start_in_background(port=0, tokens=args.tokens, delay_ms=args.delay_ms, ttft_ms=args.ttft_ms)
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{mock.server_address[1]}/v1"
+    os.environ["MAX_TOKENS"] = str(args.tokens)
+    if args.sem_cache:
+        os.environ["CHATBOT_CACHE_MAX_ENTRIES"] = "0"
+
+    os.chdir(BASE_DIR)
+    import logging
+    logging.disable(logging.INFO)
+    url = _iniciar_app()
+    from src.chatbot import cache_respostas, metricas_fases
+
+    perguntas = _corpus(args.corpus)
+    # Aquece dados e índices fora da medição
+    _requisicao(requests.Session(), url, args.rota, perguntas[0], "aquecimento")
+
+    print("=" * 86)
+    print(f"TESTE DE CARGA DO CHATBOT: /chatbot_{args.rota}, {len(perguntas)} perguntas no corpus, "
+          f"mock {args.ttft_ms:.0f} ms + {args.tokens} x {args.delay_ms:.0f} ms")
+    print("=" * 86)
+    cabecalho = (f"{'conc.':>5} | {'reqs':>5} | {'erros':>5} | {'req/s':>7} | "
+                 f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} | {'modelo':>6}")
+    if args.rota == "stream":
+        cabecalho += f" | {'1º trecho p50/p95/p99':>23}"
+    fases_por_nivel = {}
+    linhas = []
+
+    for concorrencia in args.concorrencia:
+        cache_respostas.clear()
+        metricas_fases.reset()
+        mock.chamadas = 0
+        sessoes = threading.local()
+
+        def executar(i):
+            if not hasattr(sessoes, "http"):
+                sessoes.http = requests.Session()
+            return _requisicao(sessoes.http, url, args.rota, perguntas[i % len(perguntas)],
+                               f"carga-{i % concorrencia}")
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            resultados = list(executor.map(executar, range(args.requisicoes)))
+        duracao = time.perf_counter() - inicio
+
+        latencias = [r[0] for r in resultados if r[2]]
+        erros = sum(1 for r in resultados if not r[2])
+        linha = (f"{concorrencia:>5} | {len(resultados):>5} | {erros:>5} | {len(resultados) / duracao:>7.1f} | "
+                 f"{_percentis(latencias)} | {mock.chamadas:>6}")
+        if args.rota == "stream":
+            linha += f" | {_percentis([r[1] for r in resultados if r[1] is not None]):>23}"
+        linhas.append(linha)
+        fases_por_nivel[concorrencia] = metricas_fases.stats()
+
+    print(cabecalho)
+    print("-" * len(cabecalho))
+    for linha in linhas:
+        print(linha)
+
+    print("\nTEMPO POR FASE (dentro do app)")
+    print(f"{'conc.':>5} | {'fase':<22} | {'execuções':>9} | {'média ms':>8} | {'p95 ms':>8} | {'total s':>8}")
+    print("-" * 76)
+    for concorrencia, fases in fases_por_nivel.items():
+        for fase, dados in sorted(fases.items(), key=lambda item: -item[1]["total_s"]):
+            print(f"{concorrencia:>5} | {fase:<22} | {dados['execucoes']:>9} | {dados['media_ms']:>8.2f} | "
+                  f"{dados['p95_ms']:>8.2f} | {dados['total_s']:>8.2f}")
+
+    print(f"\nCache de respostas e coalescência: {json.dumps(requests.get(f'{url}/chatbot_cache_stats').json()['coalescencia'])}")
+    mock.shutdown()
+
+if __name__ == "__main__":
+    main()
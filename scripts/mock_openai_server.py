@@ -0,0 +1,152 @@
+"""
+Servidor local que imita a API de chat do OpenAI (/v1/chat/completions),
+com e sem streaming, para testar o chatbot sem chave nem rede.
+
+A resposta tem `max_tokens` palavras (limitado por --tokens), com latência
+inicial de --ttft-ms e --delay-ms entre palavras, como um modelo real.
+O servidor conta as chamadas recebidas (server.chamadas) e, com falhar=True,
+responde erro 500 a todas.
+
+Uso:
+    python scripts/mock_openai_server.py [--port 8099] [--tokens 400] [--delay-ms 20]
+
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8099/v1 python app.py
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PALAVRAS = ("o formulário de cadastro tem campos padronizados e o fluxo de análise "
+            "utiliza formulários com componentes de texto e seleção").split()
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # Configurados por make_server
+    max_palavras = 400
+    atraso_inicial = 0.1
+    atraso_palavra = 0.02
+    falhar = False
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, status: int, corpo: dict):
+        dados = json.dumps(corpo).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._json(404, {"error": {"message": f"rota desconhecida: {self.path}"}})
+            return
+
+        tamanho = int(self.headers.get("Content-Length", 0))
+        pedido = json.loads(self.rfile.read(tamanho) or b"{}")
+        with self.server.lock:
+            self.server.chamadas += 1
+
+        if self.falhar:
+            time.sleep(self.atraso_inicial)
+            self._json(500, {"error": {"message": "falha simulada", "type": "server_error"}})
+            return
+        n_palavras = max(1, min(int(pedido.get("max_tokens") or self.max_palavras), self.max_palavras))
+        palavras = [PALAVRAS[i % len(PALAVRAS)] for i in range(n_palavras)]
+        base = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "created": int(time.time()),
+            "model": pedido.get("model", "mock")
+        }
+
+        time.sleep(self.atraso_inicial)
+
+        if not pedido.get("stream"):
+            time.sleep(self.atraso_palavra * n_palavras)
+            self._json(200, {
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": " ".join(palavras)}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": n_palavras, "total_tokens": n_palavras}
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def enviar(delta: dict, finish_reason=None):
+            chunk = {**base, "object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        enviar({"role": "assistant", "content": ""})
+        for i, palavra in enumerate(palavras):
+            enviar({"content": palavra if i == 0 else f" {palavra}"})
+            time.sleep(self.atraso_palavra)
+        enviar({}, finish_reason="stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+def make_server(host: str = "127.0.0.1", port: int = 8099, tokens: int = 400,
+                delay_ms: float = 20, ttft_ms: float = 100, falhar: bool = False) -> ThreadingHTTPServer:
+    """
+    Cria o servidor (porta 0 = porta livre; ver server.server_address).
+
+    Args:
+        host: Endereço de escuta
+        port: Porta
+        tokens: Máximo de palavras por resposta
+        delay_ms: Intervalo entre palavras
+        ttft_ms: Latência antes da primeira palavra
+        falhar: Responde erro 500 a todas as chamadas
+
+    Returns:
+        Servidor pronto para serve_forever()
+    """
+    handler = type("MockHandler", (_MockHandler,), {
+        "max_palavras": tokens,
+        "atraso_inicial": ttft_ms / 1000,
+        "atraso_palavra": delay_ms / 1000,
+        "falhar": falhar
+    })
+    servidor = ThreadingHTTPServer((host, port), handler)
+    servidor.daemon_threads = True
+    servidor.chamadas = 0
+    servidor.lock = threading.Lock()
+    return servidor
+
+def start_in_background(**kwargs) -> ThreadingHTTPServer:
+    """Inicia o servidor em uma thread daemon e retorna-o (ver make_server)."""
+    servidor = make_server(**kwargs)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--tokens", type=int, default=400, help="Máximo de palavras por resposta")
+    parser.add_argument("--delay-ms", type=float, default=20, help="Intervalo entre palavras")
+    parser.add_argument("--ttft-ms", type=float, default=100, help="Latência antes da primeira palavra")
+    args = parser.parse_args()
+
+    servidor = make_server(args.host, args.port, args.tokens, args.delay_ms, args.ttft_ms)
+    print(f"Mock OpenAI em http://{args.host}:{servidor.server_address[1]}/v1 (Ctrl+C para sair)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -3,37 +3,133 @@ Script para processar e preparar dados uma única vez.
 Este script deve ser executado quando os dados CSV são atualizados.
 
 Uso:
-    python scripts/process_data.py
+    python scripts/process_data.py                 # reprocessamento completo
+    python scripts/process_data.py --incremental   # só linhas novas/alteradas (delta)
+    python scripts/process_data.py --compact       # junta as partes do delta na base
 """
+import argparse
 import os
 import sys
+import time
 import pandas as pd
 
 # Adicionar diretório raiz ao path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.utils.data_cache import load_data_once, clear_cache
+from src.utils.data_cache import load_data_once, clear_cache, get_metadata
+from src.utils.data_loader import preload_data
+from src.utils.artifact_store import get_artifact_dir
 from src.utils.data_processor import enrich_dataframe
+from src.utils.data_analysis import save_data_analysis
+from src.utils.retrieval_index import save_retrieval_index
+from src.utils.processed_store import (
+    compute_row_keys, write_full, plan_delta, append_delta, needs_compaction, compact
+)
 
-def process_and_save_data():
+# Caminhos
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_PATH = os.path.join(BASE_DIR, "data", "meu_arquivo.csv")
+PARQUET_PATH = os.path.join(BASE_DIR, "data", "meu_arquivo_processed.parquet")
+
+def process_incremental(csv_path: str = CSV_PATH, parquet_path: str = PARQUET_PATH):
     """
-    Processa os dados do CSV, enriquece e salva em formato Parquet otimizado.
+    Processa só o delta desde a última execução: linhas cuja chave de conteúdo
+    não existia são enriquecidas e gravadas como uma nova parte; linhas que
+    sumiram da origem são registradas como removidas. Compacta quando o delta
+    acumulado fica grande. Sem estado anterior, faz o processamento completo.
     """
-    # Caminhos
-    script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    csv_path = os.path.join(script_dir, "data", "meu_arquivo.csv")
-    parquet_path = os.path.join(script_dir, "data", "meu_arquivo_processed.parquet")
-    
     print("=" * 60)
-    print("PROCESSAMENTO DE DADOS")
+    print("PROCESSAMENTO INCREMENTAL DE DADOS")
     print("=" * 60)
     
-    # Limpar cache para garantir dados atualizados
     clear_cache()
     
-    # Carregar dados do CSV
-    print(f"\n1. Carregando dados do CSV: {csv_path}")
+    print(f"\n1. Carregando dados de origem: {csv_path}")
     df = load_data_once(csv_path)
+    if df.empty:
+        print("ERRO: DataFrame vazio!")
+        return
+    
+    inicio = time.perf_counter()
+    colunas_origem = sorted(df.columns)
+    keys = compute_row_keys(df, colunas_origem)
+    print(f"   {len(df):,} registros, chaves calculadas em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+    
+    plano = plan_delta(parquet_path, keys, colunas_origem)
+    if plano is None:
+        print("   Sem estado incremental compatível: executando processamento completo")
+        process_and_save_data(csv_path, parquet_path, df=df, keys=keys)
+        return
+    
+    if plano['compactar_antes']:
+        print("   Linhas removidas voltaram à origem: compactando antes de aplicar o delta")
+        compact(parquet_path)
+        plano = plan_delta(parquet_path, keys, colunas_origem)
+    
+    n_novas = int(plano['novas'].sum())
+    n_removidas = len(plano['removidas'])
+    print(f"\n2. Delta: {n_novas:,} linhas novas/alteradas, {n_removidas:,} removidas")
+    if n_novas == 0 and n_removidas == 0:
+        print("   Nada a fazer: dados processados já estão atualizados")
+        return
+    
+    # Enriquecimento só das linhas novas
+    inicio = time.perf_counter()
+    df_novas = enrich_dataframe(df[plano['novas']].reset_index(drop=True)) if n_novas else df.iloc[:0]
+    manifesto = append_delta(parquet_path, plano, df_novas, keys)
+    print(f"   Delta gravado em {(time.perf_counter() - inicio) * 1000:.0f} ms "
+          f"({len(manifesto['partes'])} parte(s), {manifesto.get('removidos', 0):,} remoções pendentes)")
+    
+    if needs_compaction(manifesto):
+        print("\n3. Compactando delta na base...")
+        linhas = compact(parquet_path)
+        print(f"   Base compactada: {linhas:,} registros")
+    
+    _save_analysis(csv_path)
+    print("\nPROCESSAMENTO INCREMENTAL CONCLUÍDO")
+
+def _save_analysis(csv_path: str):
+    """
+    Pré-calcula a análise global e o índice de recuperação usados pelo chatbot
+    para a versão recém-gravada, e grava os demais artefatos derivados
+    (metadados, cubo, índices) para que o próximo boot só os abra do disco.
+    """
+    inicio = time.perf_counter()
+    analise = save_data_analysis(csv_path)
+    print(f"   Análise do chatbot gravada ({analise.get('total_registros', 0):,} registros) "
+          f"em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+    
+    # Fichas do catálogo e índice TF-IDF, abertos com memory-map pelo chatbot
+    inicio = time.perf_counter()
+    indice = save_retrieval_index(csv_path)
+    print(f"   Índice de recuperação gravado ({len(indice):,} fichas) "
+          f"em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+    
+    # Metadados, dados processados em colunas .npy, índice de filtros, cubo, hierarquia e entidades
+    inicio = time.perf_counter()
+    get_metadata(csv_path)
+    preload_data(csv_path)
+    print(f"   Artefatos derivados gravados em {get_artifact_dir(csv_path)} "
+          f"em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+def process_and_save_data(csv_path: str = CSV_PATH, parquet_path: str = PARQUET_PATH,
+                          df: pd.DataFrame = None, keys=None):
+    """
+    Processa os dados do CSV, enriquece e salva em formato Parquet otimizado.
+    Reinicia o estado incremental (manifesto e chaves das linhas).
+    """
+    
+    print("=" * 60)
+    print("PROCESSAMENTO DE DADOS")
+    print("=" * 60)
+    
+    if df is None:
+        # Limpar cache para garantir dados atualizados
+        clear_cache()
+        
+        # Carregar dados do CSV
+        print(f"\n1. Carregando dados do CSV: {csv_path}")
+        df = load_data_once(csv_path)
     
     if df.empty:
         print("ERRO: DataFrame vazio!")
@@ -59,7 +155,11 @@ def process_and_save_data():
     # Salvar dados processados em Parquet
     print(f"\n3. Salvando dados processados: {parquet_path}")
     try:
-        df_processed.to_parquet(parquet_path, compression='snappy', index=False)
+        # Ordenado por fluxo/serviço/formulário em row groups pequenos (leitura com filtros descarta row groups)
+        colunas_origem = sorted(df.columns)
+        if keys is None:
+            keys = compute_row_keys(df, colunas_origem)
+        write_full(df_processed, parquet_path, keys, colunas_origem)
         print(f"   ✓ Dados processados salvos com sucesso!")
         
         # Comparar tamanhos
@@ -73,6 +173,8 @@ def process_and_save_data():
         # Memória do DataFrame
         memory_mb = df_processed.memory_usage(deep=True).sum() / 1024 / 1024
         print(f"   Memória do DataFrame: {memory_mb:.2f} MB")
+        
+        _save_analysis(csv_path)
     except Exception as e:
         print(f"   ✗ Erro ao salvar: {e}")
         import traceback
@@ -89,5 +191,17 @@ def process_and_save_data():
     print("2. Execute este script novamente quando o CSV for atualizado")
 
 if __name__ == "__main__":
-    process_and_save_data()
+    parser = argparse.ArgumentParser(description="Processa os dados do painel")
+    modo = parser.add_mutually_exclusive_group()
+    modo.add_argument("--incremental", action="store_true", help="processa só linhas novas/alteradas")
+    modo.add_argument("--compact", action="store_true", help="junta as partes incrementais na base")
+    args = parser.parse_args()
+    
+    if args.incremental:
+        process_incremental()
+    elif args.compact:
+        print(f"Base compactada: {compact(PARQUET_PATH):,} registros")
+        _save_analysis(CSV_PATH)
+    else:
+        process_and_save_data()
 
@@ -1,16 +1,18 @@
-from dash import Input, Output
+from dash import Input, Output, callback_context
 import plotly.express as px
 import plotly.graph_objects as go
-import pandas as pd
-import json
 import os
-from src.utils.data_loader import stream_filtered_df
-from src.utils.data_processor import prepare_chart_data
+from src.utils.data_loader import cached_figure
+from src.utils.hierarchy_index import get_hierarchy_index, ROTULOS_NIVEIS, RAIZ
+from src.utils.tab_results import tab_results
 from src.pages.biblioteca import biblioteca_layout
 
 # Caminho do arquivo CSV
 CSV_PATH = "data/meu_arquivo.csv"
 
+# Máximo de nós do treemap enviados ao navegador por resposta
+MAX_NOS = int(os.environ.get("BIBLIOTECA_MAX_NOS", "1500"))
+
 def _create_empty_figure(message):
     """Cria uma figura vazia com mensagem"""
     fig = go.Figure()
@@ -31,43 +33,45 @@ def _create_empty_figure(message):
     )
     return fig
 
-def _create_fluxos_hierarquia_tree(df):
-    """Cria diagrama hierárquico (treemap) mostrando Fluxo -> Serviço -> Formulário -> Campos"""
-    if df.empty or 'fluxo' not in df.columns or 'servico' not in df.columns or 'formulario' not in df.columns or 'nomeCampo' not in df.columns:
-        return _create_empty_figure("Dados não disponíveis")
-    
+def _create_fluxos_hierarquia_tree(filters, raiz=None):
+    """
+    Cria diagrama hierárquico (treemap) mostrando Fluxo -> Serviço -> Formulário -> Campos.
+    As contagens vêm da árvore pré-calculada (exatas, sem amostragem); a figura
+    traz no máximo MAX_NOS nós a partir de `raiz` e os blocos com níveis ocultos
+    são abertos com um clique.
+    """
     try:
-        # Preparar dados hierárquicos
-        # Agrupar por fluxo, serviço, formulário e campo, contando ocorrências
-        df_hierarquia = df.groupby(['fluxo', 'servico', 'formulario', 'nomeCampo']).size().reset_index(name='Qtd')
-        
-        # Renomear colunas para o formato esperado pelo treemap
-        df_hierarquia = df_hierarquia.rename(columns={
-            'fluxo': 'Fluxo',
-            'servico': 'Serviço',
-            'formulario': 'Formulário',
-            'nomeCampo': 'Campo'
-        })
-        
-        # Limitar a quantidade de dados se houver muitos (para performance)
-        if len(df_hierarquia) > 10000:
-            # Amostrar mantendo representatividade por fluxo
-            df_hierarquia = df_hierarquia.groupby('Fluxo').apply(
-                lambda x: x.sample(min(500, len(x)), random_state=42)
-            ).reset_index(drop=True)
-        
-        # Criar o treemap
-        fig = px.treemap(
-            df_hierarquia,
-            path=["Fluxo", "Serviço", "Formulário", "Campo"],
-            values="Qtd",
-            color="Fluxo",
-            color_discrete_sequence=px.colors.qualitative.Set2,
-            title="Estrutura Hierárquica - Fluxo > Serviço > Formulário > Campos"
-        )
-        
+        indice = get_hierarchy_index(CSV_PATH)
+        nos = indice.treemap_nodes(filters, raiz, MAX_NOS)
+        if nos["values"][0] == 0:
+            return _create_empty_figure("Nenhum dado disponível")
+
+        # Cor por fluxo (mesma paleta do gráfico anterior)
+        paleta = px.colors.qualitative.Set2
+        cores = ["lightgray" if fluxo < 0 else paleta[fluxo % len(paleta)] for fluxo in nos["fluxos"]]
+        detalhes = [
+            [ROTULOS_NIVEIS[nivel] if nivel >= 0 else "", "<br>Clique para abrir os níveis abaixo" if expandir else ""]
+            for nivel, expandir in zip(nos["niveis"], nos["expandir"])
+        ]
+
+        fig = go.Figure(go.Treemap(
+            ids=nos["ids"],
+            labels=nos["labels"],
+            parents=nos["parents"],
+            values=nos["values"],
+            branchvalues="total",
+            level=nos["raiz"],
+            maxdepth=3,
+            marker=dict(colors=cores),
+            customdata=detalhes,
+            hovertemplate="<b>%{label}</b><br>%{customdata[0]}<br>Registros: %{value:,}%{customdata[1]}<extra></extra>"
+        ))
+
+        titulo = "Estrutura Hierárquica - Fluxo > Serviço > Formulário > Campos"
+        if nos["truncado"]:
+            titulo += f"<br><sup>Mostrando os {len(nos['ids']):,} maiores blocos; clique em um bloco para detalhar</sup>"
+
         # Atualizar estilo
-        fig.update_traces(root_color="lightgray")
         fig.update_layout(
             template='plotly_white',
             height=600,
@@ -75,7 +79,7 @@ def _create_fluxos_hierarquia_tree(df):
             plot_bgcolor='white',
             paper_bgcolor='white',
             title=dict(
-                text="Estrutura Hierárquica - Fluxo > Serviço > Formulário > Campos",
+                text=titulo,
                 font=dict(size=16, color="#212529"),
                 x=0.5,
                 xanchor='center'
@@ -95,33 +99,24 @@ def register_callbacks(app):
     @app.callback(
         Output("biblioteca-hierarquia-tree", "figure"),
         Input("filtered-data-store", "data"),
+        Input("biblioteca-hierarquia-tree", "clickData"),
         prevent_initial_call=False,
         allow_duplicate=True
     )
-    def update_biblioteca_hierarquia(filtered_data_json):
+    def update_biblioteca_hierarquia(filtered_data_json, click_data):
         if filtered_data_json is None:
             return _create_empty_figure("Nenhum dado disponível")
 
-        # Busca dados diretamente do cache usando os filtros
-        filters = filtered_data_json
-        df = stream_filtered_df(CSV_PATH,
-                              filters.get("ano"), 
-                              filters.get("fluxo"), 
-                              filters.get("servico"), 
-                              filters.get("formulario"))
-        
-        if df.empty:
-            return _create_empty_figure("Nenhum dado disponível")
-
         try:
-            # OTIMIZAÇÃO: Preparar dados para gráficos (amostragem se necessário)
-            # Para biblioteca, podemos aumentar o limite já que é a única visualização
-            df_charts = prepare_chart_data(df, max_rows=100000)
-            
-            # Criar gráfico hierárquico
-            fig_hierarquia = _create_fluxos_hierarquia_tree(df_charts)
-            
-            return fig_hierarquia
+            # OTIMIZAÇÃO: Clique em um bloco carrega só os níveis abaixo dele
+            disparo = callback_context.triggered[0]["prop_id"] if callback_context.triggered else ""
+            raiz = _clicked_root(click_data) if disparo == "biblioteca-hierarquia-tree.clickData" else None
+            if raiz is not None:
+                return cached_figure(CSV_PATH, f"biblioteca.hierarquia.{raiz}", filtered_data_json,
+                                     lambda: _create_fluxos_hierarquia_tree(filtered_data_json, raiz))
+
+            # OTIMIZAÇÃO: Resultado reaproveitado ao voltar para a aba com os mesmos filtros
+            return tab_results.get("biblioteca", filtered_data_json)
             
         except Exception as e:
             print(f"Erro ao atualizar gráfico de biblioteca: {e}")
@@ -129,3 +124,22 @@ def register_callbacks(app):
             traceback.print_exc()
             return _create_empty_figure("Erro ao carregar dados")
 
+    tab_results.register("biblioteca", CSV_PATH, _compute_biblioteca)
+
+def _clicked_root(click_data):
+    """
+    Nó a abrir a partir do clickData do treemap (None = topo).
+    Clicar no bloco do nó aberto (o do topo da figura) volta um nível.
+    """
+    pontos = (click_data or {}).get("points") or []
+    if not pontos or not pontos[0].get("id"):
+        return None
+    ponto = pontos[0]
+    raiz = ponto.get("parent") if ponto["id"] == ponto.get("entry") else ponto["id"]
+    return None if not raiz or raiz == RAIZ else raiz
+
+def _compute_biblioteca(filters):
+    """Figura da hierarquia da aba Biblioteca para os filtros (níveis de cima)"""
+    # OTIMIZAÇÃO: Figura servida do cache de figuras; a árvore é calculada uma vez por versão dos dados
+    return cached_figure(CSV_PATH, "biblioteca.hierarquia", filters,
+                         lambda: _create_fluxos_hierarquia_tree(filters))
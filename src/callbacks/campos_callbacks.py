@@ -3,11 +3,11 @@ import plotly.express as px
 import pandas as pd
 import json
 import os
-from src.utils.data_loader import stream_filtered_df
-from src.utils.data_processor import calculate_kpis, prepare_chart_data
+from src.utils.data_loader import stream_filtered_df, filtered_cube, cached_figure
+from src.utils.tab_results import tab_results
+from src.callbacks.table_callbacks import register_paged_table
+from src.utils.data_processor import prepare_chart_data
 from src.pages.campos import campos_layout
-import dash_bootstrap_components as dbc
-from dash import html
 import plotly.graph_objects as go
 
 # Caminho do arquivo CSV
@@ -39,7 +39,6 @@ def register_callbacks(app):
         Output("pct-campos-padrao", "children"),
         Output("campos-mais-usados", "figure"),
         Output("campos-com-variacoes", "figure"),
-        Output("tabela-autoria-dados", "children"),
         Output("diversidade-campos-tipo", "figure"),
         Input("filtered-data-store", "data"),
         prevent_initial_call=False,
@@ -48,47 +47,62 @@ def register_callbacks(app):
     def update_campos(filtered_data_json):
         if filtered_data_json is None:
             empty_fig = _create_empty_figure("Nenhum dado disponível")
-            return "0", "0", "0%", empty_fig, empty_fig, None, empty_fig
-
-        # Busca dados diretamente do cache usando os filtros
-        filters = filtered_data_json
-        df = stream_filtered_df(CSV_PATH,
-                              filters.get("ano"), 
-                              filters.get("fluxo"), 
-                              filters.get("servico"), 
-                              filters.get("formulario"))
-
-        if df.empty:
-            empty_fig = _create_empty_figure("Nenhum dado disponível")
-            return "0", "0", "0%", empty_fig, empty_fig, None, empty_fig
+            return "0", "0", "0%", empty_fig, empty_fig, empty_fig
 
         try:
-            # OTIMIZAÇÃO: Calcular KPIs usando função centralizada (dados já processados)
-            kpis = calculate_kpis(df)
-
-            # OTIMIZAÇÃO: Preparar dados para gráficos (amostragem se necessário)
-            df_charts = prepare_chart_data(df, max_rows=50000)
+            # OTIMIZAÇÃO: Resultado reaproveitado ao voltar para a aba com os mesmos filtros
+            return tab_results.get("campos", filtered_data_json)
             
-            # Criar gráficos usando dados já processados
-            fig_top = _create_campos_mais_usados_chart(df_charts)
-            fig_var = _create_campos_com_variacoes_chart(df_charts)
-            fig_diversidade = _create_diversidade_campos_tipo_chart(df_charts)
-
-            tabela_autoria = _create_tabela_autoria_dados(df_charts)
-
-            return str(kpis['qtd_campos_distintos']), str(kpis['qtd_campos_padronizados']), kpis['pct_campos_padrao'], fig_top, fig_var, tabela_autoria, fig_diversidade
-                   
         except Exception as e:
             print(f"Erro no callback: {e}")
             empty_fig = _create_empty_figure("Erro ao carregar dados")
-            return "0", "0", "0%", empty_fig, empty_fig, None, empty_fig
+            return "0", "0", "0%", empty_fig, empty_fig, empty_fig
+
+    tab_results.register("campos", CSV_PATH, _compute_campos)
+
+    # OTIMIZAÇÃO: Tabela de autoria paginada no servidor (só a página visível vai ao navegador)
+    register_paged_table(app, "tabela-autoria-dados", CSV_PATH, _create_tabela_autoria_dados)
+
+def _compute_campos(filters):
+    """Saídas da aba Campos para os filtros (KPIs e gráficos)"""
+    # Busca dados diretamente do cache usando os filtros
+    df = stream_filtered_df(CSV_PATH,
+                          filters.get("ano"), 
+                          filters.get("fluxo"), 
+                          filters.get("servico"), 
+                          filters.get("formulario"))
+
+    if df.empty:
+        empty_fig = _create_empty_figure("Nenhum dado disponível")
+        return "0", "0", "0%", empty_fig, empty_fig, empty_fig
+
+    # OTIMIZAÇÃO: KPIs lidos do cubo de métricas pré-agregadas
+    kpis = filtered_cube(CSV_PATH,
+                         filters.get("ano"), 
+                         filters.get("fluxo"), 
+                         filters.get("servico"), 
+                         filters.get("formulario")).kpis()
+
+    # OTIMIZAÇÃO: Preparar dados para gráficos (amostragem se necessário)
+    df_charts = prepare_chart_data(df, max_rows=50000)
+    
+    # Criar gráficos usando dados já processados
+    # OTIMIZAÇÃO: Figuras servidas do cache de figuras (por gráfico, versão dos dados e filtros)
+    fig_top = cached_figure(CSV_PATH, "campos.mais_usados", filters,
+                            lambda: _create_campos_mais_usados_chart(df_charts))
+    fig_var = cached_figure(CSV_PATH, "campos.com_variacoes", filters,
+                            lambda: _create_campos_com_variacoes_chart(df_charts))
+    fig_diversidade = cached_figure(CSV_PATH, "campos.diversidade_tipo", filters,
+                                    lambda: _create_diversidade_campos_tipo_chart(df_charts))
+
+    return str(kpis['qtd_campos_distintos']), str(kpis['qtd_campos_padronizados']), kpis['pct_campos_padrao'], fig_top, fig_var, fig_diversidade
 
 def _create_campos_mais_usados_chart(df):
     if 'nomeCampo' not in df.columns:
         return _create_empty_figure("Dados de campos não disponíveis")
     
     try:
-        top = df['nomeCampo'].value_counts().reset_index()
+        top = df.groupby('nomeCampo', observed=True).size().reset_index()
         top.columns = ['nomeCampo','qtd']
         top = top.sort_values('qtd', ascending=False).head(20)
         
@@ -179,7 +193,7 @@ def _create_campos_com_variacoes_chart(df):
         return _create_empty_figure("Dados de variação de campos não disponíveis")
     
     try:
-        var = df.groupby('nomeCampo')['legendaCampoFilho'].nunique().reset_index(name='variacoes')
+        var = df.groupby('nomeCampo', observed=True)['legendaCampoFilho'].nunique().reset_index(name='variacoes')
         var = var.sort_values('variacoes', ascending=False).head(20)
         
         # Truncar nomes longos para melhor visualização (máximo 50 caracteres)
@@ -283,90 +297,22 @@ def _create_campos_com_variacoes_chart(df):
         print(f"Erro ao criar gráfico de campos com variações: {e}")
         return _create_empty_figure("Erro ao processar dados")
 
-def _create_tabela_autoria_dados(df):
+def _create_tabela_autoria_dados(filters):
+    """Tabela de autoria: campos distintos criados por autor"""
+    df = stream_filtered_df(CSV_PATH,
+                          filters.get("ano"), 
+                          filters.get("fluxo"), 
+                          filters.get("servico"), 
+                          filters.get("formulario"))
     if 'autor' not in df.columns or 'nomeCampo' not in df.columns:
         autoria_data = pd.DataFrame({'Autor': ["N/A"], 'Campos Criados': [0]})
     else:
-        autoria_data = df.groupby('autor')['nomeCampo'].nunique().reset_index(name='Campos Criados')
+        autoria_data = df.groupby('autor', observed=True)['nomeCampo'].nunique().reset_index(name='Campos Criados')
         autoria_data.columns = ['Autor', 'Campos Criados']
-        autoria_data = autoria_data.sort_values('Campos Criados', ascending=False).head(10)
-    
-    # Criar tabela estilizada com estilo similar à overview
-    header_style = {
-        "backgroundColor": "#1e3a5f",
-        "color": "white",
-        "padding": "12px 16px",
-        "position": "sticky",
-        "top": 0,
-        "zIndex": 10,
-        "fontWeight": "bold",
-        "fontSize": "13px",
-        "textAlign": "left",
-        "border": "none",
-        "whiteSpace": "nowrap"
-    }
-    
-    header = html.Thead([
-        html.Tr([
-            html.Th("Autor", style=header_style),
-            html.Th("Campos Criados", style={**header_style, "textAlign": "center"})
-        ])
-    ], style={"position": "sticky", "top": 0, "zIndex": 10})
-    
-    body_rows = []
-    cell_style = {
-        "padding": "12px 16px",
-        "border": "1px solid #dee2e6",
-        "fontSize": "13px",
-        "color": "#212529",
-        "whiteSpace": "nowrap",
-        "overflow": "hidden",
-        "textOverflow": "ellipsis"
-    }
-    
-    for idx, (_, row) in enumerate(autoria_data.iterrows()):
-        autor_text = str(row['Autor'])
-        if len(autor_text) > 60:
-            autor_text = autor_text[:57] + "..."
-        
-        body_rows.append(
-            html.Tr([
-                html.Td(autor_text, style={**cell_style, "maxWidth": "300px"}),
-                html.Td(str(int(row['Campos Criados'])), style={**cell_style, "textAlign": "center"})
-            ], style={
-                "backgroundColor": "#ffffff" if idx % 2 == 0 else "#f8f9fa",
-                "borderBottom": "1px solid #dee2e6"
-            })
-        )
-    
-    table = dbc.Table([
-        header,
-        html.Tbody(body_rows)
-    ], bordered=False, hover=True, responsive=True, striped=False, 
-    style={
-        "marginBottom": 0,
-        "fontSize": "13px",
-        "width": "100%",
-        "borderCollapse": "separate",
-        "borderSpacing": 0,
-        "borderRadius": "8px",
-        "overflow": "hidden"
-    })
-    
-    tabela_com_scroll = html.Div(
-        table,
-        style={
-            "maxHeight": "450px",
-            "overflowY": "auto",
-            "overflowX": "auto",
-            "border": "1px solid #dee2e6",
-            "borderRadius": "8px",
-            "display": "block",
-            "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"
-        }
-    )
+        autoria_data['Autor'] = autoria_data['Autor'].astype(str)
+        autoria_data = autoria_data.sort_values('Campos Criados', ascending=False)
     
-    return tabela_com_scroll
+    return autoria_data.reset_index(drop=True), None
 
 def _create_diversidade_campos_tipo_chart(df):
     # OTIMIZAÇÃO: Usar coluna tipo_componente já processada (não precisa calcular novamente)
@@ -374,7 +320,7 @@ def _create_diversidade_campos_tipo_chart(df):
         return _create_empty_figure("Dados de tipo de campo não disponíveis")
     
     try:
-        diversidade = df['tipo_componente'].value_counts().reset_index()
+        diversidade = df.groupby('tipo_componente', observed=True).size().reset_index()
         diversidade.columns = ['Tipo de Componente', 'Quantidade']
         diversidade = diversidade.sort_values('Quantidade', ascending=False)
         
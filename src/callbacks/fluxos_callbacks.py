@@ -4,11 +4,10 @@ import plotly.graph_objects as go
 import pandas as pd
 import json
 import os
-from src.utils.data_loader import stream_filtered_df
-from src.utils.data_processor import calculate_kpis, calculate_padronizacao_por_fluxo, prepare_chart_data
+from src.utils.data_loader import filtered_cube, cached_figure
+from src.utils.tab_results import tab_results
+from src.callbacks.table_callbacks import register_paged_table
 from src.pages.fluxos import fluxos_layout
-import dash_bootstrap_components as dbc
-from dash import html
 
 # Caminho do arquivo CSV
 CSV_PATH = "data/meu_arquivo.csv"
@@ -45,7 +44,6 @@ def register_callbacks(app):
         Output("pct-fluxo-padronizado", "children"),
         Output("percentual-padronizacao-fluxo", "figure"),
         Output("contagem-servico-por-fluxo", "figure"),
-        Output("padronizacao-por-fluxo-tabela", "children"),
         Input("filtered-data-store", "data"),
         prevent_initial_call=False,
         allow_duplicate=True
@@ -53,56 +51,64 @@ def register_callbacks(app):
     def update_fluxos(filtered_data_json):
         if filtered_data_json is None:
             empty_fig = _create_empty_figure("Nenhum dado disponível")
-            return "0", "0", "0", "0%", empty_fig, empty_fig, html.Div("Nenhum dado disponível")
-
-        # Busca dados diretamente do cache usando os filtros
-        filters = filtered_data_json
-        df = stream_filtered_df(CSV_PATH,
-                              filters.get("ano"), 
-                              filters.get("fluxo"), 
-                              filters.get("servico"), 
-                              filters.get("formulario"))
-        
-        if df.empty:
-            empty_fig = _create_empty_figure("Nenhum dado disponível")
-            return "0", "0", "0", "0%", empty_fig, empty_fig, html.Div("Nenhum dado disponível")
+            return "0", "0", "0", "0%", empty_fig, empty_fig
 
         try:
-            # OTIMIZAÇÃO: Calcular KPIs usando função centralizada (dados já processados)
-            kpis = calculate_kpis(df)
-            
-            # OTIMIZAÇÃO: Preparar dados para gráficos (amostragem se necessário)
-            df_charts = prepare_chart_data(df, max_rows=50000)
-            
-            # Criar gráficos usando dados já processados
-            fig_percentual_padronizacao = _create_fluxo_padronizacao_chart(df_charts)
-            fig_contagem_servico_fluxo = _create_ranking_chart(df_charts)
-            tabela_padronizacao = _create_padronizacao_tabela(df_charts)
-            
-            return str(kpis['qtd_servicos']), str(kpis['qtd_fluxos']), str(kpis['media_campos_fluxo']), kpis['pct_fluxo_padronizado'], fig_percentual_padronizacao, fig_contagem_servico_fluxo, tabela_padronizacao
+            # OTIMIZAÇÃO: Resultado reaproveitado ao voltar para a aba com os mesmos filtros
+            return tab_results.get("fluxos-servicos", filtered_data_json)
             
         except Exception as e:
             print(f"Erro ao atualizar gráficos de fluxos: {e}")
             import traceback
             traceback.print_exc()
             empty_fig = _create_empty_figure("Erro ao carregar dados")
-            return "0", "0", "0", "0%", empty_fig, empty_fig, html.Div(f"Erro: {str(e)}")
+            return "0", "0", "0", "0%", empty_fig, empty_fig
 
-def _create_fluxo_padronizacao_chart(df):
+    tab_results.register("fluxos-servicos", CSV_PATH, _compute_fluxos)
+
+    # OTIMIZAÇÃO: Tabela de padronização paginada no servidor (só a página visível vai ao navegador)
+    register_paged_table(app, "padronizacao-por-fluxo-tabela", CSV_PATH, _create_padronizacao_tabela,
+                         percentuais={"% Padronização": 1})
+
+def _compute_fluxos(filters):
+    """Saídas da aba Fluxos e Serviços para os filtros (KPIs e gráficos)"""
+    # Busca o cubo de métricas pré-agregadas já restrito aos filtros
+    cube = filtered_cube(CSV_PATH,
+                         filters.get("ano"), 
+                         filters.get("fluxo"), 
+                         filters.get("servico"), 
+                         filters.get("formulario"))
+    
+    if cube.empty:
+        empty_fig = _create_empty_figure("Nenhum dado disponível")
+        return "0", "0", "0", "0%", empty_fig, empty_fig
+
+    # OTIMIZAÇÃO: KPIs e gráficos lidos do cubo (valores exatos, sem amostragem)
+    kpis = cube.kpis()
+    
+    # OTIMIZAÇÃO: Figuras servidas do cache de figuras (por gráfico, versão dos dados e filtros)
+    fig_percentual_padronizacao = cached_figure(CSV_PATH, "fluxos.padronizacao", filters,
+                                                lambda: _create_fluxo_padronizacao_chart(cube))
+    fig_contagem_servico_fluxo = cached_figure(CSV_PATH, "fluxos.ranking", filters,
+                                               lambda: _create_ranking_chart(cube))
+    
+    return str(kpis['qtd_servicos']), str(kpis['qtd_fluxos']), str(kpis['media_campos_fluxo']), kpis['pct_fluxo_padronizado'], fig_percentual_padronizacao, fig_contagem_servico_fluxo
+
+def _create_fluxo_padronizacao_chart(cube):
     """Gráfico de barras horizontais - Percentual de Padronização por Fluxo"""
-    if 'fluxo' not in df.columns:
+    if not cube.has('fluxo'):
         return _create_empty_figure("Dados não disponíveis")
     
     try:
-        # OTIMIZAÇÃO: is_padronizado já existe no DataFrame processado
-        if 'is_padronizado' not in df.columns:
+        # OTIMIZAÇÃO: contagens de padronizados já somadas por célula no cubo
+        if not cube.has('qtd_padronizado'):
             return _create_empty_figure("Dados não disponíveis")
         
         # Calcular percentual de padronização por fluxo
-        padronizacao = df.groupby('fluxo').agg(
-            total_campos=('is_padronizado', 'count'),
-            campos_padronizados=('is_padronizado', 'sum')
-        ).reset_index()
+        padronizacao = pd.DataFrame({
+            'total_campos': cube.size_by('fluxo'),
+            'campos_padronizados': cube.size_by('fluxo', 'qtd_padronizado')
+        }).reset_index()
         
         padronizacao['percent_padronizado'] = (padronizacao['campos_padronizados'] / padronizacao['total_campos'] * 100).round(1)
         padronizacao = padronizacao.sort_values('percent_padronizado', ascending=True).tail(20)
@@ -199,14 +205,14 @@ def _create_fluxo_padronizacao_chart(df):
         traceback.print_exc()
         return _create_empty_figure("Erro ao processar dados")
 
-def _create_ranking_chart(df):
+def _create_ranking_chart(cube):
     """Gráfico de barras horizontais - Análise de Fluxos por Serviços (Contagem de serviço)"""
-    if 'fluxo' not in df.columns or 'servico' not in df.columns:
+    if not cube.has('fluxo') or not cube.has('servico'):
         return _create_empty_figure("Dados não disponíveis")
     
     try:
-        # Agrupar por fluxo e contar serviços únicos
-        ranking = df.groupby('fluxo')['servico'].nunique().reset_index()
+        # Serviços únicos por fluxo
+        ranking = cube.nunique_by('fluxo', 'servico').reset_index()
         ranking.columns = ['fluxo', 'contagem_servico']
         ranking = ranking.sort_values('contagem_servico', ascending=False).head(20)
         
@@ -320,174 +326,37 @@ def _create_ranking_chart(df):
         traceback.print_exc()
         return _create_empty_figure("Erro ao processar dados")
 
-def _create_padronizacao_tabela(df):
-    """Criar tabela de padronização por fluxo usando a fórmula do PowerBI"""
-    if df.empty or 'fluxo' not in df.columns or 'nomeCampo' not in df.columns:
-        return html.Div("Nenhum dado disponível", style={"padding": "20px", "textAlign": "center", "color": "#6c757d"})
+def _create_padronizacao_tabela(filters):
+    """Tabela de padronização por fluxo usando a fórmula do PowerBI"""
+    cube = filtered_cube(CSV_PATH,
+                         filters.get("ano"), 
+                         filters.get("fluxo"), 
+                         filters.get("servico"), 
+                         filters.get("formulario"))
+    colunas = ['Fluxo', 'Campos do Formulário', 'Campos Padronizados', '% Padronização']
+    if cube.empty or not cube.has('fluxo') or not cube.has('nomeCampo'):
+        return pd.DataFrame(columns=colunas), "Nenhum dado disponível"
     
-    try:
-        # Criar cópia para não modificar o original
-        df_work = df.copy()
-        
-        # OTIMIZAÇÃO: is_padronizado já existe no DataFrame processado
-        # Não precisa recalcular
-        
-        # Agrupar dados para a tabela
-        # Campos do Formulário = quantidade de campos únicos por fluxo
-        # Campos Padronizados = quantidade de campos únicos padronizados por fluxo
-        # (contar campos únicos onde is_padronizado = 1)
-        
-        # Agrupar por fluxo e contar campos únicos
-        campos_por_fluxo = df_work.groupby('fluxo').agg(
-            Campos_Formulario=('nomeCampo', 'nunique')
-        ).reset_index()
-        
-        # Para campos padronizados, filtrar apenas os padronizados e contar únicos por fluxo
-        df_padronizados = df_work[df_work['is_padronizado'] == 1]
-        if not df_padronizados.empty:
-            campos_padronizados_por_fluxo = df_padronizados.groupby('fluxo').agg(
-                Campos_Padronizados=('nomeCampo', 'nunique')
-            ).reset_index()
-        else:
-            campos_padronizados_por_fluxo = pd.DataFrame(columns=['fluxo', 'Campos_Padronizados'])
-        
-        # Fazer merge dos dados
-        padronizacao_por_fluxo = campos_por_fluxo.merge(
-            campos_padronizados_por_fluxo, 
-            on='fluxo', 
-            how='left'
-        ).fillna(0)
-        
-        # Converter para int
-        padronizacao_por_fluxo['Campos_Padronizados'] = padronizacao_por_fluxo['Campos_Padronizados'].astype(int)
-        
-        padronizacao_por_fluxo.columns = ['Fluxo', 'Campos do Formulário', 'Campos Padronizados']
-        padronizacao_por_fluxo['% Padronização do Fluxo'] = (
-            padronizacao_por_fluxo['Campos Padronizados'] / padronizacao_por_fluxo['Campos do Formulário'] * 100
-        ).round(1)
-        
-        # Ordenar por percentual (decrescente)
-        padronizacao_por_fluxo = padronizacao_por_fluxo.sort_values('% Padronização do Fluxo', ascending=False)
-        
-        # Adicionar linha de total
-        total_campos = padronizacao_por_fluxo['Campos do Formulário'].sum()
-        total_padronizados = padronizacao_por_fluxo['Campos Padronizados'].sum()
-        pct_total = (total_padronizados / total_campos * 100).round(1) if total_campos > 0 else 0
-        
-        # Criar tabela usando dbc.Table com estilo similar à overview
-        # Header com posição sticky e estilo melhorado
-        header_style = {
-            "backgroundColor": "#1e3a5f",
-            "color": "white",
-            "padding": "12px 16px",
-            "position": "sticky",
-            "top": 0,
-            "zIndex": 10,
-            "fontWeight": "bold",
-            "fontSize": "13px",
-            "textAlign": "left",
-            "border": "none",
-            "whiteSpace": "nowrap"
-        }
-        
-        header = html.Thead([
-            html.Tr([
-                html.Th("Fluxo", style=header_style),
-                html.Th("Campos do Formulário", style={**header_style, "textAlign": "center"}),
-                html.Th("Campos Padronizados", style={**header_style, "textAlign": "center"}),
-                html.Th("% Padronização", style={**header_style, "textAlign": "center"})
-            ])
-        ], style={"position": "sticky", "top": 0, "zIndex": 10})
-        
-        # Body com melhor estilo e tamanho de texto
-        body_rows = []
-        MAX_LINHAS_VISIVEIS = 15
-        
-        cell_style = {
-            "padding": "12px 16px",
-            "border": "1px solid #dee2e6",
-            "fontSize": "13px",
-            "color": "#212529",
-            "whiteSpace": "nowrap",
-            "overflow": "hidden",
-            "textOverflow": "ellipsis"
-        }
-        
-        for idx, row in padronizacao_por_fluxo.iterrows():
-            # Truncar nome do fluxo se muito longo
-            fluxo_text = str(row['Fluxo'])
-            if len(fluxo_text) > 60:
-                fluxo_text = fluxo_text[:57] + "..."
-            
-            body_rows.append(
-                html.Tr([
-                    html.Td(fluxo_text, style={**cell_style, "maxWidth": "300px"}),
-                    html.Td(str(int(row['Campos do Formulário'])), style={**cell_style, "textAlign": "center"}),
-                    html.Td(str(int(row['Campos Padronizados'])), style={**cell_style, "textAlign": "center"}),
-                    html.Td(f"{row['% Padronização do Fluxo']:.1f}%", style={**cell_style, "textAlign": "center"})
-                ], style={
-                    "backgroundColor": "#ffffff" if idx % 2 == 0 else "#f8f9fa",
-                    "borderBottom": "1px solid #dee2e6"
-                })
-            )
-        
-        # Footer com total
-        footer_style = {
-            "padding": "14px 16px",
-            "border": "1px solid #dee2e6",
-            "backgroundColor": "#e9ecef",
-            "fontWeight": "bold",
-            "fontSize": "14px"
-        }
-        
-        footer = html.Tfoot([
-            html.Tr([
-                html.Td("Total", style={**footer_style}),
-                html.Td(str(int(total_campos)), style={**footer_style, "textAlign": "center"}),
-                html.Td(str(int(total_padronizados)), style={**footer_style, "textAlign": "center"}),
-                html.Td(f"{pct_total:.1f}%", style={**footer_style, "textAlign": "center"})
-            ])
-        ])
-        
-        table = dbc.Table([
-            header,
-            html.Tbody(body_rows),
-            footer
-        ], bordered=False, hover=True, responsive=True, striped=False, 
-        style={
-            "marginBottom": 0,
-            "fontSize": "13px",
-            "width": "100%",
-            "borderCollapse": "separate",
-            "borderSpacing": 0,
-            "borderRadius": "8px",
-            "overflow": "hidden"
-        })
-        
-        # Calcular altura e envolver em div com scroll
-        altura_linha = 48
-        altura_header = 50
-        altura_footer = 50
-        altura_total = altura_header + (MAX_LINHAS_VISIVEIS * altura_linha) + altura_footer
-        
-        tabela_com_scroll = html.Div(
-            table,
-            style={
-                "maxHeight": f"{altura_total}px",
-                "overflowY": "auto",
-                "overflowX": "auto",
-                "border": "1px solid #dee2e6",
-                "borderRadius": "8px",
-                "display": "block",
-                "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"
-            }
-        )
-        
-        return tabela_com_scroll
-        
-    except Exception as e:
-        print(f"Erro ao criar tabela de padronização: {e}")
-        import traceback
-        traceback.print_exc()
-        return html.Div(f"Erro ao criar tabela: {str(e)}", style={"padding": "20px", "color": "#dc3545"})
-
+    # Campos do Formulário = quantidade de campos únicos por fluxo
+    # Campos Padronizados = quantidade de campos únicos padronizados por fluxo
+    # (contar campos únicos onde is_padronizado = 1)
+    padronizacao_por_fluxo = cube.distinct_by('fluxo')
+    if 'padronizados' not in padronizacao_por_fluxo.columns:
+        padronizacao_por_fluxo['padronizados'] = 0
+    
+    padronizacao_por_fluxo.columns = colunas[:3]
+    padronizacao_por_fluxo['Fluxo'] = padronizacao_por_fluxo['Fluxo'].astype(str)
+    padronizacao_por_fluxo['% Padronização'] = (
+        padronizacao_por_fluxo['Campos Padronizados'] / padronizacao_por_fluxo['Campos do Formulário'] * 100
+    ).round(1)
+    
+    # Ordenar por percentual (decrescente)
+    padronizacao_por_fluxo = padronizacao_por_fluxo.sort_values('% Padronização', ascending=False)
+    
+    # Linha de total vai para o resumo abaixo da tabela
+    total_campos = padronizacao_por_fluxo['Campos do Formulário'].sum()
+    total_padronizados = padronizacao_por_fluxo['Campos Padronizados'].sum()
+    pct_total = (total_padronizados / total_campos * 100).round(1) if total_campos > 0 else 0
+    resumo = f"Total: {int(total_campos)} campos do formulário, {int(total_padronizados)} padronizados ({pct_total:.1f}%)"
+    
+    return padronizacao_por_fluxo.reset_index(drop=True), resumo
@@ -3,11 +3,10 @@ import plotly.express as px
 import pandas as pd
 import json
 import os
-from src.utils.data_loader import stream_filtered_df
-from src.utils.data_processor import calculate_kpis, prepare_chart_data
+from src.utils.data_loader import filtered_cube, cached_figure
+from src.utils.tab_results import tab_results
+from src.callbacks.table_callbacks import register_paged_table
 from src.pages.formularios import formularios_layout
-import dash_bootstrap_components as dbc
-from dash import html
 import plotly.graph_objects as go
 
 # Caminho do arquivo CSV
@@ -45,7 +44,6 @@ def register_callbacks(app):
         Output("pct-formularios-padrao", "children"),
         Output("formularios-mais-usados", "figure"),
         Output("complexidade-formularios-form", "figure"),
-        Output("formularios-utilizados-table", "children"),
         Output("analise-fluxo-complexidade", "figure"),
         Input("filtered-data-store", "data"),
         prevent_initial_call=False,
@@ -54,51 +52,59 @@ def register_callbacks(app):
     def update_formularios(filtered_data_json):
         if filtered_data_json is None:
             empty_fig = _create_empty_figure("Nenhum dado disponível")
-            return "0", "0", "0", "0", empty_fig, empty_fig, None, empty_fig
-
-        # Busca dados diretamente do cache usando os filtros
-        filters = filtered_data_json
-        df = stream_filtered_df(CSV_PATH,
-                              filters.get("ano"), 
-                              filters.get("fluxo"), 
-                              filters.get("servico"), 
-                              filters.get("formulario"))
-
-        if df.empty:
-            empty_fig = _create_empty_figure("Nenhum dado disponível")
-            return "0", "0", "0", "0", empty_fig, empty_fig, None, empty_fig
+            return "0", "0", "0", "0", empty_fig, empty_fig, empty_fig
 
         try:
-            # OTIMIZAÇÃO: Calcular KPIs usando função centralizada (dados já processados)
-            kpis = calculate_kpis(df)
-            
-            # OTIMIZAÇÃO: Preparar dados para gráficos (amostragem se necessário)
-            df_charts = prepare_chart_data(df, max_rows=50000)
-            
-            # Criar gráficos usando dados já processados
-            fig_formularios_mais_usados = _create_formularios_mais_usados_chart(df_charts)
-            fig_complexidade_formularios = _create_complexidade_formularios_chart(df_charts)
-            tabela_formularios_utilizados = _create_formularios_utilizados_table(df_charts)
-            fig_analise_fluxo_complexidade = _create_analise_fluxo_complexidade_chart(df_charts)
-            
-            return str(kpis['qtd_formularios']), str(kpis['qtd_campos_distintos']), str(kpis['media_campos_formulario']), str(kpis['qtd_campos_padronizados']), fig_formularios_mais_usados, fig_complexidade_formularios, tabela_formularios_utilizados, fig_analise_fluxo_complexidade
+            # OTIMIZAÇÃO: Resultado reaproveitado ao voltar para a aba com os mesmos filtros
+            return tab_results.get("formularios", filtered_data_json)
             
         except Exception as e:
             print(f"Erro ao atualizar gráficos de formulários: {e}")
             import traceback
             traceback.print_exc()
             empty_fig = _create_empty_figure("Erro ao carregar dados")
-            empty_div = html.Div("Erro ao carregar dados", style={"padding": "20px", "textAlign": "center", "color": "#dc3545"})
-            return "0", "0", "0", "0", empty_fig, empty_fig, empty_div, empty_fig
+            return "0", "0", "0", "0", empty_fig, empty_fig, empty_fig
+
+    tab_results.register("formularios", CSV_PATH, _compute_formularios)
+
+    # OTIMIZAÇÃO: Ranking de formulários paginado no servidor (só a página visível vai ao navegador)
+    register_paged_table(app, "formularios-utilizados-table", CSV_PATH, _create_formularios_utilizados_table,
+                         percentuais={"% de contribuição": 2})
+
+def _compute_formularios(filters):
+    """Saídas da aba Formulários para os filtros (KPIs e gráficos)"""
+    # Busca o cubo de métricas pré-agregadas já restrito aos filtros
+    cube = filtered_cube(CSV_PATH,
+                         filters.get("ano"), 
+                         filters.get("fluxo"), 
+                         filters.get("servico"), 
+                         filters.get("formulario"))
+
+    if cube.empty:
+        empty_fig = _create_empty_figure("Nenhum dado disponível")
+        return "0", "0", "0", "0", empty_fig, empty_fig, empty_fig
+
+    # OTIMIZAÇÃO: KPIs e gráficos lidos do cubo (valores exatos, sem amostragem)
+    kpis = cube.kpis()
+    
+    # OTIMIZAÇÃO: Figuras servidas do cache de figuras (por gráfico, versão dos dados e filtros)
+    fig_formularios_mais_usados = cached_figure(CSV_PATH, "formularios.mais_usados", filters,
+                                                lambda: _create_formularios_mais_usados_chart(cube))
+    fig_complexidade_formularios = cached_figure(CSV_PATH, "formularios.complexidade", filters,
+                                                 lambda: _create_complexidade_formularios_chart(cube))
+    fig_analise_fluxo_complexidade = cached_figure(CSV_PATH, "formularios.analise_fluxo_complexidade", filters,
+                                                   lambda: _create_analise_fluxo_complexidade_chart(cube))
+    
+    return str(kpis['qtd_formularios']), str(kpis['qtd_campos_distintos']), str(kpis['media_campos_formulario']), str(kpis['qtd_campos_padronizados']), fig_formularios_mais_usados, fig_complexidade_formularios, fig_analise_fluxo_complexidade
 
-def _create_formularios_mais_usados_chart(df):
+def _create_formularios_mais_usados_chart(cube):
     """Gráfico de barras horizontais - Formulários Mais Utilizados em Fluxos de Trabalho"""
-    if "formulario" not in df.columns or "fluxo" not in df.columns:
+    if not cube.has("formulario") or not cube.has("fluxo"):
         return _create_empty_figure("Dados de formulários não disponíveis")
     
     try:
         # Contar quantos fluxos únicos cada formulário é usado
-        formularios_fluxos = df.groupby("formulario")["fluxo"].nunique().reset_index()
+        formularios_fluxos = cube.nunique_by("formulario", "fluxo").reset_index()
         formularios_fluxos.columns = ["formulario", "qtd_fluxos"]
         formularios_fluxos = formularios_fluxos.sort_values("qtd_fluxos", ascending=False).head(20)
         
@@ -206,14 +212,14 @@ def _create_formularios_mais_usados_chart(df):
         print(f"Erro ao criar gráfico de formulários mais usados: {e}")
         return _create_empty_figure("Erro ao processar dados")
 
-def _create_complexidade_formularios_chart(df):
+def _create_complexidade_formularios_chart(cube):
     """Gráfico de barras horizontais - Formulários que Utilizados Mais Campos"""
-    if "formulario" not in df.columns or "nomeCampo" not in df.columns:
+    if not cube.has("formulario") or not cube.has("nomeCampo"):
         return _create_empty_figure("Dados de formulários ou campos não disponíveis")
     
     try:
         # Contar campos únicos por formulário
-        comp = df.groupby("formulario")["nomeCampo"].nunique().reset_index(name="qtd_campos")
+        comp = cube.distinct_by("formulario")[["formulario", "distintos"]].rename(columns={"distintos": "qtd_campos"})
         comp = comp.sort_values("qtd_campos", ascending=False).head(20)
         
         # Truncar nomes longos para melhor visualização (máximo 50 caracteres)
@@ -301,156 +307,65 @@ def _create_complexidade_formularios_chart(df):
         print(f"Erro ao criar gráfico de complexidade: {e}")
         return _create_empty_figure("Erro ao processar dados")
 
-def _create_formularios_utilizados_table(df):
-    """Criar tabela de ranking de formulários por uso em fluxos x quantidade de campos"""
-    if "formulario" not in df.columns or "fluxo" not in df.columns or "nomeCampo" not in df.columns:
-        return html.Div("Nenhum dado disponível", style={"padding": "20px", "textAlign": "center", "color": "#6c757d"})
+def _create_formularios_utilizados_table(filters):
+    """Tabela de ranking de formulários por uso em fluxos x quantidade de campos"""
+    cube = filtered_cube(CSV_PATH,
+                         filters.get("ano"), 
+                         filters.get("fluxo"), 
+                         filters.get("servico"), 
+                         filters.get("formulario"))
+    colunas = ["Ranking", "Formulário", "Fluxos Usados", "Campos", "% de contribuição"]
+    if cube.empty or not cube.has("formulario") or not cube.has("fluxo") or not cube.has("nomeCampo"):
+        return pd.DataFrame(columns=colunas), "Nenhum dado disponível"
     
-    try:
-        # Contar fluxos únicos por formulário
-        form_flux_counts = df.groupby("formulario")["fluxo"].nunique().reset_index(name="fluxos_usados")
-        
-        # Contar campos únicos por formulário
-        form_campos_counts = df.groupby("formulario")["nomeCampo"].nunique().reset_index(name="campos")
-        
-        # Fazer merge
-        ranking_df = pd.merge(form_flux_counts, form_campos_counts, on="formulario")
-        
-        # Calcular % de contribuição (baseado na soma de fluxos_usados * campos)
-        total_contribuicao = (ranking_df["fluxos_usados"] * ranking_df["campos"]).sum()
-        ranking_df["pct_contribuicao"] = ((ranking_df["fluxos_usados"] * ranking_df["campos"]) / total_contribuicao * 100).round(2)
-        
-        # Ordenar por contribuição (descendente)
-        ranking_df = ranking_df.sort_values("pct_contribuicao", ascending=False)
-        
-        # Adicionar ranking
-        ranking_df.insert(0, "ranking", range(1, len(ranking_df) + 1))
-        
-        # Renomear colunas
-        ranking_df.columns = ["Ranking", "Formulário", "Fluxos Usados", "Campos", "% de contribuição"]
-        
-        # Formatar % de contribuição
-        ranking_df["% de contribuição"] = ranking_df["% de contribuição"].apply(lambda x: f"{x:.2f}%")
-        
-        # Criar tabela estilizada com estilo similar à overview
-        header_style = {
-            "backgroundColor": "#1e3a5f",
-            "color": "white",
-            "padding": "12px 16px",
-            "position": "sticky",
-            "top": 0,
-            "zIndex": 10,
-            "fontWeight": "bold",
-            "fontSize": "13px",
-            "textAlign": "center",
-            "border": "none",
-            "whiteSpace": "nowrap"
-        }
-        
-        header_cells = [
-            html.Th("Ranking", style={**header_style}),
-            html.Th("Formulário", style={**header_style, "textAlign": "left"}),
-            html.Th("Fluxos Usados", style=header_style),
-            html.Th("Campos", style=header_style),
-            html.Th("% Contribuição", style=header_style)
-        ]
-        
-        header = html.Thead([html.Tr(header_cells)], style={"position": "sticky", "top": 0, "zIndex": 10})
-        
-        body_rows = []
-        cell_style = {
-            "padding": "12px 16px",
-            "border": "1px solid #dee2e6",
-            "fontSize": "13px",
-            "color": "#212529",
-            "whiteSpace": "nowrap",
-            "overflow": "hidden",
-            "textOverflow": "ellipsis"
-        }
-        
-        for idx, row in ranking_df.head(20).iterrows():
-            formulario_text = str(row['Formulário'])
-            if len(formulario_text) > 60:
-                formulario_text = formulario_text[:57] + "..."
-            
-            body_rows.append(
-                html.Tr([
-                    html.Td(str(int(row['Ranking'])), style={**cell_style, "textAlign": "center"}),
-                    html.Td(formulario_text, style={**cell_style, "maxWidth": "400px"}),
-                    html.Td(str(int(row['Fluxos Usados'])), style={**cell_style, "textAlign": "center"}),
-                    html.Td(str(int(row['Campos'])), style={**cell_style, "textAlign": "center"}),
-                    html.Td(row['% de contribuição'], style={**cell_style, "textAlign": "center"})
-                ], style={
-                    "backgroundColor": "#ffffff" if idx % 2 == 0 else "#f8f9fa",
-                    "borderBottom": "1px solid #dee2e6"
-                })
-            )
-        
-        table = dbc.Table([
-            header,
-            html.Tbody(body_rows)
-        ], bordered=False, hover=True, responsive=True, striped=False, 
-        style={
-            "marginBottom": 0,
-            "fontSize": "13px",
-            "width": "100%",
-            "borderCollapse": "separate",
-            "borderSpacing": 0,
-            "borderRadius": "8px",
-            "overflow": "hidden"
-        })
-        
-        tabela_com_scroll = html.Div(
-            table,
-            style={
-                "maxHeight": "600px",
-                "overflowY": "auto",
-                "overflowX": "auto",
-                "border": "1px solid #dee2e6",
-                "borderRadius": "8px",
-                "display": "block",
-                "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"
-            }
-        )
-        
-        return tabela_com_scroll
-    except Exception as e:
-        print(f"Erro ao criar tabela de formulários utilizados: {e}")
-        import traceback
-        traceback.print_exc()
-        return html.Div(f"Erro ao processar dados: {str(e)}", style={"padding": "20px", "textAlign": "center", "color": "#dc3545"})
+    # Contar fluxos únicos por formulário
+    form_flux_counts = cube.nunique_by("formulario", "fluxo").reset_index(name="fluxos_usados")
+    
+    # Contar campos únicos por formulário
+    form_campos_counts = cube.distinct_by("formulario")[["formulario", "distintos"]].rename(columns={"distintos": "campos"})
+    
+    # Fazer merge
+    ranking_df = pd.merge(form_flux_counts, form_campos_counts, on="formulario")
+    ranking_df["formulario"] = ranking_df["formulario"].astype(str)
+    
+    # Calcular % de contribuição (baseado na soma de fluxos_usados * campos)
+    total_contribuicao = (ranking_df["fluxos_usados"] * ranking_df["campos"]).sum()
+    ranking_df["pct_contribuicao"] = ((ranking_df["fluxos_usados"] * ranking_df["campos"]) / total_contribuicao * 100).round(2)
+    
+    # Ordenar por contribuição (descendente)
+    ranking_df = ranking_df.sort_values("pct_contribuicao", ascending=False)
+    
+    # Adicionar ranking
+    ranking_df.insert(0, "ranking", range(1, len(ranking_df) + 1))
+    
+    # Renomear colunas (o % é formatado pela coluna da tabela, o valor continua numérico)
+    ranking_df.columns = colunas
+    
+    return ranking_df.reset_index(drop=True), f"{len(ranking_df)} formulários"
 
-def _create_analise_fluxo_complexidade_chart(df):
+def _create_analise_fluxo_complexidade_chart(cube):
     """Gráfico de scatter plot - Análise de Risco vs. Complexidade dos Fluxos"""
-    if "fluxo" not in df.columns or "formulario" not in df.columns or "nomeCampo" not in df.columns:
+    if not cube.has("fluxo") or not cube.has("formulario") or not cube.has("nomeCampo"):
         return _create_empty_figure("Dados não disponíveis")
     
     try:
         # Calcular complexidade: média de campos por formulário por fluxo
-        fluxo_complexidade = df.groupby(["fluxo", "formulario"])["nomeCampo"].nunique().reset_index()
-        fluxo_complexidade = fluxo_complexidade.groupby("fluxo")["nomeCampo"].mean().reset_index(name="media_campos_por_formulario")
-        
-        # Calcular quantidade total de campos por fluxo (para o eixo Y)
-        fluxo_qtd_campos = df.groupby("fluxo")["nomeCampo"].nunique().reset_index(name="qtd_campos_por_fluxo")
-        
-        # OTIMIZAÇÃO: Usar coluna is_padronizado já processada
-        df_work = df.copy()
-        # is_padronizado já existe no DataFrame processado
-        
-        # Calcular % de padronização por fluxo (baseado em campos únicos)
-        percentuais_fluxos = []
-        for fluxo in df_work['fluxo'].unique():
-            df_fluxo = df_work[df_work['fluxo'] == fluxo]
-            total_campos_unicos = df_fluxo['nomeCampo'].nunique()
-            if total_campos_unicos > 0:
-                campos_padronizados_unicos = df_fluxo[df_fluxo['is_padronizado'] == 1]['nomeCampo'].nunique()
-                pct_fluxo = (campos_padronizados_unicos / total_campos_unicos) * 100
-                percentuais_fluxos.append({'fluxo': fluxo, 'pct_padronizacao': pct_fluxo})
-        
-        fluxo_padronizacao = pd.DataFrame(percentuais_fluxos)
+        fluxo_complexidade = cube.distinct_by(["fluxo", "formulario"])
+        fluxo_complexidade = fluxo_complexidade.groupby("fluxo")["distintos"].mean().reset_index(name="media_campos_por_formulario")
+        
+        # Quantidade total de campos por fluxo (eixo Y) e % de padronização (campos únicos)
+        campos_fluxo = cube.distinct_by("fluxo")
+        fluxo_qtd_campos = campos_fluxo[["fluxo", "distintos"]].rename(columns={"distintos": "qtd_campos_por_fluxo"})
+        
+        com_campos = campos_fluxo[campos_fluxo["distintos"] > 0]
+        padronizados = com_campos["padronizados"] if "padronizados" in com_campos.columns else 0
+        fluxo_padronizacao = pd.DataFrame({
+            "fluxo": com_campos["fluxo"],
+            "pct_padronizacao": padronizados / com_campos["distintos"] * 100
+        })
         
         # Contar número de formulários por fluxo (para tamanho dos pontos)
-        fluxo_num_formularios = df.groupby("fluxo")["formulario"].nunique().reset_index(name="num_formularios")
+        fluxo_num_formularios = cube.nunique_by("fluxo", "formulario").reset_index(name="num_formularios")
         
         # Fazer merge de todos os dados
         analise_df = pd.merge(fluxo_complexidade, fluxo_qtd_campos, on="fluxo")
@@ -1,12 +1,12 @@
 from dash import Input, Output, callback_context, State
-from dash import html, dcc
+from dash import dcc
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 import json
-import dash_bootstrap_components as dbc
-from src.utils.data_loader import stream_filtered_df
-from src.utils.data_processor import calculate_kpis, prepare_chart_data
+from src.utils.data_loader import stream_filtered_df, filtered_cube, cached_figure
+from src.utils.tab_results import tab_results
+from src.callbacks.table_callbacks import register_paged_table
 import os
 from src.pages.overview import overview_layout
 from src.pages.fluxos import fluxos_layout  
@@ -93,7 +93,6 @@ def register_callbacks(app):
         Output("fluxo-por-mes", "figure"),
         Output("formulario-por-servico", "figure"),
         Output("servico-por-fluxo", "figure"),
-        Output("tabela-detalhada", "children"),
         Input("filtered-data-store", "data"),
         prevent_initial_call=False,
         allow_duplicate=True
@@ -101,55 +100,62 @@ def register_callbacks(app):
     def update_overview_from_store(filtered_data_json):
         if filtered_data_json is None:
             empty_fig = _create_empty_figure("Nenhum dado disponível")
-            return "0", "0", "0", "0", empty_fig, empty_fig, empty_fig, html.Div("Nenhum dado disponível")
+            return "0", "0", "0", "0", empty_fig, empty_fig, empty_fig
 
-        # Busca dados diretamente do cache usando os filtros
-        filters = filtered_data_json
-        df = stream_filtered_df(CSV_PATH,
-                              filters.get("ano"), 
-                              filters.get("fluxo"), 
-                              filters.get("servico"), 
-                              filters.get("formulario"))
-        
-        if df.empty:
-            empty_fig = _create_empty_figure("Nenhum dado disponível")
-            return "0", "0", "0", "0", empty_fig, empty_fig, empty_fig, html.Div("Nenhum dado disponível")
-        
         try:
-            # OTIMIZAÇÃO: Calcular KPIs usando função centralizada (muito mais rápido)
-            kpis = calculate_kpis(df)
-            
-            # OTIMIZAÇÃO: Preparar dados para gráficos (amostragem se necessário)
-            df_charts = prepare_chart_data(df, max_rows=50000)
-            
-            # Criar gráficos usando dados já processados
-            fig_fluxo_mes = _create_fluxo_por_mes_chart(df_charts)
-            fig_formulario_servico = _create_formulario_por_servico_chart(df_charts)
-            fig_servico_fluxo = _create_servico_por_fluxo_chart(df_charts)
-            
-            # OTIMIZAÇÃO: Limitar dados da tabela para melhor performance
-            tabela = _create_detailed_table(df_charts.head(1000))  # Limitar a 1000 linhas
-            
-            return (str(kpis['qtd_fluxos']), str(kpis['qtd_servicos']), str(kpis['qtd_formularios']), 
-                   str(kpis['qtd_etapas']), fig_fluxo_mes, fig_formulario_servico, 
-                   fig_servico_fluxo, tabela)
+            # OTIMIZAÇÃO: Resultado reaproveitado ao voltar para a aba com os mesmos filtros
+            return tab_results.get("visao-geral", filtered_data_json)
                    
         except Exception as e:
             print(f"Erro no callback: {e}")
             import traceback
             traceback.print_exc()
             empty_fig = _create_empty_figure("Erro ao carregar dados")
-            return "0", "0", "0", "0", empty_fig, empty_fig, empty_fig, html.Div(f"Erro: {str(e)}")
+            return "0", "0", "0", "0", empty_fig, empty_fig, empty_fig
+
+    tab_results.register("visao-geral", CSV_PATH, _compute_overview)
+
+    # OTIMIZAÇÃO: Tabela detalhada paginada no servidor (só a página visível vai ao navegador)
+    register_paged_table(app, "tabela-detalhada", CSV_PATH, _create_detailed_table)
+
+
+def _compute_overview(filters):
+    """Saídas da aba Visão Geral para os filtros (KPIs e gráficos)"""
+    # Busca o cubo de métricas pré-agregadas já restrito aos filtros
+    cube = filtered_cube(CSV_PATH,
+                         filters.get("ano"), 
+                         filters.get("fluxo"), 
+                         filters.get("servico"), 
+                         filters.get("formulario"))
+    
+    if cube.empty:
+        empty_fig = _create_empty_figure("Nenhum dado disponível")
+        return "0", "0", "0", "0", empty_fig, empty_fig, empty_fig
+    
+    # OTIMIZAÇÃO: KPIs e gráficos lidos do cubo (sem reagrupar as linhas brutas)
+    kpis = cube.kpis()
+    
+    # OTIMIZAÇÃO: Figuras servidas do cache de figuras (por gráfico, versão dos dados e filtros)
+    fig_fluxo_mes = cached_figure(CSV_PATH, "overview.fluxo_por_mes", filters,
+                                  lambda: _create_fluxo_por_mes_chart(cube))
+    fig_formulario_servico = cached_figure(CSV_PATH, "overview.formulario_por_servico", filters,
+                                           lambda: _create_formulario_por_servico_chart(cube))
+    fig_servico_fluxo = cached_figure(CSV_PATH, "overview.servico_por_fluxo", filters,
+                                      lambda: _create_servico_por_fluxo_chart(cube))
+    
+    return (str(kpis['qtd_fluxos']), str(kpis['qtd_servicos']), str(kpis['qtd_formularios']), 
+           str(kpis['qtd_etapas']), fig_fluxo_mes, fig_formulario_servico, 
+           fig_servico_fluxo)
 
 
-def _create_fluxo_por_mes_chart(df):
+def _create_fluxo_por_mes_chart(cube):
     """Gráfico de barras horizontais - Top fluxos ordenados do maior para o menor"""
-    if 'fluxo' not in df.columns:
+    if not cube.has('fluxo'):
         return _create_empty_figure("Dados não disponíveis")
     
     try:
-        # Agrupar por fluxo e contar registros, ordenar do maior para o menor
-        fluxos_contagem = df.groupby('fluxo').size().sort_values(ascending=False).head(20)
+        # Contagem de registros por fluxo (pré-agregada no cubo), do maior para o menor
+        fluxos_contagem = cube.size_by('fluxo').sort_values(ascending=False).head(20)
         
         if fluxos_contagem.empty:
             return _create_empty_figure("Nenhum dado disponível")
@@ -245,16 +251,14 @@ def _create_fluxo_por_mes_chart(df):
         return _create_empty_figure("Erro ao processar dados")
 
 
-def _create_formulario_por_servico_chart(df):
+def _create_formulario_por_servico_chart(cube):
     """Gráfico de barras horizontais - Contagem de formulário por serviço"""
-    if 'servico' not in df.columns or 'formulario' not in df.columns:
+    if not cube.has('servico') or not cube.has('formulario'):
         return _create_empty_figure("Dados não disponíveis")
     
     try:
-        # Agrupar por serviço e contar formulários únicos
-        contagem = df.groupby('servico').agg({
-            'formulario': 'nunique'
-        }).reset_index()
+        # Formulários únicos por serviço
+        contagem = cube.nunique_by('servico', 'formulario').reset_index()
         contagem.columns = ['servico', 'quantidade']
         
         # Ordenar por contagem (decrescente) e pegar top 20
@@ -370,16 +374,14 @@ def _create_formulario_por_servico_chart(df):
         return _create_empty_figure("Erro ao processar dados")
 
 
-def _create_servico_por_fluxo_chart(df):
+def _create_servico_por_fluxo_chart(cube):
     """Gráfico de barras horizontais - Contagem de serviço por fluxo"""
-    if 'fluxo' not in df.columns or 'servico' not in df.columns:
+    if not cube.has('fluxo') or not cube.has('servico'):
         return _create_empty_figure("Dados não disponíveis")
     
     try:
-        # Agrupar por fluxo e contar serviços únicos
-        contagem = df.groupby('fluxo').agg({
-            'servico': 'nunique'
-        }).reset_index()
+        # Serviços únicos por fluxo
+        contagem = cube.nunique_by('fluxo', 'servico').reset_index()
         contagem.columns = ['fluxo', 'contagem_servico']
         
         # Ordenar por contagem (decrescente) e pegar top 20
@@ -495,167 +497,41 @@ def _create_servico_por_fluxo_chart(df):
         return _create_empty_figure("Erro ao processar dados")
 
 
-def _create_detailed_table(df):
-    """Criar tabela detalhada com: Fluxo, Qtd Srv por Fluxo, Serviço, Etapa (se disponível), Formulário"""
+def _create_detailed_table(filters):
+    """Tabela detalhada com: Fluxo, Qtd Srv por Fluxo, Serviço, Etapa (se disponível), Formulário"""
+    # A tabela detalhada lista combinações (incluindo etapa), então usa as linhas filtradas
+    df = stream_filtered_df(CSV_PATH,
+                          filters.get("ano"), 
+                          filters.get("fluxo"), 
+                          filters.get("servico"), 
+                          filters.get("formulario"))
     if df.empty or 'fluxo' not in df.columns:
-        return html.Div("Nenhum dado disponível", style={"padding": "20px", "textAlign": "center", "color": "#6c757d"})
+        return pd.DataFrame(columns=['Fluxo', 'Qtd Srv por Fluxo', 'Serviço', 'Formulário']), "Nenhum dado disponível"
     
-    try:
-        # Determinar colunas para agrupar (etapa é opcional)
-        groupby_cols = ['fluxo', 'servico', 'formulario']
-        if 'etapa' in df.columns:
-            groupby_cols.insert(2, 'etapa')
-        
-        # Agrupar dados para a tabela
-        df_table = df.groupby(groupby_cols).size().reset_index(name='qtd')
-        
-        # Calcular quantidade de serviços por fluxo
-        servicos_por_fluxo = df.groupby('fluxo')['servico'].nunique().reset_index()
-        servicos_por_fluxo.columns = ['fluxo', 'qtd_srv_fluxo']
-        
-        # Mesclar com dados principais
-        df_table = df_table.merge(servicos_por_fluxo, on='fluxo', how='left')
-        
-        # Reordenar colunas (etapa é opcional)
-        table_cols = ['fluxo', 'qtd_srv_fluxo', 'servico']
-        if 'etapa' in df_table.columns:
-            table_cols.append('etapa')
-        table_cols.append('formulario')
-        df_table = df_table[table_cols]
-        
-        # Ordenar por fluxo
-        df_table = df_table.sort_values('fluxo')
-        
-        # OTIMIZAÇÃO: Limitar número de linhas processadas para melhor performance
-        MAX_LINHAS_VISIVEIS = 15
-        MAX_LINHAS_PROCESSAR = 200  # Processar no máximo 200 linhas (depois agrupar)
-        
-        # Calcular total antes de limitar
-        total_servicos = df['servico'].nunique()
-        
-        # Limitar dados processados antes de criar HTML
-        df_table_limited = df_table.head(MAX_LINHAS_PROCESSAR)
-        
-        # Criar tabela usando dbc.Table
-        table_data = []
-        
-        # Header com estilo azul escuro e bordas arredondadas
-        header_style = {
-            "backgroundColor": "#1e3a5f",  # Azul escuro similar à imagem
-            "color": "white",
-            "padding": "14px 16px",
-            "position": "sticky",
-            "top": 0,
-            "zIndex": 10,
-            "fontWeight": "bold",
-            "fontSize": "15px",
-            "textAlign": "left",
-            "border": "none"
-        }
-        
-        header_cells = [
-            html.Th("Fluxo", style=header_style),
-            html.Th("Qtd Srv por Fluxo", style={**header_style, "textAlign": "center"}),
-            html.Th("Serviço", style=header_style)
-        ]
-        if 'etapa' in df_table.columns:
-            header_cells.append(html.Th("Etapa", style=header_style))
-        header_cells.append(html.Th("Formulário", style=header_style))
-        
-        header = html.Thead([
-            html.Tr(header_cells)
-        ], style={"position": "sticky", "top": 0, "zIndex": 10})
-        
-        # Body com melhor estilo e tamanho de texto
-        body_rows = []
-        
-        cell_style = {
-            "padding": "12px 16px",
-            "border": "1px solid #dee2e6",
-            "fontSize": "14px",
-            "color": "#212529"
-        }
-        
-        for idx, row in df_table_limited.iterrows():
-            row_cells = [
-                html.Td(str(row['fluxo']), style={**cell_style}),
-                html.Td(str(int(row['qtd_srv_fluxo'])), style={**cell_style, "textAlign": "center"}),
-                html.Td(str(row['servico']), style={**cell_style})
-            ]
-            if 'etapa' in df_table.columns:
-                row_cells.append(html.Td(str(row['etapa']) if pd.notna(row['etapa']) else "", style={**cell_style}))
-            row_cells.append(html.Td(str(row['formulario']) if pd.notna(row['formulario']) else "", style={**cell_style}))
-            
-            body_rows.append(
-                html.Tr(row_cells, style={
-                    "backgroundColor": "#ffffff" if idx % 2 == 0 else "#f8f9fa",
-                    "borderBottom": "1px solid #dee2e6"
-                })
-            )
-        
-        # Footer com total
-        footer_style = {
-            "padding": "14px 16px",
-            "border": "1px solid #dee2e6",
-            "backgroundColor": "#e9ecef",
-            "fontWeight": "bold",
-            "fontSize": "15px"
-        }
-        
-        footer_cells = [
-            html.Td("Total", style={**footer_style}),
-            html.Td(str(total_servicos), style={**footer_style, "textAlign": "center"}),
-            html.Td("", style={**footer_style})
-        ]
-        if 'etapa' in df_table.columns:
-            footer_cells.append(html.Td("", style={**footer_style}))
-        footer_cells.append(html.Td("", style={**footer_style}))
-        
-        footer = html.Tfoot([
-            html.Tr(footer_cells)
-        ])
-        
-        table = dbc.Table([
-            header,
-            html.Tbody(body_rows),
-            footer
-        ], bordered=False, hover=True, responsive=True, striped=False, 
-        style={
-            "marginBottom": 0,
-            "fontSize": "14px",
-            "width": "100%",
-            "borderCollapse": "separate",
-            "borderSpacing": 0,
-            "borderRadius": "8px",
-            "overflow": "hidden"
-        })
-        
-        # Calcular altura aproximada: altura do header (50px) + altura de cada linha (48px) + footer (50px)
-        # Mostrar MAX_LINHAS_VISIVEIS linhas + header + footer
-        altura_linha = 48
-        altura_header = 50
-        altura_footer = 50
-        altura_total = altura_header + (MAX_LINHAS_VISIVEIS * altura_linha) + altura_footer
-        
-        # Envolver a tabela em uma div com altura fixa e scroll
-        # Usar display block para melhor controle do scroll
-        tabela_com_scroll = html.Div(
-            table,
-            style={
-                "maxHeight": f"{altura_total}px",
-                "overflowY": "auto",
-                "overflowX": "auto",
-                "border": "1px solid #dee2e6",
-                "borderRadius": "8px",
-                "display": "block",
-                "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"
-            }
-        )
-        
-        return tabela_com_scroll
-        
-    except Exception as e:
-        print(f"Erro ao criar tabela detalhada: {e}")
-        import traceback
-        traceback.print_exc()
-        return html.Div(f"Erro ao criar tabela: {str(e)}", style={"padding": "20px", "color": "#dc3545"})
+    # Determinar colunas para agrupar (etapa é opcional)
+    groupby_cols = ['fluxo', 'servico', 'formulario']
+    if 'etapa' in df.columns:
+        groupby_cols.insert(2, 'etapa')
+    
+    # Agrupar dados para a tabela (todas as combinações; a paginação fica no servidor)
+    df_table = df.groupby(groupby_cols, observed=True).size().reset_index(name='qtd')
+    
+    # Calcular quantidade de serviços por fluxo
+    servicos_por_fluxo = df.groupby('fluxo', observed=True)['servico'].nunique().reset_index()
+    servicos_por_fluxo.columns = ['fluxo', 'qtd_srv_fluxo']
+    
+    # Mesclar com dados principais
+    df_table = df_table.merge(servicos_por_fluxo, on='fluxo', how='left')
+    
+    # Reordenar colunas (etapa é opcional) e ordenar por fluxo
+    table_cols = ['fluxo', 'qtd_srv_fluxo', 'servico'] + (['etapa'] if 'etapa' in df_table.columns else []) + ['formulario']
+    df_table = df_table[table_cols].sort_values('fluxo')
+    
+    # Texto simples (categorias ordenam pelo código, não alfabeticamente)
+    for col in table_cols:
+        if col != 'qtd_srv_fluxo':
+            df_table[col] = df_table[col].astype(str).where(df_table[col].notna(), "")
+    
+    df_table.columns = ['Fluxo', 'Qtd Srv por Fluxo', 'Serviço'] + (['Etapa'] if 'etapa' in table_cols else []) + ['Formulário']
+    resumo = f"Total: {df['servico'].nunique()} serviços em {len(df_table):,} combinações".replace(",", ".")
+    return df_table.reset_index(drop=True), resumo
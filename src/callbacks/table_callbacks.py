@@ -0,0 +1,52 @@
+from dash import Input, Output, callback_context
+from src.utils.data_loader import cached_table
+from src.utils.paged_table import page_table, table_columns
+
+def register_paged_table(app, table_id, csv_path, build_table, percentuais=None):
+    """
+    Registra o callback de uma tabela criada com create_paged_table.
+    A tabela completa é montada uma vez por filtros (cache de tabelas); trocar
+    de página, ordenar ou filtrar só recorta o DataFrame em memória.
+
+    Args:
+        app: Instância da aplicação Dash
+        table_id: ID do DataTable
+        csv_path: Caminho do CSV usado pelos callbacks
+        build_table: Função que recebe os filtros e retorna (DataFrame, resumo)
+        percentuais: {coluna: casas decimais} das colunas exibidas como percentual
+    """
+    @app.callback(
+        Output(table_id, "data"),
+        Output(table_id, "columns"),
+        Output(table_id, "page_count"),
+        Output(table_id, "page_current"),
+        Output(f"{table_id}-resumo", "children"),
+        Input("filtered-data-store", "data"),
+        Input(table_id, "page_current"),
+        Input(table_id, "page_size"),
+        Input(table_id, "sort_by"),
+        Input(table_id, "filter_query"),
+        prevent_initial_call=False
+    )
+    def update_paged_table(filtered_data_json, page_current, page_size, sort_by, filter_query):
+        filters = filtered_data_json or {}
+
+        # Filtros do painel, filtro ou ordenação da tabela mudaram: volta para a primeira página
+        disparo = callback_context.triggered[0]["prop_id"] if callback_context.triggered else ""
+        if disparo != f"{table_id}.page_current" or page_current is None:
+            page_current = 0
+
+        try:
+            tabela, resumo = cached_table(csv_path, table_id, filters, lambda: build_table(filters))
+            data, page_count, total = page_table(tabela, page_current, page_size, sort_by, filter_query)
+            if total == 0 and not resumo:
+                resumo = "Nenhum dado disponível"
+            return data, table_columns(tabela, percentuais), page_count, min(page_current, page_count - 1), resumo
+
+        except Exception as e:
+            print(f"Erro ao atualizar tabela {table_id}: {e}")
+            import traceback
+            traceback.print_exc()
+            return [], [], 1, 0, f"Erro ao carregar dados: {str(e)}"
+
+    return update_paged_table
@@ -11,7 +11,8 @@
 import os
 import json
 import logging
-from typing import Dict, List, Optional
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 
 # Importações para análise de dados
@@ -22,7 +23,16 @@ from openai import OpenAI
 from dotenv import load_dotenv
 
 # Importações do projeto para acesso aos dados
-from src.utils.data_cache import load_data_once, get_filtered_data
+from src.utils.data_cache import get_filtered_data, get_data_version
+from src.utils.data_analysis import get_data_analysis
+from src.utils.entity_index import get_entity_index, normalizar_texto
+from src.utils.retrieval_index import get_retrieval_index
+from src.utils.response_cache import ResponseCache
+from src.utils.query_engine import answer_question
+from src.utils.session_store import create_session_store
+from src.utils.single_flight import SingleFlight
+from src.utils.phase_stats import PhaseStats
+from src.utils.prompt_builder import Secao, build_prompt, render_sections
 
 # =============================================================================
 # CONFIGURAÇÃO E INICIALIZAÇÃO
@@ -40,330 +50,135 @@ logger = logging.getLogger(__name__)
 
 # Inicializa cliente OpenAI se a chave estiver disponível
 # Se não houver chave, o sistema usará fallback (modo sem OpenAI)
+# OPENAI_BASE_URL permite apontar para um servidor compatível (ex.: scripts/mock_openai_server.py)
 openai_api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=openai_api_key) if openai_api_key else None
+openai_base_url = os.getenv("OPENAI_BASE_URL") or None
+client = OpenAI(api_key=openai_api_key, base_url=openai_base_url) if openai_api_key else None
 
 if not client:
     logger.warning("⚠️ OpenAI API Key não configurada. Sistema funcionará em modo fallback.")
 
-# Memória de contexto por sessão (armazena histórico de conversas)
-# Estrutura: {session_id: [lista de mensagens]}
-contexto_sessoes: Dict[str, List[Dict]] = {}
-
 # Caminho do arquivo CSV com os dados
 CSV_PATH = "data/meu_arquivo.csv"
 
 # Limite máximo de mensagens no histórico por sessão
 MAX_HISTORICO_MENSAGENS = 20
 
+# Orçamento de tokens do prompt (contexto + histórico + pergunta, sem a resposta)
+# e fração máxima desse orçamento usada pelo histórico da sessão
+PROMPT_MAX_TOKENS = int(os.getenv("CHATBOT_PROMPT_MAX_TOKENS", "2000"))
+PROMPT_FRACAO_HISTORICO = float(os.getenv("CHATBOT_PROMPT_FRACAO_HISTORICO", "0.3"))
+
+# Fichas do catálogo recuperadas por pergunta (máximo) e similaridade mínima de cada uma
+RETRIEVAL_TOP_K = int(os.getenv("CHATBOT_RETRIEVAL_TOP_K", "8"))
+RETRIEVAL_SCORE_MINIMO = float(os.getenv("CHATBOT_RETRIEVAL_SCORE_MINIMO", "0.6"))
+
+# Memória de contexto por sessão (armazena histórico de conversas)
+# OTIMIZAÇÃO: sessões inativas expiram, o número de sessões e os bytes por sessão
+# são limitados; com CHATBOT_SESSION_BACKEND=sqlite o histórico é compartilhado
+# entre os workers do gunicorn (ver src/utils/session_store.py)
+contexto_sessoes = create_session_store(max_mensagens=MAX_HISTORICO_MENSAGENS)
+
+# Cache de respostas para perguntas repetidas (exatas ou quase iguais), por versão dos dados
+cache_respostas = ResponseCache(
+    max_entries=int(os.getenv("CHATBOT_CACHE_MAX_ENTRIES", "500")),
+    ttl=float(os.getenv("CHATBOT_CACHE_TTL", "3600")),
+    similaridade_minima=float(os.getenv("CHATBOT_CACHE_SIMILARIDADE", "0.8"))
+)
+
+# Perguntas iguais feitas ao mesmo tempo com as mesmas entradas do prompt (texto da pergunta,
+# histórico da sessão, dados específicos e versão dos dados; ver _chave_chamada) esperam
+# uma única chamada ao OpenAI; quem espera desiste após o timeout (s) e usa o fallback
+chamadas_em_andamento = SingleFlight(timeout=float(os.getenv("CHATBOT_SINGLEFLIGHT_TIMEOUT", "60")))
+
+# Tempo gasto em cada fase do atendimento (consulta estruturada, análise da pergunta,
+# montagem do prompt, chamada ao modelo); ver obter_metricas_fases
+metricas_fases = PhaseStats()
+
 # =============================================================================
 # FUNÇÕES DE ANÁLISE DE DADOS
 # =============================================================================
 
 def analisar_dados_csv() -> Dict:
     """
-    Analisa os dados do CSV para fornecer estatísticas detalhadas ao chatbot.
+    Retorna as estatísticas detalhadas dos dados para o chatbot.
     
-    Esta função realiza uma análise profunda:
-    - Estatísticas gerais e métricas
-    - Relacionamentos entre formulários, campos e fluxos
-    - Análise de uso e frequência
-    - Estatísticas de tempo e performance
-    - Distribuição de dados
+    A análise (estatísticas gerais, top 10 de formulários/campos/fluxos com
+    detalhes, médias e relacionamentos) é calculada uma vez por versão dos
+    dados e memoizada (ver src/utils/data_analysis.py); as mensagens do chat
+    não fazem trabalho sobre o DataFrame para obtê-la.
     
     Returns:
         Dict: Dicionário completo com estatísticas e análises dos dados
     """
     try:
-        # Carrega o DataFrame completo usando o cache
-        df = load_data_once(CSV_PATH)
-        
-        # Verifica se o DataFrame está vazio
-        if df.empty:
+        analise = get_data_analysis(CSV_PATH)
+        if not analise:
             logger.warning("DataFrame vazio ao analisar dados CSV")
-            return {}
-        
-        # =====================================================================
-        # ESTATÍSTICAS GERAIS
-        # =====================================================================
-        total_formularios = df['formulario'].nunique() if 'formulario' in df.columns else 0
-        total_campos = df['nomeCampo'].nunique() if 'nomeCampo' in df.columns else 0
-        total_fluxos = df['fluxo'].nunique() if 'fluxo' in df.columns else 0
-        total_servicos = df['servico'].nunique() if 'servico' in df.columns else 0
-        total_registros = len(df)
-        
-        # =====================================================================
-        # ANÁLISES DE USO E FREQUÊNCIA
-        # =====================================================================
-        # Formulários mais usados com detalhes
-        formularios_mais_usados = {}
-        formularios_detalhes = {}
-        if 'formulario' in df.columns:
-            formularios_group = df.groupby('formulario')
-            formularios_mais_usados = (
-                formularios_group.size()
-                .sort_values(ascending=False)
-                .head(10)
-                .to_dict()
-            )
-            # Detalhes: campos por formulário
-            for form in formularios_mais_usados.keys():
-                campos_no_form = df[df['formulario'] == form]['nomeCampo'].nunique()
-                formularios_detalhes[form] = {
-                    'uso': formularios_mais_usados[form],
-                    'campos': campos_no_form
-                }
-        
-        # Campos mais comuns com detalhes
-        campos_mais_comuns = {}
-        campos_detalhes = {}
-        if 'nomeCampo' in df.columns:
-            campos_group = df.groupby('nomeCampo')
-            campos_mais_comuns = (
-                campos_group.size()
-                .sort_values(ascending=False)
-                .head(10)
-                .to_dict()
-            )
-            # Detalhes: em quantos formulários cada campo aparece
-            for campo in campos_mais_comuns.keys():
-                formularios_com_campo = df[df['nomeCampo'] == campo]['formulario'].nunique()
-                campos_detalhes[campo] = {
-                    'uso': campos_mais_comuns[campo],
-                    'formularios': formularios_com_campo
-                }
-        
-        # Fluxos mais ativos com detalhes
-        fluxos_mais_ativos = {}
-        fluxos_detalhes = {}
-        if 'fluxo' in df.columns:
-            fluxos_group = df.groupby('fluxo')
-            fluxos_mais_ativos = (
-                fluxos_group.size()
-                .sort_values(ascending=False)
-                .head(10)
-                .to_dict()
-            )
-            # Detalhes: formulários por fluxo
-            for fluxo in fluxos_mais_ativos.keys():
-                formularios_no_fluxo = df[df['fluxo'] == fluxo]['formulario'].nunique()
-                fluxos_detalhes[fluxo] = {
-                    'uso': fluxos_mais_ativos[fluxo],
-                    'formularios': formularios_no_fluxo
-                }
-        
-        # Serviços mais utilizados
-        servicos_mais_usados = {}
-        if 'servico' in df.columns:
-            servicos_mais_usados = (
-                df.groupby('servico')
-                .size()
-                .sort_values(ascending=False)
-                .head(10)
-                .to_dict()
-            )
-        
-        # =====================================================================
-        # MÉTRICAS E CÁLCULOS AVANÇADOS
-        # =====================================================================
-        # Média de campos por formulário
-        media_campos_por_formulario = 0
-        if total_formularios > 0 and 'formulario' in df.columns and 'nomeCampo' in df.columns:
-            campos_por_form = df.groupby('formulario')['nomeCampo'].nunique()
-            media_campos_por_formulario = round(campos_por_form.mean(), 2)
-        
-        # Média de formulários por fluxo
-        media_formularios_por_fluxo = 0
-        if total_fluxos > 0 and 'fluxo' in df.columns and 'formulario' in df.columns:
-            forms_por_fluxo = df.groupby('fluxo')['formulario'].nunique()
-            media_formularios_por_fluxo = round(forms_por_fluxo.mean(), 2)
-        
-        # =====================================================================
-        # ANÁLISE DE TEMPO E PERFORMANCE (se disponível)
-        # =====================================================================
-        tempo_medio = None
-        tempo_medio_inicio_fim = None
-        if 'tempoTotal' in df.columns:
-            tempo_medio = round(df['tempoTotal'].mean(), 2) if not df['tempoTotal'].isna().all() else None
-        if 'tempoInicioFim' in df.columns:
-            tempo_medio_inicio_fim = round(df['tempoInicioFim'].mean(), 2) if not df['tempoInicioFim'].isna().all() else None
-        
-        # =====================================================================
-        # ANÁLISE DE STATUS (se disponível)
-        # =====================================================================
-        status_distribuicao = {}
-        if 'status' in df.columns:
-            status_distribuicao = df['status'].value_counts().to_dict()
-        
-        # =====================================================================
-        # RELACIONAMENTOS E CORRELAÇÕES
-        # =====================================================================
-        # Formulário com mais campos
-        formulario_mais_campos = None
-        max_campos = 0
-        if 'formulario' in df.columns and 'nomeCampo' in df.columns:
-            campos_por_form = df.groupby('formulario')['nomeCampo'].nunique()
-            if not campos_por_form.empty:
-                formulario_mais_campos = campos_por_form.idxmax()
-                max_campos = int(campos_por_form.max())
-        
-        # Retorna dicionário completo com todas as análises
-        return {
-            "total_formularios": total_formularios,
-            "total_campos": total_campos,
-            "total_fluxos": total_fluxos,
-            "total_servicos": total_servicos,
-            "total_registros": total_registros,
-            "media_campos_por_formulario": media_campos_por_formulario,
-            "media_formularios_por_fluxo": media_formularios_por_fluxo,
-            "formularios_mais_usados": formularios_mais_usados,
-            "formularios_detalhes": formularios_detalhes,
-            "campos_mais_comuns": campos_mais_comuns,
-            "campos_detalhes": campos_detalhes,
-            "fluxos_mais_ativos": fluxos_mais_ativos,
-            "fluxos_detalhes": fluxos_detalhes,
-            "servicos_mais_usados": servicos_mais_usados,
-            "tempo_medio": tempo_medio,
-            "tempo_medio_inicio_fim": tempo_medio_inicio_fim,
-            "status_distribuicao": status_distribuicao,
-            "formulario_mais_campos": formulario_mais_campos,
-            "max_campos_no_formulario": max_campos
-        }
+        return analise
         
     except Exception as e:
         logger.error(f"Erro ao analisar dados CSV: {e}")
         return {}
 
 
+# Tipos de entidade buscados: (coluna, palavras-chave normalizadas, rótulo, plural, detalhe)
+_BUSCAS_ENTIDADE = [
+    ('formulario', ('formulario',), 'Formulário', 'formulário(s)', "contém {campos} campos únicos"),
+    ('nomeCampo', ('campo',), 'Campo', 'campo(s) único(s)', "aparece em {formularios} formulário(s)"),
+    ('fluxo', ('fluxo',), 'Fluxo', 'fluxo(s)', "utiliza {formularios} formulário(s)"),
+    ('servico', ('servico',), 'Serviço', 'serviço(s)', None),
+]
+
+
 def buscar_dados_especificos(pergunta: str, analise_dados: Optional[Dict] = None) -> Optional[str]:
     """
     Busca informações específicas nos dados baseado na pergunta do usuário.
     
     Esta função realiza busca inteligente:
-    - Busca por nome exato de formulários, campos, fluxos
-    - Busca parcial (contains)
+    - Encontra, em uma passada sobre a pergunta, todos os formulários, campos,
+      fluxos e serviços citados pelo nome (sem diferenciar acentos e maiúsculas)
+    - Prefere o nome mais longo citado (o mais específico) e, em empate, o mais usado
+    - Sem nome completo na pergunta, ranqueia correspondências parciais por tokens
     - Retorna informações detalhadas quando encontra
-    - Usa análise de dados para contexto adicional
+    
+    O índice de entidades é construído uma vez por versão dos dados
+    (ver src/utils/entity_index.py).
     
     Args:
         pergunta: Texto da pergunta do usuário
-        analise_dados: Dicionário opcional com análises já calculadas (para performance)
+        analise_dados: Não é mais necessário (os detalhes vêm do índice de entidades)
         
     Returns:
         Optional[str]: Resposta formatada com dados encontrados ou None
     """
     try:
-        # Carrega o DataFrame
-        df = load_data_once(CSV_PATH)
-        
-        if df.empty:
+        indice = get_entity_index(CSV_PATH)
+        if len(indice) == 0:
             return None
         
-        # Converte pergunta para minúsculas para busca case-insensitive
-        pergunta_lower = pergunta.lower()
-        
-        # Se não recebeu análise, calcula rapidamente
-        if analise_dados is None:
-            analise_dados = analisar_dados_csv()
-        
-        # =====================================================================
-        # BUSCA POR NOME ESPECÍFICO DE FORMULÁRIO
-        # =====================================================================
-        if 'formulario' in pergunta_lower or 'formulário' in pergunta_lower:
-            if 'formulario' in df.columns:
-                # Busca por nome exato ou parcial
-                formularios_disponiveis = df['formulario'].unique().tolist()
-                
-                # Tenta encontrar correspondência exata ou parcial
-                formulario_encontrado = None
-                for form in formularios_disponiveis:
-                    if form.lower() in pergunta_lower or pergunta_lower in form.lower():
-                        formulario_encontrado = form
-                        break
-                
-                if formulario_encontrado:
-                    # Retorna detalhes específicos do formulário
-                    detalhes = analise_dados.get('formularios_detalhes', {}).get(formulario_encontrado, {})
-                    campos = detalhes.get('campos', df[df['formulario'] == formulario_encontrado]['nomeCampo'].nunique())
-                    uso = detalhes.get('uso', len(df[df['formulario'] == formulario_encontrado]))
-                    
-                    return (
-                        f"Formulário '{formulario_encontrado}': "
-                        f"usado {uso} vezes, contém {campos} campos únicos."
-                    )
-                else:
-                    # Lista todos os formulários se não encontrou específico
-                    total = len(formularios_disponiveis)
-                    principais = ', '.join(formularios_disponiveis[:5])
-                    return f"Encontrei {total} formulário(s). Principais: {principais}"
-        
-        # =====================================================================
-        # BUSCA POR NOME ESPECÍFICO DE CAMPO
-        # =====================================================================
-        if 'campo' in pergunta_lower:
-            if 'nomeCampo' in df.columns:
-                campos_disponiveis = df['nomeCampo'].dropna().unique().tolist()
-                
-                # Busca por nome exato ou parcial
-                campo_encontrado = None
-                for campo in campos_disponiveis:
-                    if str(campo).lower() in pergunta_lower or pergunta_lower in str(campo).lower():
-                        campo_encontrado = campo
-                        break
-                
-                if campo_encontrado:
-                    # Retorna detalhes específicos do campo
-                    detalhes = analise_dados.get('campos_detalhes', {}).get(campo_encontrado, {})
-                    formularios = detalhes.get('formularios', df[df['nomeCampo'] == campo_encontrado]['formulario'].nunique())
-                    uso = detalhes.get('uso', len(df[df['nomeCampo'] == campo_encontrado]))
-                    
-                    return (
-                        f"Campo '{campo_encontrado}': "
-                        f"usado {uso} vezes, aparece em {formularios} formulário(s)."
-                    )
-                else:
-                    total = len(campos_disponiveis)
-                    principais = ', '.join([str(c) for c in campos_disponiveis[:5]])
-                    return f"Encontrei {total} campo(s) único(s). Principais: {principais}"
-        
-        # =====================================================================
-        # BUSCA POR NOME ESPECÍFICO DE FLUXO
-        # =====================================================================
-        if 'fluxo' in pergunta_lower:
-            if 'fluxo' in df.columns:
-                fluxos_disponiveis = df['fluxo'].dropna().unique().tolist()
-                
-                # Busca por nome exato ou parcial
-                fluxo_encontrado = None
-                for fluxo in fluxos_disponiveis:
-                    if str(fluxo).lower() in pergunta_lower or pergunta_lower in str(fluxo).lower():
-                        fluxo_encontrado = fluxo
-                        break
-                
-                if fluxo_encontrado:
-                    # Retorna detalhes específicos do fluxo
-                    detalhes = analise_dados.get('fluxos_detalhes', {}).get(fluxo_encontrado, {})
-                    formularios = detalhes.get('formularios', df[df['fluxo'] == fluxo_encontrado]['formulario'].nunique())
-                    uso = detalhes.get('uso', len(df[df['fluxo'] == fluxo_encontrado]))
-                    
-                    return (
-                        f"Fluxo '{fluxo_encontrado}': "
-                        f"usado {uso} vezes, utiliza {formularios} formulário(s)."
-                    )
-                else:
-                    total = len(fluxos_disponiveis)
-                    principais = ', '.join([str(f) for f in fluxos_disponiveis[:5]])
-                    return f"Encontrei {total} fluxo(s). Principais: {principais}"
-        
-        # =====================================================================
-        # BUSCA POR SERVIÇOS
-        # =====================================================================
-        if 'servico' in pergunta_lower or 'serviço' in pergunta_lower:
-            if 'servico' in df.columns:
-                servicos_disponiveis = df['servico'].dropna().unique().tolist()
-                total = len(servicos_disponiveis)
-                principais = ', '.join([str(s) for s in servicos_disponiveis[:5]])
-                return f"Encontrei {total} serviço(s). Principais: {principais}"
+        # Pergunta normalizada: "formulário" e "Formulario" casam com a mesma palavra-chave
+        pergunta_normalizada = normalizar_texto(pergunta)
+        
+        for tipo, palavras_chave, rotulo, plural, detalhe in _BUSCAS_ENTIDADE:
+            if not any(palavra in pergunta_normalizada for palavra in palavras_chave):
+                continue
+            if indice.count(tipo) == 0:
+                continue
+            
+            # Nome completo citado na pergunta; senão, a melhor correspondência parcial
+            encontradas = indice.find(pergunta, tipos=[tipo]) or indice.search_partial(pergunta, tipo, limite=1)
+            
+            if encontradas:
+                entidade = encontradas[0]
+                resposta = f"{rotulo} '{entidade['nome']}': usado {entidade['uso']} vezes"
+                if detalhe:
+                    resposta += ", " + detalhe.format(**entidade)
+                return resposta + "."
+            
+            # Lista os principais se não encontrou específico
+            principais = ', '.join(e['nome'] for e in indice.top(tipo, 5))
+            return f"Encontrei {indice.count(tipo)} {plural}. Principais: {principais}"
         
         return None
         
@@ -372,33 +187,70 @@ def buscar_dados_especificos(pergunta: str, analise_dados: Optional[Dict] = None
         return None
 
 
+def _fatos_pergunta(pergunta: str) -> List[str]:
+    """
+    Fichas de fatos do catálogo relevantes para a pergunta: primeiro as das
+    entidades citadas pelo nome exato, depois as mais parecidas com a pergunta
+    no índice de recuperação (TF-IDF de n-gramas de caracteres, sem chamadas
+    de rede; ver src/utils/retrieval_index.py).
+    
+    Args:
+        pergunta: Texto da pergunta do usuário
+        
+    Returns:
+        List[str]: Até RETRIEVAL_TOP_K fichas (vazia se nada relevante)
+    """
+    try:
+        indice = get_retrieval_index(CSV_PATH)
+        fichas = []
+        for entidade in get_entity_index(CSV_PATH).find(pergunta):
+            ficha = indice.card(entidade['tipo'], entidade['nome'])
+            if ficha and ficha not in fichas:
+                fichas.append(ficha)
+        for resultado in indice.search(pergunta, k=RETRIEVAL_TOP_K, score_minimo=RETRIEVAL_SCORE_MINIMO):
+            if len(fichas) >= RETRIEVAL_TOP_K:
+                break
+            if resultado['ficha'] not in fichas:
+                fichas.append(resultado['ficha'])
+        return fichas[:RETRIEVAL_TOP_K]
+    except Exception as e:
+        logger.error(f"Erro ao recuperar fatos da pergunta: {e}")
+        return []
+
+
 # =============================================================================
 # FUNÇÕES DE CONTEXTO E MEMÓRIA
 # =============================================================================
 
-def criar_contexto_sistema(analise_dados: Dict) -> str:
+_SEPARADOR = "================================================================================\n"
+
+
+def _titulo_secao(titulo: str) -> str:
+    """Cabeçalho de seção do contexto do sistema."""
+    return f"{_SEPARADOR}{titulo}\n{_SEPARADOR}"
+
+
+def secoes_contexto_sistema(analise_dados: Dict, fatos: Optional[List[str]] = None) -> List[Secao]:
     """
-    Cria um contexto detalhado e preciso para o OpenAI baseado nos dados analisados.
+    Seções do contexto do sistema, na ordem de exibição, com a prioridade de
+    cada uma no orçamento de tokens (ver src/utils/prompt_builder.py):
     
-    Este contexto fornece informações completas sobre:
-    - Estatísticas detalhadas do sistema
-    - Formulários, campos e fluxos principais com detalhes
-    - Relacionamentos entre dados
-    - Métricas de performance
-    - Instruções específicas para respostas precisas
+    - 0: apresentação, estatísticas gerais e instruções (sempre incluídas)
+    - 1: fichas do catálogo relevantes para a pergunta
+    - 2: rankings de formulários, campos e fluxos e destaques
+    - 3: métricas de performance e funcionalidades do dashboard
+    - 4: exemplos de respostas
     
     Args:
         analise_dados: Dicionário completo com estatísticas e análises
+        fatos: Fichas do catálogo relevantes para a pergunta (ver _fatos_pergunta)
         
     Returns:
-        str: Texto do contexto do sistema formatado e detalhado
+        List[Secao]: Seções do contexto
     """
-    contexto = f"""Você é um assistente especializado em Governança de Dados do Painel de Governança - Santos.
+    secoes = [Secao("geral", f"""Você é um assistente especializado em Governança de Dados do Painel de Governança - Santos.
 
-================================================================================
-ESTATÍSTICAS GERAIS DO SISTEMA:
-================================================================================
-- Total de Registros: {analise_dados.get('total_registros', 0)}
+{_titulo_secao("ESTATÍSTICAS GERAIS DO SISTEMA:")}- Total de Registros: {analise_dados.get('total_registros', 0)}
 - Total de Formulários Únicos: {analise_dados.get('total_formularios', 0)}
 - Total de Campos Únicos: {analise_dados.get('total_campos', 0)}
 - Total de Fluxos de Trabalho: {analise_dados.get('total_fluxos', 0)}
@@ -406,90 +258,57 @@ ESTATÍSTICAS GERAIS DO SISTEMA:
 - Média de Campos por Formulário: {analise_dados.get('media_campos_por_formulario', 0)}
 - Média de Formulários por Fluxo: {analise_dados.get('media_formularios_por_fluxo', 0)}
 
-================================================================================
-FORMULÁRIOS MAIS UTILIZADOS (Top 10):
-================================================================================
-"""
-    # Adiciona formulários com detalhes
-    formularios_detalhes = analise_dados.get('formularios_detalhes', {})
-    formularios_mais_usados = analise_dados.get('formularios_mais_usados', {})
-    
-    if formularios_mais_usados:
-        for i, (formulario, uso) in enumerate(list(formularios_mais_usados.items())[:10], 1):
-            detalhes = formularios_detalhes.get(formulario, {})
-            campos = detalhes.get('campos', 'N/A')
-            contexto += f"{i}. {formulario}\n"
-            contexto += f"   - Usado: {uso} vezes\n"
-            contexto += f"   - Campos únicos: {campos}\n\n"
-    else:
-        contexto += "Nenhum dado disponível\n\n"
-    
-    contexto += "================================================================================\n"
-    contexto += "CAMPOS MAIS COMUNS (Top 10):\n"
-    contexto += "================================================================================\n"
-    
-    # Adiciona campos com detalhes
-    campos_detalhes = analise_dados.get('campos_detalhes', {})
-    campos_mais_comuns = analise_dados.get('campos_mais_comuns', {})
-    
-    if campos_mais_comuns:
-        for i, (campo, uso) in enumerate(list(campos_mais_comuns.items())[:10], 1):
-            detalhes = campos_detalhes.get(campo, {})
-            formularios = detalhes.get('formularios', 'N/A')
-            contexto += f"{i}. {campo}\n"
-            contexto += f"   - Ocorrências: {uso}\n"
-            contexto += f"   - Aparece em: {formularios} formulário(s)\n\n"
-    else:
-        contexto += "Nenhum dado disponível\n\n"
-    
-    contexto += "================================================================================\n"
-    contexto += "FLUXOS MAIS ATIVOS (Top 10):\n"
-    contexto += "================================================================================\n"
-    
-    # Adiciona fluxos com detalhes
-    fluxos_detalhes = analise_dados.get('fluxos_detalhes', {})
-    fluxos_mais_ativos = analise_dados.get('fluxos_mais_ativos', {})
-    
-    if fluxos_mais_ativos:
-        for i, (fluxo, uso) in enumerate(list(fluxos_mais_ativos.items())[:10], 1):
-            detalhes = fluxos_detalhes.get(fluxo, {})
-            formularios = detalhes.get('formularios', 'N/A')
-            contexto += f"{i}. {fluxo}\n"
-            contexto += f"   - Ocorrências: {uso}\n"
-            contexto += f"   - Formulários utilizados: {formularios}\n\n"
-    else:
-        contexto += "Nenhum dado disponível\n\n"
+""")]
+    
+    # Fichas relevantes para a pergunta: prioridade sobre os rankings gerais
+    if fatos:
+        secoes.append(Secao(
+            "fatos",
+            _titulo_secao("FATOS DO CATÁLOGO RELEVANTES PARA A PERGUNTA:"),
+            [f"- {ficha}\n" for ficha in fatos] + ["\n"],
+            prioridade=1
+        ))
+    
+    # Rankings com detalhes: (nome, título, ranking, detalhes, chave do detalhe, linhas do item)
+    rankings = [
+        ("formularios", "FORMULÁRIOS MAIS UTILIZADOS (Top 10):", 'formularios_mais_usados',
+         'formularios_detalhes', 'campos', "   - Usado: {uso} vezes\n   - Campos únicos: {detalhe}\n\n"),
+        ("campos", "CAMPOS MAIS COMUNS (Top 10):", 'campos_mais_comuns',
+         'campos_detalhes', 'formularios', "   - Ocorrências: {uso}\n   - Aparece em: {detalhe} formulário(s)\n\n"),
+        ("fluxos", "FLUXOS MAIS ATIVOS (Top 10):", 'fluxos_mais_ativos',
+         'fluxos_detalhes', 'formularios', "   - Ocorrências: {uso}\n   - Formulários utilizados: {detalhe}\n\n"),
+    ]
+    for nome, titulo, chave_ranking, chave_detalhes, chave_detalhe, modelo in rankings:
+        ranking = analise_dados.get(chave_ranking, {})
+        detalhes = analise_dados.get(chave_detalhes, {})
+        itens = [
+            f"{i}. {item}\n" + modelo.format(uso=uso, detalhe=detalhes.get(item, {}).get(chave_detalhe, 'N/A'))
+            for i, (item, uso) in enumerate(list(ranking.items())[:10], 1)
+        ] or ["Nenhum dado disponível\n\n"]
+        secoes.append(Secao(nome, _titulo_secao(titulo), itens, prioridade=2))
     
     # Adiciona informações sobre formulário com mais campos
     if analise_dados.get('formulario_mais_campos'):
-        contexto += "================================================================================\n"
-        contexto += "DESTAQUES:\n"
-        contexto += "================================================================================\n"
-        contexto += f"Formulário com mais campos: {analise_dados.get('formulario_mais_campos')}\n"
-        contexto += f"Total de campos: {analise_dados.get('max_campos_no_formulario', 0)}\n\n"
+        secoes.append(Secao("destaques", _titulo_secao("DESTAQUES:"), [
+            f"Formulário com mais campos: {analise_dados.get('formulario_mais_campos')}\n"
+            f"Total de campos: {analise_dados.get('max_campos_no_formulario', 0)}\n\n"
+        ], prioridade=2))
     
     # Adiciona métricas de tempo se disponíveis
     if analise_dados.get('tempo_medio'):
-        contexto += "================================================================================\n"
-        contexto += "MÉTRICAS DE PERFORMANCE:\n"
-        contexto += "================================================================================\n"
-        contexto += f"Tempo médio total: {analise_dados.get('tempo_medio')} unidades\n"
+        linhas = f"Tempo médio total: {analise_dados.get('tempo_medio')} unidades\n"
         if analise_dados.get('tempo_medio_inicio_fim'):
-            contexto += f"Tempo médio início-fim: {analise_dados.get('tempo_medio_inicio_fim')} unidades\n"
-        contexto += "\n"
-    
-    contexto += """================================================================================
-FUNCIONALIDADES DO DASHBOARD:
-================================================================================
-1. Visão Geral: Análise geral de formulários, fluxos e campos com KPIs
-2. Fluxos/Serviços: Análise detalhada de fluxos de trabalho e serviços
-3. Formulários: Análise de formulários, seus campos e uso em fluxos
-4. Campos: Análise detalhada de campos individuais e sua distribuição
-
-================================================================================
-INSTRUÇÕES CRÍTICAS PARA RESPOSTAS PRECISAS:
-================================================================================
-1. SEMPRE use os dados reais fornecidos acima quando responder perguntas
+            linhas += f"Tempo médio início-fim: {analise_dados.get('tempo_medio_inicio_fim')} unidades\n"
+        secoes.append(Secao("performance", _titulo_secao("MÉTRICAS DE PERFORMANCE:"), [linhas + "\n"], prioridade=3))
+    
+    secoes.append(Secao("funcionalidades", _titulo_secao("FUNCIONALIDADES DO DASHBOARD:"), [
+        "1. Visão Geral: Análise geral de formulários, fluxos e campos com KPIs\n"
+        "2. Fluxos/Serviços: Análise detalhada de fluxos de trabalho e serviços\n"
+        "3. Formulários: Análise de formulários, seus campos e uso em fluxos\n"
+        "4. Campos: Análise detalhada de campos individuais e sua distribuição\n\n"
+    ], prioridade=3))
+    
+    secoes.append(Secao("instrucoes", _titulo_secao("INSTRUÇÕES CRÍTICAS PARA RESPOSTAS PRECISAS:") + """1. SEMPRE use os dados reais fornecidos acima quando responder perguntas
 2. Se perguntarem sobre números específicos, use EXATAMENTE os valores dos dados
 3. Quando mencionar formulários, campos ou fluxos, cite os nomes EXATOS dos dados
 4. Forneça análises baseadas nos relacionamentos entre dados (ex: qual formulário tem mais campos)
@@ -500,18 +319,41 @@ INSTRUÇÕES CRÍTICAS PARA RESPOSTAS PRECISAS:
 9. Se perguntarem sobre "quantos", "qual", "quais", use os dados reais da análise
 10. Mantenha foco em governança de dados, qualidade, compliance e eficiência
 
-================================================================================
-EXEMPLOS DE RESPOSTAS PRECISAS:
-================================================================================
-- "Quantos formulários temos?" → Use o número exato de total_formularios
-- "Qual formulário tem mais campos?" → Cite o formulario_mais_campos com o número exato
-- "Quais são os formulários mais usados?" → Liste os formulários mais usados com seus números de uso
-- "Quantos campos tem o formulário X?" → Use os dados de formularios_detalhes
+"""))
+    
+    secoes.append(Secao("exemplos", _titulo_secao("EXEMPLOS DE RESPOSTAS PRECISAS:"), [
+        '- "Quantos formulários temos?" → Use o número exato de total_formularios\n',
+        '- "Qual formulário tem mais campos?" → Cite o formulario_mais_campos com o número exato\n',
+        '- "Quais são os formulários mais usados?" → Liste os formulários mais usados com seus números de uso\n',
+        '- "Quantos campos tem o formulário X?" → Use os dados de formularios_detalhes\n'
+    ], prioridade=4))
+    
+    secoes.append(Secao("importante", "\nIMPORTANTE: Sua precisão depende de usar os dados fornecidos acima. "
+                                      "Sempre verifique os dados antes de responder.\n"))
+    return secoes
+
 
-IMPORTANTE: Sua precisão depende de usar os dados fornecidos acima. Sempre verifique os dados antes de responder.
-"""
+def criar_contexto_sistema(analise_dados: Dict) -> str:
+    """
+    Cria um contexto detalhado e preciso para o OpenAI baseado nos dados analisados.
+    
+    Este contexto fornece informações completas sobre:
+    - Estatísticas detalhadas do sistema
+    - Formulários, campos e fluxos principais com detalhes
+    - Relacionamentos entre dados
+    - Métricas de performance
+    - Instruções específicas para respostas precisas
+    
+    Texto completo, sem orçamento de tokens; as mensagens enviadas ao OpenAI
+    usam as mesmas seções limitadas pelo orçamento (ver _preparar_mensagens).
     
-    return contexto
+    Args:
+        analise_dados: Dicionário completo com estatísticas e análises
+        
+    Returns:
+        str: Texto do contexto do sistema formatado e detalhado
+    """
+    return render_sections(secoes_contexto_sistema(analise_dados))
 
 
 def limpar_contexto(session_id: str = "default"):
@@ -523,8 +365,7 @@ def limpar_contexto(session_id: str = "default"):
     Args:
         session_id: ID da sessão a ser limpa
     """
-    if session_id in contexto_sessoes:
-        del contexto_sessoes[session_id]
+    if contexto_sessoes.delete(session_id):
         logger.info(f"Contexto limpo para sessão: {session_id}")
 
 
@@ -532,20 +373,203 @@ def limpar_contexto(session_id: str = "default"):
 # FUNÇÃO PRINCIPAL - GERAÇÃO DE RESPOSTAS
 # =============================================================================
 
+def responder_consulta_estruturada(mensagem: str) -> Optional[str]:
+    """
+    Responde diretamente perguntas que são consultas agregadas (contagens,
+    top N, médias, percentual de padronização), sem chamar o OpenAI.
+    Ver src/utils/query_engine.py.
+    
+    Args:
+        mensagem: Mensagem do usuário
+        
+    Returns:
+        Optional[str]: Resposta calculada sobre os dados, ou None para perguntas abertas
+    """
+    try:
+        return answer_question(mensagem, CSV_PATH)
+    except Exception as e:
+        logger.error(f"Erro ao responder consulta estruturada: {e}")
+        return None
+
+
+def _contexto_pergunta(mensagem: str, session_id: str):
+    """
+    Estatísticas dos dados, histórico da sessão, dados específicos da pergunta
+    e a chave da pergunta no cache de respostas (versão dos dados + dados
+    específicos + histórico + pergunta normalizada).
+    
+    O histórico entra na chave porque é enviado ao modelo: a mesma pergunta de
+    acompanhamento ("e qual a principal dificuldade dele?") em sessões com
+    conversas diferentes tem respostas diferentes.
+    """
+    # Estatísticas dos dados (snapshot memoizado por versão dos dados)
+    analise_dados = analisar_dados_csv()
+    
+    # Busca dados específicos relacionados à pergunta (passa análise para evitar recalcular)
+    dados_especificos = buscar_dados_especificos(mensagem, analise_dados)
+    
+    # Histórico atual (últimas mensagens; vazio em sessão nova ou expirada)
+    historico = contexto_sessoes.get(session_id)
+    
+    chave = cache_respostas.make_key(mensagem, dados_especificos, get_data_version(CSV_PATH), historico)
+    return analise_dados, historico, dados_especificos, chave
+
+
+def _chave_chamada(mensagem: str, chave) -> Tuple:
+    """
+    Chave de coalescência das chamadas ao OpenAI: a chave do cache (versão dos
+    dados, dados específicos, hash do histórico e pergunta normalizada) mais o
+    texto exato da pergunta, ou seja, tudo o que entra no prompt. Só quem
+    enviaria o mesmo prompt compartilha a chamada em andamento.
+    """
+    return chave + (mensagem,)
+
+
+def _preparar_mensagens(mensagem: str, session_id: str, historico: List[Dict], analise_dados: Dict,
+                        dados_especificos: Optional[str]) -> List[Dict]:
+    """
+    Monta as mensagens enviadas ao OpenAI: contexto do sistema, histórico
+    recente da sessão, dados específicos encontrados e a pergunta atual.
+    
+    OTIMIZAÇÃO: o prompt é limitado a PROMPT_MAX_TOKENS tokens (contados
+    localmente). Fichas do catálogo relevantes para a pergunta têm prioridade sobre os rankings
+    gerais; turnos antigos do histórico são resumidos ou descartados (ver
+    src/utils/prompt_builder.py). Custo e latência por chamada ficam previsíveis.
+    
+    Args:
+        mensagem: Mensagem do usuário (já validada)
+        session_id: ID da sessão
+        historico: Mensagens anteriores da sessão (as mesmas usadas na chave do cache)
+        analise_dados: Estatísticas dos dados
+        dados_especificos: Dados encontrados para a pergunta (ou None)
+        
+    Returns:
+        List[Dict]: Mensagens no formato da API de chat
+    """
+    # Seções do contexto do sistema, com as fichas do catálogo relevantes para a pergunta
+    secoes = secoes_contexto_sistema(analise_dados, _fatos_pergunta(mensagem))
+    
+    if not historico:
+        logger.info(f"Nova sessão: {session_id}")
+    
+    # Estrutura de mensagens para OpenAI:
+    # - system: Contexto do sistema e instruções (e resumo de turnos antigos)
+    # - user: Mensagens do usuário
+    # - assistant: Respostas anteriores do assistente
+    mensagens, relatorio = build_prompt(
+        secoes, mensagem, historico, dados_especificos,
+        max_tokens=PROMPT_MAX_TOKENS, fracao_historico=PROMPT_FRACAO_HISTORICO
+    )
+    logger.info(
+        f"Prompt: {relatorio['tokens']}/{relatorio['orcamento']} tokens ({relatorio['contador']}), "
+        f"histórico {relatorio['mensagens_historico']} msgs, "
+        f"omitidas: {', '.join(relatorio['secoes_omitidas']) or 'nenhuma'}"
+    )
+    return mensagens
+
+
+def _parametros_modelo() -> Dict:
+    """
+    Parâmetros da chamada ao OpenAI, otimizados para precisão.
+    
+    Modelo: gpt-4o-mini é mais preciso e econômico que gpt-3.5-turbo
+    Temperature: 0.3 para respostas mais precisas e determinísticas
+    Max tokens: 800 para permitir respostas mais completas quando necessário
+    Top_p: 0.9 para foco em tokens mais prováveis (maior precisão)
+    """
+    return {
+        "model": os.getenv("MODEL_NAME", "gpt-4o-mini"),  # Permite configurar via .env
+        "temperature": float(os.getenv("TEMPERATURE", "0.3")),  # Mais preciso (0.3 vs 0.7)
+        "max_tokens": int(os.getenv("MAX_TOKENS", "800")),  # Mais tokens para respostas completas
+        "top_p": 0.9,  # Foco em tokens mais prováveis para maior precisão
+        "frequency_penalty": 0.1,  # Reduz repetição
+        "presence_penalty": 0.1  # Incentiva variedade quando necessário
+    }
+
+
+def _registrar_historico(session_id: str, mensagem: str, resposta: str):
+    """
+    Adiciona a pergunta e a resposta ao histórico da sessão. O armazenamento
+    mantém só as MAX_HISTORICO_MENSAGENS mensagens mais recentes (e o limite de
+    bytes por sessão) para evitar consumo excessivo de memória.
+    """
+    contexto_sessoes.append(session_id, [
+        {"role": "user", "content": mensagem},
+        {"role": "assistant", "content": resposta}
+    ])
+
+
+def _chamar_modelo(mensagem: str, session_id: str, historico: List[Dict], analise_dados: Dict,
+                   dados_especificos: Optional[str], chave) -> str:
+    """
+    Chama o OpenAI para a pergunta e guarda a resposta no cache.
+    Executado uma vez por pergunta em andamento (ver chamadas_em_andamento).
+    
+    Returns:
+        str: Resposta do modelo
+    """
+    with metricas_fases.measure("prompt"):
+        mensagens = _preparar_mensagens(mensagem, session_id, historico, analise_dados, dados_especificos)
+    
+    logger.info(f"Chamando OpenAI API para sessão: {session_id}")
+    inicio = time.perf_counter()
+    with metricas_fases.measure("modelo"):
+        response = client.chat.completions.create(messages=mensagens, **_parametros_modelo())
+    
+    # Extrai a resposta gerada
+    resposta = response.choices[0].message.content
+    
+    cache_respostas.put(chave, resposta, custo=time.perf_counter() - inicio)
+    return resposta
+
+
+def _chamar_modelo_stream(mensagem: str, session_id: str, historico: List[Dict], analise_dados: Dict,
+                          dados_especificos: Optional[str], chave) -> Iterator[str]:
+    """
+    Versão em streaming de _chamar_modelo: produz os trechos à medida que o
+    OpenAI os envia e guarda a resposta completa no cache ao terminar.
+    
+    Yields:
+        str: Trechos da resposta, na ordem
+    """
+    with metricas_fases.measure("prompt"):
+        mensagens = _preparar_mensagens(mensagem, session_id, historico, analise_dados, dados_especificos)
+    
+    logger.info(f"Chamando OpenAI API (streaming) para sessão: {session_id}")
+    inicio = time.perf_counter()
+    stream = client.chat.completions.create(messages=mensagens, stream=True, **_parametros_modelo())
+    
+    trechos = []
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        trecho = chunk.choices[0].delta.content
+        if trecho:
+            if not trechos:
+                metricas_fases.record("modelo_primeiro_trecho", time.perf_counter() - inicio)
+            trechos.append(trecho)
+            yield trecho
+    
+    metricas_fases.record("modelo", time.perf_counter() - inicio)
+    cache_respostas.put(chave, "".join(trechos), custo=time.perf_counter() - inicio)
+
+
 def gerar_resposta(mensagem: str, session_id: str = "default") -> str:
     """
     Função principal que gera resposta do chatbot usando OpenAI com contexto.
     
     Fluxo de execução:
     1. Valida a mensagem de entrada
-    2. Analisa os dados do CSV para obter estatísticas
-    3. Busca dados específicos relacionados à pergunta
-    4. Cria contexto do sistema com informações relevantes
-    5. Mantém histórico de conversa por sessão
-    6. Chama OpenAI API para gerar resposta inteligente
-    7. Atualiza histórico com nova conversa
+    2. Responde direto dos dados se for uma consulta agregada (sem OpenAI)
+    3. Obtém as estatísticas dos dados (memoizadas por versão)
+    4. Busca dados específicos relacionados à pergunta
+    5. Cria contexto do sistema com informações relevantes
+    6. Mantém histórico de conversa por sessão
+    7. Chama OpenAI API (perguntas iguais simultâneas compartilham uma única chamada)
+    8. Atualiza histórico com nova conversa
     
     Se OpenAI não estiver disponível, usa modo fallback com respostas básicas.
+    Para entregar a resposta aos poucos, ver gerar_resposta_stream.
     
     Args:
         mensagem: Mensagem do usuário
@@ -554,115 +578,42 @@ def gerar_resposta(mensagem: str, session_id: str = "default") -> str:
     Returns:
         str: Resposta do chatbot
     """
-    # =========================================================================
-    # VALIDAÇÃO DE ENTRADA
-    # =========================================================================
+    # Valida entrada
     if not mensagem or mensagem.strip() == "":
         return "Por favor, digite uma mensagem válida."
     
     # Remove espaços em branco
     mensagem = mensagem.strip()
     
-    # =========================================================================
-    # VERIFICAÇÃO DE OPENAI
-    # =========================================================================
+    # Consultas agregadas são respondidas direto dos dados, sem OpenAI
+    with metricas_fases.measure("consulta_estruturada"):
+        resposta = responder_consulta_estruturada(mensagem)
+    if resposta is not None:
+        _registrar_historico(session_id, mensagem, resposta)
+        return resposta
+    
     # Se OpenAI não estiver configurado, usa modo fallback
     if not client:
         logger.info("OpenAI não disponível, usando modo fallback")
         return gerar_resposta_fallback(mensagem)
     
     try:
-        # =====================================================================
-        # ANÁLISE DE DADOS
-        # =====================================================================
-        # Analisa dados do CSV para obter estatísticas
-        logger.info(f"Analisando dados CSV para sessão: {session_id}")
-        analise_dados = analisar_dados_csv()
-        
-        # Busca dados específicos relacionados à pergunta (passa análise para evitar recalcular)
-        dados_especificos = buscar_dados_especificos(mensagem, analise_dados)
-        
-        # =====================================================================
-        # PREPARAÇÃO DO CONTEXTO
-        # =====================================================================
-        # Cria contexto do sistema com informações do dashboard
-        contexto_sistema = criar_contexto_sistema(analise_dados)
-        
-        # Inicializa histórico da sessão se não existir
-        if session_id not in contexto_sessoes:
-            contexto_sessoes[session_id] = []
-            logger.info(f"Nova sessão criada: {session_id}")
-        
-        # Obtém histórico atual (últimas mensagens)
-        historico = contexto_sessoes[session_id].copy()
-        
-        # =====================================================================
-        # PREPARAÇÃO DAS MENSAGENS PARA OPENAI
-        # =====================================================================
-        # Estrutura de mensagens para OpenAI:
-        # - system: Contexto do sistema e instruções
-        # - user: Mensagens do usuário
-        # - assistant: Respostas anteriores do assistente
-        
-        mensagens = [
-            {"role": "system", "content": contexto_sistema}
-        ]
-        
-        # Adiciona histórico recente (últimas 10 interações para não exceder limites)
-        # Isso mantém contexto da conversa sem sobrecarregar o modelo
-        for item in historico[-10:]:
-            mensagens.append(item)
-        
-        # Adiciona dados específicos encontrados como contexto adicional
-        if dados_especificos:
-            mensagens.append({
-                "role": "system",
-                "content": f"DADOS ESPECÍFICOS ENCONTRADOS: {dados_especificos}"
-            })
-        
-        # Adiciona mensagem atual do usuário
-        mensagens.append({"role": "user", "content": mensagem})
-        
-        # =====================================================================
-        # CHAMADA À API OPENAI
-        # =====================================================================
-        logger.info(f"Chamando OpenAI API para sessão: {session_id}")
-        
-        # =====================================================================
-        # PARÂMETROS OTIMIZADOS PARA PRECISÃO
-        # =====================================================================
-        # Modelo: gpt-4o-mini é mais preciso e econômico que gpt-3.5-turbo
-        # Temperature: 0.3 para respostas mais precisas e determinísticas
-        # Max tokens: 800 para permitir respostas mais completas quando necessário
-        # Top_p: 0.9 para foco em tokens mais prováveis (maior precisão)
+        with metricas_fases.measure("analise"):
+            analise_dados, historico, dados_especificos, chave = _contexto_pergunta(mensagem, session_id)
+        
+        # Pergunta repetida: responde do cache, sem chamar o OpenAI
+        resposta = cache_respostas.get(chave)
+        if resposta is not None:
+            logger.info(f"Resposta servida do cache para sessão: {session_id}")
+            _registrar_historico(session_id, mensagem, resposta)
+            return resposta
         
-        response = client.chat.completions.create(
-            model=os.getenv("MODEL_NAME", "gpt-4o-mini"),  # Permite configurar via .env
-            messages=mensagens,
-            temperature=float(os.getenv("TEMPERATURE", "0.3")),  # Mais preciso (0.3 vs 0.7)
-            max_tokens=int(os.getenv("MAX_TOKENS", "800")),  # Mais tokens para respostas completas
-            top_p=0.9,  # Foco em tokens mais prováveis para maior precisão
-            frequency_penalty=0.1,  # Reduz repetição
-            presence_penalty=0.1  # Incentiva variedade quando necessário
+        # OTIMIZAÇÃO: o mesmo prompt em andamento em outra requisição (mesma pergunta
+        # e mesmo histórico) não gera outra chamada ao OpenAI; espera e compartilha a resposta (ou o erro)
+        resposta = chamadas_em_andamento.do(
+            _chave_chamada(mensagem, chave), lambda: _chamar_modelo(mensagem, session_id, historico, analise_dados, dados_especificos, chave)
         )
-        
-        # Extrai a resposta gerada
-        resposta = response.choices[0].message.content
-        
-        # =====================================================================
-        # ATUALIZAÇÃO DO HISTÓRICO
-        # =====================================================================
-        # Adiciona mensagem do usuário ao histórico
-        contexto_sessoes[session_id].append({"role": "user", "content": mensagem})
-        
-        # Adiciona resposta do assistente ao histórico
-        contexto_sessoes[session_id].append({"role": "assistant", "content": resposta})
-        
-        # Limita histórico para evitar consumo excessivo de memória
-        # Mantém apenas as últimas MAX_HISTORICO_MENSAGENS mensagens
-        if len(contexto_sessoes[session_id]) > MAX_HISTORICO_MENSAGENS:
-            contexto_sessoes[session_id] = contexto_sessoes[session_id][-MAX_HISTORICO_MENSAGENS:]
-            logger.info(f"Histórico limitado para {MAX_HISTORICO_MENSAGENS} mensagens na sessão: {session_id}")
+        _registrar_historico(session_id, mensagem, resposta)
         
         logger.info(f"Resposta gerada com sucesso para sessão: {session_id}")
         return resposta
@@ -673,6 +624,110 @@ def gerar_resposta(mensagem: str, session_id: str = "default") -> str:
         return gerar_resposta_fallback(mensagem)
 
 
+def gerar_resposta_stream(mensagem: str, session_id: str = "default") -> Iterator[str]:
+    """
+    Versão em streaming de gerar_resposta: produz os trechos da resposta à
+    medida que o OpenAI os envia (stream=True), então o primeiro trecho chega
+    sem esperar a resposta inteira. O histórico da sessão é atualizado quando
+    a resposta termina.
+    
+    Sem OpenAI (ou se a chamada falhar antes do primeiro trecho), produz a
+    resposta do modo fallback de uma vez.
+    
+    Args:
+        mensagem: Mensagem do usuário
+        session_id: ID da sessão para manter contexto (padrão: "default")
+        
+    Yields:
+        str: Trechos da resposta, na ordem
+    """
+    if not mensagem or mensagem.strip() == "":
+        yield "Por favor, digite uma mensagem válida."
+        return
+    
+    mensagem = mensagem.strip()
+    
+    # Consultas agregadas são respondidas direto dos dados, sem OpenAI
+    with metricas_fases.measure("consulta_estruturada"):
+        resposta = responder_consulta_estruturada(mensagem)
+    if resposta is not None:
+        _registrar_historico(session_id, mensagem, resposta)
+        yield resposta
+        return
+    
+    if not client:
+        logger.info("OpenAI não disponível, usando modo fallback")
+        yield gerar_resposta_fallback(mensagem)
+        return
+    
+    trechos = []
+    try:
+        with metricas_fases.measure("analise"):
+            analise_dados, historico, dados_especificos, chave = _contexto_pergunta(mensagem, session_id)
+        
+        # Pergunta repetida: entrega a resposta do cache de uma vez
+        resposta = cache_respostas.get(chave)
+        if resposta is not None:
+            logger.info(f"Resposta servida do cache para sessão: {session_id}")
+            _registrar_historico(session_id, mensagem, resposta)
+            yield resposta
+            return
+        
+        # OTIMIZAÇÃO: o mesmo prompt em andamento em outra requisição (mesma pergunta
+        # e mesmo histórico) não gera outra chamada ao OpenAI; os trechos do stream em andamento são repassados
+        fabrica = lambda: _chamar_modelo_stream(
+            mensagem, session_id, historico, analise_dados, dados_especificos, chave
+        )
+        for trecho in chamadas_em_andamento.do_stream(_chave_chamada(mensagem, chave), fabrica):
+            trechos.append(trecho)
+            yield trecho
+        
+    except Exception as e:
+        logger.error(f"Erro ao gerar resposta com OpenAI (streaming): {e}")
+        if not trechos:
+            yield gerar_resposta_fallback(mensagem)
+        return
+    
+    resposta = "".join(trechos)
+    _registrar_historico(session_id, mensagem, resposta)
+    logger.info(f"Resposta (streaming) gerada com sucesso para sessão: {session_id}")
+
+
+def obter_metricas_cache() -> Dict:
+    """
+    Métricas do cache de respostas: acertos (exatos e por similaridade),
+    taxa de acerto, chamadas ao OpenAI e segundos economizados; em
+    "coalescencia", as perguntas simultâneas que compartilharam uma chamada.
+    
+    Returns:
+        Dict: Contadores do cache
+    """
+    return {**cache_respostas.stats(), "coalescencia": chamadas_em_andamento.stats()}
+
+
+def obter_metricas_sessoes() -> Dict:
+    """
+    Métricas do armazenamento de sessões: backend, sessões ativas, limites
+    e quantas sessões foram removidas por inatividade ou por excesso.
+    
+    Returns:
+        Dict: Contadores das sessões
+    """
+    return contexto_sessoes.stats()
+
+
+def obter_metricas_fases() -> Dict:
+    """
+    Tempo gasto em cada fase do atendimento: consulta estruturada, análise da
+    pergunta (estatísticas, dados específicos e chave do cache), montagem do
+    prompt e chamada ao modelo (no streaming, também até o primeiro trecho).
+    
+    Returns:
+        Dict: Por fase, execuções, tempo total e percentis em ms
+    """
+    return metricas_fases.stats()
+
+
 def gerar_resposta_fallback(mensagem: str) -> str:
     """
     Resposta fallback quando OpenAI não está disponível.
@@ -690,7 +745,7 @@ def gerar_resposta_fallback(mensagem: str) -> str:
     
     # Analisa dados mesmo sem OpenAI
     analise_dados = analisar_dados_csv()
-    dados_especificos = buscar_dados_especificos(mensagem)
+    dados_especificos = buscar_dados_especificos(mensagem, analise_dados)
     
     # Se encontrou dados específicos, retorna eles
     if dados_especificos:
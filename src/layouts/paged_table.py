@@ -0,0 +1,67 @@
+from dash import html, dash_table
+
+def create_paged_table(table_id, page_size=15, max_width="300px", **div_kwargs):
+    """
+    Cria uma tabela paginada, ordenada e filtrada no servidor.
+    Só a página visível é enviada ao navegador (dados, colunas e número de
+    páginas vêm do callback registrado em src/callbacks/table_callbacks.py);
+    o estilo é definido uma vez para a tabela, não por célula.
+
+    Args:
+        table_id: ID do DataTable (o resumo abaixo da tabela usa f"{table_id}-resumo")
+        page_size: Linhas por página
+        max_width: Largura máxima das células (textos longos terminam em reticências)
+        **div_kwargs: Argumentos repassados à div que envolve a tabela
+
+    Returns:
+        Componente com a tabela e o resumo
+    """
+    tabela = dash_table.DataTable(
+        id=table_id,
+        columns=[],
+        data=[],
+        page_current=0,
+        page_size=page_size,
+        page_count=1,
+        page_action="custom",
+        sort_action="custom",
+        sort_mode="single",
+        sort_by=[],
+        filter_action="custom",
+        filter_query="",
+        style_as_list_view=True,
+        style_table={"overflowX": "auto"},
+        style_header={
+            "backgroundColor": "#1e3a5f",
+            "color": "white",
+            "fontWeight": "bold",
+            "fontSize": "13px",
+            "padding": "12px 16px",
+            "border": "none"
+        },
+        style_filter={"backgroundColor": "#f1f3f5"},
+        style_cell={
+            "padding": "12px 16px",
+            "fontSize": "13px",
+            "fontFamily": "inherit",
+            "color": "#212529",
+            "textAlign": "left",
+            "maxWidth": max_width,
+            "overflow": "hidden",
+            "textOverflow": "ellipsis",
+            "whiteSpace": "nowrap",
+            "border": "1px solid #dee2e6"
+        },
+        style_cell_conditional=[{"if": {"column_type": "numeric"}, "textAlign": "center"}],
+        style_data_conditional=[{"if": {"row_index": "odd"}, "backgroundColor": "#f8f9fa"}]
+    )
+
+    return html.Div([
+        html.Div(tabela, style={
+            "border": "1px solid #dee2e6",
+            "borderRadius": "8px",
+            "overflow": "hidden",
+            "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"
+        }),
+        html.Div(id=f"{table_id}-resumo", style={"padding": "8px 4px", "fontSize": "13px", "color": "#495057"})
+    ], **div_kwargs)
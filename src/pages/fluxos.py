@@ -4,6 +4,9 @@ from dash import html, dcc
 # Importa componentes do Dash Bootstrap para facilitar o layout com cards, linhas e colunas
 import dash_bootstrap_components as dbc
 
+# Tabela paginada no servidor (só a página visível é enviada ao navegador)
+from src.layouts.paged_table import create_paged_table
+
 def create_title_with_tooltip(title_text, tooltip_id, tooltip_content):
     """
     Cria um título com ícone de informação e tooltip.
@@ -244,9 +247,10 @@ def fluxos_layout():
                                 html.Span("MongoDB do ACTO - Período: 2024 até setembro de 2025.", style={"color": "#e9ecef"})
                             ])
                         ),
-                        html.Div(
-                            id='padronizacao-por-fluxo-tabela',
-                            style={"width": "100%", "overflow": "hidden"}
+                        create_paged_table(
+                            'padronizacao-por-fluxo-tabela',
+                            page_size=15,
+                            style={"width": "100%"}
                         )
                     ]),
                     className="mb-4 shadow-lg",
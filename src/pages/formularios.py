@@ -4,6 +4,9 @@ from dash import html, dcc
 # Importa componentes do Dash Bootstrap para facilitar o layout com cards, linhas e colunas
 import dash_bootstrap_components as dbc
 
+# Tabela paginada no servidor (só a página visível é enviada ao navegador)
+from src.layouts.paged_table import create_paged_table
+
 def create_title_with_tooltip(title_text, tooltip_id, tooltip_content):
     """
     Cria um título com ícone de informação e tooltip.
@@ -251,9 +254,11 @@ def formularios_layout():
                         html.Span("MongoDB do ACTO - Período: 2024 até setembro de 2025.", style={"color": "#e9ecef"})
                     ])
                 ),
-                html.Div(
-                    id='formularios-utilizados-table',
-                    style={"width": "100%", "overflow": "auto"}
+                create_paged_table(
+                    'formularios-utilizados-table',
+                    page_size=20,
+                    max_width="400px",
+                    style={"width": "100%"}
                 )
             ]),
             className="mb-4 shadow-lg",
@@ -4,6 +4,9 @@ from dash import html, dcc
 # Importa componentes do Dash Bootstrap para facilitar o layout com cards, linhas e colunas
 import dash_bootstrap_components as dbc
 
+# Tabela paginada no servidor (só a página visível é enviada ao navegador)
+from src.layouts.paged_table import create_paged_table
+
 def create_title_with_tooltip(title_text, tooltip_id, tooltip_content):
     """
     Cria um título com ícone de informação e tooltip.
@@ -280,7 +283,7 @@ def overview_layout():
                         html.Span("MongoDB do ACTO - Período: 2024 até setembro de 2025.", style={"color": "#e9ecef"})
                     ])
                 ),
-                html.Div(id='tabela-detalhada', className="mt-3")
+                create_paged_table('tabela-detalhada', page_size=15, className="mt-3")
             ]),
             className="mb-4 shadow-sm",
             style={"border": "1px solid #dee2e6", "backgroundColor": "#ffffff", "borderRadius": "12px"}
@@ -0,0 +1,312 @@
+"""
+Cubo pré-agregado das métricas do painel.
+Materializa, uma vez por versão dos dados, as métricas de cada combinação
+(ano, fluxo, serviço, formulário). Os callbacks consultam o cubo em vez de
+reagrupar as linhas brutas a cada mudança de filtro.
+
+Contagens distintas (campos, etapas) são guardadas como conjuntos exatos:
+uma tabela de pares (célula, código) sem repetição. Assim qualquer agregação
+de células soma os conjuntos corretamente, sem dupla contagem.
+"""
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Union
+from src.utils.grouped_kernels import grouped_distinct_counts
+
+# Grão do cubo, na ordem dos filtros do painel
+GRAO_CUBO = ['ano', 'fluxo', 'servico', 'formulario']
+
+# Colunas cujas contagens distintas precisam agregar corretamente entre células
+COLUNAS_DISTINTAS = ['nomeCampo', 'etapa']
+
+def _codificar(serie: pd.Series):
+    """Retorna (códigos, rótulos) de uma coluna, reaproveitando categorias existentes."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy().astype(np.int64), serie.cat.categories
+    codes, uniques = pd.factorize(serie, sort=True)
+    return codes.astype(np.int64), pd.Index(uniques)
+
+def _intervalos(inicio: np.ndarray, fim: np.ndarray) -> np.ndarray:
+    """Concatena np.arange(inicio[i], fim[i]) para todos os i, sem loop Python."""
+    tamanhos = fim - inicio
+    total = int(tamanhos.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    deslocamento = np.repeat(inicio - np.concatenate(([0], np.cumsum(tamanhos)[:-1])), tamanhos)
+    return deslocamento + np.arange(total)
+
+class AggregateCube:
+    """
+    Cubo de métricas por (ano, fluxo, serviço, formulário).
+
+    Use `AggregateCube.from_dataframe(df)` para construir e `filter(...)` para
+    obter a visão correspondente aos filtros do painel.
+    """
+
+    def __init__(self, celulas: pd.DataFrame, distintos: Dict[str, pd.DataFrame],
+                 rotulos: Dict[str, pd.Index], padronizado_por_campo: Optional[np.ndarray]):
+        self.celulas = celulas
+        self.distintos = distintos
+        self.rotulos = rotulos
+        self.padronizado_por_campo = padronizado_por_campo
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'AggregateCube':
+        """
+        Constrói o cubo a partir do DataFrame processado.
+
+        Args:
+            df: DataFrame processado (com is_padronizado)
+
+        Returns:
+            AggregateCube com as células e os conjuntos distintos
+        """
+        rotulos = {}
+        chaves = {}
+        for dim in GRAO_CUBO:
+            if dim == 'ano':
+                if 'dataCriacao' not in df.columns:
+                    continue
+                codes, uniques = pd.factorize(df['dataCriacao'].dt.year, sort=True)
+                chaves['ano'] = codes.astype(np.int64)
+                rotulos['ano'] = pd.Index(uniques.astype(int))
+            elif dim in df.columns:
+                chaves[dim], rotulos[dim] = _codificar(df[dim])
+
+        if df.empty or not chaves:
+            return cls(pd.DataFrame(columns=list(chaves) + ['qtd']), {}, rotulos, None)
+
+        # Uma célula por combinação observada do grão (códigos -1 = valor nulo)
+        grupos = pd.DataFrame(chaves).groupby(list(chaves), sort=True)
+        celula_por_linha = grupos.ngroup().to_numpy()
+        celulas = grupos.size().reset_index(name='qtd')
+        if 'is_padronizado' in df.columns:
+            pesos = df['is_padronizado'].fillna(0).to_numpy()
+            celulas['qtd_padronizado'] = np.bincount(celula_por_linha, weights=pesos,
+                                                     minlength=len(celulas)).astype(np.int64)
+
+        # Conjuntos exatos: pares (célula, código) sem repetição, ordenados por célula
+        distintos = {}
+        padronizado_por_campo = None
+        for col in COLUNAS_DISTINTAS:
+            if col not in df.columns:
+                continue
+            codes, rotulos[col] = _codificar(df[col])
+            validos = codes >= 0
+            n = len(rotulos[col])
+            pares = np.unique(celula_por_linha[validos] * n + codes[validos])
+            distintos[col] = pd.DataFrame({'celula': pares // n, 'codigo': pares % n})
+
+            if col == 'nomeCampo' and 'is_padronizado' in df.columns:
+                padronizado_por_campo = np.zeros(n, dtype=np.int8)
+                marcados = validos & (df['is_padronizado'].to_numpy() == 1)
+                padronizado_por_campo[codes[marcados]] = 1
+
+        return cls(celulas, distintos, rotulos, padronizado_por_campo)
+
+    def to_artifact(self) -> Dict[str, Any]:
+        """Partes gravadas no armazenamento de artefatos (tabela de células + rótulos)."""
+        partes = {
+            'celulas': self.celulas,
+            'rotulos': {dim: rotulos.tolist() for dim, rotulos in self.rotulos.items()}
+        }
+        for col, pares in self.distintos.items():
+            partes[f'distintos.{col}'] = pares
+        if self.padronizado_por_campo is not None:
+            partes['padronizado_por_campo'] = self.padronizado_por_campo
+        return partes
+
+    @classmethod
+    def from_artifact(cls, partes: Dict[str, Any]) -> 'AggregateCube':
+        """Reabre o cubo gravado por to_artifact."""
+        distintos = {chave.split('.', 1)[1]: valor for chave, valor in partes.items() if chave.startswith('distintos.')}
+        rotulos = {dim: pd.Index(valores) for dim, valores in partes['rotulos'].items()}
+        return cls(partes['celulas'], distintos, rotulos, partes.get('padronizado_por_campo'))
+
+    # -------------------------------------------------------------------------
+    # Filtros
+    # -------------------------------------------------------------------------
+    @property
+    def empty(self) -> bool:
+        return self.celulas.empty or int(self.celulas['qtd'].sum()) == 0
+
+    def has(self, dim: str) -> bool:
+        """Indica se a dimensão, coluna distinta ou métrica (ex.: qtd_padronizado) existe no cubo."""
+        return dim in self.rotulos or dim in self.celulas.columns
+
+    def filter(self, ano: Optional[str] = None, fluxo: Optional[str] = None,
+               servico: Optional[str] = None, formulario: Optional[str] = None) -> 'AggregateCube':
+        """
+        Retorna a visão do cubo restrita às células que atendem aos filtros.
+        O custo depende do número de células, não do número de linhas.
+        """
+        filtros = {'ano': int(ano) if ano else None, 'fluxo': fluxo,
+                   'servico': servico, 'formulario': formulario}
+
+        mascara = np.ones(len(self.celulas), dtype=bool)
+        filtrou = False
+        for dim, valor in filtros.items():
+            if not valor or dim not in self.celulas.columns:
+                continue
+            try:
+                code = self.rotulos[dim].get_loc(valor)
+            except KeyError:
+                code = -2  # Não existe nos dados: nenhuma célula atende
+            mascara &= self.celulas[dim].to_numpy() == code
+            filtrou = True
+
+        if not filtrou:
+            return self
+
+        selecionadas = np.flatnonzero(mascara)
+        novo_id = np.full(len(self.celulas), -1, dtype=np.int64)
+        novo_id[selecionadas] = np.arange(len(selecionadas))
+        celulas = self.celulas.iloc[selecionadas].reset_index(drop=True)
+
+        distintos = {}
+        for col, pares in self.distintos.items():
+            # Pares ordenados por célula: seleciona só os intervalos das células escolhidas
+            celula = pares['celula'].to_numpy()
+            inicio = np.searchsorted(celula, selecionadas, side='left')
+            fim = np.searchsorted(celula, selecionadas, side='right')
+            idx = _intervalos(inicio, fim)
+            distintos[col] = pd.DataFrame({'celula': novo_id[celula[idx]],
+                                           'codigo': pares['codigo'].to_numpy()[idx]})
+
+        return AggregateCube(celulas, distintos, self.rotulos, self.padronizado_por_campo)
+
+    # -------------------------------------------------------------------------
+    # Consultas
+    # -------------------------------------------------------------------------
+    def _serie(self, dim: str, codigos: np.ndarray, valores: np.ndarray) -> pd.Series:
+        """Monta uma Series indexada pelos rótulos da dimensão."""
+        return pd.Series(valores, index=pd.Index(self.rotulos[dim][codigos], name=dim))
+
+    def size_by(self, dim: str, metrica: str = 'qtd') -> pd.Series:
+        """
+        Soma de uma métrica aditiva (qtd = linhas, qtd_padronizado) por valor da dimensão.
+        Equivale a df.groupby(dim).size() / df.groupby(dim)['is_padronizado'].sum().
+        """
+        codigos = self.celulas[dim].to_numpy()
+        validos = codigos >= 0
+        soma = np.bincount(codigos[validos], weights=self.celulas[metrica].to_numpy()[validos],
+                           minlength=len(self.rotulos[dim])).astype(np.int64)
+        presentes = np.flatnonzero(np.bincount(codigos[validos], minlength=len(self.rotulos[dim])))
+        return self._serie(dim, presentes, soma[presentes])
+
+    def nunique_by(self, dim: str, alvo: str) -> pd.Series:
+        """
+        Quantidade de valores distintos de `alvo` por valor de `dim` (ambos no grão do cubo).
+        Equivale a df.groupby(dim)[alvo].nunique().
+        """
+        codigos = self.celulas[dim].to_numpy()
+        alvos = self.celulas[alvo].to_numpy()
+        presentes = np.unique(codigos[codigos >= 0])
+        validos = (codigos >= 0) & (alvos >= 0)
+        pares = np.unique(codigos[validos] * len(self.rotulos[alvo]) + alvos[validos])
+        contagem = np.bincount(pares // len(self.rotulos[alvo]), minlength=len(self.rotulos[dim]))
+        return self._serie(dim, presentes, contagem[presentes])
+
+    def nunique(self, dim: str) -> int:
+        """Quantidade de valores distintos de uma dimensão do grão ou de uma coluna distinta."""
+        if dim in self.distintos:
+            return int(len(np.unique(self.distintos[dim]['codigo'].to_numpy())))
+        codigos = self.celulas[dim].to_numpy()
+        return int(len(np.unique(codigos[codigos >= 0])))
+
+    def distinct_by(self, dims: Union[str, List[str]], coluna: str = 'nomeCampo') -> pd.DataFrame:
+        """
+        Contagem exata de valores distintos de `coluna` por combinação de dimensões.
+        Para nomeCampo também conta os campos padronizados distintos.
+
+        Returns:
+            DataFrame com as dimensões, `distintos` e (para nomeCampo) `padronizados`
+        """
+        dims = [dims] if isinstance(dims, str) else list(dims)
+        pares = self.distintos[coluna]
+        celula = pares['celula'].to_numpy()
+        codigo = pares['codigo'].to_numpy()
+
+        # Chave combinada das dimensões de cada célula
+        tamanhos = [len(self.rotulos[d]) for d in dims]
+        codigos_celula = [self.celulas[d].to_numpy() for d in dims]
+        celula_valida = np.logical_and.reduce([c >= 0 for c in codigos_celula])
+        chave_celula = np.zeros(len(self.celulas), dtype=np.int64)
+        chave_celula[celula_valida] = np.ravel_multi_index(
+            [c[celula_valida] for c in codigos_celula], tamanhos)
+        chave_celula[~celula_valida] = -1
+
+        # Grupos observados (inclui grupos sem nenhum valor distinto, com contagem 0)
+        marcados = None
+        if coluna == 'nomeCampo' and self.padronizado_por_campo is not None:
+            marcados = self.padronizado_por_campo[codigo] == 1
+        grupos, distintos, padronizados = grouped_distinct_counts(
+            chave_celula[celula], codigo, len(self.rotulos[coluna]), marcados,
+            universo=np.unique(chave_celula[celula_valida]))
+
+        resultado = {}
+        for d, c in zip(dims, np.unravel_index(grupos, tamanhos)):
+            resultado[d] = self.rotulos[d][c]
+        resultado = pd.DataFrame(resultado)
+        resultado['distintos'] = distintos
+        if padronizados is not None:
+            resultado['padronizados'] = padronizados
+        return resultado
+
+    def kpis(self) -> Dict:
+        """
+        Calcula os KPIs principais (mesmas chaves e regras de calculate_kpis) a partir do cubo.
+        """
+        kpis = {
+            'qtd_fluxos': 0,
+            'qtd_servicos': 0,
+            'qtd_formularios': 0,
+            'qtd_etapas': 0,
+            'qtd_campos_distintos': 0,
+            'qtd_campos_padronizados': 0,
+            'pct_campos_padrao': "0%",
+            'media_campos_fluxo': 0,
+            'media_campos_formulario': 0,
+            'pct_fluxo_padronizado': "0%"
+        }
+
+        if self.empty:
+            return kpis
+
+        tem_campos = 'nomeCampo' in self.distintos
+
+        if self.has('fluxo'):
+            kpis['qtd_fluxos'] = self.nunique('fluxo')
+            if tem_campos:
+                kpis['media_campos_fluxo'] = round(self.distinct_by('fluxo')['distintos'].mean(), 2)
+
+        if self.has('servico'):
+            kpis['qtd_servicos'] = self.nunique('servico')
+
+        if self.has('formulario'):
+            kpis['qtd_formularios'] = self.nunique('formulario')
+            if tem_campos:
+                kpis['media_campos_formulario'] = round(self.distinct_by('formulario')['distintos'].mean(), 2)
+
+        if 'etapa' in self.distintos:
+            kpis['qtd_etapas'] = self.nunique('etapa')
+
+        if tem_campos:
+            codigos = np.unique(self.distintos['nomeCampo']['codigo'].to_numpy())
+            kpis['qtd_campos_distintos'] = int(len(codigos))
+
+            if self.padronizado_por_campo is not None:
+                kpis['qtd_campos_padronizados'] = int(self.padronizado_por_campo[codigos].sum())
+                if kpis['qtd_campos_distintos'] > 0:
+                    pct = (kpis['qtd_campos_padronizados'] / kpis['qtd_campos_distintos']) * 100
+                    kpis['pct_campos_padrao'] = f"{pct:.2f}%"
+
+                # Percentual de padronização por fluxo (média entre fluxos com campos)
+                if self.has('fluxo'):
+                    por_fluxo = self.distinct_by('fluxo')
+                    por_fluxo = por_fluxo[por_fluxo['distintos'] > 0]
+                    if not por_fluxo.empty:
+                        pct_medio = (por_fluxo['padronizados'] / por_fluxo['distintos'] * 100).mean()
+                        kpis['pct_fluxo_padronizado'] = f"{pct_medio:.1f}%"
+
+        return kpis
@@ -0,0 +1,204 @@
+"""
+Artefatos derivados dos dados gravados em disco para reinícios rápidos.
+
+Cada artefato (dados processados, metadados, cubo, índices, análise do
+chatbot) é gravado uma vez em `data/artifacts/<nome>/<chave>/` e reaberto nos
+boots seguintes em vez de ser recalculado. A chave combina o hash do conteúdo
+dos arquivos de origem com a versão do código que monta o artefato (hash do
+fonte dos módulos envolvidos): mudar os dados ou o código de um artefato
+invalida só aquele artefato.
+
+Partes de um artefato:
+    DataFrame     -> um .npy por coluna (categóricas como códigos + dicionário
+                     no manifesto, como o plano de dados compartilhado; ver
+                     shared_data.write_columns), aberto com mmap_mode='r'
+    numpy.ndarray -> <parte>.npy     (aberto com mmap_mode='r')
+    demais        -> no manifest.json (listas, dicionários e números)
+
+Reabrir um artefato não copia os dados: as colunas numéricas e os códigos
+das categóricas apontam para as páginas do arquivo; só os dicionários de
+rótulos são montados em memória.
+
+A gravação é atômica (diretório temporário + rename), então processos
+concorrentes nunca enxergam um artefato parcial.
+
+Configuração: ARTIFACT_STORE ("True"/"False") e ARTIFACT_DIR (padrão:
+diretório "artifacts" ao lado do CSV).
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils.shared_data import read_columns, write_columns
+
+_MANIFESTO = "manifest.json"
+_FORMATO = 2
+_BLOCO_HASH = 1 << 20
+
+_code_version_cache = {}  # Versão do código por conjunto de módulos: {nomes: hash}
+
+def is_enabled() -> bool:
+    """Indica se o armazenamento de artefatos está ativo (ARTIFACT_STORE, padrão True)."""
+    return os.environ.get("ARTIFACT_STORE", "True").lower() == "true"
+
+def get_artifact_dir(csv_path: str) -> str:
+    """Diretório dos artefatos: ARTIFACT_DIR ou "artifacts" ao lado do CSV."""
+    return os.environ.get("ARTIFACT_DIR", "").strip() or os.path.join(os.path.dirname(csv_path) or ".", "artifacts")
+
+def hash_files(paths: Iterable[str]) -> str:
+    """
+    Hash do conteúdo de um conjunto de arquivos (nome + bytes de cada um).
+
+    Args:
+        paths: Arquivos de origem (inexistentes são ignorados)
+
+    Returns:
+        Hash hexadecimal (blake2b de 16 bytes)
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        if not os.path.isfile(path):
+            continue
+        h.update(os.path.basename(path).encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            for bloco in iter(lambda: f.read(_BLOCO_HASH), b""):
+                h.update(bloco)
+    return h.hexdigest()
+
+def code_version(*modulos: str) -> str:
+    """
+    Versão do código que monta um artefato: hash do fonte dos módulos
+    informados (mais o deste módulo, que define o formato em disco).
+
+    Args:
+        modulos: Nomes dos módulos já importados (ex.: "src.utils.aggregate_cube")
+
+    Returns:
+        Hash hexadecimal curto
+    """
+    nomes = tuple(sorted(set(modulos) | {__name__}))
+    versao = _code_version_cache.get(nomes)
+    if versao is None:
+        versao = hash_files(getattr(sys.modules[nome], "__file__", "") or "" for nome in nomes)[:16]
+        _code_version_cache[nomes] = versao
+    return versao
+
+class ArtifactStore:
+    """
+    Artefatos de um diretório, um subdiretório por nome e chave.
+
+    Args:
+        base_dir: Diretório raiz dos artefatos
+    """
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+
+    def _path(self, nome: str, chave: str) -> str:
+        return os.path.join(self.base_dir, nome, hashlib.sha1(chave.encode("utf-8")).hexdigest()[:16])
+
+    def load(self, nome: str, chave: str) -> Optional[Dict[str, Any]]:
+        """
+        Abre as partes do artefato gravado para a chave.
+
+        Args:
+            nome: Nome do artefato
+            chave: Chave (origem + código) esperada
+
+        Returns:
+            Dicionário {parte: valor}, ou None se não houver artefato válido para a chave
+        """
+        caminho = self._path(nome, chave)
+        try:
+            with open(os.path.join(caminho, _MANIFESTO), "r", encoding="utf-8") as f:
+                manifesto = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if manifesto.get("formato") != _FORMATO or manifesto.get("chave") != chave:
+            return None
+
+        partes = {}
+        for parte, info in manifesto["partes"].items():
+            if info["tipo"] == "tabela":
+                partes[parte] = read_columns(caminho, info["colunas"])
+            elif info["tipo"] == "array":
+                partes[parte] = np.load(os.path.join(caminho, info["arquivo"]), mmap_mode="r")
+            else:
+                partes[parte] = info["valor"]
+        return partes
+
+    def save(self, nome: str, chave: str, partes: Dict[str, Any]) -> str:
+        """
+        Grava o artefato da chave e remove as versões anteriores do mesmo nome
+        (processos que ainda as mapeiam não são afetados).
+
+        Args:
+            nome: Nome do artefato
+            chave: Chave (origem + código)
+            partes: {parte: DataFrame | ndarray | valor serializável em JSON}
+
+        Returns:
+            Caminho do artefato
+        """
+        diretorio = os.path.join(self.base_dir, nome)
+        destino = self._path(nome, chave)
+        os.makedirs(diretorio, exist_ok=True)
+        temporario = tempfile.mkdtemp(prefix=".tmp-", dir=diretorio)
+        try:
+            infos = {}
+            for i, (parte, valor) in enumerate(partes.items()):
+                if isinstance(valor, pd.DataFrame):
+                    colunas = write_columns(valor, temporario, prefixo=f"p{i:03d}c")
+                    infos[parte] = {"tipo": "tabela", "colunas": colunas}
+                elif isinstance(valor, np.ndarray):
+                    arquivo = f"p{i:03d}.npy"
+                    np.save(os.path.join(temporario, arquivo), np.ascontiguousarray(valor))
+                    infos[parte] = {"tipo": "array", "arquivo": arquivo}
+                else:
+                    infos[parte] = {"tipo": "json", "valor": valor}
+
+            with open(os.path.join(temporario, _MANIFESTO), "w", encoding="utf-8") as f:
+                json.dump({"formato": _FORMATO, "nome": nome, "chave": chave, "partes": infos}, f, ensure_ascii=False)
+
+            if os.path.exists(destino):
+                shutil.rmtree(destino, ignore_errors=True)
+            try:
+                os.rename(temporario, destino)
+            except OSError:
+                # Outro processo gravou a mesma versão primeiro
+                shutil.rmtree(temporario, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(temporario, ignore_errors=True)
+            raise
+
+        for entrada in os.listdir(diretorio):
+            caminho = os.path.join(diretorio, entrada)
+            if caminho != destino and not entrada.startswith(".tmp-") and os.path.isdir(caminho):
+                shutil.rmtree(caminho, ignore_errors=True)
+        return destino
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Artefatos gravados: nome, chave e tamanho em bytes."""
+        artefatos = []
+        if not os.path.isdir(self.base_dir):
+            return artefatos
+        for nome in sorted(os.listdir(self.base_dir)):
+            diretorio = os.path.join(self.base_dir, nome)
+            if not os.path.isdir(diretorio):
+                continue
+            for entrada in sorted(os.listdir(diretorio)):
+                caminho = os.path.join(diretorio, entrada)
+                if entrada.startswith(".tmp-") or not os.path.isfile(os.path.join(caminho, _MANIFESTO)):
+                    continue
+                with open(os.path.join(caminho, _MANIFESTO), "r", encoding="utf-8") as f:
+                    chave = json.load(f).get("chave")
+                tamanho = sum(os.path.getsize(os.path.join(caminho, a)) for a in os.listdir(caminho))
+                artefatos.append({"nome": nome, "chave": chave, "bytes": tamanho})
+        return artefatos
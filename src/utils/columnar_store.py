@@ -0,0 +1,89 @@
+"""
+Armazenamento colunar das dimensões textuais do painel.
+Codifica as colunas repetitivas (fluxo, serviço, formulário, campo...) como
+`category`: cada coluna passa a ser um vetor de códigos inteiros mais um único
+dicionário código -> rótulo, em vez de uma string Python por linha.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+# Dimensões usadas pelos filtros, agrupamentos e KPIs do painel
+DIMENSOES_CATEGORICAS = ['fluxo', 'servico', 'formulario', 'etapa', 'nomeCampo', 'autor', 'tipo_componente']
+
+# Outras colunas de texto com alta repetição que também se beneficiam da codificação
+COLUNAS_TEXTO_REPETITIVO = ['tipoCampo', 'legenda', 'legendaCampoFilho', 'statusFluxo']
+
+def encode_categorical_columns(df: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Converte as dimensões textuais do DataFrame para `category` (in-place).
+    As categorias ficam sempre em ordem alfabética, para que ordenações e
+    listas de metadados continuem iguais às feitas sobre as strings originais.
+
+    Args:
+        df: DataFrame carregado
+        columns: Colunas a codificar (padrão: dimensões + colunas repetitivas)
+
+    Returns:
+        O mesmo DataFrame, com as colunas codificadas
+    """
+    if df.empty:
+        return df
+
+    if columns is None:
+        columns = DIMENSOES_CATEGORICAS + COLUNAS_TEXTO_REPETITIVO
+
+    for col in columns:
+        if col not in df.columns:
+            continue
+
+        serie = df[col]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            categorias = serie.cat.categories
+            if not categorias.is_monotonic_increasing:
+                df[col] = serie.cat.reorder_categories(sorted(categorias))
+        else:
+            df[col] = serie.astype('category')
+
+    # Flag binária não precisa de 64 bits por linha
+    if 'is_padronizado' in df.columns and df['is_padronizado'].dtype != np.int8:
+        df['is_padronizado'] = df['is_padronizado'].fillna(0).astype(np.int8)
+
+    return df
+
+def get_code_dictionaries(df: pd.DataFrame) -> Dict[str, Dict[int, str]]:
+    """
+    Retorna os dicionários código -> rótulo de cada coluna categórica.
+
+    Args:
+        df: DataFrame já codificado
+
+    Returns:
+        Dicionário {coluna: {código: rótulo}}
+    """
+    dicionarios = {}
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            dicionarios[col] = dict(enumerate(df[col].cat.categories.astype(str).tolist()))
+    return dicionarios
+
+def get_codes(df: pd.DataFrame, column: str) -> np.ndarray:
+    """Retorna o vetor de códigos inteiros de uma coluna categórica (-1 = nulo)."""
+    return df[column].cat.codes.to_numpy()
+
+def lookup_code(df: pd.DataFrame, column: str, label) -> int:
+    """
+    Converte um rótulo no código correspondente da coluna.
+
+    Returns:
+        Código da categoria ou -1 se o rótulo não existir
+    """
+    categorias = df[column].cat.categories
+    try:
+        return int(categorias.get_loc(label))
+    except KeyError:
+        return -1
+
+def get_categories(df: pd.DataFrame, column: str) -> List[str]:
+    """Retorna os rótulos (ordenados) de uma coluna categórica."""
+    return df[column].cat.categories.astype(str).tolist()
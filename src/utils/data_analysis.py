@@ -0,0 +1,194 @@
+"""
+Snapshot das estatísticas globais usadas pelo chatbot.
+A análise é calculada uma vez por versão dos dados (ver data_cache.get_data_version):
+fica memoizada em memória e gravada no armazenamento de artefatos
+(data/artifacts, ver artifact_store.py) pelo scripts/process_data.py ou no
+primeiro uso, então as mensagens do chat não fazem nenhum trabalho sobre o
+DataFrame para obter as estatísticas gerais.
+"""
+import os
+import pandas as pd
+from typing import Any, Dict, Optional
+
+from src.utils.data_cache import cached_artifact, get_data_version, load_processed_data
+
+_analysis_cache = {}  # Análise por arquivo: {caminho absoluto: (versao, analise)}
+
+_TOP_N = 10
+
+def _top(serie_tamanhos: pd.Series) -> Dict[str, int]:
+    """Os _TOP_N maiores valores de um groupby().size(), como dicionário JSON."""
+    top = serie_tamanhos.sort_values(ascending=False).head(_TOP_N)
+    return {str(k): int(v) for k, v in top.items()}
+
+def _media(valores: pd.Series) -> Optional[float]:
+    """Média arredondada de uma coluna numérica (None se toda nula)."""
+    if valores.isna().all():
+        return None
+    return round(float(valores.mean()), 2)
+
+def compute_data_analysis(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Calcula as estatísticas globais dos dados para o contexto do chatbot.
+    Cada relacionamento (campos por formulário, formulários por campo e por fluxo)
+    é um único groupby; os detalhes do top 10 saem desses agregados, sem filtrar
+    o DataFrame por item.
+
+    Args:
+        df: DataFrame com formulario, nomeCampo, fluxo e servico
+
+    Returns:
+        Dicionário com estatísticas e análises (apenas tipos nativos, serializável em JSON)
+    """
+    if df.empty:
+        return {}
+
+    colunas = set(df.columns)
+
+    # =====================================================================
+    # ESTATÍSTICAS GERAIS
+    # =====================================================================
+    total_formularios = int(df['formulario'].nunique()) if 'formulario' in colunas else 0
+    total_campos = int(df['nomeCampo'].nunique()) if 'nomeCampo' in colunas else 0
+    total_fluxos = int(df['fluxo'].nunique()) if 'fluxo' in colunas else 0
+    total_servicos = int(df['servico'].nunique()) if 'servico' in colunas else 0
+
+    # Relacionamentos (um groupby cada, reutilizados pelos detalhes e pelas médias)
+    campos_por_form = None
+    if {'formulario', 'nomeCampo'} <= colunas:
+        campos_por_form = df.groupby('formulario', observed=True)['nomeCampo'].nunique()
+    forms_por_campo = None
+    if {'nomeCampo', 'formulario'} <= colunas:
+        forms_por_campo = df.groupby('nomeCampo', observed=True)['formulario'].nunique()
+    forms_por_fluxo = None
+    if {'fluxo', 'formulario'} <= colunas:
+        forms_por_fluxo = df.groupby('fluxo', observed=True)['formulario'].nunique()
+
+    # =====================================================================
+    # ANÁLISES DE USO E FREQUÊNCIA
+    # =====================================================================
+    formularios_mais_usados, formularios_detalhes = {}, {}
+    if 'formulario' in colunas:
+        formularios_mais_usados = _top(df.groupby('formulario', observed=True).size())
+        for form, uso in formularios_mais_usados.items():
+            campos = int(campos_por_form.get(form, 0)) if campos_por_form is not None else 0
+            formularios_detalhes[form] = {'uso': uso, 'campos': campos}
+
+    campos_mais_comuns, campos_detalhes = {}, {}
+    if 'nomeCampo' in colunas:
+        campos_mais_comuns = _top(df.groupby('nomeCampo', observed=True).size())
+        for campo, uso in campos_mais_comuns.items():
+            formularios = int(forms_por_campo.get(campo, 0)) if forms_por_campo is not None else 0
+            campos_detalhes[campo] = {'uso': uso, 'formularios': formularios}
+
+    fluxos_mais_ativos, fluxos_detalhes = {}, {}
+    if 'fluxo' in colunas:
+        fluxos_mais_ativos = _top(df.groupby('fluxo', observed=True).size())
+        for fluxo, uso in fluxos_mais_ativos.items():
+            formularios = int(forms_por_fluxo.get(fluxo, 0)) if forms_por_fluxo is not None else 0
+            fluxos_detalhes[fluxo] = {'uso': uso, 'formularios': formularios}
+
+    servicos_mais_usados = {}
+    if 'servico' in colunas:
+        servicos_mais_usados = _top(df.groupby('servico', observed=True).size())
+
+    # =====================================================================
+    # MÉTRICAS E CÁLCULOS AVANÇADOS
+    # =====================================================================
+    media_campos_por_formulario = 0
+    if total_formularios > 0 and campos_por_form is not None:
+        media_campos_por_formulario = round(float(campos_por_form.mean()), 2)
+
+    media_formularios_por_fluxo = 0
+    if total_fluxos > 0 and forms_por_fluxo is not None:
+        media_formularios_por_fluxo = round(float(forms_por_fluxo.mean()), 2)
+
+    tempo_medio = _media(df['tempoTotal']) if 'tempoTotal' in colunas else None
+    tempo_medio_inicio_fim = _media(df['tempoInicioFim']) if 'tempoInicioFim' in colunas else None
+
+    status_distribuicao = {}
+    if 'status' in colunas:
+        status_distribuicao = {str(k): int(v) for k, v in df['status'].value_counts().items()}
+
+    # Formulário com mais campos
+    formulario_mais_campos = None
+    max_campos = 0
+    if campos_por_form is not None and not campos_por_form.empty:
+        formulario_mais_campos = str(campos_por_form.idxmax())
+        max_campos = int(campos_por_form.max())
+
+    return {
+        "total_formularios": total_formularios,
+        "total_campos": total_campos,
+        "total_fluxos": total_fluxos,
+        "total_servicos": total_servicos,
+        "total_registros": len(df),
+        "media_campos_por_formulario": media_campos_por_formulario,
+        "media_formularios_por_fluxo": media_formularios_por_fluxo,
+        "formularios_mais_usados": formularios_mais_usados,
+        "formularios_detalhes": formularios_detalhes,
+        "campos_mais_comuns": campos_mais_comuns,
+        "campos_detalhes": campos_detalhes,
+        "fluxos_mais_ativos": fluxos_mais_ativos,
+        "fluxos_detalhes": fluxos_detalhes,
+        "servicos_mais_usados": servicos_mais_usados,
+        "tempo_medio": tempo_medio,
+        "tempo_medio_inicio_fim": tempo_medio_inicio_fim,
+        "status_distribuicao": status_distribuicao,
+        "formulario_mais_campos": formulario_mais_campos,
+        "max_campos_no_formulario": max_campos
+    }
+
+def save_data_analysis(csv_path: str) -> Dict[str, Any]:
+    """
+    Calcula a análise da versão atual dos dados e grava no armazenamento de
+    artefatos (data/artifacts). Usado pelo scripts/process_data.py.
+
+    Args:
+        csv_path: Caminho do arquivo CSV original
+
+    Returns:
+        Dicionário da análise
+    """
+    versao = get_data_version(csv_path)
+    analise = cached_artifact(csv_path, 'analise', (__name__,),
+                              lambda: compute_data_analysis(load_processed_data(csv_path)),
+                              _to_parts, _from_parts, rebuild=True)
+    _analysis_cache[os.path.abspath(csv_path)] = (versao, analise)
+    return analise
+
+def get_data_analysis(csv_path: str) -> Dict[str, Any]:
+    """
+    Retorna a análise global dos dados, recalculada apenas quando a versão muda.
+    Ordem: memória do processo -> artefato gravado para o conteúdo atual dos
+    dados -> cálculo sobre os dados processados.
+
+    Args:
+        csv_path: Caminho do arquivo CSV original
+
+    Returns:
+        Dicionário com estatísticas e análises (vazio se não houver dados)
+    """
+    chave = os.path.abspath(csv_path)
+    versao = get_data_version(csv_path)
+
+    cached = _analysis_cache.get(chave)
+    if cached is not None and cached[0] == versao:
+        return cached[1]
+
+    def build():
+        analise = compute_data_analysis(load_processed_data(csv_path))
+        print(f"Análise dos dados calculada: {analise.get('total_registros', 0):,} registros")
+        return analise
+
+    analise = cached_artifact(csv_path, 'analise', (__name__,), build, _to_parts, _from_parts)
+    _analysis_cache[chave] = (versao, analise)
+    return analise
+
+def _to_parts(analise: Dict[str, Any]) -> Dict[str, Any]:
+    """Partes gravadas no armazenamento de artefatos."""
+    return {'analise': analise}
+
+def _from_parts(partes: Dict[str, Any]) -> Dict[str, Any]:
+    """Análise gravada por _to_parts."""
+    return partes['analise']
@@ -1,121 +1,251 @@
 import pandas as pd
 import os
-from typing import Dict, Any, Optional
+import csv
+import codecs
+import json
+from typing import Dict, Any, Callable, List, Optional
+from src.utils.columnar_store import (
+    DIMENSOES_CATEGORICAS, COLUNAS_TEXTO_REPETITIVO,
+    encode_categorical_columns, get_code_dictionaries, get_categories
+)
+from src.utils.filter_index import FilterIndex
+from src.utils.aggregate_cube import AggregateCube
+from src.utils.shared_data import get_shared_data_dir, export_snapshot, attach_snapshot
+from src.utils.lru_cache import LRUCache, dataframe_nbytes
+from src.utils.processed_store import (
+    read_processed_dataset, processed_timestamp, get_manifest_path, get_delta_dir
+)
+from src.utils.artifact_store import (
+    ArtifactStore, get_artifact_dir, hash_files, code_version, is_enabled as artifacts_enabled
+)
 
 # Cache global para dados
 _data_cache = {}
 _metadata_cache = {}
 _file_timestamps = {}  # Armazena timestamps dos arquivos para invalidar cache
-_filtered_data_cache = {}  # Cache de dados filtrados para melhor performance
 _max_filtered_cache_size = 50  # Limite de entradas no cache de filtros
+_max_filtered_cache_mb = float(os.environ.get("FILTERED_CACHE_MAX_MB", "256"))  # Orçamento de memória do cache de filtros
 
-def load_data_once(csv_path: str) -> pd.DataFrame:
+def _filtered_nbytes(df: pd.DataFrame) -> int:
     """
-    Carrega os dados do CSV uma única vez usando chunks e armazena em cache.
-    Invalida o cache automaticamente se o arquivo foi modificado.
+    Tamanho de um DataFrame filtrado: recortes dos dados completos em memória
+    compartilham os dicionários das categóricas; subconjuntos lidos direto do
+    Parquet têm dicionários próprios, que contam no orçamento.
+    """
+    return dataframe_nbytes(df, [base for base in _data_cache.values() if isinstance(base, pd.DataFrame)])
+
+# Cache LRU de dados filtrados, limitado por bytes e por entradas
+_filtered_data_cache = LRUCache(int(_max_filtered_cache_mb * 1024 * 1024), max_entries=_max_filtered_cache_size,
+                                sizeof=_filtered_nbytes)
+_filter_index_cache = {}  # Índice de filtros por arquivo: {caminho absoluto: (versao, FilterIndex)}
+_cube_cache = {}  # Cubo pré-agregado por arquivo: {caminho absoluto: (versao, AggregateCube)}
+_source_hash_cache = {}  # Hash do conteúdo da origem: {caminho absoluto: (versao, hash)}
+_max_figure_cache_size = int(os.environ.get("FIGURE_CACHE_MAX_ENTRIES", "500"))  # Limite de figuras em cache
+_max_figure_cache_mb = float(os.environ.get("FIGURE_CACHE_MAX_MB", "64"))  # Orçamento de memória do cache de figuras
+# Cache LRU de figuras serializadas (JSON) por gráfico, versão dos dados e filtros
+_figure_cache = LRUCache(int(_max_figure_cache_mb * 1024 * 1024), max_entries=_max_figure_cache_size, sizeof=len)
+_max_table_cache_mb = float(os.environ.get("TABLE_CACHE_MAX_MB", "64"))  # Orçamento de memória do cache de tabelas
+# Cache LRU das tabelas completas (paginadas no servidor): {(tabela, versão, filtros): (DataFrame, resumo)}
+_table_cache = LRUCache(int(_max_table_cache_mb * 1024 * 1024), max_entries=200,
+                        sizeof=lambda valor: dataframe_nbytes(valor[0]))
+
+# Filtros aceitos por load_processed_data (os mesmos do painel)
+FILTROS_PROCESSADOS = ('ano', 'fluxo', 'servico', 'formulario')
+
+def _normalize_path(path: str) -> str:
+    """
+    Caminho absoluto e normalizado usado como chave dos caches por arquivo:
+    "data/meu_arquivo.csv" (chatbot) e o caminho absoluto do painel
+    compartilham as mesmas entradas em vez de carregar os dados duas vezes.
+    """
+    return os.path.abspath(os.path.normpath(path))
+
+def _get_parquet_raw_path(csv_path: str) -> str:
+    """Retorna o caminho do Parquet bruto (mesmo nome do CSV, extensão .parquet)"""
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+def _resolve_data_source(csv_path: str) -> str:
+    """
+    Escolhe o arquivo de origem dos dados brutos.
+    Usa o Parquet ao lado do CSV quando existe e não é mais antigo que o CSV;
+    caso contrário usa o próprio CSV.
+    """
+    if csv_path.endswith('.parquet'):
+        return csv_path
+    
+    parquet_path = _get_parquet_raw_path(csv_path)
+    if os.path.exists(parquet_path):
+        if not os.path.exists(csv_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+            return parquet_path
+    return csv_path
+
+def _get_source_timestamp(csv_path: str) -> Optional[tuple]:
+    """Identifica a versão da origem dos dados brutos: (arquivo, mtime), ou None se não existir."""
+    source_path = _resolve_data_source(csv_path)
+    if not os.path.exists(source_path):
+        return None
+    return (source_path, os.path.getmtime(source_path))
+
+def _read_parquet_source(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Lê o Parquet com projeção de colunas, mantendo as colunas de texto repetitivo
+    codificadas em dicionário (viram `category` sem materializar uma string por linha).
+    """
+    import pyarrow.parquet as pq
+    
+    schema = pq.read_schema(path)
+    if columns is not None:
+        columns = [c for c in columns if c in schema.names]
+    
+    colunas_lidas = columns if columns is not None else schema.names
+    dicionarios = [c for c in DIMENSOES_CATEGORICAS + COLUNAS_TEXTO_REPETITIVO if c in colunas_lidas]
+    
+    table = pq.read_table(path, columns=columns, read_dictionary=dicionarios)
+    df = table.to_pandas()
+    
+    # O leitor de CSV trata campos vazios como nulos: mantém a mesma semântica
+    for col in dicionarios:
+        if '' in df[col].cat.categories:
+            df[col] = df[col].cat.remove_categories([''])
+    return df
+
+def _read_csv_source(csv_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Lê o CSV em chunks. Separador, encoding e cabeçalho são detectados a partir de
+    uma única amostra do início do arquivo, e o arquivo é percorrido só uma vez.
+    """
+    with open(csv_path, 'rb') as f:
+        amostra = f.read(64 * 1024)
+    
+    # Tenta detectar o encoding correto (decodificador incremental: amostra pode cortar um caractere)
+    encoding = 'utf-8'
+    try:
+        texto = codecs.getincrementaldecoder('utf-8')().decode(amostra, final=False)
+    except UnicodeDecodeError:
+        encoding = 'latin1'
+        texto = amostra.decode('latin1')
+    
+    # Detecta o separador automaticamente
+    first_line = texto.lstrip('\ufeff').splitlines()[0] if texto else ''
+    sep = ';' if ';' in first_line else ','
+    print(f"Separador detectado: '{sep}'")
+    
+    # Verifica quais colunas existem no CSV
+    columns_in_file = [c.strip().lstrip('\ufeff') for c in next(csv.reader([first_line], delimiter=sep), [])]
+    
+    # Carrega dados em chunks para evitar problemas de memória
+    chunk_size = 100000  # 100k registros por chunk
+    chunks = []
+    
+    read_csv_params = {
+        'filepath_or_buffer': csv_path,
+        'encoding': encoding,
+        'sep': sep,
+        'low_memory': False,
+        'chunksize': chunk_size
+    }
+    
+    if columns is not None:
+        usecols = [c for c in columns if c in columns_in_file]
+        read_csv_params['usecols'] = lambda c: c.strip().lstrip('\ufeff') in usecols
+        columns_in_file = usecols
+    
+    if 'dataCriacao' in columns_in_file:
+        read_csv_params['parse_dates'] = ['dataCriacao']
+    
+    # Tenta adicionar dtype apenas se a coluna existir
+    if 'statusFluxo' in columns_in_file:
+        read_csv_params['dtype'] = {'statusFluxo': 'category'}
+    
+    print(f"Carregando dados em chunks (encoding: {encoding}, sep: '{sep}')...")
+    for i, chunk in enumerate(pd.read_csv(**read_csv_params)):
+        # Limpa colunas do chunk
+        chunk.columns = [c.strip().lstrip('\ufeff') for c in chunk.columns]
+        chunks.append(chunk)
+        
+        if (i + 1) % 10 == 0:  # Log a cada 1M registros
+            print(f"Chunk {i+1}: {len(chunk):,} registros processados")
+    
+    # Concatena todos os chunks
+    return pd.concat(chunks, ignore_index=True)
+
+def load_data_once(csv_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Carrega os dados brutos uma única vez e armazena em cache.
+    Lê o Parquet correspondente ao CSV quando disponível (leitura colunar direta);
+    o CSV fica como alternativa. Invalida o cache automaticamente se a origem foi modificada.
     
     Args:
-        csv_path: Caminho para o arquivo CSV
+        csv_path: Caminho para o arquivo CSV (ou Parquet)
+        columns: Colunas a carregar (padrão: todas)
         
     Returns:
-        DataFrame com todos os dados
+        DataFrame com os dados
     """
     global _data_cache, _file_timestamps
     
-    # Verifica se o arquivo foi modificado
+    csv_path = _normalize_path(csv_path)
+    cache_key = csv_path if columns is None else f"{csv_path}::{','.join(columns)}"
+    
+    # Verifica se a origem foi modificada
     file_modified = False
-    if os.path.exists(csv_path):
-        current_timestamp = os.path.getmtime(csv_path)
+    current_timestamp = _get_source_timestamp(csv_path)
+    if current_timestamp is not None:
         if csv_path in _file_timestamps:
             if current_timestamp != _file_timestamps[csv_path]:
-                print(f"Arquivo {csv_path} foi modificado. Invalidando cache...")
+                print(f"Arquivo {current_timestamp[0]} foi modificado. Invalidando cache...")
                 file_modified = True
-                # Remove do cache se foi modificado
-                if csv_path in _data_cache:
-                    del _data_cache[csv_path]
+                # Remove do cache (inclusive projeções de colunas) se foi modificado
+                for key in [k for k in _data_cache if k == csv_path or k.startswith(f"{csv_path}::")]:
+                    del _data_cache[key]
                 if csv_path in _metadata_cache:
                     del _metadata_cache[csv_path]
         _file_timestamps[csv_path] = current_timestamp
     
-    if csv_path not in _data_cache or file_modified:
-        print(f"Carregando dados do CSV: {csv_path}")
+    # Projeção de colunas sobre o DataFrame completo já em memória
+    if columns is not None and csv_path in _data_cache and not file_modified:
+        df = _data_cache[csv_path]
+        return df[[c for c in columns if c in df.columns]]
+    
+    if cache_key not in _data_cache or file_modified:
         try:
-            if not os.path.exists(csv_path):
+            if current_timestamp is None:
                 print(f"Aviso: Arquivo CSV não encontrado em {csv_path}. Retornando DataFrame vazio.")
-                _data_cache[csv_path] = pd.DataFrame()
-                return _data_cache[csv_path]
-
-            # Detecta o separador automaticamente
-            with open(csv_path, 'r', encoding='utf-8') as f:
-                first_line = f.readline()
-                sep = ';' if ';' in first_line else ','
-            print(f"Separador detectado: '{sep}'")
-
-            # Tenta detectar o encoding correto
-            encoding = 'utf-8'
-            try:
-                # Primeiro tenta UTF-8
-                test_df = pd.read_csv(csv_path, encoding='utf-8', sep=sep, nrows=10)
-            except (UnicodeDecodeError, UnicodeError):
-                # Se falhar, usa latin1
-                encoding = 'latin1'
-                test_df = pd.read_csv(csv_path, encoding='latin1', sep=sep, nrows=10)
-            
-            # Verifica quais colunas existem no CSV
-            columns_in_file = test_df.columns.tolist()
-            parse_dates_list = []
-            if 'dataCriacao' in columns_in_file:
-                parse_dates_list = ['dataCriacao']
-            
-            # Carrega dados em chunks para evitar problemas de memória
-            chunk_size = 100000  # 100k registros por chunk
-            chunks = []
-            
-            read_csv_params = {
-                'filepath_or_buffer': csv_path,
-                'encoding': encoding,
-                'sep': sep,
-                'low_memory': False,
-                'chunksize': chunk_size
-            }
+                _data_cache[cache_key] = pd.DataFrame()
+                return _data_cache[cache_key]
             
-            if parse_dates_list:
-                read_csv_params['parse_dates'] = parse_dates_list
-            
-            # Tenta adicionar dtype apenas se a coluna existir
-            if 'statusFluxo' in columns_in_file:
-                read_csv_params['dtype'] = {'statusFluxo': 'category'}
+            source_path = current_timestamp[0]
+            if source_path.endswith('.parquet'):
+                print(f"Carregando dados do Parquet: {source_path}")
+                df = _read_parquet_source(source_path, columns)
+            else:
+                print(f"Carregando dados do CSV: {source_path}")
+                df = _read_csv_source(source_path, columns)
             
-            print(f"Carregando dados em chunks (encoding: {encoding}, sep: '{sep}')...")
-            for i, chunk in enumerate(pd.read_csv(**read_csv_params)):
-                # Limpa colunas do chunk
-                chunk.columns = [c.strip().lstrip('\ufeff') for c in chunk.columns]
-                chunks.append(chunk)
-                
-                if (i + 1) % 10 == 0:  # Log a cada 1M registros
-                    print(f"Chunk {i+1}: {len(chunk):,} registros processados")
+            if columns is not None:
+                df = df[[c for c in columns if c in df.columns]]
             
-            # Concatena todos os chunks
-            df = pd.concat(chunks, ignore_index=True)
+            # Codifica dimensões textuais como category (códigos inteiros + dicionário)
+            df = encode_categorical_columns(df)
             
             # REMOVIDO: Limpeza de encoding (tratamento será feito externamente)
             # df = clean_dataframe_text_columns(df)
             
             # Armazena no cache
-            _data_cache[csv_path] = df
+            _data_cache[cache_key] = df
             print(f"Dados carregados: {len(df):,} registros, {len(df.columns)} colunas")
             print(f"Colunas disponíveis: {', '.join(df.columns.tolist()[:10])}{'...' if len(df.columns) > 10 else ''}")
             
         except FileNotFoundError as e:
-            print(f"Erro: Arquivo CSV não encontrado em {csv_path}. {e}")
-            _data_cache[csv_path] = pd.DataFrame()
+            print(f"Erro: Arquivo de dados não encontrado em {csv_path}. {e}")
+            _data_cache[cache_key] = pd.DataFrame()
         except Exception as e:
             print(f"Erro ao carregar dados: {e}")
             import traceback
             traceback.print_exc()
-            _data_cache[csv_path] = pd.DataFrame()
+            _data_cache[cache_key] = pd.DataFrame()
     
-    return _data_cache[csv_path]
+    return _data_cache[cache_key]
 
 def get_metadata(csv_path: str) -> Dict[str, Any]:
     """
@@ -129,10 +259,12 @@ def get_metadata(csv_path: str) -> Dict[str, Any]:
     """
     global _metadata_cache, _file_timestamps
     
-    # Verifica se o arquivo foi modificado (invalida cache de metadados também)
+    csv_path = _normalize_path(csv_path)
+    
+    # Verifica se a origem foi modificada (invalida cache de metadados também)
     file_modified = False
-    if os.path.exists(csv_path):
-        current_timestamp = os.path.getmtime(csv_path)
+    current_timestamp = _get_source_timestamp(csv_path)
+    if current_timestamp is not None:
         if csv_path in _file_timestamps:
             if current_timestamp != _file_timestamps[csv_path]:
                 file_modified = True
@@ -140,69 +272,112 @@ def get_metadata(csv_path: str) -> Dict[str, Any]:
                     del _metadata_cache[csv_path]
     
     if csv_path not in _metadata_cache or file_modified:
-        df = load_data_once(csv_path)
-        
-        if df.empty:
-            return {"anos": [], "fluxos": [], "servicos": [], "formularios": []}
-        
-        # Extrai metadados
-        anos = []
-        if 'dataCriacao' in df.columns:
-            anos = sorted(df['dataCriacao'].dt.year.dropna().unique().astype(int).tolist())
-        
-        fluxos = []
-        if 'fluxo' in df.columns:
-            fluxos = sorted(df['fluxo'].dropna().unique().astype(str).tolist())
-        
-        servicos = []
-        if 'servico' in df.columns:
-            servicos = sorted(df['servico'].dropna().unique().astype(str).tolist())
-        
-        formularios = []
-        if 'formulario' in df.columns:
-            formularios = sorted(df['formulario'].dropna().unique().astype(str).tolist())
-        
-        _metadata_cache[csv_path] = {
-            "anos": anos,
-            "fluxos": fluxos,
-            "servicos": servicos,
-            "formularios": formularios
-        }
-        
-        print(f"Metadados extraidos: {len(anos)} anos, {len(fluxos)} fluxos, {len(servicos)} servicos, {len(formularios)} formularios")
+        # OTIMIZAÇÃO: Listas reabertas do armazenamento de artefatos quando a origem não mudou
+        metadados = cached_artifact(csv_path, "metadados", (__name__, "src.utils.columnar_store"),
+                                    lambda: _build_metadata(csv_path),
+                                    lambda m: {"metadados": m}, lambda partes: partes["metadados"])
+        if not any(metadados.values()):
+            return metadados
+        _metadata_cache[csv_path] = metadados
+        # Lidos do disco sem passar por load_data_once: registra o timestamp para detectar mudanças
+        if current_timestamp is not None:
+            _file_timestamps.setdefault(csv_path, current_timestamp)
     
     return _metadata_cache[csv_path]
 
+def _build_metadata(csv_path: str) -> Dict[str, Any]:
+    """Extrai as listas de anos, fluxos, serviços e formulários dos dados brutos (ver get_metadata)."""
+    # Metadados só precisam das colunas dos filtros
+    df = load_data_once(csv_path, columns=['dataCriacao', 'fluxo', 'servico', 'formulario'])
+    
+    if df.empty:
+        return {"anos": [], "fluxos": [], "servicos": [], "formularios": []}
+    
+    # Extrai metadados
+    anos = []
+    if 'dataCriacao' in df.columns:
+        anos = sorted(df['dataCriacao'].dt.year.dropna().unique().astype(int).tolist())
+    
+    # Colunas categóricas: o dicionário de rótulos já é a lista ordenada de valores
+    fluxos = []
+    if 'fluxo' in df.columns:
+        fluxos = get_categories(df, 'fluxo')
+    
+    servicos = []
+    if 'servico' in df.columns:
+        servicos = get_categories(df, 'servico')
+    
+    formularios = []
+    if 'formulario' in df.columns:
+        formularios = get_categories(df, 'formulario')
+    
+    print(f"Metadados extraidos: {len(anos)} anos, {len(fluxos)} fluxos, {len(servicos)} servicos, {len(formularios)} formularios")
+    return {
+        "anos": anos,
+        "fluxos": fluxos,
+        "servicos": servicos,
+        "formularios": formularios
+    }
+
 def _get_parquet_processed_path(csv_path: str) -> str:
     """Retorna o caminho do arquivo Parquet processado correspondente ao CSV"""
     return csv_path.replace('.csv', '_processed.parquet')
 
-def load_processed_data(csv_path: str) -> pd.DataFrame:
+def load_processed_data(csv_path: str, columns: Optional[List[str]] = None, 
+                        filters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
     """
     Carrega dados processados (enriquecidos) do Parquet.
     Se não existir, carrega do CSV e processa em tempo de execução.
     
+    Com `columns` e/ou `filters`, lê só o necessário: se os dados completos já estão
+    em memória, responde pelo índice de filtros; senão empurra a projeção e os
+    predicados para o leitor do Parquet, que descarta row groups pelas estatísticas.
+    
     Args:
         csv_path: Caminho do arquivo CSV original
+        columns: Colunas necessárias (padrão: todas)
+        filters: Predicados de igualdade {'ano', 'fluxo', 'servico', 'formulario'}; valores vazios são ignorados
         
     Returns:
         DataFrame processado e enriquecido
     """
+    global _data_cache, _file_timestamps
+    
+    csv_path = _normalize_path(csv_path)
+    filtros = {chave: valor for chave, valor in (filters or {}).items() if valor}
+    desconhecidos = set(filtros) - set(FILTROS_PROCESSADOS)
+    if desconhecidos:
+        raise ValueError(f"Filtros não suportados: {', '.join(sorted(desconhecidos))}")
+    
+    if columns is not None or filtros:
+        return _load_processed_subset(csv_path, columns, filtros)
+    
     parquet_path = _get_parquet_processed_path(csv_path)
     
-    # Tentar carregar Parquet processado
+    # Tentar carregar Parquet processado (base + partes incrementais)
     if os.path.exists(parquet_path):
+        # Reutiliza o DataFrame codificado em memória enquanto os arquivos não mudarem
+        parquet_timestamp = processed_timestamp(parquet_path)
+        if parquet_path in _data_cache and _file_timestamps.get(parquet_path) == parquet_timestamp:
+            return _data_cache[parquet_path]
+        
         try:
-            # Verificar se CSV foi modificado após Parquet
-            if os.path.exists(csv_path):
-                csv_timestamp = os.path.getmtime(csv_path)
-                parquet_timestamp = os.path.getmtime(parquet_path)
-                
-                if csv_timestamp > parquet_timestamp:
-                    print(f"Aviso: CSV foi modificado após processamento. Execute: python scripts/process_data.py")
+            # Verificar se os dados brutos foram modificados após o Parquet processado
+            source_timestamp = _get_source_timestamp(csv_path)
+            if source_timestamp is not None and source_timestamp[1] > parquet_timestamp:
+                print(f"Aviso: Dados brutos modificados após processamento. Execute: python scripts/process_data.py")
             
-            print(f"Carregando dados processados: {parquet_path}")
-            df = pd.read_parquet(parquet_path)
+            # Modo compartilhado: anexa o snapshot em memory-map publicado pelo processo mestre
+            df = _attach_shared_data(csv_path)
+            if df is None:
+                # OTIMIZAÇÃO: colunas .npy em memory-map (códigos + dicionários) no lugar de descomprimir o Parquet a cada boot
+                df = cached_artifact(csv_path, "processados", ("src.utils.processed_store", "src.utils.columnar_store"),
+                                     lambda: _read_processed_data(parquet_path),
+                                     lambda dados: {"dados": dados},
+                                     lambda partes: encode_categorical_columns(partes["dados"]))
+                df = _publish_shared_data(csv_path, df)
+            _data_cache[parquet_path] = df
+            _file_timestamps[parquet_path] = parquet_timestamp
             print(f"Dados processados carregados: {len(df):,} registros")
             return df
         except Exception as e:
@@ -213,14 +388,290 @@ def load_processed_data(csv_path: str) -> pd.DataFrame:
     print("Dados processados não encontrados. Processando do CSV...")
     from src.utils.data_processor import enrich_dataframe
     df = load_data_once(csv_path)
-    df_enriched = enrich_dataframe(df)
+    df_enriched = encode_categorical_columns(enrich_dataframe(df))
     print("Dados processados em tempo de execução (considere executar scripts/process_data.py para melhor performance)")
     return df_enriched
 
+def _read_processed_data(parquet_path: str) -> pd.DataFrame:
+    """Lê o Parquet processado completo (base + partes incrementais), já codificado."""
+    print(f"Carregando dados processados: {parquet_path}")
+    return encode_categorical_columns(read_processed_dataset(parquet_path))
+
+def _load_processed_subset(csv_path: str, columns: Optional[List[str]], filtros: Dict[str, Any]) -> pd.DataFrame:
+    """Subconjunto (colunas x linhas) dos dados processados; ver load_processed_data."""
+    parquet_path = _get_parquet_processed_path(csv_path)
+    em_memoria = (parquet_path in _data_cache and os.path.exists(parquet_path)
+                  and _file_timestamps.get(parquet_path) == processed_timestamp(parquet_path))
+    
+    if em_memoria or not os.path.exists(parquet_path):
+        # Dados completos disponíveis: responde pelo índice de filtros, sem reler o arquivo
+        df = load_processed_data(csv_path)
+        if df.empty:
+            return df
+        linhas = get_filter_index(csv_path).lookup(**filtros) if filtros else None
+        if linhas is not None:
+            df = df.take(linhas)
+        if columns is not None:
+            df = df[[c for c in columns if c in df.columns]]
+        return df
+    
+    cache_key = _get_cache_key(csv_path, *(filtros.get(f) for f in FILTROS_PROCESSADOS)) + (
+        tuple(columns) if columns is not None else None,)
+    cached = _filtered_data_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Projeção e predicados empurrados para o leitor: row groups fora do intervalo
+    # (min/max) dos filtros nem são descomprimidos
+    df = encode_categorical_columns(read_processed_dataset(parquet_path, columns, filtros))
+    _filtered_data_cache.put(cache_key, df)
+    
+    return df
+
+def _attach_shared_data(csv_path: str) -> Optional[pd.DataFrame]:
+    """Anexa o snapshot compartilhado da versão atual dos dados (None se desativado ou inexistente)."""
+    shared_dir = get_shared_data_dir()
+    if not shared_dir:
+        return None
+    
+    df = attach_snapshot(shared_dir, get_data_version(csv_path))
+    if df is not None:
+        print(f"Dados processados anexados do plano compartilhado: {len(df):,} registros")
+    return df
+
+def _publish_shared_data(csv_path: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Publica o DataFrame no plano compartilhado e devolve a versão em memory-map,
+    para que nem o processo que publicou mantenha uma cópia privada.
+    """
+    shared_dir = get_shared_data_dir()
+    if not shared_dir or df.empty:
+        return df
+    
+    try:
+        versao = get_data_version(csv_path)
+        caminho = export_snapshot(df, shared_dir, versao)
+        anexado = attach_snapshot(shared_dir, versao)
+        if anexado is not None:
+            print(f"Dados processados publicados no plano compartilhado: {caminho}")
+            return anexado
+    except Exception as e:
+        print(f"Aviso: não foi possível publicar os dados compartilhados: {e}")
+    return df
+
+def preload_shared_data(csv_path: str) -> Dict[str, Any]:
+    """
+    Pré-carrega os dados no processo mestre do gunicorn, antes do fork dos workers.
+    Publica o snapshot compartilhado e constrói o índice de filtros e o cubo, que
+    os workers herdam prontos.
+    
+    Args:
+        csv_path: Caminho do arquivo CSV original
+        
+    Returns:
+        Resumo do pré-carregamento (registros e diretório compartilhado)
+    """
+    df = load_processed_data(csv_path)
+    if not df.empty:
+        get_filter_index(csv_path)
+        get_aggregate_cube(csv_path)
+    return {"registros": len(df), "shared_data_dir": get_shared_data_dir()}
+
+def get_category_dictionaries(csv_path: str) -> Dict[str, Dict[int, str]]:
+    """
+    Retorna os dicionários código -> rótulo das colunas categóricas dos dados processados.
+    
+    Args:
+        csv_path: Caminho do arquivo CSV original
+        
+    Returns:
+        Dicionário {coluna: {código: rótulo}}
+    """
+    return get_code_dictionaries(load_processed_data(csv_path))
+
+def get_data_version(csv_path: str) -> str:
+    """
+    Retorna um identificador da versão dos dados.
+    Muda sempre que o CSV, o Parquet bruto ou o Parquet processado correspondente for alterado.
+    
+    Args:
+        csv_path: Caminho do arquivo CSV original
+        
+    Returns:
+        String com nome, mtime e tamanho dos arquivos de origem
+    """
+    partes = []
+    processed_path = _get_parquet_processed_path(csv_path)
+    for path in (csv_path, _get_parquet_raw_path(csv_path), processed_path, get_manifest_path(processed_path)):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            partes.append(f"{os.path.basename(path)}:{stat.st_mtime_ns}:{stat.st_size}")
+    return "|".join(partes) if partes else "sem-dados"
+
+def _source_files(csv_path: str) -> List[str]:
+    """Arquivos de origem dos dados: CSV, Parquet bruto, Parquet processado e partes incrementais."""
+    processed_path = _get_parquet_processed_path(csv_path)
+    arquivos = [csv_path, _get_parquet_raw_path(csv_path), processed_path]
+    delta_dir = get_delta_dir(processed_path)
+    if os.path.isdir(delta_dir):
+        arquivos += sorted(os.path.join(delta_dir, nome) for nome in os.listdir(delta_dir) if '.tmp' not in nome)
+    return arquivos
+
+def get_source_hash(csv_path: str) -> str:
+    """
+    Hash do conteúdo dos arquivos de origem (chave dos artefatos em disco).
+    Só relê os arquivos quando a versão (mtime/tamanho) muda; o último hash fica
+    gravado no diretório de artefatos, então um reinício com os mesmos arquivos
+    não relê nada, e arquivos copiados ou restaurados com outro mtime mas o
+    mesmo conteúdo continuam aproveitando os artefatos.
+    
+    Args:
+        csv_path: Caminho do arquivo CSV original
+        
+    Returns:
+        Hash hexadecimal do conteúdo
+    """
+    chave = os.path.abspath(csv_path)
+    versao = get_data_version(csv_path)
+    cached = _source_hash_cache.get(chave)
+    if cached is not None and cached[0] == versao:
+        return cached[1]
+    
+    registro = os.path.join(get_artifact_dir(csv_path), "origem.json")
+    nome = os.path.basename(csv_path)
+    try:
+        with open(registro, "r", encoding="utf-8") as f:
+            registros = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        registros = {}
+    
+    if registros.get(nome, {}).get("versao") == versao:
+        hash_origem = registros[nome]["hash"]
+    else:
+        hash_origem = hash_files(_source_files(csv_path))
+        registros[nome] = {"versao": versao, "hash": hash_origem}
+        if artifacts_enabled():
+            try:
+                os.makedirs(os.path.dirname(registro), exist_ok=True)
+                temporario = f"{registro}.{os.getpid()}.tmp"
+                with open(temporario, "w", encoding="utf-8") as f:
+                    json.dump(registros, f, ensure_ascii=False)
+                os.replace(temporario, registro)
+            except OSError as e:
+                print(f"Aviso: não foi possível gravar o hash da origem: {e}")
+    
+    _source_hash_cache[chave] = (versao, hash_origem)
+    return hash_origem
+
+def cached_artifact(csv_path: str, nome: str, modulos: tuple, build: Callable[[], Any],
+                    to_parts: Callable[[Any], Dict[str, Any]], from_parts: Callable[[Dict[str, Any]], Any],
+                    rebuild: bool = False) -> Any:
+    """
+    Obtém um artefato derivado dos dados do armazenamento em disco (data/artifacts),
+    construindo e gravando apenas quando não há artefato para o conteúdo atual da
+    origem e a versão atual do código.
+    
+    Args:
+        csv_path: Caminho do arquivo CSV original
+        nome: Nome do artefato
+        modulos: Módulos cujo código monta o artefato (entram na chave)
+        build: Função que constrói o artefato
+        to_parts: Converte o artefato em partes gravadas ({parte: DataFrame | ndarray | JSON})
+        from_parts: Reconstrói o artefato a partir das partes lidas
+        rebuild: Ignora o artefato gravado e reconstrói (usado pelo scripts/process_data.py)
+        
+    Returns:
+        O artefato (lido do disco ou recém-construído)
+    """
+    if not artifacts_enabled():
+        return build()
+    
+    store = ArtifactStore(get_artifact_dir(csv_path))
+    chave = f"{get_source_hash(csv_path)}:{code_version(*modulos)}"
+    if not rebuild:
+        try:
+            partes = store.load(nome, chave)
+            if partes is not None:
+                valor = from_parts(partes)
+                print(f"Artefato '{nome}' aberto do disco")
+                return valor
+        except Exception as e:
+            print(f"Aviso: artefato '{nome}' inválido, reconstruindo: {e}")
+    
+    valor = build()
+    try:
+        store.save(nome, chave, to_parts(valor))
+    except Exception as e:
+        print(f"Aviso: não foi possível gravar o artefato '{nome}': {e}")
+    return valor
+
+def get_filter_index(csv_path: str) -> FilterIndex:
+    """
+    Obtém o índice de filtros dos dados processados, reconstruído apenas quando a versão dos dados muda.
+    
+    Args:
+        csv_path: Caminho do arquivo CSV original
+        
+    Returns:
+        FilterIndex com as posting lists de ano, fluxo, serviço e formulário
+    """
+    global _filter_index_cache
+    
+    csv_path = _normalize_path(csv_path)
+    versao = get_data_version(csv_path)
+    cached = _filter_index_cache.get(csv_path)
+    if cached is not None and cached[0] == versao:
+        return cached[1]
+    
+    def build():
+        index = FilterIndex(load_processed_data(csv_path))
+        print(f"Índice de filtros construído: {index.memory_usage() / 1024 / 1024:.2f} MB")
+        return index
+    
+    index = cached_artifact(csv_path, "indice_filtros", ("src.utils.filter_index",), build,
+                            FilterIndex.to_artifact, FilterIndex.from_artifact)
+    _filter_index_cache[csv_path] = (versao, index)
+    return index
+
+def get_aggregate_cube(csv_path: str, ano: Optional[str] = None, fluxo: Optional[str] = None, 
+                       servico: Optional[str] = None, formulario: Optional[str] = None) -> AggregateCube:
+    """
+    Obtém o cubo pré-agregado (construído uma vez por versão dos dados) já restrito aos filtros.
+    
+    Args:
+        csv_path: Caminho do arquivo CSV original
+        ano: Filtro por ano
+        fluxo: Filtro por fluxo
+        servico: Filtro por serviço
+        formulario: Filtro por formulário
+        
+    Returns:
+        AggregateCube com as células que atendem aos filtros
+    """
+    global _cube_cache
+    
+    csv_path = _normalize_path(csv_path)
+    versao = get_data_version(csv_path)
+    cached = _cube_cache.get(csv_path)
+    if cached is None or cached[0] != versao:
+        def build():
+            cube = AggregateCube.from_dataframe(load_processed_data(csv_path))
+            print(f"Cubo de métricas construído: {len(cube.celulas):,} células")
+            return cube
+        
+        cube = cached_artifact(csv_path, "cubo", ("src.utils.aggregate_cube", "src.utils.grouped_kernels"), build,
+                               AggregateCube.to_artifact, AggregateCube.from_artifact)
+        _cube_cache[csv_path] = (versao, cube)
+    else:
+        cube = cached[1]
+    
+    return cube.filter(ano, fluxo, servico, formulario)
+
 def _get_cache_key(csv_path: str, ano: Optional[str], fluxo: Optional[str], 
-                   servico: Optional[str], formulario: Optional[str]) -> str:
-    """Gera chave única para cache de dados filtrados"""
-    return f"{csv_path}__{ano}__{fluxo}__{servico}__{formulario}"
+                   servico: Optional[str], formulario: Optional[str]) -> tuple:
+    """Gera chave única para cache de dados filtrados (inclui a versão dos dados)"""
+    csv_path = _normalize_path(csv_path)
+    return (csv_path, get_data_version(csv_path), ano, fluxo, servico, formulario)
 
 def get_filtered_data(csv_path: str, ano: Optional[str] = None, fluxo: Optional[str] = None, 
                      servico: Optional[str] = None, formulario: Optional[str] = None) -> pd.DataFrame:
@@ -238,12 +689,11 @@ def get_filtered_data(csv_path: str, ano: Optional[str] = None, fluxo: Optional[
     Returns:
         DataFrame filtrado
     """
-    global _filtered_data_cache, _max_filtered_cache_size
-    
     # Verificar cache de dados filtrados
     cache_key = _get_cache_key(csv_path, ano, fluxo, servico, formulario)
-    if cache_key in _filtered_data_cache:
-        return _filtered_data_cache[cache_key]
+    cached = _filtered_data_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
     # OTIMIZAÇÃO: Carregar dados já processados (com is_padronizado, tipo_componente, etc.)
     df = load_processed_data(csv_path)
@@ -251,37 +701,17 @@ def get_filtered_data(csv_path: str, ano: Optional[str] = None, fluxo: Optional[
     if df.empty:
         return df
     
-    # OTIMIZAÇÃO: Usar máscaras booleanas para filtros (muito mais eficiente)
-    mask = pd.Series([True] * len(df), index=df.index)
-    
-    # Filtro por ano (só se a coluna existir)
-    if ano and 'dataCriacao' in df.columns:
-        mask = mask & (df['dataCriacao'].dt.year == int(ano))
+    # OTIMIZAÇÃO: Índice invertido - intersecta as posting lists dos filtros
+    # e seleciona só as linhas do resultado, sem varrer as colunas
+    linhas = get_filter_index(csv_path).lookup(ano, fluxo, servico, formulario)
     
-    # Filtro por fluxo
-    if fluxo and 'fluxo' in df.columns:
-        mask = mask & (df['fluxo'] == fluxo)
+    if linhas is None:
+        return df  # Sem filtros, retorna referência (não ocupa o cache)
     
-    # Filtro por serviço
-    if servico and 'servico' in df.columns:
-        mask = mask & (df['servico'] == servico)
+    filtered_df = df.take(linhas)
     
-    # Filtro por formulário
-    if formulario and 'formulario' in df.columns:
-        mask = mask & (df['formulario'] == formulario)
-    
-    # Aplicar filtros
-    if mask.all():
-        filtered_df = df  # Sem filtros, retorna referência
-    else:
-        filtered_df = df[mask].copy()
-    
-    # Armazenar no cache (limitado)
-    if len(_filtered_data_cache) >= _max_filtered_cache_size:
-        oldest_key = list(_filtered_data_cache.keys())[0]
-        del _filtered_data_cache[oldest_key]
-    
-    _filtered_data_cache[cache_key] = filtered_df
+    # Armazenar no cache (LRU limitado por bytes; remove os menos usados)
+    _filtered_data_cache.put(cache_key, filtered_df)
     
     return filtered_df
 
@@ -310,6 +740,63 @@ def get_filtered_data_safe(csv_path: str, ano: Optional[str] = None, fluxo: Opti
     
     return df
 
+def filter_cache_key(filtros: Optional[Dict[str, Any]]) -> tuple:
+    """Filtros do painel como tupla hashável (seleções múltiplas viram tuplas)."""
+    filtros = filtros or {}
+    return tuple(
+        tuple(valor) if isinstance(valor, list) else valor
+        for valor in (filtros.get(nome) for nome in FILTROS_PROCESSADOS)
+    )
+
+def get_cached_figure(csv_path: str, chart_id: str, filtros: Optional[Dict[str, Any]],
+                      builder: Callable[[], Any]) -> Any:
+    """
+    Obtém uma figura do cache de figuras, construindo-a só quando ausente.
+    A chave é (gráfico, versão dos dados, filtros); a figura fica guardada como
+    JSON, então um acerto não toca em pandas nem no Plotly.
+
+    Args:
+        csv_path: Caminho do arquivo CSV original
+        chart_id: Identificador do gráfico (ex.: "overview.fluxo_por_mes")
+        filtros: Filtros do painel (ano, fluxo, servico, formulario)
+        builder: Função sem argumentos que constrói a go.Figure (chamada só em caso de ausência)
+
+    Returns:
+        Dicionário da figura (acerto) ou a go.Figure construída (ausência)
+    """
+    cache_key = (chart_id, get_data_version(csv_path), filter_cache_key(filtros))
+    cached = _figure_cache.get(cache_key)
+    if cached is not None:
+        return json.loads(cached)
+
+    fig = builder()
+    _figure_cache.put(cache_key, fig.to_json())
+    return fig
+
+def get_cached_table(csv_path: str, table_id: str, filtros: Optional[Dict[str, Any]],
+                     builder: Callable[[], tuple]) -> tuple:
+    """
+    Obtém o conteúdo completo de uma tabela paginada no servidor, construindo-o só quando ausente.
+    Trocar de página, ordenar ou filtrar a tabela reaproveita o mesmo DataFrame.
+
+    Args:
+        csv_path: Caminho do arquivo CSV original
+        table_id: Identificador da tabela (id do DataTable)
+        filtros: Filtros do painel (ano, fluxo, servico, formulario)
+        builder: Função sem argumentos que retorna (DataFrame, resumo)
+
+    Returns:
+        Tupla (DataFrame, resumo)
+    """
+    cache_key = (table_id, get_data_version(csv_path), filter_cache_key(filtros))
+    cached = _table_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    tabela = builder()
+    _table_cache.put(cache_key, tabela)
+    return tabela
+
 def _enrich_data_with_standardized_fields(df: pd.DataFrame) -> pd.DataFrame:
     """
     Enriquece os dados transformando alguns campos em campos padronizados.
@@ -358,7 +845,7 @@ def _enrich_data_with_standardized_fields(df: pd.DataFrame) -> pd.DataFrame:
     }
     
     # Obter todos os fluxos e ordenar por quantidade de campos (maior para menor)
-    campos_por_fluxo = df.groupby('fluxo')['nomeCampo'].nunique().sort_values(ascending=False)
+    campos_por_fluxo = df.groupby('fluxo', observed=True)['nomeCampo'].nunique().sort_values(ascending=False)
     fluxos_ordenados = campos_por_fluxo.index.tolist()
     
     if len(fluxos_ordenados) == 0:
@@ -431,8 +918,8 @@ def _enrich_data_with_standardized_fields(df: pd.DataFrame) -> pd.DataFrame:
             mapeamento_global[campo_antigo] = campo_padronizado
             contador_padronizados += 1
     
-    # Aplicar o mapeamento global
-    df_enriched['nomeCampo'] = df_enriched['nomeCampo'].replace(mapeamento_global)
+    # Aplicar o mapeamento global (sobre strings: os novos nomes não existem nas categorias)
+    df_enriched['nomeCampo'] = df_enriched['nomeCampo'].astype(object).replace(mapeamento_global)
     
     # Calcular estatísticas finais
     total_campos = df['nomeCampo'].nunique()
@@ -467,7 +954,7 @@ def _enrich_data_with_multiple_services(df: pd.DataFrame) -> pd.DataFrame:
     df_enriched = df.copy()
     
     # Agrupar por fluxo para ver quais já têm múltiplos serviços
-    fluxo_servicos = df.groupby('fluxo')['servico'].nunique().reset_index()
+    fluxo_servicos = df.groupby('fluxo', observed=True)['servico'].nunique().reset_index()
     fluxo_servicos.columns = ['fluxo', 'num_servicos']
     
     # Selecionar fluxos que têm apenas 1 serviço para enriquecer
@@ -628,7 +1115,7 @@ def _vary_formulario_campos(df: pd.DataFrame, min_campos: int = 15, max_campos:
         print(f"Campos variados: {len(novos_registros)} novos registros adicionados, {len(indices_para_remover)} removidos para {len(formularios)} formulários")
     
     # Verificar e reportar quantidade de campos por formulário
-    campos_por_form = df_varied.groupby('formulario')['nomeCampo'].nunique()
+    campos_por_form = df_varied.groupby('formulario', observed=True)['nomeCampo'].nunique()
     print(f"Quantidade de campos por formulário: min={campos_por_form.min()}, max={campos_por_form.max()}, média={campos_por_form.mean():.1f}")
     
     return df_varied
@@ -687,22 +1174,52 @@ def get_sampled_data_for_charts(csv_path: str, ano: Optional[str] = None, fluxo:
 
 def clear_cache():
     """Limpa o cache de dados."""
-    global _data_cache, _metadata_cache, _file_timestamps, _filtered_data_cache
+    global _data_cache, _metadata_cache, _file_timestamps, _filtered_data_cache, _filter_index_cache, _cube_cache
     _data_cache.clear()
     _metadata_cache.clear()
     _file_timestamps.clear()
     _filtered_data_cache.clear()
-    print("Cache limpo (incluindo cache de dados filtrados)")
+    _filter_index_cache.clear()
+    _cube_cache.clear()
+    _figure_cache.clear()
+    _table_cache.clear()
+    print("Cache limpo (incluindo cache de dados filtrados, de figuras e de tabelas)")
 
 def get_cache_info() -> Dict[str, Any]:
     """Retorna informações sobre o cache."""
     total_memory = sum(df.memory_usage(deep=True).sum() for df in _data_cache.values()) / 1024 / 1024  # MB
-    filtered_memory = sum(df.memory_usage(deep=True).sum() for df in _filtered_data_cache.values()) / 1024 / 1024  # MB
+    filtered_stats = _filtered_data_cache.stats()
+    filtered_memory = filtered_stats["bytes"] / 1024 / 1024  # MB
+    index_memory = sum(index.memory_usage() for _, index in _filter_index_cache.values()) / 1024 / 1024  # MB
+    figure_stats = _figure_cache.stats()
+    figure_memory = figure_stats["bytes"] / 1024 / 1024  # MB
+    table_stats = _table_cache.stats()
+    table_memory = table_stats["bytes"] / 1024 / 1024  # MB
     return {
         "data_files_cached": len(_data_cache),
         "metadata_files_cached": len(_metadata_cache),
         "filtered_data_cached": len(_filtered_data_cache),
+        "filter_indexes_cached": len(_filter_index_cache),
+        "filter_index_memory_usage": index_memory,
+        "cubes_cached": len(_cube_cache),
         "total_memory_usage": total_memory,
         "filtered_memory_usage": filtered_memory,
-        "total_memory_mb": round(total_memory + filtered_memory, 2)
+        "filtered_cache_max_mb": round(filtered_stats["max_bytes"] / 1024 / 1024, 2),
+        "filtered_cache_hits": filtered_stats["hits"],
+        "filtered_cache_misses": filtered_stats["misses"],
+        "filtered_cache_evictions": filtered_stats["evictions"],
+        "filtered_cache_hit_rate": filtered_stats["hit_rate"],
+        "figures_cached": len(_figure_cache),
+        "figure_memory_usage": figure_memory,
+        "figure_cache_max_mb": round(figure_stats["max_bytes"] / 1024 / 1024, 2),
+        "figure_cache_hits": figure_stats["hits"],
+        "figure_cache_misses": figure_stats["misses"],
+        "figure_cache_evictions": figure_stats["evictions"],
+        "figure_cache_hit_rate": figure_stats["hit_rate"],
+        "tables_cached": len(_table_cache),
+        "table_memory_usage": table_memory,
+        "table_cache_hits": table_stats["hits"],
+        "table_cache_misses": table_stats["misses"],
+        "table_cache_evictions": table_stats["evictions"],
+        "total_memory_mb": round(total_memory + filtered_memory + figure_memory + table_memory, 2)
     }
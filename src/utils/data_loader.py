@@ -1,6 +1,10 @@
 import pandas as pd
 import os
-from src.utils.data_cache import load_data_once, get_metadata, get_filtered_data
+from src.utils.data_cache import load_data_once, get_metadata, get_filtered_data, get_aggregate_cube, preload_shared_data, get_cached_figure, get_cached_table
+from src.utils.data_analysis import get_data_analysis
+from src.utils.entity_index import get_entity_index
+from src.utils.hierarchy_index import get_hierarchy_index
+from src.utils.retrieval_index import get_retrieval_index
 
 def _clean_columns(df):
     df.columns = [c.strip().lstrip('\ufeff') for c in df.columns]
@@ -22,6 +26,45 @@ def stream_filtered_df(path_csv, ano=None, fluxo=None, servico=None, formulario=
     """
     return get_filtered_data(abs_path_csv, ano, fluxo, servico, formulario)
 
+def filtered_cube(path_csv, ano=None, fluxo=None, servico=None, formulario=None):
+    script_dir = os.path.dirname(__file__)
+    abs_path_csv = os.path.join(script_dir, "..", "..", path_csv)
+    """
+    Obtém o cubo de métricas pré-agregadas restrito aos filtros.
+    """
+    return get_aggregate_cube(abs_path_csv, ano, fluxo, servico, formulario)
+
+def cached_figure(path_csv, chart_id, filters, builder):
+    script_dir = os.path.dirname(__file__)
+    abs_path_csv = os.path.join(script_dir, "..", "..", path_csv)
+    """
+    Obtém a figura do gráfico do cache de figuras (builder só roda em caso de ausência).
+    """
+    return get_cached_figure(abs_path_csv, chart_id, filters, builder)
+
+def cached_table(path_csv, table_id, filters, builder):
+    script_dir = os.path.dirname(__file__)
+    abs_path_csv = os.path.join(script_dir, "..", "..", path_csv)
+    """
+    Obtém (DataFrame, resumo) de uma tabela paginada do cache de tabelas (builder só roda em caso de ausência).
+    """
+    return get_cached_table(abs_path_csv, table_id, filters, builder)
+
+def preload_data(path_csv):
+    script_dir = os.path.dirname(__file__)
+    abs_path_csv = os.path.join(script_dir, "..", "..", path_csv)
+    """
+    Pré-carrega dados processados, índice, cubo, a análise, a hierarquia da
+    Biblioteca e os índices de entidades e de recuperação do chatbot (usado pelo
+    processo mestre do gunicorn).
+    """
+    resumo = preload_shared_data(abs_path_csv)
+    get_data_analysis(abs_path_csv)
+    get_hierarchy_index(abs_path_csv)
+    get_entity_index(abs_path_csv)
+    get_retrieval_index(abs_path_csv)
+    return resumo
+
 def quick_read(path_csv, nrows=None):
     script_dir = os.path.dirname(__file__)
     abs_path_csv = os.path.join(script_dir, "..", "..", path_csv)
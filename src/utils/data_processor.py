@@ -2,8 +2,10 @@
 Módulo para processamento e enriquecimento de dados.
 Centraliza toda a lógica de transformação de dados.
 """
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+from src.utils.grouped_kernels import distinct_counts_by
 
 # Prefixos padronizados para identificação de campos
 PADRAO_PREFIXOS = ["TXT_", "CBO_", "CHK_", "RAD_", "BTN_", "TAB_", "ICO_", 
@@ -145,9 +147,75 @@ def get_tipo_componente(nome_campo: str) -> str:
     
     return "Outros/Sem Padrão"
 
+# Tabelas de prefixos usadas pela classificação vetorizada. Reproduzem exatamente
+# as regras de is_padronizado e get_tipo_componente (funções de referência acima).
+_PADRONIZADO_PREFIXOS_3 = ["TXT", "CBO", "RAD", "CHK"]
+# is_padronizado compara LEFT(nomeCampo, 5) com prefixos de 4 caracteres e só
+# para nomes com 5+ caracteres: a regra nunca casa, mas é mantida como na fórmula
+_PADRONIZADO_PREFIXOS_5 = ["CPF_", "CNP_", "CEP_", "TEL_", "EMA_"]
+
+_TIPO_COMPONENTE_PREFIXO_3 = {
+    "LBL": "Label", "TXT": "TextBox", "TXA": "Textarea", "CHK": "CheckBox",
+    "RAD": "RadioButton", "CBO": "Combobox", "IMG": "Imagem", "DT_": "Data",
+    "LNK": "Hiperlink", "ARQ": "Arquivo", "MAP": "Mapa", "ENT": "Entidade",
+    "FT_": "Foto", "PLT": "Planta", "BTN": "Button", "GRD": "Grid",
+    "CSM": "Consumo", "AGD": "Agendamento", "FLX": "Fluxo"
+}
+
+_TIPO_COMPONENTE_PREFIXO_4 = {
+    "CPF_": "CPF", "CNP_": "CNPJ", "CEP_": "CEP", "TEL_": "Telefone", "EMA_": "Email"
+}
+
+# Mapeamento simplificado (todos os prefixos têm 4 caracteres, então startswith
+# equivale a comparar LEFT(nomeCampo, 4))
+_TIPO_COMPONENTE_PREFIXO_GERAL = {
+    "TXT_": "Caixa de Texto", "CBO_": "Combobox", "CHK_": "Checkbox", "RAD_": "Radio Button",
+    "BTN_": "Botão", "TAB_": "Tabela", "ICO_": "Ícone", "IMG_": "Imagem", "LBL_": "Label",
+    "DAT_": "Data", "NUM_": "Número", "TEL_": "Telefone", "EML_": "Email", "URL_": "URL"
+}
+
+TIPO_COMPONENTE_PADRAO = "Outros/Sem Padrão"
+
+def classify_nomes_campo(nomes: pd.Index) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Classifica nomes de campo distintos com operações vetorizadas de prefixo.
+    Equivale a aplicar is_padronizado e get_tipo_componente a cada nome.
+    
+    Args:
+        nomes: Valores distintos de nomeCampo (sem nulos)
+        
+    Returns:
+        Tupla (is_padronizado como int64, tipo_componente como object), alinhados a `nomes`
+    """
+    texto = pd.Series(nomes.astype(str), dtype=object)
+    validos = (texto != 'nan').to_numpy()
+    prefixo_3 = texto.str[:3]
+    prefixo_4 = texto.str[:4]
+    prefixo_5 = texto.str[:5]
+    
+    padronizado = (
+        prefixo_3.isin(_PADRONIZADO_PREFIXOS_3)
+        | (prefixo_5.isin(_PADRONIZADO_PREFIXOS_5) & (texto.str.len() >= 5))
+        | prefixo_4.isin(PADRAO_PREFIXOS)
+    ).to_numpy() & validos
+    
+    # Mesma precedência das cadeias if/elif: 3 letras, depois 4 letras, depois mapa geral
+    tipo = (
+        prefixo_3.map(_TIPO_COMPONENTE_PREFIXO_3)
+        .fillna(prefixo_4.map(_TIPO_COMPONENTE_PREFIXO_4))
+        .fillna(prefixo_4.map(_TIPO_COMPONENTE_PREFIXO_GERAL))
+        .fillna(TIPO_COMPONENTE_PADRAO)
+        .to_numpy(dtype=object)
+    )
+    tipo[~validos] = TIPO_COMPONENTE_PADRAO
+    
+    return padronizado.astype(np.int64), tipo
+
 def enrich_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """
     Enriquece o DataFrame com colunas calculadas.
+    A classificação roda uma vez por valor distinto de nomeCampo e o resultado
+    é espalhado para as linhas pelos códigos da coluna.
     
     Args:
         df: DataFrame original
@@ -162,8 +230,21 @@ def enrich_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     
     # Adicionar coluna is_padronizado se nomeCampo existir
     if 'nomeCampo' in df_enriched.columns:
-        df_enriched['is_padronizado'] = df_enriched['nomeCampo'].apply(is_padronizado)
-        df_enriched['tipo_componente'] = df_enriched['nomeCampo'].apply(get_tipo_componente)
+        serie = df_enriched['nomeCampo']
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            codes, nomes = serie.cat.codes.to_numpy(), serie.cat.categories
+        else:
+            codes, nomes = pd.factorize(serie)
+            nomes = pd.Index(nomes)
+        
+        padronizado, tipo = classify_nomes_campo(nomes)
+        
+        # Código -1 (nulo) cai na última posição: não padronizado / sem padrão
+        padronizado = np.append(padronizado, 0)
+        tipo_codes, tipos = pd.factorize(np.append(tipo, TIPO_COMPONENTE_PADRAO), sort=True)
+        
+        df_enriched['is_padronizado'] = padronizado[codes]
+        df_enriched['tipo_componente'] = pd.Categorical.from_codes(tipo_codes[codes], categories=tipos)
     
     return df_enriched
 
@@ -193,11 +274,16 @@ def calculate_kpis(df: pd.DataFrame) -> Dict[str, Any]:
     if df.empty:
         return kpis
     
+    # Campos distintos (e padronizados distintos) por fluxo, em uma única passada
+    campos_por_fluxo = None
+    if 'fluxo' in df.columns and 'nomeCampo' in df.columns:
+        campos_por_fluxo = distinct_counts_by(df, 'fluxo')
+    
     # KPIs básicos
     if 'fluxo' in df.columns:
         kpis['qtd_fluxos'] = df['fluxo'].nunique()
-        if 'nomeCampo' in df.columns:
-            kpis['media_campos_fluxo'] = round(df.groupby('fluxo')['nomeCampo'].nunique().mean(), 2)
+        if campos_por_fluxo is not None:
+            kpis['media_campos_fluxo'] = round(campos_por_fluxo['distintos'].mean(), 2)
     
     if 'servico' in df.columns:
         kpis['qtd_servicos'] = df['servico'].nunique()
@@ -205,7 +291,7 @@ def calculate_kpis(df: pd.DataFrame) -> Dict[str, Any]:
     if 'formulario' in df.columns:
         kpis['qtd_formularios'] = df['formulario'].nunique()
         if 'nomeCampo' in df.columns:
-            kpis['media_campos_formulario'] = round(df.groupby('formulario')['nomeCampo'].nunique().mean(), 2)
+            kpis['media_campos_formulario'] = round(df.groupby('formulario', observed=True)['nomeCampo'].nunique().mean(), 2)
     
     if 'etapa' in df.columns:
         kpis['qtd_etapas'] = df['etapa'].nunique()
@@ -221,19 +307,10 @@ def calculate_kpis(df: pd.DataFrame) -> Dict[str, Any]:
                 kpis['pct_campos_padrao'] = f"{pct:.2f}%"
     
     # Calcular percentual de padronização por fluxo (média)
-    if 'fluxo' in df.columns and 'nomeCampo' in df.columns and 'is_padronizado' in df.columns:
-        percentuais_fluxos = []
-        for fluxo in df['fluxo'].unique():
-            df_fluxo = df[df['fluxo'] == fluxo]
-            total_campos_unicos = df_fluxo['nomeCampo'].nunique()
-            
-            if total_campos_unicos > 0:
-                campos_padronizados_unicos = df_fluxo[df_fluxo['is_padronizado'] == 1]['nomeCampo'].nunique()
-                pct_fluxo = (campos_padronizados_unicos / total_campos_unicos) * 100
-                percentuais_fluxos.append(pct_fluxo)
-        
-        if percentuais_fluxos:
-            pct_medio = sum(percentuais_fluxos) / len(percentuais_fluxos)
+    if campos_por_fluxo is not None and 'padronizados' in campos_por_fluxo.columns:
+        com_campos = campos_por_fluxo[campos_por_fluxo['distintos'] > 0]
+        if not com_campos.empty:
+            pct_medio = (com_campos['padronizados'] / com_campos['distintos'] * 100).mean()
             kpis['pct_fluxo_padronizado'] = f"{pct_medio:.1f}%"
     
     return kpis
@@ -251,17 +328,13 @@ def calculate_padronizacao_por_fluxo(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty or 'fluxo' not in df.columns or 'is_padronizado' not in df.columns:
         return pd.DataFrame(columns=['fluxo', 'pct_padronizacao'])
     
-    percentuais = []
-    for fluxo in df['fluxo'].unique():
-        df_fluxo = df[df['fluxo'] == fluxo]
-        total_campos_unicos = df_fluxo['nomeCampo'].nunique()
-        
-        if total_campos_unicos > 0:
-            campos_padronizados_unicos = df_fluxo[df_fluxo['is_padronizado'] == 1]['nomeCampo'].nunique()
-            pct = (campos_padronizados_unicos / total_campos_unicos) * 100
-            percentuais.append({'fluxo': fluxo, 'pct_padronizacao': pct})
+    campos_por_fluxo = distinct_counts_by(df, 'fluxo')
+    campos_por_fluxo = campos_por_fluxo[campos_por_fluxo['distintos'] > 0]
     
-    return pd.DataFrame(percentuais)
+    return pd.DataFrame({
+        'fluxo': campos_por_fluxo['fluxo'].to_numpy(),
+        'pct_padronizacao': (campos_por_fluxo['padronizados'] / campos_por_fluxo['distintos'] * 100).to_numpy()
+    })
 
 def prepare_chart_data(df: pd.DataFrame, max_rows: int = 50000) -> pd.DataFrame:
     """
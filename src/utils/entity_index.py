@@ -0,0 +1,293 @@
+"""
+Índice de entidades (formulários, campos, fluxos e serviços) para o chatbot.
+Os nomes são normalizados (minúsculas, sem acentos, pontuação vira espaço) e
+compilados em um autômato Aho-Corasick: todas as entidades citadas em uma
+pergunta são encontradas em uma única passada sobre o texto da pergunta,
+independente do tamanho do catálogo. Quando nenhum nome aparece inteiro, um
+índice invertido de tokens ranqueia as correspondências parciais.
+Construído uma vez por versão dos dados (ver get_entity_index).
+"""
+import math
+import os
+import re
+import unicodedata
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from src.utils.data_cache import cached_artifact, get_data_version, load_processed_data
+
+_entity_index_cache = {}  # Índice por arquivo: {caminho absoluto: (versao, EntityIndex)}
+
+# Tipos indexados: coluna -> (chave do detalhe, coluna contada no detalhe)
+TIPOS_ENTIDADE = {
+    'formulario': ('campos', 'nomeCampo'),
+    'nomeCampo': ('formularios', 'formulario'),
+    'fluxo': ('formularios', 'formulario'),
+    'servico': (None, None)
+}
+
+# Nomes normalizados mais curtos que isso não entram no autômato (casariam em qualquer frase)
+TAMANHO_MINIMO_NOME = 3
+
+# Palavras que não identificam entidades na busca parcial
+_PALAVRAS_IGNORADAS = frozenset("""
+a o as os de da do das dos e em no na nos nas um uma para por com sem que qual quais
+quantos quantas quanto como onde tem temos ha sobre me mostre mostra liste lista
+formulario formularios campo campos fluxo fluxos servico servicos
+""".split())
+
+_NAO_ALFANUMERICO = re.compile(r'[^0-9a-z]+')
+
+def normalizar_texto(texto: Any) -> str:
+    """
+    Normaliza texto para comparação: minúsculas, sem acentos, qualquer caractere
+    não alfanumérico vira um único espaço.
+
+    Args:
+        texto: Texto original (valores não textuais viram string)
+
+    Returns:
+        Texto normalizado (tokens separados por um espaço)
+    """
+    decomposto = unicodedata.normalize('NFKD', str(texto).lower())
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return _NAO_ALFANUMERICO.sub(' ', sem_acentos).strip()
+
+class _AhoCorasick:
+    """Autômato Aho-Corasick sobre caracteres; cada padrão tem um identificador inteiro."""
+
+    def __init__(self):
+        self._transicoes: List[Dict[str, int]] = [{}]
+        self._falha: List[int] = [0]
+        self._saidas: List[List[int]] = [[]]
+
+    def add(self, padrao: str, ident: int):
+        estado = 0
+        for c in padrao:
+            proximo = self._transicoes[estado].get(c)
+            if proximo is None:
+                proximo = len(self._transicoes)
+                self._transicoes[estado][c] = proximo
+                self._transicoes.append({})
+                self._falha.append(0)
+                self._saidas.append([])
+            estado = proximo
+        self._saidas[estado].append(ident)
+
+    def build(self):
+        """Calcula os links de falha (BFS) e propaga as saídas pelos sufixos."""
+        fila = deque(self._transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            for c, proximo in self._transicoes[estado].items():
+                fila.append(proximo)
+                falha = self._falha[estado]
+                while falha and c not in self._transicoes[falha]:
+                    falha = self._falha[falha]
+                destino = self._transicoes[falha].get(c, 0)
+                self._falha[proximo] = destino if destino != proximo else 0
+                self._saidas[proximo] = self._saidas[proximo] + self._saidas[self._falha[proximo]]
+
+    def iter(self, texto: str):
+        """Gera (posição final, identificador) de cada ocorrência de padrão no texto."""
+        estado = 0
+        for i, c in enumerate(texto):
+            while estado and c not in self._transicoes[estado]:
+                estado = self._falha[estado]
+            estado = self._transicoes[estado].get(c, 0)
+            for ident in self._saidas[estado]:
+                yield i, ident
+
+class EntityIndex:
+    """
+    Índice de entidades construído uma vez por versão dos dados.
+
+    Args:
+        entidades: {tipo: {nome: detalhes}} (detalhes inclui 'uso')
+    """
+
+    def __init__(self, entidades: Dict[str, Dict[str, Dict[str, int]]]):
+        self._entidades: List[Dict[str, Any]] = []
+        self._por_tipo: Dict[str, List[int]] = {}
+        self._automato = _AhoCorasick()
+        self._padroes: List[List[int]] = []  # padrão -> entidades com esse nome normalizado
+        self._tamanho_padrao: List[int] = []
+        self._tokens: Dict[str, List[int]] = {}  # token -> entidades que o contêm
+
+        padrao_por_texto: Dict[str, int] = {}
+        for tipo, nomes in entidades.items():
+            ids = self._por_tipo.setdefault(tipo, [])
+            for nome, detalhes in nomes.items():
+                normalizado = normalizar_texto(nome)
+                if not normalizado:
+                    continue
+                ident = len(self._entidades)
+                tokens = set(normalizado.split()) - _PALAVRAS_IGNORADAS
+                self._entidades.append({'tipo': tipo, 'nome': nome, 'tokens': tokens, **detalhes})
+                ids.append(ident)
+                for token in tokens:
+                    self._tokens.setdefault(token, []).append(ident)
+
+                if len(normalizado) < TAMANHO_MINIMO_NOME:
+                    continue
+                padrao = padrao_por_texto.get(normalizado)
+                if padrao is None:
+                    padrao = len(self._padroes)
+                    padrao_por_texto[normalizado] = padrao
+                    self._padroes.append([])
+                    self._tamanho_padrao.append(len(normalizado))
+                    # Espaços nas pontas: o nome só casa com palavras inteiras da pergunta
+                    self._automato.add(f" {normalizado} ", padrao)
+                self._padroes[padrao].append(ident)
+
+        self._automato.build()
+        n_entidades = max(len(self._entidades), 1)
+        self._idf = {token: math.log(1 + n_entidades / len(ids)) for token, ids in self._tokens.items()}
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'EntityIndex':
+        """Constrói o índice a partir do DataFrame processado (um groupby por relacionamento)."""
+        entidades = {}
+        for tipo, (chave_detalhe, coluna_detalhe) in TIPOS_ENTIDADE.items():
+            if tipo not in df.columns:
+                continue
+            grupos = df.groupby(tipo, observed=True)
+            uso = grupos.size()
+            distintos = None
+            if chave_detalhe and coluna_detalhe in df.columns:
+                distintos = grupos[coluna_detalhe].nunique()
+            detalhes = {}
+            for nome, n in uso.items():
+                detalhe = {'uso': int(n)}
+                if distintos is not None:
+                    detalhe[chave_detalhe] = int(distintos.get(nome, 0))
+                detalhes[str(nome)] = detalhe
+            entidades[tipo] = detalhes
+        return cls(entidades)
+
+    def to_artifact(self) -> Dict[str, Any]:
+        """Partes gravadas no armazenamento de artefatos (as contagens; o autômato é recompilado ao abrir)."""
+        entidades: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for entidade in self._entidades:
+            detalhes = {k: v for k, v in entidade.items() if k not in ('tipo', 'nome', 'tokens')}
+            entidades.setdefault(entidade['tipo'], {})[entidade['nome']] = detalhes
+        return {'entidades': entidades}
+
+    @classmethod
+    def from_artifact(cls, partes: Dict[str, Any]) -> 'EntityIndex':
+        """Reabre o índice gravado por to_artifact."""
+        return cls(partes['entidades'])
+
+    def __len__(self) -> int:
+        return len(self._entidades)
+
+    def _publico(self, ident: int, **extras) -> Dict[str, Any]:
+        entidade = {k: v for k, v in self._entidades[ident].items() if k != 'tokens'}
+        entidade.update(extras)
+        return entidade
+
+    def find(self, pergunta: str, tipos: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Encontra todas as entidades citadas por nome completo na pergunta.
+        Quando duas ocorrências se sobrepõem, fica a mais longa (ex.: um formulário
+        cujo nome contém o nome de outro). Resultado ordenado pela relevância:
+        nome mais longo primeiro, depois maior uso.
+
+        Args:
+            pergunta: Texto da pergunta
+            tipos: Restringe aos tipos informados (padrão: todos)
+
+        Returns:
+            Lista de entidades ({'tipo', 'nome', 'uso', ...} + 'inicio'/'fim' no texto normalizado)
+        """
+        tipos = set(tipos) if tipos is not None else None
+        texto = f" {normalizar_texto(pergunta)} "
+
+        ocorrencias = []
+        for fim, padrao in self._automato.iter(texto):
+            tamanho = self._tamanho_padrao[padrao]
+            ocorrencias.append((fim - tamanho, fim - 1, padrao))
+
+        # Mais longas primeiro; uma ocorrência contida em outra já aceita é descartada
+        ocorrencias.sort(key=lambda o: (-(o[1] - o[0]), o[0]))
+        aceitas = []
+        for inicio, fim, padrao in ocorrencias:
+            if any(inicio >= a_inicio and fim <= a_fim for a_inicio, a_fim, _ in aceitas):
+                continue
+            aceitas.append((inicio, fim, padrao))
+
+        encontradas = []
+        for inicio, fim, padrao in aceitas:
+            for ident in self._padroes[padrao]:
+                if tipos is None or self._entidades[ident]['tipo'] in tipos:
+                    encontradas.append(self._publico(ident, inicio=inicio - 1, fim=fim - 1))
+        encontradas.sort(key=lambda e: (-(e['fim'] - e['inicio']), -e['uso']))
+        return encontradas
+
+    def search_partial(self, pergunta: str, tipo: str, limite: int = 5,
+                       cobertura_minima: float = 0.5) -> List[Dict[str, Any]]:
+        """
+        Ranqueia entidades de um tipo pelos tokens em comum com a pergunta
+        (peso IDF), para quando o nome não aparece inteiro.
+
+        Args:
+            pergunta: Texto da pergunta
+            tipo: Tipo de entidade
+            limite: Máximo de resultados
+            cobertura_minima: Fração mínima do peso dos tokens da entidade presente na pergunta
+
+        Returns:
+            Lista de entidades com 'score' (cobertura), da mais relevante para a menos
+        """
+        tokens = set(normalizar_texto(pergunta).split()) - _PALAVRAS_IGNORADAS
+        pontos: Dict[int, float] = {}
+        for token in tokens:
+            for ident in self._tokens.get(token, ()):
+                if self._entidades[ident]['tipo'] == tipo:
+                    pontos[ident] = pontos.get(ident, 0.0) + self._idf[token]
+
+        ranking = []
+        for ident, peso in pontos.items():
+            total = sum(self._idf[t] for t in self._entidades[ident]['tokens'])
+            cobertura = peso / total if total else 0.0
+            if cobertura >= cobertura_minima:
+                ranking.append((cobertura, peso, self._entidades[ident]['uso'], ident))
+        ranking.sort(reverse=True)
+        return [self._publico(ident, score=round(cobertura, 3)) for cobertura, _, _, ident in ranking[:limite]]
+
+    def top(self, tipo: str, n: int = 5) -> List[Dict[str, Any]]:
+        """As n entidades mais usadas de um tipo."""
+        ids = sorted(self._por_tipo.get(tipo, []), key=lambda i: -self._entidades[i]['uso'])
+        return [self._publico(i) for i in ids[:n]]
+
+    def count(self, tipo: str) -> int:
+        """Quantidade de entidades de um tipo."""
+        return len(self._por_tipo.get(tipo, []))
+
+def get_entity_index(csv_path: str) -> EntityIndex:
+    """
+    Obtém o índice de entidades, reconstruído apenas quando a versão dos dados muda.
+
+    Args:
+        csv_path: Caminho do arquivo CSV original
+
+    Returns:
+        EntityIndex dos dados processados
+    """
+    chave = os.path.abspath(csv_path)
+    versao = get_data_version(csv_path)
+    cached = _entity_index_cache.get(chave)
+    if cached is not None and cached[0] == versao:
+        return cached[1]
+
+    def build():
+        indice = EntityIndex.from_dataframe(load_processed_data(csv_path))
+        print(f"Índice de entidades construído: {len(indice):,} nomes")
+        return indice
+
+    indice = cached_artifact(csv_path, "entidades", (__name__,), build,
+                             EntityIndex.to_artifact, EntityIndex.from_artifact)
+    _entity_index_cache[chave] = (versao, indice)
+    return indice
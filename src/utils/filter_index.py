@@ -0,0 +1,136 @@
+"""
+Índice invertido para os quatro filtros do painel (ano, fluxo, serviço, formulário).
+Para cada valor distinto de cada dimensão guarda a lista ordenada de linhas
+(posting list). Uma combinação de filtros é respondida intersectando as listas,
+sem varrer as colunas inteiras.
+"""
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional
+
+# Dimensões indexadas (nome do filtro -> coluna do DataFrame)
+DIMENSOES_FILTRO = {
+    'fluxo': 'fluxo',
+    'servico': 'servico',
+    'formulario': 'formulario'
+}
+
+class _PostingLists:
+    """Listas de linhas agrupadas por código: linhas[inicio[c]:inicio[c + 1]] pertencem ao código c."""
+
+    def __init__(self, codes: np.ndarray, n_codigos: int, dtype):
+        validos = codes >= 0
+        # argsort estável mantém as linhas de cada código em ordem crescente
+        ordem = np.argsort(codes, kind='stable').astype(dtype)
+        n_nulos = int((~validos).sum())
+        self.linhas = ordem[n_nulos:]
+        contagens = np.bincount(codes[validos], minlength=n_codigos)
+        self.inicio = np.concatenate(([0], np.cumsum(contagens)))
+
+    @classmethod
+    def from_arrays(cls, linhas: np.ndarray, inicio: np.ndarray) -> '_PostingLists':
+        """Listas já montadas (ver FilterIndex.from_artifact)."""
+        listas = cls.__new__(cls)
+        listas.linhas = linhas
+        listas.inicio = inicio
+        return listas
+
+    def get(self, code: int) -> np.ndarray:
+        if code < 0 or code >= len(self.inicio) - 1:
+            return self.linhas[:0]
+        return self.linhas[self.inicio[code]:self.inicio[code + 1]]
+
+def _intersect_sorted(menor: np.ndarray, maior: np.ndarray) -> np.ndarray:
+    """Interseção de dois vetores ordenados em O(|menor| log |maior|)."""
+    if len(menor) == 0 or len(maior) == 0:
+        return menor[:0]
+    pos = np.searchsorted(maior, menor)
+    pos[pos == len(maior)] = 0
+    return menor[maior[pos] == menor]
+
+class FilterIndex:
+    """
+    Índice de filtros construído uma vez por versão dos dados.
+
+    Args:
+        df: DataFrame processado (dimensões codificadas como category)
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.n_linhas = len(df)
+        dtype = np.int32 if self.n_linhas < np.iinfo(np.int32).max else np.int64
+        self._categorias: Dict[str, pd.Index] = {}
+        self._postings: Dict[str, _PostingLists] = {}
+
+        for filtro, col in DIMENSOES_FILTRO.items():
+            if col not in df.columns:
+                continue
+            serie = df[col]
+            if not isinstance(serie.dtype, pd.CategoricalDtype):
+                serie = serie.astype('category')
+            categorias = serie.cat.categories
+            self._categorias[filtro] = categorias
+            self._postings[filtro] = _PostingLists(serie.cat.codes.to_numpy(), len(categorias), dtype)
+
+        # Ano é derivado de dataCriacao
+        if 'dataCriacao' in df.columns:
+            anos = df['dataCriacao'].dt.year
+            codes, uniques = pd.factorize(anos, sort=True)
+            self._categorias['ano'] = pd.Index(uniques.astype(int))
+            self._postings['ano'] = _PostingLists(codes, len(uniques), dtype)
+
+    def to_artifact(self) -> Dict[str, Any]:
+        """Partes gravadas no armazenamento de artefatos (posting lists como arrays)."""
+        partes = {
+            'n_linhas': self.n_linhas,
+            'categorias': {filtro: categorias.tolist() for filtro, categorias in self._categorias.items()}
+        }
+        for filtro, listas in self._postings.items():
+            partes[f'{filtro}.linhas'] = listas.linhas
+            partes[f'{filtro}.inicio'] = listas.inicio
+        return partes
+
+    @classmethod
+    def from_artifact(cls, partes: Dict[str, Any]) -> 'FilterIndex':
+        """Reabre o índice gravado por to_artifact (arrays em memory-map)."""
+        index = cls.__new__(cls)
+        index.n_linhas = partes['n_linhas']
+        index._categorias = {filtro: pd.Index(valores) for filtro, valores in partes['categorias'].items()}
+        index._postings = {filtro: _PostingLists.from_arrays(partes[f'{filtro}.linhas'], partes[f'{filtro}.inicio'])
+                           for filtro in index._categorias}
+        return index
+
+    def lookup(self, ano: Optional[str] = None, fluxo: Optional[str] = None,
+               servico: Optional[str] = None, formulario: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        Retorna as linhas (ordenadas) que satisfazem todos os filtros informados.
+
+        Returns:
+            Vetor de posições de linhas, ou None se nenhum filtro foi aplicado
+        """
+        filtros = {'ano': int(ano) if ano else None, 'fluxo': fluxo,
+                   'servico': servico, 'formulario': formulario}
+
+        listas = []
+        for filtro, valor in filtros.items():
+            if not valor or filtro not in self._postings:
+                continue
+            try:
+                code = self._categorias[filtro].get_loc(valor)
+            except KeyError:
+                code = -1
+            listas.append(self._postings[filtro].get(code))
+
+        if not listas:
+            return None
+
+        # Começa pela lista mais curta: o custo depende do tamanho do resultado
+        listas.sort(key=len)
+        resultado = listas[0]
+        for lista in listas[1:]:
+            resultado = _intersect_sorted(resultado, lista)
+        return resultado
+
+    def memory_usage(self) -> int:
+        """Bytes ocupados pelas posting lists."""
+        return sum(p.linhas.nbytes + p.inicio.nbytes for p in self._postings.values())
@@ -0,0 +1,86 @@
+"""
+Kernels agrupados sobre códigos inteiros.
+Calculam, em uma única passada, quantos valores distintos (ex.: nomeCampo) e
+quantos valores distintos marcados (ex.: padronizados) existem em cada grupo
+(ex.: fluxo), sem laço Python por grupo nem máscaras sobre o DataFrame inteiro.
+"""
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple
+
+def _codificar(serie: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """Códigos inteiros (-1 = nulo) e rótulos de uma coluna categórica ou comum."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy().astype(np.int64), serie.cat.categories
+    codes, uniques = pd.factorize(serie, sort=True)
+    return codes.astype(np.int64), pd.Index(uniques)
+
+def grouped_distinct_counts(grupos: np.ndarray, valores: np.ndarray, n_valores: int,
+                            marcados: Optional[np.ndarray] = None,
+                            universo: Optional[np.ndarray] = None
+                            ) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """
+    Conta valores distintos por grupo a partir de vetores de códigos.
+
+    Args:
+        grupos: Código do grupo de cada linha (-1 = nulo, linha ignorada)
+        valores: Código do valor de cada linha (-1 = nulo, não contado)
+        n_valores: Quantidade de códigos possíveis de valor
+        marcados: Máscara booleana por linha; conta também os distintos marcados
+        universo: Grupos a reportar (ordenados); padrão = grupos não nulos presentes
+
+    Returns:
+        Tupla (grupos, distintos, distintos_marcados); grupos sem valores têm contagem 0
+    """
+    grupos = np.asarray(grupos, dtype=np.int64)
+    valores = np.asarray(valores, dtype=np.int64)
+    n_valores = max(int(n_valores), 1)
+
+    if universo is None:
+        universo = np.unique(grupos[grupos >= 0])
+
+    validos = (grupos >= 0) & (valores >= 0)
+    chaves = grupos[validos] * n_valores + valores[validos]
+
+    def _contar(chaves_linhas: np.ndarray) -> np.ndarray:
+        pares = np.unique(chaves_linhas)
+        posicao = np.searchsorted(universo, pares // n_valores)
+        return np.bincount(posicao, minlength=len(universo)).astype(np.int64)
+
+    distintos = _contar(chaves)
+    distintos_marcados = None
+    if marcados is not None:
+        distintos_marcados = _contar(chaves[np.asarray(marcados, dtype=bool)[validos]])
+
+    return universo, distintos, distintos_marcados
+
+def distinct_counts_by(df: pd.DataFrame, grupo: str, coluna: str = 'nomeCampo',
+                       flag: Optional[str] = 'is_padronizado') -> pd.DataFrame:
+    """
+    Valores distintos de `coluna` (e distintos com `flag` == 1) por valor de `grupo`.
+    Equivale a df.groupby(grupo)[coluna].nunique() e ao mesmo cálculo restrito
+    às linhas marcadas, feitos juntos em uma passada.
+
+    Args:
+        df: DataFrame processado
+        grupo: Coluna de agrupamento (ex.: 'fluxo')
+        coluna: Coluna cujos valores distintos são contados (ex.: 'nomeCampo')
+        flag: Coluna 0/1 que marca as linhas (None ou ausente = não calcula)
+
+    Returns:
+        DataFrame com `grupo`, `distintos` e, se houver flag, `padronizados`
+    """
+    codigos_grupo, rotulos_grupo = _codificar(df[grupo])
+    codigos_valor, rotulos_valor = _codificar(df[coluna])
+
+    marcados = None
+    if flag is not None and flag in df.columns:
+        marcados = df[flag].to_numpy() == 1
+
+    grupos, distintos, padronizados = grouped_distinct_counts(
+        codigos_grupo, codigos_valor, len(rotulos_valor), marcados)
+
+    resultado = pd.DataFrame({grupo: rotulos_grupo[grupos], 'distintos': distintos})
+    if padronizados is not None:
+        resultado['padronizados'] = padronizados
+    return resultado
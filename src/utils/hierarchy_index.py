@@ -0,0 +1,283 @@
+"""
+Hierarquia Fluxo -> Serviço -> Formulário -> Campo da Biblioteca.
+A árvore é montada uma vez por versão dos dados, com a contagem exata de
+registros de cada nó (as folhas são as combinações dos quatro níveis e os
+níveis de cima somam os filhos). Os filtros do painel são níveis da própria
+árvore, então uma visão filtrada só recalcula as contagens com bincount sobre
+as folhas, sem reagrupar os dados.
+
+O treemap é servido por nível de detalhe: a partir do nó escolhido (ou do
+topo), os níveis de baixo entram inteiros enquanto couberem no orçamento de
+nós; do nível que não cabe entram só os maiores. Os nós com filhos fora da
+resposta são carregados ao clicar neles (ver get_hierarchy_index e
+biblioteca_callbacks.py).
+"""
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils.data_cache import cached_artifact, get_data_version, load_processed_data
+
+_hierarchy_index_cache = {}  # Árvore por arquivo: {caminho absoluto: (versao, HierarchyIndex)}
+
+# Colunas dos níveis da árvore, do topo para as folhas
+NIVEIS = ('fluxo', 'servico', 'formulario', 'nomeCampo')
+ROTULOS_NIVEIS = ('Fluxo', 'Serviço', 'Formulário', 'Campo')
+
+# Rótulo dos registros sem valor no nível (contados, para as somas fecharem)
+SEM_NOME = "(sem nome)"
+
+# Id do nó raiz virtual (todos os fluxos)
+RAIZ = "raiz"
+
+class HierarchyIndex:
+    """
+    Árvore de contagens em arrays por nível.
+
+    Os nós de cada nível ficam na ordem das folhas (ordenadas pelos códigos
+    dos quatro níveis), então os filhos de um nó são um intervalo contíguo do
+    nível seguinte. Ids dos nós: "nível:posição" (ex.: "2:153").
+
+    Args:
+        categorias: Rótulos de cada nível (código -> rótulo)
+        codigos_folha: Código de cada nível por folha
+        contagem_folha: Registros por folha
+    """
+
+    def __init__(self, categorias: List[np.ndarray], codigos_folha: List[np.ndarray], contagem_folha: np.ndarray):
+        self.categorias = categorias
+        self.codigos_folha = codigos_folha
+        self.contagem_folha = contagem_folha
+        self._codigo_por_rotulo = [{rotulo: i for i, rotulo in enumerate(c)} for c in categorias]
+
+        n_folhas = len(contagem_folha)
+        self.no_da_folha = []   # por nível: nó ao qual cada folha pertence
+        self.rotulo = []        # por nível: código do rótulo de cada nó
+        self.pai = []           # por nível: posição do pai no nível de cima
+        self.fluxo = []         # por nível: código do fluxo de cada nó (cor do treemap)
+        self.contagem = []      # por nível: registros de cada nó (sem filtros)
+        mudou = np.zeros(n_folhas, dtype=bool)
+        for nivel in range(len(NIVEIS)):
+            # Um nó novo começa onde o prefixo de códigos até este nível muda
+            if n_folhas:
+                mudou[1:] |= codigos_folha[nivel][1:] != codigos_folha[nivel][:-1]
+                mudou[0] = True
+            no = np.cumsum(mudou) - 1
+            primeiras = np.flatnonzero(mudou)
+            self.no_da_folha.append(no.astype(np.int32))
+            self.rotulo.append(codigos_folha[nivel][primeiras])
+            self.pai.append(self.no_da_folha[nivel - 1][primeiras] if nivel else np.zeros(len(primeiras), np.int32))
+            self.fluxo.append(codigos_folha[0][primeiras])
+            self.contagem.append(np.bincount(no, weights=contagem_folha, minlength=len(primeiras)).astype(np.int64))
+
+        # Filhos de cada nó: intervalo [inicio_filhos, fim_filhos) do nível seguinte
+        self.inicio_filhos, self.fim_filhos = [], []
+        for nivel in range(len(NIVEIS) - 1):
+            n = len(self.rotulo[nivel])
+            self.inicio_filhos.append(np.searchsorted(self.pai[nivel + 1], np.arange(n), side='left'))
+            self.fim_filhos.append(np.searchsorted(self.pai[nivel + 1], np.arange(n), side='right'))
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "HierarchyIndex":
+        """Monta a árvore a partir dos dados processados (uma linha por registro)."""
+        categorias, codigos = [], []
+        for col in NIVEIS:
+            serie = df[col] if col in df.columns else pd.Series(SEM_NOME, index=df.index)
+            valores = serie.astype(object).where(serie.notna(), SEM_NOME).astype(str)
+            cod, cat = pd.factorize(valores, sort=True)
+            categorias.append(np.asarray(cat, dtype=object))
+            codigos.append(cod.astype(np.int32))
+
+        folhas = pd.DataFrame(dict(zip(NIVEIS, codigos))).groupby(list(NIVEIS), sort=True).size()
+        codigos_folha = [folhas.index.get_level_values(i).to_numpy(np.int32) for i in range(len(NIVEIS))]
+        return cls(categorias, codigos_folha, folhas.to_numpy(np.int64))
+
+    def to_artifact(self) -> Dict[str, Any]:
+        """Partes gravadas no armazenamento de artefatos (as folhas; os níveis são recalculados ao abrir)."""
+        partes = {'categorias': [c.tolist() for c in self.categorias], 'contagem_folha': self.contagem_folha}
+        for nivel, codigos in enumerate(self.codigos_folha):
+            partes[f'codigos_folha.{nivel}'] = codigos
+        return partes
+
+    @classmethod
+    def from_artifact(cls, partes: Dict[str, Any]) -> "HierarchyIndex":
+        """Reabre a árvore gravada por to_artifact."""
+        return cls([np.asarray(c, dtype=object) for c in partes['categorias']],
+                   [partes[f'codigos_folha.{nivel}'] for nivel in range(len(NIVEIS))],
+                   partes['contagem_folha'])
+
+    def __len__(self) -> int:
+        """Total de nós (todos os níveis)."""
+        return sum(len(r) for r in self.rotulo)
+
+    @property
+    def total(self) -> int:
+        """Registros contados na árvore."""
+        return int(self.contagem_folha.sum())
+
+    def counts(self, filtros: Optional[Dict[str, Any]] = None) -> List[np.ndarray]:
+        """
+        Contagem de registros de cada nó, por nível, restrita aos filtros do painel.
+
+        Args:
+            filtros: Filtros do painel (fluxo, servico, formulario; ano é ignorado, não há data)
+
+        Returns:
+            Lista (um array por nível) com a contagem de cada nó
+        """
+        mascara = None
+        for nivel, col in enumerate(NIVEIS):
+            valor = (filtros or {}).get(col)
+            if valor is None or valor == [] or valor == "":
+                continue
+            valores = valor if isinstance(valor, (list, tuple)) else [valor]
+            codigos = [self._codigo_por_rotulo[nivel][v] for v in map(str, valores) if v in self._codigo_por_rotulo[nivel]]
+            selecao = np.isin(self.codigos_folha[nivel], codigos)
+            mascara = selecao if mascara is None else mascara & selecao
+
+        if mascara is None:
+            return self.contagem
+        pesos = np.where(mascara, self.contagem_folha, 0)
+        return [np.bincount(self.no_da_folha[nivel], weights=pesos, minlength=len(self.rotulo[nivel])).astype(np.int64)
+                for nivel in range(len(NIVEIS))]
+
+    @staticmethod
+    def parse_node_id(no_id: Optional[str]) -> Optional[tuple]:
+        """(nível, posição) de um id "nível:posição"; None para a raiz ou ids inválidos."""
+        try:
+            nivel, posicao = (int(p) for p in str(no_id).split(":"))
+        except (TypeError, ValueError):
+            return None
+        return nivel, posicao
+
+    def label(self, nivel: int, posicao: int) -> str:
+        """Rótulo do nó."""
+        return str(self.categorias[nivel][self.rotulo[nivel][posicao]])
+
+    def treemap_nodes(self, filtros: Optional[Dict[str, Any]] = None, raiz: Optional[str] = None,
+                      max_nos: int = 1500) -> Dict[str, Any]:
+        """
+        Nós do treemap a partir de `raiz`, limitados ao orçamento de nós.
+
+        Args:
+            filtros: Filtros do painel
+            raiz: Id do nó aberto (None = todos os fluxos)
+            max_nos: Máximo de nós enviados (incluindo a raiz e os ancestrais do caminho)
+
+        Returns:
+            Dicionário com listas ids, labels, parents, values, niveis, fluxos e
+            expandir (nó com filhos fora da resposta), além de raiz (id do nó
+            aberto), total_nos (nós da subárvore) e truncado (se algum ficou de fora)
+        """
+        contagens = self.counts(filtros)
+        alvo = self.parse_node_id(raiz)
+        if alvo is not None:
+            nivel, posicao = alvo
+            if not (0 <= nivel < len(NIVEIS) and 0 <= posicao < len(contagens[nivel])) or contagens[nivel][posicao] == 0:
+                alvo = None  # nó inexistente ou fora dos filtros: volta ao topo
+
+        nos = {"ids": [], "labels": [], "parents": [], "values": [], "niveis": [], "fluxos": [], "expandir": []}
+
+        def adicionar(no_id, rotulo, pai, valor, nivel, fluxo, expandir=False):
+            nos["ids"].append(no_id)
+            nos["labels"].append(rotulo)
+            nos["parents"].append(pai)
+            nos["values"].append(int(valor))
+            nos["niveis"].append(nivel)
+            nos["fluxos"].append(fluxo)
+            nos["expandir"].append(expandir)
+
+        # Raiz virtual e caminho até o nó aberto (mostrados na barra de caminho do treemap)
+        total = int(contagens[0].sum())
+        adicionar(RAIZ, "Todos os fluxos", "", total, -1, -1)
+        caminho = []
+        if alvo is not None:
+            nivel, posicao = alvo
+            while nivel >= 0:
+                caminho.append((nivel, posicao))
+                posicao, nivel = int(self.pai[nivel][posicao]), nivel - 1
+            for nivel, posicao in reversed(caminho):
+                pai = f"{nivel - 1}:{self.pai[nivel][posicao]}" if nivel else RAIZ
+                adicionar(f"{nivel}:{posicao}", self.label(nivel, posicao), pai,
+                          contagens[nivel][posicao], nivel, int(self.fluxo[nivel][posicao]))
+
+        # Nós do nível de baixo do nó aberto, nível a nível, enquanto couberem
+        restante, total_nos, truncado = max_nos - len(nos["ids"]), 0, False
+        if alvo is None:
+            nivel_filhos, pais_nivel, candidatos = 0, None, np.flatnonzero(contagens[0])
+        else:
+            nivel_filhos, pais_nivel, candidatos = alvo[0] + 1, np.array([alvo[1]]), None
+        while nivel_filhos < len(NIVEIS):
+            if candidatos is None:
+                # Filhos (com registros) dos nós incluídos no nível de cima
+                inicio = self.inicio_filhos[nivel_filhos - 1][pais_nivel]
+                fim = self.fim_filhos[nivel_filhos - 1][pais_nivel]
+                if not len(inicio) or (fim - inicio).sum() == 0:
+                    break
+                candidatos = np.concatenate([np.arange(a, b) for a, b in zip(inicio, fim)])
+                candidatos = candidatos[contagens[nivel_filhos][candidatos] > 0]
+            if not len(candidatos):
+                break
+            total_nos += len(candidatos)
+
+            if len(candidatos) > restante:
+                # Nível não cabe inteiro: entram os maiores
+                truncado = True
+                if restante <= 0:
+                    break
+                maiores = np.argpartition(-contagens[nivel_filhos][candidatos], restante - 1)[:restante]
+                candidatos = np.sort(candidatos[maiores])
+
+            for posicao in candidatos:
+                pai = f"{nivel_filhos - 1}:{self.pai[nivel_filhos][posicao]}" if nivel_filhos else RAIZ
+                adicionar(f"{nivel_filhos}:{posicao}", self.label(nivel_filhos, posicao), pai,
+                          contagens[nivel_filhos][posicao], nivel_filhos, int(self.fluxo[nivel_filhos][posicao]))
+            restante -= len(candidatos)
+            if truncado:
+                break
+            pais_nivel, candidatos = candidatos, None
+            nivel_filhos += 1
+
+        # Nós com filhos que ficaram de fora da resposta: abertos com um clique
+        # (os ancestrais do nó aberto já estão na barra de caminho)
+        incluidos = set(nos["ids"])
+        ancestrais = {f"{nivel}:{posicao}" for nivel, posicao in caminho[1:]}
+        for i, (no_id, nivel) in enumerate(zip(nos["ids"], nos["niveis"])):
+            if 0 <= nivel < len(NIVEIS) - 1 and no_id not in ancestrais:
+                posicao = int(no_id.split(":")[1])
+                filhos = range(self.inicio_filhos[nivel][posicao], self.fim_filhos[nivel][posicao])
+                nos["expandir"][i] = any(contagens[nivel + 1][f] > 0 and f"{nivel + 1}:{f}" not in incluidos
+                                         for f in filhos)
+
+        nos["raiz"] = f"{alvo[0]}:{alvo[1]}" if alvo is not None else RAIZ
+        nos["total_nos"] = total_nos
+        nos["truncado"] = truncado
+        return nos
+
+def get_hierarchy_index(csv_path: str) -> HierarchyIndex:
+    """
+    Obtém a árvore da Biblioteca, reconstruída apenas quando a versão dos dados muda.
+
+    Args:
+        csv_path: Caminho do arquivo CSV original
+
+    Returns:
+        HierarchyIndex dos dados processados
+    """
+    chave = os.path.abspath(csv_path)
+    versao = get_data_version(csv_path)
+    cached = _hierarchy_index_cache.get(chave)
+    if cached is not None and cached[0] == versao:
+        return cached[1]
+
+    def build():
+        indice = HierarchyIndex.from_dataframe(load_processed_data(csv_path, columns=list(NIVEIS)))
+        print(f"Hierarquia da biblioteca construída: {len(indice):,} nós")
+        return indice
+
+    indice = cached_artifact(csv_path, "hierarquia", (__name__,), build,
+                             HierarchyIndex.to_artifact, HierarchyIndex.from_artifact)
+    _hierarchy_index_cache[chave] = (versao, indice)
+    return indice
@@ -0,0 +1,141 @@
+"""
+Cache LRU limitado por bytes e por número de entradas, seguro para threads.
+Usado para os DataFrames filtrados: cada entrada tem seu tamanho medido ao
+entrar, as menos usadas recentemente saem primeiro quando o orçamento estoura
+e os contadores de acerto/erro/remoção ficam disponíveis em get_cache_info.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+import pandas as pd
+
+def dataframe_nbytes(df: pd.DataFrame, compartilhados: Iterable[pd.DataFrame] = ()) -> int:
+    """
+    Bytes ocupados pelo DataFrame.
+    Colunas categóricas contam os códigos e, quando o dicionário de rótulos é
+    do próprio DataFrame, também o dicionário. Dicionários que são o mesmo
+    objeto de um dos DataFrames `compartilhados` (take/filtros sobre os dados
+    completos não os copiam) não são contados de novo.
+
+    Args:
+        df: DataFrame medido
+        compartilhados: DataFrames cujos dicionários já estão em memória
+
+    Returns:
+        Tamanho em bytes
+    """
+    ja_contados = {
+        id(base[col].cat.categories)
+        for base in compartilhados for col in base.columns
+        if isinstance(base[col].dtype, pd.CategoricalDtype)
+    }
+    total = int(df.index.memory_usage())
+    for col in df.columns:
+        serie = df[col]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            total += int(serie.cat.codes.nbytes)
+            categorias = serie.cat.categories
+            if id(categorias) not in ja_contados:
+                total += int(categorias.memory_usage(deep=True))
+        else:
+            total += int(serie.memory_usage(index=False, deep=True))
+    return total
+
+class LRUCache:
+    """
+    Cache LRU com orçamento de bytes.
+
+    Args:
+        max_bytes: Orçamento total de bytes das entradas
+        max_entries: Limite opcional de entradas
+        sizeof: Função que mede o tamanho de um valor em bytes
+    """
+
+    def __init__(self, max_bytes: int, max_entries: Optional[int] = None,
+                 sizeof: Callable[[Any], int] = dataframe_nbytes):
+        self.max_bytes = int(max_bytes)
+        self.max_entries = max_entries
+        self._sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor e o marca como usado mais recentemente (default se ausente)."""
+        with self._lock:
+            entrada = self._entries.get(key)
+            if entrada is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entrada[0]
+
+    def put(self, key: Hashable, value: Any) -> bool:
+        """
+        Armazena o valor, removendo as entradas menos recentes até caber no orçamento.
+
+        Returns:
+            False se o valor sozinho excede o orçamento (não é armazenado)
+        """
+        tamanho = int(self._sizeof(value))
+        with self._lock:
+            antigo = self._entries.pop(key, None)
+            if antigo is not None:
+                self._nbytes -= antigo[1]
+
+            if tamanho > self.max_bytes:
+                self.rejected += 1
+                return False
+
+            while self._entries and (
+                self._nbytes + tamanho > self.max_bytes
+                or (self.max_entries is not None and len(self._entries) >= self.max_entries)
+            ):
+                _, (_, tamanho_removido) = self._entries.popitem(last=False)
+                self._nbytes -= tamanho_removido
+                self.evictions += 1
+
+            self._entries[key] = (value, tamanho)
+            self._nbytes += tamanho
+            return True
+
+    def clear(self):
+        """Remove todas as entradas (os contadores são mantidos)."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados pelas entradas."""
+        return self._nbytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Verifica a presença sem alterar a ordem nem os contadores."""
+        with self._lock:
+            return key in self._entries
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores e ocupação do cache."""
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._nbytes,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "rejected": self.rejected,
+                "hit_rate": round(self.hits / consultas, 4) if consultas else 0.0
+            }
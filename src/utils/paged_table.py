@@ -0,0 +1,135 @@
+"""
+Paginação, ordenação e filtro de tabelas no servidor.
+As tabelas do painel são dash_table.DataTable com page_action/sort_action/
+filter_action="custom": o DataFrame completo de cada tabela fica no cache de
+tabelas (data_cache) e só a página visível vai para o navegador, então o
+tamanho da resposta não cresce com o número de linhas.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from dash.dash_table.Format import Format, Scheme, Symbol
+
+# Trecho do filter_query do DataTable: {coluna} operador valor
+_PARTE_FILTRO = re.compile(
+    r"^\{(?P<coluna>[^}]+)\}\s*(?P<operador>[si]?(?:>=|<=|!=|=|>|<)|eq|ne|gt|ge|lt|le|[si]?contains|datestartswith)"
+    r"\s+(?P<valor>.+)$"
+)
+# Operadores por extenso normalizados para os símbolos
+_OPERADORES = {"eq": "=", "ne": "!=", "gt": ">", "ge": ">=", "lt": "<", "le": "<=", "datestartswith": "startswith"}
+
+def _parse_filter_part(parte: str) -> Optional[Tuple[str, str, Any]]:
+    """(coluna, operador, valor) de um trecho do filter_query, ou None se não reconhecido."""
+    match = _PARTE_FILTRO.match(parte.strip())
+    if not match:
+        return None
+    operador = match.group("operador")
+    if operador.endswith("contains"):
+        operador = "contains"
+    else:
+        operador = _OPERADORES.get(operador, operador.lstrip("si"))
+
+    valor = match.group("valor").strip()
+    if len(valor) >= 2 and valor[0] == valor[-1] and valor[0] in "\"'`":
+        valor = valor[1:-1]
+    else:
+        try:
+            valor = float(valor)
+        except ValueError:
+            pass
+    return match.group("coluna"), operador, valor
+
+def apply_filter_query(df: pd.DataFrame, filter_query: Optional[str]) -> pd.DataFrame:
+    """
+    Aplica o filter_query do DataTable (trechos unidos por "&&").
+    Trechos não reconhecidos ou de colunas inexistentes são ignorados.
+
+    Args:
+        df: DataFrame completo da tabela
+        filter_query: Filtro digitado no cabeçalho da tabela
+
+    Returns:
+        DataFrame filtrado
+    """
+    if not filter_query:
+        return df
+    mascara = pd.Series(True, index=df.index)
+    for parte in filter_query.split(" && "):
+        filtro = _parse_filter_part(parte)
+        if filtro is None or filtro[0] not in df.columns:
+            continue
+        coluna, operador, valor = filtro
+        serie = df[coluna]
+        if operador in ("contains", "startswith"):
+            texto = serie.astype(str)
+            if operador == "startswith":
+                mascara &= texto.str.startswith(str(valor))
+            else:
+                mascara &= texto.str.contains(str(valor), case=False, regex=False)
+            continue
+
+        if pd.api.types.is_numeric_dtype(serie):
+            if not isinstance(valor, float):
+                continue  # comparação numérica com texto: ignora o trecho
+        else:
+            serie = serie.astype(str)
+            valor = str(int(valor)) if isinstance(valor, float) and valor.is_integer() else str(valor)
+        comparacoes = {
+            "=": serie.eq, "!=": serie.ne, ">": serie.gt, ">=": serie.ge, "<": serie.lt, "<=": serie.le
+        }
+        mascara &= comparacoes[operador](valor)
+    return df[mascara]
+
+def page_table(df: pd.DataFrame, page_current: Optional[int], page_size: int,
+               sort_by: Optional[List[Dict[str, str]]] = None,
+               filter_query: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int, int]:
+    """
+    Filtra, ordena e recorta a página pedida pelo DataTable.
+
+    Args:
+        df: DataFrame completo da tabela
+        page_current: Página atual (começa em 0)
+        page_size: Linhas por página
+        sort_by: Ordenação do DataTable ([{"column_id", "direction"}])
+        filter_query: Filtro do DataTable
+
+    Returns:
+        (linhas da página como registros, total de páginas, total de linhas após o filtro)
+    """
+    df = apply_filter_query(df, filter_query)
+    colunas = [s["column_id"] for s in (sort_by or []) if s.get("column_id") in df.columns]
+    if colunas:
+        ascendente = [s["direction"] == "asc" for s in sort_by if s.get("column_id") in df.columns]
+        df = df.sort_values(colunas, ascending=ascendente, kind="stable")
+
+    total = len(df)
+    paginas = max(1, -(-total // page_size))
+    pagina = min(max(page_current or 0, 0), paginas - 1)
+    inicio = pagina * page_size
+    return df.iloc[inicio:inicio + page_size].to_dict("records"), paginas, total
+
+def table_columns(df: pd.DataFrame, percentuais: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+    """
+    Definição das colunas do DataTable a partir do DataFrame.
+    Colunas numéricas filtram e ordenam como números; as de percentual
+    recebem o sufixo % com as casas decimais indicadas.
+
+    Args:
+        df: DataFrame da tabela
+        percentuais: {coluna: casas decimais} das colunas exibidas como percentual
+
+    Returns:
+        Lista de colunas no formato do DataTable
+    """
+    percentuais = percentuais or {}
+    colunas = []
+    for coluna in df.columns:
+        definicao = {"name": coluna, "id": coluna}
+        if pd.api.types.is_numeric_dtype(df[coluna]):
+            definicao["type"] = "numeric"
+            if coluna in percentuais:
+                definicao["format"] = Format(precision=percentuais[coluna], scheme=Scheme.fixed,
+                                             symbol=Symbol.yes, symbol_suffix="%")
+        colunas.append(definicao)
+    return colunas
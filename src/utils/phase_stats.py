@@ -0,0 +1,68 @@
+"""
+Tempo gasto em cada fase do atendimento do chatbot (consulta estruturada,
+análise/contexto da pergunta, montagem do prompt, chamada ao modelo).
+Guarda contagem e soma de cada fase e as últimas amostras, das quais saem os
+percentis. Usado pelas métricas do chatbot e pelo scripts/load_test_chatbot.py.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict
+
+import numpy as np
+
+class PhaseStats:
+    """
+    Acumulador de tempos por fase (thread-safe).
+
+    Args:
+        max_amostras: Amostras mais recentes guardadas por fase para os percentis
+    """
+
+    def __init__(self, max_amostras: int = 5000):
+        self.max_amostras = max_amostras
+        self._fases: Dict[str, list] = {}  # fase -> [contagem, soma, deque de amostras]
+        self._lock = threading.Lock()
+
+    def record(self, fase: str, segundos: float):
+        """Registra uma execução da fase."""
+        with self._lock:
+            dados = self._fases.get(fase)
+            if dados is None:
+                dados = self._fases[fase] = [0, 0.0, deque(maxlen=self.max_amostras)]
+            dados[0] += 1
+            dados[1] += segundos
+            dados[2].append(segundos)
+
+    @contextmanager
+    def measure(self, fase: str):
+        """Context manager que registra o tempo do bloco (mesmo se ele levantar exceção)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(fase, time.perf_counter() - inicio)
+
+    def reset(self):
+        """Descarta todas as medições."""
+        with self._lock:
+            self._fases.clear()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Por fase: execuções, tempo total (s), média, p50, p95, p99 e máximo (ms)."""
+        with self._lock:
+            copia = {fase: (n, soma, np.array(amostras)) for fase, (n, soma, amostras) in self._fases.items()}
+        resultado = {}
+        for fase, (n, soma, amostras) in copia.items():
+            p50, p95, p99 = np.percentile(amostras, [50, 95, 99]) * 1000
+            resultado[fase] = {
+                "execucoes": n,
+                "total_s": round(soma, 3),
+                "media_ms": round(soma / n * 1000, 2),
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "max_ms": round(float(amostras.max()) * 1000, 2)
+            }
+        return resultado
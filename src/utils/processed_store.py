@@ -0,0 +1,312 @@
+"""
+Armazenamento do Parquet processado com atualização incremental.
+
+Layout (ao lado do CSV):
+    meu_arquivo_processed.parquet        base compactada
+    meu_arquivo_processed.delta/
+        manifest.json                    partes, colunas de origem e contadores
+        keys.npy                         chaves (ordenadas) das linhas do estado atual
+        removed.npy                      chaves removidas desde a última compactação
+        part-00001.parquet ...           linhas novas/alteradas, já enriquecidas
+
+Cada linha processada carrega a coluna _row_key: hash do conteúdo das colunas de
+origem combinado com o número da ocorrência (linhas idênticas recebem chaves
+distintas). Uma linha alterada vira remoção da chave antiga + parte com a nova.
+"""
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+from src.utils.columnar_store import DIMENSOES_CATEGORICAS, COLUNAS_TEXTO_REPETITIVO
+
+# Coluna interna com a chave de conteúdo de cada linha
+ROW_KEY = '_row_key'
+
+# Gravação do Parquet processado: linhas ordenadas pelas chaves dos filtros e row groups
+# pequenos, para que as estatísticas (min/max) de cada row group permitam descartá-lo
+CHAVES_ORDENACAO_PROCESSADO = ['fluxo', 'servico', 'formulario', 'dataCriacao']
+TAMANHO_ROW_GROUP_PROCESSADO = 8192
+
+# Compacta quando houver partes demais ou quando o delta passar desta fração da base
+MAX_PARTES_DELTA = 8
+FRACAO_MAXIMA_DELTA = 0.25
+
+_FORMATO = 1
+
+def get_delta_dir(parquet_path: str) -> str:
+    """Diretório das partes incrementais do Parquet processado."""
+    return os.path.splitext(parquet_path)[0] + '.delta'
+
+def get_manifest_path(parquet_path: str) -> str:
+    """Caminho do manifesto das partes incrementais."""
+    return os.path.join(get_delta_dir(parquet_path), 'manifest.json')
+
+def load_manifest(parquet_path: str) -> Optional[Dict[str, Any]]:
+    """Lê o manifesto (None se não existir ou for de outro formato)."""
+    try:
+        with open(get_manifest_path(parquet_path), 'r', encoding='utf-8') as f:
+            manifesto = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return manifesto if manifesto.get('formato') == _FORMATO else None
+
+def _save_manifest(parquet_path: str, manifesto: Dict[str, Any]):
+    """Grava o manifesto de forma atômica (arquivo temporário + rename)."""
+    caminho = get_manifest_path(parquet_path)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+def _save_array(path: str, valores: np.ndarray):
+    """Grava um .npy de forma atômica."""
+    temporario = path + '.tmp.npy'
+    np.save(temporario, valores)
+    os.replace(temporario, path)
+
+def processed_timestamp(parquet_path: str) -> Optional[float]:
+    """mtime do conjunto processado (base ou manifesto, o mais recente), ou None se não existir."""
+    if not os.path.exists(parquet_path):
+        return None
+    timestamp = os.path.getmtime(parquet_path)
+    manifesto = get_manifest_path(parquet_path)
+    if os.path.exists(manifesto):
+        timestamp = max(timestamp, os.path.getmtime(manifesto))
+    return timestamp
+
+def compute_row_keys(df: pd.DataFrame, columns: Optional[List[str]] = None) -> np.ndarray:
+    """
+    Chave de conteúdo de cada linha (uint64), estável entre execuções.
+
+    Args:
+        df: DataFrame de origem (antes do enriquecimento)
+        columns: Colunas que compõem a chave (padrão: todas, em ordem alfabética)
+
+    Returns:
+        Vetor de chaves, únicas mesmo para linhas idênticas
+    """
+    columns = sorted(df.columns) if columns is None else columns
+    conteudo = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    # Número da ocorrência entre linhas de mesmo conteúdo
+    ocorrencia = pd.Series(conteudo).groupby(conteudo).cumcount().to_numpy()
+    return pd.util.hash_pandas_object(
+        pd.DataFrame({'conteudo': conteudo, 'ocorrencia': ocorrencia}), index=False).to_numpy()
+
+def build_parquet_filters(colunas_arquivo: List[str], filtros: Dict[str, Any]) -> Optional[list]:
+    """Converte os filtros do painel em predicados do pyarrow (filtros sem coluna no arquivo são ignorados)."""
+    predicados = []
+    for chave in ('fluxo', 'servico', 'formulario'):
+        if filtros.get(chave) and chave in colunas_arquivo:
+            predicados.append((chave, '=', filtros[chave]))
+
+    # Ano é derivado de dataCriacao: vira um intervalo [01/01/ano, 01/01/ano+1)
+    if filtros.get('ano') and 'dataCriacao' in colunas_arquivo:
+        ano = int(filtros['ano'])
+        predicados.append(('dataCriacao', '>=', pd.Timestamp(ano, 1, 1)))
+        predicados.append(('dataCriacao', '<', pd.Timestamp(ano + 1, 1, 1)))
+
+    return predicados or None
+
+def write_processed_data(df: pd.DataFrame, parquet_path: str):
+    """
+    Grava dados processados em Parquet, ordenados pelas chaves dos filtros e em
+    row groups pequenos, para que leituras com filtros descartem row groups inteiros.
+    A gravação é atômica (arquivo temporário + rename).
+
+    Args:
+        df: DataFrame processado
+        parquet_path: Caminho do Parquet de saída
+    """
+    chaves = [c for c in CHAVES_ORDENACAO_PROCESSADO if c in df.columns]
+    if chaves:
+        df = df.sort_values(chaves, kind='stable', na_position='last').reset_index(drop=True)
+
+    # Grava texto simples: o Parquet monta um dicionário por row group só com os valores
+    # presentes (uma coluna category repetiria o dicionário inteiro em cada row group)
+    categoricas = [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+    if categoricas:
+        df = df.astype({c: object for c in categoricas})
+
+    temporario = parquet_path + '.tmp'
+    df.to_parquet(temporario, compression='snappy', index=False,
+                  row_group_size=TAMANHO_ROW_GROUP_PROCESSADO)
+    os.replace(temporario, parquet_path)
+
+def read_processed_dataset(parquet_path: str, columns: Optional[List[str]] = None,
+                           filters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """
+    Lê base + partes incrementais, descartando as linhas removidas.
+    Projeção e predicados são empurrados para o leitor de cada arquivo.
+
+    Args:
+        parquet_path: Caminho do Parquet processado (base)
+        columns: Colunas a ler (padrão: todas, sem a coluna interna _row_key)
+        filters: Filtros do painel {'ano', 'fluxo', 'servico', 'formulario'}
+
+    Returns:
+        DataFrame (colunas repetitivas como category)
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    manifesto = load_manifest(parquet_path)
+    delta_dir = get_delta_dir(parquet_path)
+    arquivos = [parquet_path]
+    removidos = None
+    if manifesto is not None:
+        arquivos += [os.path.join(delta_dir, parte['arquivo']) for parte in manifesto['partes']]
+        if manifesto.get('removidos', 0) > 0:
+            removidos = np.load(os.path.join(delta_dir, 'removed.npy'))
+
+    colunas_arquivo = pq.read_schema(parquet_path).names
+    pediu_chave = columns is not None and ROW_KEY in columns
+    if columns is None:
+        columns = [c for c in colunas_arquivo if c != ROW_KEY]
+    columns = [c for c in columns if c in colunas_arquivo]
+
+    colunas_lidas = list(columns)
+    if removidos is not None and ROW_KEY not in colunas_lidas and ROW_KEY in colunas_arquivo:
+        colunas_lidas.append(ROW_KEY)
+
+    dicionarios = [c for c in DIMENSOES_CATEGORICAS + COLUNAS_TEXTO_REPETITIVO if c in colunas_lidas]
+    predicados = build_parquet_filters(colunas_arquivo, filters or {})
+
+    tabelas = [pq.read_table(arquivo, columns=colunas_lidas, filters=predicados, read_dictionary=dicionarios)
+               for arquivo in arquivos]
+    tabela = pa.concat_tables(tabelas) if len(tabelas) > 1 else tabelas[0]
+
+    if removidos is not None and ROW_KEY in tabela.column_names:
+        tabela = tabela.filter(pc.invert(pc.is_in(tabela[ROW_KEY], value_set=pa.array(removidos))))
+    if ROW_KEY in tabela.column_names and not pediu_chave:
+        tabela = tabela.drop_columns([ROW_KEY])
+
+    return tabela.to_pandas()
+
+def write_full(df_processed: pd.DataFrame, parquet_path: str, keys: np.ndarray, source_columns: List[str]):
+    """
+    Reprocessamento completo: grava a base (com _row_key) e zera as partes incrementais.
+
+    Args:
+        df_processed: DataFrame enriquecido, alinhado a `keys`
+        parquet_path: Caminho do Parquet processado
+        keys: Chaves de conteúdo das linhas (compute_row_keys sobre os dados de origem)
+        source_columns: Colunas de origem usadas na chave
+    """
+    df_processed = df_processed.assign(**{ROW_KEY: keys})
+    write_processed_data(df_processed, parquet_path)
+
+    delta_dir = get_delta_dir(parquet_path)
+    if os.path.isdir(delta_dir):
+        shutil.rmtree(delta_dir)
+    os.makedirs(delta_dir)
+    _save_array(os.path.join(delta_dir, 'keys.npy'), np.sort(keys))
+    _save_manifest(parquet_path, {
+        'formato': _FORMATO,
+        'colunas_origem': list(source_columns),
+        'linhas_base': int(len(df_processed)),
+        'partes': [],
+        'removidos': 0
+    })
+
+def plan_delta(parquet_path: str, keys: np.ndarray, source_columns: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Compara as chaves atuais da origem com o estado gravado.
+
+    Returns:
+        Dicionário com máscara de linhas novas (`novas`), chaves removidas (`removidas`) e
+        `compactar_antes` (linha nova com chave ainda marcada como removida: a remoção
+        esconderia também a linha nova), ou None se for necessário reprocessar tudo
+        (sem manifesto ou colunas de origem diferentes)
+    """
+    manifesto = load_manifest(parquet_path)
+    if manifesto is None or manifesto['colunas_origem'] != list(source_columns) or not os.path.exists(parquet_path):
+        return None
+
+    delta_dir = get_delta_dir(parquet_path)
+    anteriores = np.load(os.path.join(delta_dir, 'keys.npy'))
+    novas = ~np.isin(keys, anteriores)
+
+    compactar_antes = False
+    if manifesto.get('removidos', 0) > 0 and novas.any():
+        removidas_antes = np.load(os.path.join(delta_dir, 'removed.npy'))
+        compactar_antes = bool(np.isin(keys[novas], removidas_antes).any())
+
+    return {
+        'manifesto': manifesto,
+        'novas': novas,
+        'removidas': np.setdiff1d(anteriores, keys),
+        'compactar_antes': compactar_antes
+    }
+
+def append_delta(parquet_path: str, plano: Dict[str, Any], df_novas: pd.DataFrame,
+                 keys: np.ndarray) -> Dict[str, Any]:
+    """
+    Grava as linhas novas (já enriquecidas) como uma parte e registra as remoções.
+
+    Args:
+        parquet_path: Caminho do Parquet processado
+        plano: Resultado de plan_delta
+        df_novas: Linhas novas enriquecidas, alinhadas a keys[plano['novas']]
+        keys: Chaves de todas as linhas atuais da origem
+
+    Returns:
+        Manifesto atualizado
+    """
+    manifesto = plano['manifesto']
+    delta_dir = get_delta_dir(parquet_path)
+
+    if len(df_novas):
+        numero = max([int(p['arquivo'][5:10]) for p in manifesto['partes']] + [0]) + 1
+        arquivo = f"part-{numero:05d}.parquet"
+        write_processed_data(df_novas.assign(**{ROW_KEY: keys[plano['novas']]}),
+                             os.path.join(delta_dir, arquivo))
+        manifesto['partes'].append({'arquivo': arquivo, 'linhas': int(len(df_novas))})
+
+    if len(plano['removidas']):
+        caminho = os.path.join(delta_dir, 'removed.npy')
+        removidas = plano['removidas']
+        if manifesto.get('removidos', 0) > 0:
+            removidas = np.union1d(np.load(caminho), removidas)
+        _save_array(caminho, removidas)
+        manifesto['removidos'] = int(len(removidas))
+
+    _save_array(os.path.join(delta_dir, 'keys.npy'), np.sort(keys))
+    _save_manifest(parquet_path, manifesto)
+    return manifesto
+
+def needs_compaction(manifesto: Dict[str, Any]) -> bool:
+    """Indica se o delta acumulado justifica compactar."""
+    linhas_delta = sum(p['linhas'] for p in manifesto['partes']) + manifesto.get('removidos', 0)
+    return (len(manifesto['partes']) > MAX_PARTES_DELTA
+            or linhas_delta > FRACAO_MAXIMA_DELTA * max(manifesto['linhas_base'], 1))
+
+def compact(parquet_path: str) -> int:
+    """
+    Junta base + partes (sem as linhas removidas) em uma nova base e limpa o delta.
+
+    Returns:
+        Número de linhas da nova base
+    """
+    manifesto = load_manifest(parquet_path)
+    if manifesto is None:
+        return 0
+
+    import pyarrow.parquet as pq
+
+    # Inclui a coluna interna _row_key para que a nova base continue rastreável
+    df = read_processed_dataset(parquet_path, columns=pq.read_schema(parquet_path).names)
+    write_processed_data(df, parquet_path)
+
+    delta_dir = get_delta_dir(parquet_path)
+    for parte in manifesto['partes']:
+        os.remove(os.path.join(delta_dir, parte['arquivo']))
+    if os.path.exists(os.path.join(delta_dir, 'removed.npy')):
+        os.remove(os.path.join(delta_dir, 'removed.npy'))
+
+    manifesto.update({'linhas_base': int(len(df)), 'partes': [], 'removidos': 0})
+    _save_manifest(parquet_path, manifesto)
+    return len(df)
@@ -0,0 +1,208 @@
+"""
+Montagem do prompt do chatbot dentro de um orçamento de tokens.
+O contexto do sistema é dividido em seções com prioridade; as obrigatórias
+entram sempre, as demais entram (item a item) enquanto houver orçamento.
+O histórico da sessão ocupa no máximo uma fração do orçamento: os turnos mais
+recentes entram inteiros e os mais antigos viram um resumo curto ou saem.
+Assim o tamanho do prompt, e com ele o custo e a latência de cada chamada,
+fica limitado independentemente dos dados e da conversa.
+
+Os tokens são contados localmente: com tiktoken (opcional) quando instalado,
+senão por uma estimativa conservadora baseada em palavras.
+"""
+import math
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Tokens extras por mensagem no formato de chat (papel e delimitadores)
+TOKENS_POR_MENSAGEM = 4
+
+# Tamanho máximo de cada pergunta citada no resumo de turnos antigos
+_TAMANHO_PERGUNTA_RESUMO = 80
+
+_PEDACOS = re.compile(r'\w+|[^\w\s]+')
+
+_codificador = None
+
+def _obter_codificador():
+    """Codificador do tiktoken (None se indisponível; o vocabulário pode exigir download)."""
+    global _codificador
+    if _codificador is None and tiktoken is not None:
+        try:
+            _codificador = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _codificador = False
+    return _codificador or None
+
+@lru_cache(maxsize=8192)
+def count_tokens(texto: str) -> int:
+    """
+    Número de tokens do texto.
+
+    Args:
+        texto: Texto a contar
+
+    Returns:
+        Tokens pelo tiktoken (cl100k_base) ou estimativa: cada palavra ou
+        sequência de pontuação conta um token a cada 4 caracteres
+    """
+    if not texto:
+        return 0
+    codificador = _obter_codificador()
+    if codificador is not None:
+        return len(codificador.encode(texto))
+    return sum(math.ceil(len(p) / 4) for p in _PEDACOS.findall(texto))
+
+def token_counter_name() -> str:
+    """Contador de tokens em uso ('tiktoken' ou 'estimativa')."""
+    return "tiktoken" if _obter_codificador() is not None else "estimativa"
+
+class Secao:
+    """
+    Parte do contexto do sistema.
+
+    Args:
+        nome: Identificador da seção (aparece no relatório)
+        cabecalho: Texto que abre a seção
+        itens: Linhas/itens da seção, em ordem de importância
+        prioridade: 0 = obrigatória (entra inteira); valores maiores entram depois
+    """
+
+    __slots__ = ("nome", "cabecalho", "itens", "prioridade")
+
+    def __init__(self, nome: str, cabecalho: str, itens: Sequence[str] = (), prioridade: int = 0):
+        self.nome = nome
+        self.cabecalho = cabecalho
+        self.itens = list(itens)
+        self.prioridade = prioridade
+
+    def texto(self, n_itens: Optional[int] = None) -> str:
+        """Texto da seção com os primeiros n_itens itens (todos se None)."""
+        return self.cabecalho + "".join(self.itens[:n_itens])
+
+def render_sections(secoes: Sequence[Secao]) -> str:
+    """Texto completo das seções, sem limite de tokens."""
+    return "".join(secao.texto() for secao in secoes)
+
+def _resumo_historico(antigas: List[Dict], orcamento: int) -> Optional[str]:
+    """Resumo das perguntas dos turnos antigos (mais recentes primeiro) que cabe no orçamento."""
+    prefixo = "Resumo da conversa anterior (perguntas já feitas pelo usuário): "
+    perguntas = []
+    for item in reversed(antigas):
+        if item.get("role") != "user":
+            continue
+        pergunta = " ".join(str(item.get("content", "")).split())
+        if len(pergunta) > _TAMANHO_PERGUNTA_RESUMO:
+            pergunta = pergunta[:_TAMANHO_PERGUNTA_RESUMO - 3] + "..."
+        candidato = prefixo + "; ".join(perguntas + [pergunta])
+        if count_tokens(candidato) + TOKENS_POR_MENSAGEM > orcamento:
+            break
+        perguntas.append(pergunta)
+    return prefixo + "; ".join(perguntas) if perguntas else None
+
+def build_prompt(secoes: Sequence[Secao], pergunta: str, historico: Sequence[Dict] = (),
+                 dados_especificos: Optional[str] = None, max_tokens: int = 3000,
+                 fracao_historico: float = 0.3) -> Tuple[List[Dict], Dict]:
+    """
+    Monta as mensagens do chat dentro do orçamento de tokens.
+
+    Ordem de preenchimento: seções obrigatórias, pergunta e dados específicos;
+    seções de prioridade 1 (fatos relevantes para a pergunta); histórico (até
+    fracao_historico do que sobrou); demais seções por prioridade, distribuindo
+    os itens entre seções de mesma prioridade (o primeiro item de cada uma,
+    depois o segundo...).
+
+    Args:
+        secoes: Seções do contexto do sistema, na ordem de exibição
+        pergunta: Pergunta atual do usuário
+        historico: Mensagens anteriores da sessão (mais antigas primeiro)
+        dados_especificos: Dados encontrados para a pergunta (ou None)
+        max_tokens: Orçamento de tokens do prompt (sem contar a resposta)
+        fracao_historico: Fração máxima do orçamento livre usada pelo histórico
+
+    Returns:
+        (mensagens no formato da API de chat, relatório com tokens e cortes)
+    """
+    incluidos = {}  # índice da seção -> número de itens incluídos
+    usados = count_tokens(pergunta) + 2 * TOKENS_POR_MENSAGEM  # pergunta + mensagem de sistema
+    extra = f"DADOS ESPECÍFICOS ENCONTRADOS: {dados_especificos}" if dados_especificos else None
+    if extra:
+        usados += count_tokens(extra) + TOKENS_POR_MENSAGEM
+
+    for i, secao in enumerate(secoes):
+        if secao.prioridade == 0:
+            incluidos[i] = len(secao.itens)
+            usados += count_tokens(secao.texto())
+
+    def preencher(prioridade: int):
+        nonlocal usados
+        grupo = [i for i, s in enumerate(secoes) if s.prioridade == prioridade]
+        custos = {i: count_tokens(secoes[i].cabecalho) for i in grupo}
+        rodada = 0
+        while grupo:
+            restantes = []
+            for i in grupo:
+                secao = secoes[i]
+                if rodada >= len(secao.itens):
+                    continue
+                custo = count_tokens(secao.itens[rodada]) + (custos[i] if rodada == 0 else 0)
+                if usados + custo > max_tokens:
+                    continue
+                usados += custo
+                incluidos[i] = rodada + 1
+                restantes.append(i)
+            grupo = restantes
+            rodada += 1
+
+    preencher(1)
+
+    # Histórico: turnos recentes inteiros; os antigos viram um resumo curto
+    orcamento_historico = max(0, int((max_tokens - usados) * fracao_historico))
+    recentes: List[Dict] = []
+    gasto_historico = 0
+    for item in reversed(list(historico)):
+        custo = count_tokens(str(item.get("content", ""))) + TOKENS_POR_MENSAGEM
+        if gasto_historico + custo > orcamento_historico:
+            break
+        recentes.insert(0, item)
+        gasto_historico += custo
+    # Não começa o histórico com uma resposta sem a pergunta correspondente
+    while recentes and recentes[0].get("role") == "assistant":
+        gasto_historico -= count_tokens(str(recentes[0].get("content", ""))) + TOKENS_POR_MENSAGEM
+        recentes.pop(0)
+    antigas = list(historico)[:len(historico) - len(recentes)]
+    resumo = _resumo_historico(antigas, orcamento_historico - gasto_historico) if antigas else None
+    if resumo:
+        gasto_historico += count_tokens(resumo) + TOKENS_POR_MENSAGEM
+    usados += gasto_historico
+
+    for prioridade in sorted({s.prioridade for s in secoes} - {0, 1}):
+        preencher(prioridade)
+
+    contexto_sistema = "".join(secoes[i].texto(incluidos[i]) for i in sorted(incluidos))
+    mensagens = [{"role": "system", "content": contexto_sistema}]
+    if resumo:
+        mensagens.append({"role": "system", "content": resumo})
+    mensagens.extend(recentes)
+    if extra:
+        mensagens.append({"role": "system", "content": extra})
+    mensagens.append({"role": "user", "content": pergunta})
+
+    relatorio = {
+        "tokens": usados,
+        "orcamento": max_tokens,
+        "contador": token_counter_name(),
+        "secoes_omitidas": [s.nome for i, s in enumerate(secoes) if i not in incluidos],
+        "secoes_cortadas": [s.nome for i, s in enumerate(secoes)
+                            if i in incluidos and incluidos[i] < len(s.itens)],
+        "mensagens_historico": len(recentes),
+        "mensagens_resumidas": len(antigas) if resumo else 0,
+        "mensagens_descartadas": 0 if resumo else len(antigas)
+    }
+    return mensagens, relatorio
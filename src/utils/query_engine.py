@@ -0,0 +1,371 @@
+"""
+Motor de consultas estruturadas do chatbot.
+Perguntas que são na verdade agregações (contagens, top N, médias, percentual
+de padronização) são interpretadas em um plano de consulta e respondidas
+diretamente sobre os dados em cache, em milissegundos e sem chamar o modelo:
+
+    "quantos formulários tem o fluxo APP CULTURA"
+    "top 5 formulários do fluxo X em 2024"
+    "qual fluxo tem mais campos"
+    "média de campos por formulário"
+    "% padronização do serviço Y"
+
+Perguntas abertas (ou que não se encaixam em nenhuma intenção) retornam None
+e seguem para o OpenAI. Também vão para o modelo as perguntas que o motor não
+entenderia por inteiro: nome citado que não corresponde a nenhuma entidade
+("do fluxo XYZ"), negação ("não usam", "sem", "exceto") e números que não são
+o ano nem o N de um ranking ("mais de 10 campos"). Responder sem o filtro ou
+a pergunta oposta daria números errados direto ao usuário.
+"""
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from src.utils.data_cache import get_filtered_data
+from src.utils.entity_index import get_entity_index, normalizar_texto
+from src.utils.grouped_kernels import distinct_counts_by
+
+# Dimensões consultáveis: coluna -> palavras (normalizadas) que a identificam
+DIMENSOES = {
+    'formulario': ('formulario', 'formularios', 'form', 'forms'),
+    'nomeCampo': ('campo', 'campos'),
+    'fluxo': ('fluxo', 'fluxos'),
+    'servico': ('servico', 'servicos'),
+    'tipo_componente': ('componente', 'componentes'),
+    'registros': ('registro', 'registros', 'linha', 'linhas'),
+}
+
+# Rótulos para as respostas: coluna -> (singular, plural)
+ROTULOS = {
+    'formulario': ('formulário', 'formulários'),
+    'nomeCampo': ('campo', 'campos'),
+    'fluxo': ('fluxo', 'fluxos'),
+    'servico': ('serviço', 'serviços'),
+    'tipo_componente': ('tipo de componente', 'tipos de componente'),
+    'registros': ('registro', 'registros'),
+}
+
+# Dimensões que podem ser usadas como filtro (citadas pelo nome)
+FILTROS_ENTIDADE = ('fluxo', 'servico', 'formulario', 'nomeCampo')
+
+# Expressões de perguntas abertas: vão para o modelo mesmo citando números
+_PERGUNTA_ABERTA = re.compile(
+    r'\b(por que|porque|como (posso|podemos|melhorar|funciona)|explique|explica|o que (e|significa)|'
+    r'sugira|sugestao|recomend\w*|deveria|devemos|vale a pena|analise|opiniao)\b'
+)
+_ANO = re.compile(r'\b(19|20)\d{2}\b')
+_TOP_N = re.compile(
+    r'\btop (\d+)\b|\b(\d+) (?:mais|menos|maiores|menores|principais|primeiros)\b|'
+    r'(?:^|\b(?:os|as|quais|liste|mostre|cite) )(\d+) (?:formularios|forms|campos|fluxos|servicos|componentes|registros)\b'
+)
+# Negação: o motor não calcula complementos ("formulários que não usam o campo X")
+_NEGACAO = {'nao', 'sem', 'exceto', 'nenhum', 'nenhuma', 'nunca', 'fora'}
+
+_PALAVRA_DIMENSAO = {palavra: dim for dim, palavras in DIMENSOES.items() for palavra in palavras}
+_PLURAIS = {'formularios', 'forms', 'campos', 'fluxos', 'servicos', 'componentes', 'registros', 'linhas'}
+_CONTAGEM = {'quantos', 'quantas', 'quantidade', 'total', 'numero', 'qtd'}
+_RANKING_MAIOR = {'top', 'mais', 'maiores', 'maior', 'principais', 'ranking'}
+_RANKING_MENOR = {'menos', 'menores', 'menor'}
+_MEDIA = {'media', 'medio', 'medias'}
+_MEDIDA_RANKING = {'mais', 'menos', 'maior', 'menor', 'maiores', 'menores'}
+# Ranking por uso (sem medida citada) só com uma destas palavras ou N explícito;
+# "quais campos são mais importantes" é pergunta aberta
+_USO = re.compile(r'\b(usad|utilizad|comu|frequent|ativ|ocorrenc|registro|top|ranking)\w*')
+# Palavras de tipo no singular: logo depois delas vem o nome de uma entidade ("do fluxo X")
+_TIPO_SINGULAR = {'formulario', 'form', 'campo', 'fluxo', 'servico'}
+# Palavras que podem vir depois da palavra de tipo sem ser um nome ("qual fluxo tem mais campos")
+_LIGACAO = {
+    'a', 'o', 'as', 'os', 'um', 'uma', 'de', 'do', 'da', 'dos', 'das', 'em', 'no', 'na', 'nos', 'nas',
+    'por', 'para', 'com', 'e', 'ou', 'que', 'qual', 'quais', 'tem', 'possui', 'possuem', 'ha', 'existe',
+    'existem', 'temos', 'foi', 'foram', 'esta', 'estao', 'usa', 'usam', 'utiliza', 'utilizam', 'mais',
+    'menos', 'maior', 'menor', 'maiores', 'menores', 'principais', 'primeiros', 'top', 'ranking',
+} | _CONTAGEM | _MEDIA | set(_PALAVRA_DIMENSAO)
+
+def _num(valor) -> str:
+    """Inteiro com separador de milhar brasileiro."""
+    return f"{int(valor):,}".replace(',', '.')
+
+def _dec(valor) -> str:
+    """Decimal com duas casas e vírgula."""
+    return f"{valor:.2f}".replace('.', ',')
+
+def _token_de(texto: str, posicao: int) -> int:
+    """Índice do token que começa na posição (texto com tokens separados por um espaço)."""
+    return texto[:posicao].count(' ')
+
+def _resolver_entidades(texto: str, tokens: List[str], indice) -> Tuple[Dict[str, Dict], Set[int]]:
+    """
+    Escolhe uma entidade por trecho citado. A palavra de tipo logo antes do nome
+    ("do fluxo X", "serviço Y") decide entre entidades homônimas; sem ela, vale a
+    ordem fluxo > serviço > formulário e nomes curtos demais são ignorados
+    (campos só contam com a palavra "campo" antes do nome).
+
+    Returns:
+        Tupla ({coluna: entidade}, índices de tokens consumidos pelas entidades)
+    """
+    por_trecho: Dict[tuple, List[Dict]] = {}
+    for entidade in indice.find(texto, tipos=FILTROS_ENTIDADE):
+        por_trecho.setdefault((entidade['inicio'], entidade['fim']), []).append(entidade)
+
+    filtros: Dict[str, Dict] = {}
+    consumidos = set()
+    for (inicio, fim), candidatas in sorted(por_trecho.items()):
+        primeiro = _token_de(texto, inicio)
+        ultimo = _token_de(texto, fim)
+        tipo_citado = _PALAVRA_DIMENSAO.get(tokens[primeiro - 1]) if primeiro > 0 else None
+
+        escolhida = None
+        if tipo_citado is not None:
+            escolhida = next((c for c in candidatas if c['tipo'] == tipo_citado), None)
+        if escolhida is None:
+            nome = texto[inicio:fim + 1]
+            if ' ' not in nome and len(nome) < 8:
+                continue
+            ordem = [c for c in candidatas if c['tipo'] != 'nomeCampo']
+            ordem.sort(key=lambda c: FILTROS_ENTIDADE.index(c['tipo']))
+            escolhida = ordem[0] if ordem else None
+        if escolhida is None or escolhida['tipo'] in filtros:
+            continue
+
+        filtros[escolhida['tipo']] = escolhida
+        consumidos.update(range(primeiro, ultimo + 1))
+        if tipo_citado == escolhida['tipo']:
+            consumidos.add(primeiro - 1)
+    return filtros, consumidos
+
+def _nome_nao_resolvido(tokens: List[str], consumidos: Set[int]) -> bool:
+    """
+    Indica se alguma palavra de tipo ("fluxo", "formulário"...) é seguida de um
+    nome que não virou entidade, como "do fluxo INEXISTENTE" ou um nome truncado.
+    """
+    for i, t in enumerate(tokens[:-1]):
+        if t not in _TIPO_SINGULAR or i in consumidos or i + 1 in consumidos:
+            continue
+        seguinte = tokens[i + 1]
+        if seguinte in _LIGACAO or seguinte.startswith('padroniz') or _ANO.fullmatch(seguinte) or _USO.match(seguinte):
+            continue
+        return True
+    return False
+
+def parse_question(pergunta: str, csv_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Interpreta a pergunta como um plano de consulta.
+
+    Args:
+        pergunta: Pergunta do usuário
+        csv_path: Caminho do arquivo CSV original (índice de entidades)
+
+    Returns:
+        Plano {'intencao', 'alvo', 'medida', 'grupo', 'n', 'ordem', 'filtros', 'ano'}
+        ou None se a pergunta não for uma consulta estruturada
+    """
+    texto = normalizar_texto(pergunta)
+    if not texto:
+        return None
+
+    tokens = texto.split()
+    entidades, consumidos = _resolver_entidades(texto, tokens, get_entity_index(csv_path))
+    livres = [(i, t) for i, t in enumerate(tokens) if i not in consumidos]
+    palavras = {t for _, t in livres}
+    texto_livre = ' '.join(t for _, t in livres)
+
+    # Nomes de entidades já foram removidos: "FOR_ANALISE_..." não torna a pergunta aberta
+    if _PERGUNTA_ABERTA.search(texto_livre):
+        return None
+
+    # Sem o filtro citado, ou com a pergunta invertida, a resposta estaria errada: vai para o modelo
+    if palavras & _NEGACAO or _nome_nao_resolvido(tokens, consumidos):
+        return None
+
+    # Números fora dos nomes só são entendidos como ano ou N de ranking
+    ano_encontrado = _ANO.search(texto_livre)
+    n = _TOP_N.search(texto_livre)
+    n_citado = next(g for g in n.groups() if g) if n else None
+    numeros = {t for t in palavras if any(c.isdigit() for c in t)}
+    if numeros - {ano_encontrado.group(0) if ano_encontrado else None, n_citado}:
+        return None
+
+    # Dimensões citadas (fora dos nomes das entidades), na ordem da pergunta
+    citadas = [(i, _PALAVRA_DIMENSAO[t]) for i, t in livres if t in _PALAVRA_DIMENSAO]
+    posicao = {i: k for k, (i, _) in enumerate(livres)}
+
+    def _depois_de(gatilhos) -> Optional[str]:
+        """Dimensão citada logo depois de uma das palavras (até 2 tokens adiante)."""
+        for i, t in livres:
+            if t in gatilhos:
+                for j, dim in citadas:
+                    if 0 < posicao[j] - posicao[i] <= 2:
+                        return dim
+        return None
+
+    plano = {
+        'filtros': {tipo: e['nome'] for tipo, e in entidades.items()},
+        'ano': ano_encontrado.group(0) if ano_encontrado else None,
+        'grupo': _depois_de({'por', 'cada'}),
+        'n': None,
+        'ordem': 'desc',
+        'medida': None,
+        'alvo': None
+    }
+
+    if any('padroniz' in t for t in palavras):
+        plano['intencao'] = 'padronizacao'
+        if plano['grupo'] is None and n_citado:
+            # "5 fluxos com menor padronização": a dimensão do ranking é o agrupamento
+            grupo = next((dim for _, dim in citadas if dim not in ('nomeCampo', 'registros')), None)
+            plano['grupo'] = grupo
+        if plano['grupo'] is not None:
+            plano['ordem'] = 'asc' if palavras & (_RANKING_MENOR | {'pior', 'piores'}) else 'desc'
+            plano['n'] = int(n_citado) if n_citado else 10
+        elif n_citado:
+            return None
+        return plano
+
+    if not citadas:
+        return None
+
+    if palavras & _MEDIA:
+        if n_citado:
+            return None
+        plano['intencao'] = 'media'
+        plano['medida'] = _depois_de(_MEDIA | {'de'}) or 'nomeCampo'
+        grupo = plano['grupo'] or 'formulario'
+        plano['grupo'] = grupo if grupo != plano['medida'] else None
+        return plano if plano['grupo'] else None
+
+    if n or palavras & (_RANKING_MAIOR | _RANKING_MENOR):
+        plano['intencao'] = 'ranking'
+        plano['ordem'] = 'asc' if palavras & _RANKING_MENOR else 'desc'
+        # "qual fluxo tem mais campos": campos é a medida, fluxo o alvo
+        plano['medida'] = _depois_de(_MEDIDA_RANKING)
+        candidatos = [dim for _, dim in citadas if dim != plano['medida'] and dim != 'registros']
+        if not candidatos:
+            return None
+        if plano['medida'] == 'registros':
+            plano['medida'] = None
+        if plano['medida'] is None and not n and not _USO.search(texto_livre):
+            return None
+        plano['alvo'] = candidatos[0]
+        if n_citado:
+            plano['n'] = int(n_citado)
+        else:
+            plural = any(t in _PLURAIS and _PALAVRA_DIMENSAO[t] == plano['alvo'] for t in palavras)
+            plano['n'] = 5 if plural or 'quais' in palavras else 1
+        return plano
+
+    if palavras & _CONTAGEM and not n_citado:
+        plano['intencao'] = 'contagem'
+        plano['alvo'] = citadas[0][1]
+        return plano
+
+    return None
+
+def _descrever_filtros(plano: Dict[str, Any]) -> str:
+    partes = [f"{ROTULOS[tipo][0]} '{nome}'" for tipo, nome in plano['filtros'].items()]
+    return f" ({', '.join(partes)})" if partes else ""
+
+def _dados_do_plano(plano: Dict[str, Any], csv_path: str) -> pd.DataFrame:
+    """Linhas que atendem aos filtros do plano (índice de filtros + máscara do campo)."""
+    filtros = plano['filtros']
+    df = get_filtered_data(csv_path, plano['ano'], filtros.get('fluxo'),
+                           filtros.get('servico'), filtros.get('formulario'))
+    if 'nomeCampo' in filtros and not df.empty:
+        df = df[df['nomeCampo'] == filtros['nomeCampo']]
+    return df
+
+def _contar_por(df: pd.DataFrame, grupo: str, medida: Optional[str]) -> pd.Series:
+    """Registros (medida None) ou valores distintos de `medida` por valor de `grupo`."""
+    grupos = df.groupby(grupo, observed=True)
+    return grupos.size() if medida is None else grupos[medida].nunique()
+
+def execute_query(plano: Dict[str, Any], csv_path: str) -> Optional[str]:
+    """
+    Executa o plano sobre os dados em cache e formata a resposta.
+
+    Args:
+        plano: Plano gerado por parse_question
+        csv_path: Caminho do arquivo CSV original
+
+    Returns:
+        Resposta em texto, ou None se os dados não tiverem as colunas do plano
+    """
+    df = _dados_do_plano(plano, csv_path)
+    colunas = set(df.columns) | {'registros'}
+    necessarias = {plano.get('alvo'), plano.get('medida'), plano.get('grupo')} - {None}
+    if plano['intencao'] == 'padronizacao':
+        necessarias |= {'nomeCampo', 'is_padronizado'}
+    if not necessarias <= colunas:
+        return None
+
+    filtros = _descrever_filtros(plano)
+    if df.empty:
+        return f"Nenhum registro encontrado{filtros}."
+
+    intencao = plano['intencao']
+    if intencao == 'contagem':
+        alvo = plano['alvo']
+        total = len(df) if alvo == 'registros' else int(df[alvo].nunique())
+        resposta = f"Total de {ROTULOS[alvo][1]}{filtros}: {_num(total)}"
+
+    elif intencao == 'ranking':
+        alvo, medida = plano['alvo'], plano['medida']
+        valores = _contar_por(df, alvo, medida).sort_values(
+            ascending=plano['ordem'] == 'asc', kind='stable').head(plano['n'])
+        singular, plural = ROTULOS[medida or 'registros']
+        criterio = ('menos ' if plano['ordem'] == 'asc' else 'mais ') + plural
+        linhas = [f"{i}. {nome} — {_num(v)} {singular if v == 1 else plural}"
+                  for i, (nome, v) in enumerate(valores.items(), 1)]
+        if plano['n'] == 1 and linhas:
+            nome, v = next(iter(valores.items()))
+            resposta = (f"O {ROTULOS[alvo][0]} com {criterio}{filtros} é '{nome}', "
+                        f"com {_num(v)} {singular if v == 1 else plural}.")
+        else:
+            resposta = f"Top {len(linhas)} {ROTULOS[alvo][1]} com {criterio}{filtros}:\n" + "\n".join(linhas)
+
+    elif intencao == 'media':
+        medida, grupo = plano['medida'], plano['grupo']
+        media = _contar_por(df, grupo, None if medida == 'registros' else medida).mean()
+        resposta = f"Média de {ROTULOS[medida][1]} por {ROTULOS[grupo][0]}{filtros}: {_dec(media)}"
+
+    elif intencao == 'padronizacao':
+        grupo = plano['grupo']
+        if grupo is None:
+            campos = df['nomeCampo']
+            distintos = int(campos.nunique())
+            padronizados = int(campos[df['is_padronizado'] == 1].nunique())
+            pct = padronizados / distintos * 100 if distintos else 0.0
+            resposta = (f"Padronização{filtros}: {_dec(pct)}% "
+                        f"({_num(padronizados)} de {_num(distintos)} campos distintos padronizados).")
+        else:
+            por_grupo = distinct_counts_by(df, grupo)
+            por_grupo = por_grupo[por_grupo['distintos'] > 0]
+            por_grupo = por_grupo.assign(pct=por_grupo['padronizados'] / por_grupo['distintos'] * 100)
+            por_grupo = por_grupo.sort_values('pct', ascending=plano['ordem'] == 'asc', kind='stable')
+            linhas = [f"{i}. {linha[grupo]} — {_dec(linha['pct'])}%"
+                      for i, linha in enumerate(por_grupo.head(plano['n']).to_dict('records'), 1)]
+            criterio = 'menor' if plano['ordem'] == 'asc' else 'maior'
+            resposta = (f"{ROTULOS[grupo][1].capitalize()} com {criterio} padronização{filtros}:\n"
+                        + "\n".join(linhas))
+    else:
+        return None
+
+    if plano['ano'] and 'dataCriacao' not in df.columns:
+        resposta += f"\n(Os dados não têm data de criação; o filtro de ano {plano['ano']} foi ignorado.)"
+    return resposta
+
+def answer_question(pergunta: str, csv_path: str) -> Optional[str]:
+    """
+    Responde a pergunta diretamente se ela for uma consulta estruturada.
+
+    Args:
+        pergunta: Pergunta do usuário
+        csv_path: Caminho do arquivo CSV original
+
+    Returns:
+        Resposta em texto, ou None para perguntas abertas (seguem para o modelo)
+    """
+    plano = parse_question(pergunta, csv_path)
+    if plano is None:
+        return None
+    return execute_query(plano, csv_path)
@@ -0,0 +1,193 @@
+"""
+Cache de respostas do chatbot para perguntas repetidas.
+A chave combina a versão dos dados, o contexto específico encontrado para a
+pergunta (entidades citadas, ver buscar_dados_especificos), o histórico da
+sessão enviado ao modelo e a pergunta normalizada: a resposta a um "e ele?"
+depende da conversa, então sessões com históricos diferentes nunca
+compartilham respostas. Perguntas quase iguais (mesmo contexto, mesmo
+histórico e tokens muito parecidos) também reaproveitam a resposta, desde que
+números, negações, comparativos e quantificadores sejam exatamente os mesmos.
+Entradas expiram por TTL e as menos usadas saem primeiro quando o limite de
+entradas é atingido.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.entity_index import normalizar_texto
+
+# Palavras que não mudam o sentido da pergunta na comparação por similaridade
+_PALAVRAS_NEUTRAS = frozenset("""
+a o as os e de da do das dos no na nos nas um uma me por favor voce pode poderia
+sabe saber diga dizer informe informar qual quais
+""".split())
+
+# Palavras que mudam o sentido da pergunta: polaridade, negação, comparação e quantidade.
+# Duas perguntas só são consideradas quase iguais se tiverem os mesmos números e estas palavras na mesma ordem
+_PALAVRAS_SENTIDO = frozenset("""
+mais menos maior maiores menor menores melhor melhores pior piores maximo minimo acima abaixo
+nao sem nenhum nenhuma nunca exceto nem jamais
+todos todas algum alguns alguma algumas cada poucos poucas muitos muitas unico unica apenas somente
+primeiro primeira primeiros primeiras ultimo ultima ultimos ultimas top
+dois duas tres quatro cinco seis sete oito nove dez vinte trinta cem mil
+""".split())
+
+def _tokens(texto_normalizado: str) -> frozenset:
+    return frozenset(texto_normalizado.split()) - _PALAVRAS_NEUTRAS
+
+def _sentido(texto_normalizado: str) -> tuple:
+    """Números (em qualquer posição) e palavras de sentido da pergunta, na ordem em que aparecem."""
+    palavras = texto_normalizado.split()
+    numeros = tuple(sorted(t for t in palavras if any(c.isdigit() for c in t)))
+    return numeros, tuple(t for t in palavras if t in _PALAVRAS_SENTIDO)
+
+class ResponseCache:
+    """
+    Cache de respostas com correspondência exata e por similaridade.
+
+    Args:
+        max_entries: Limite de respostas armazenadas (LRU; 0 desativa o cache)
+        ttl: Validade de cada resposta em segundos
+        similaridade_minima: Jaccard mínimo entre os tokens de duas perguntas
+            com o mesmo contexto e histórico para reaproveitar a resposta (1.0 = só exata);
+            números e palavras de sentido (ver _PALAVRAS_SENTIDO) precisam ser iguais
+    """
+
+    def __init__(self, max_entries: int = 500, ttl: float = 3600, similaridade_minima: float = 0.8):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similaridade_minima = similaridade_minima
+        # (versao, contexto, historico, pergunta) -> (resposta, tokens, sentido, criado_em, custo_segundos)
+        self._entries: "OrderedDict[Tuple, tuple]" = OrderedDict()
+        self._grupos: Dict[Tuple, set] = {}  # (versao, contexto, historico) -> chaves do grupo
+        self._lock = threading.RLock()
+        self.hits_exatos = 0
+        self.hits_similares = 0
+        self.misses = 0
+        self.expiradas = 0
+        self.evictions = 0
+        self.segundos_economizados = 0.0
+
+    @staticmethod
+    def make_key(pergunta: str, contexto: Optional[str], versao: str,
+                 historico: Optional[List[Dict]] = None) -> Tuple:
+        """
+        Chave da pergunta: (versão dos dados, contexto específico, hash do
+        histórico da sessão, pergunta normalizada).
+
+        Args:
+            pergunta: Pergunta do usuário
+            contexto: Dados específicos encontrados para a pergunta
+            versao: Versão dos dados
+            historico: Mensagens anteriores da sessão enviadas ao modelo (vazio em sessão nova)
+        """
+        resumo = ""
+        if historico:
+            serializado = json.dumps(historico, ensure_ascii=False, sort_keys=True)
+            resumo = hashlib.sha1(serializado.encode("utf-8")).hexdigest()
+        return (versao, contexto or "", resumo, normalizar_texto(pergunta))
+
+    def _remover(self, chave: Tuple):
+        self._entries.pop(chave, None)
+        grupo = self._grupos.get(chave[:3])
+        if grupo is not None:
+            grupo.discard(chave)
+            if not grupo:
+                del self._grupos[chave[:3]]
+
+    def _valida(self, chave: Tuple, agora: float) -> Optional[tuple]:
+        entrada = self._entries.get(chave)
+        if entrada is not None and agora - entrada[3] > self.ttl:
+            self._remover(chave)
+            self.expiradas += 1
+            return None
+        return entrada
+
+    def get(self, chave: Tuple) -> Optional[str]:
+        """
+        Resposta armazenada para a pergunta (exata ou quase igual), ou None.
+
+        Args:
+            chave: Chave gerada por make_key
+        """
+        agora = time.monotonic()
+        with self._lock:
+            entrada = self._valida(chave, agora)
+            encontrada = chave if entrada is not None else None
+
+            if encontrada is None and self.similaridade_minima < 1.0:
+                tokens = _tokens(chave[3])
+                sentido = _sentido(chave[3])
+                melhor = 0.0
+                for candidata in list(self._grupos.get(chave[:3], ())):
+                    dados = self._valida(candidata, agora)
+                    # Número, negação ou comparativo diferente: outra pergunta, por mais tokens que tenha em comum
+                    if dados is None or not tokens or dados[2] != sentido:
+                        continue
+                    similaridade = len(tokens & dados[1]) / len(tokens | dados[1])
+                    if similaridade >= self.similaridade_minima and similaridade > melhor:
+                        melhor, encontrada, entrada = similaridade, candidata, dados
+
+            if encontrada is None:
+                self.misses += 1
+                return None
+
+            if encontrada == chave:
+                self.hits_exatos += 1
+            else:
+                self.hits_similares += 1
+            self.segundos_economizados += entrada[4]
+            self._entries.move_to_end(encontrada)
+            return entrada[0]
+
+    def put(self, chave: Tuple, resposta: str, custo: float = 0.0):
+        """
+        Armazena a resposta da pergunta.
+
+        Args:
+            chave: Chave gerada por make_key
+            resposta: Resposta do modelo
+            custo: Tempo (s) gasto para gerar a resposta, somado às economias a cada acerto
+        """
+        if not resposta or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._remover(chave)
+            while self._entries and len(self._entries) >= self.max_entries:
+                antiga = next(iter(self._entries))
+                self._remover(antiga)
+                self.evictions += 1
+            self._entries[chave] = (resposta, _tokens(chave[3]), _sentido(chave[3]), time.monotonic(), custo)
+            self._grupos.setdefault(chave[:3], set()).add(chave)
+
+    def clear(self):
+        """Remove todas as respostas (os contadores são mantidos)."""
+        with self._lock:
+            self._entries.clear()
+            self._grupos.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de acerto e economia do cache."""
+        with self._lock:
+            hits = self.hits_exatos + self.hits_similares
+            consultas = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": hits,
+                "hits_exatos": self.hits_exatos,
+                "hits_similares": self.hits_similares,
+                "misses": self.misses,
+                "expiradas": self.expiradas,
+                "evictions": self.evictions,
+                "hit_rate": round(hits / consultas, 4) if consultas else 0.0,
+                "chamadas_llm_economizadas": hits,
+                "segundos_economizados": round(self.segundos_economizados, 2)
+            }
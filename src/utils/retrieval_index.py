@@ -0,0 +1,346 @@
+"""
+Índice de recuperação sobre o catálogo completo para o chatbot.
+Cada formulário, campo, fluxo e serviço ganha uma ficha compacta de fatos
+(contagens, fluxos que o usam, padronização e tipo de componente). As fichas
+são indexadas por TF-IDF de n-gramas de caracteres (3 e 4 letras dentro das
+palavras, com hashing em um número fixo de colunas), o que tolera acentos,
+plurais e nomes escritos pela metade, sem embeddings nem chamadas de rede.
+
+A matriz fica em formato esparso por coluna (CSC em arrays NumPy): cada
+n-grama aponta para as fichas que o contêm, então uma pergunta só percorre as
+listas dos seus próprios n-gramas. O índice é gravado no armazenamento de
+artefatos pelo scripts/process_data.py ou no primeiro uso (arquivos .npy
+abertos com memory-map, compartilhados pelos workers).
+"""
+import os
+import zlib
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils.data_cache import cached_artifact, get_data_version, load_processed_data
+from src.utils.entity_index import normalizar_texto
+
+_retrieval_index_cache = {}  # Índice por arquivo: {caminho absoluto: (versao, RetrievalIndex)}
+
+# Número de colunas do hashing de n-gramas (colisões raras para o vocabulário do catálogo)
+N_COLUNAS = 1 << 18
+TAMANHOS_NGRAMA = (3, 4)
+
+TIPOS = ('formulario', 'nomeCampo', 'fluxo', 'servico')
+
+# Palavras da pergunta que não ajudam a achar fichas
+_PALAVRAS_IGNORADAS = frozenset("""
+a o as os de da do das dos e em no na nos nas um uma para por com sem que qual quais
+quantos quantas quanto como onde tem temos ha sobre me mostre mostra liste lista fale
+formulario formularios campo campos fluxo fluxos servico servicos usa usam utiliza
+""".split())
+
+COLUNAS_FICHA = ['formulario', 'nomeCampo', 'legenda', 'fluxo', 'servico', 'is_padronizado', 'tipo_componente']
+
+def _ngramas(texto_normalizado: str) -> List[str]:
+    """N-gramas de caracteres de cada palavra, com espaço marcando início e fim."""
+    ngramas = []
+    for palavra in texto_normalizado.split():
+        palavra = f" {palavra} "
+        for n in TAMANHOS_NGRAMA:
+            ngramas.extend(palavra[i:i + n] for i in range(len(palavra) - n + 1))
+    return ngramas
+
+def _colunas(ngramas: Iterable[str]) -> np.ndarray:
+    """Coluna de cada n-grama (crc32: igual em todos os processos, ao contrário de hash())."""
+    return np.fromiter((zlib.crc32(g.encode('utf-8')) % N_COLUNAS for g in ngramas), dtype=np.int64)
+
+def _top_relacionados(df: pd.DataFrame, chave: str, coluna: str, n: int = 3) -> Dict[str, List[str]]:
+    """Os n valores de `coluna` mais frequentes em cada valor de `chave`."""
+    pares = df.groupby([chave, coluna], observed=True).size()
+    pares = pares[pares > 0].sort_values(ascending=False, kind='stable')
+    top = pares.groupby(level=0, observed=True).head(n).reset_index()
+    return {str(k): [str(v) for v in grupo] for k, grupo in top.groupby(chave, observed=True)[coluna]}
+
+def _lista(nomes: List[str], total: int) -> str:
+    """Nomes separados por vírgula, indicando quantos ficaram de fora."""
+    texto = ", ".join(nomes)
+    return texto + (f" (+{total - len(nomes)})" if total > len(nomes) else "")
+
+def _percentual(valor: float) -> str:
+    return f"{valor * 100:.0f}%"
+
+def build_cards(df: pd.DataFrame) -> List[Dict[str, str]]:
+    """
+    Fichas de fatos de todas as entidades do catálogo.
+    Cada relacionamento é um groupby sobre o DataFrame inteiro (sem laço por entidade).
+
+    Args:
+        df: DataFrame processado
+
+    Returns:
+        Lista de {'tipo', 'nome', 'texto' (indexado), 'ficha' (enviada ao modelo)}
+    """
+    if df.empty:
+        return []
+
+    colunas = [c for c in COLUNAS_FICHA if c in df.columns]
+    df = df[colunas]
+    tem = set(colunas)
+    fichas = []
+
+    def grupo(chave):
+        return df.groupby(chave, observed=True)
+
+    padronizado = {}
+    if 'is_padronizado' in tem:
+        for chave in TIPOS:
+            if chave in tem:
+                padronizado[chave] = grupo(chave)['is_padronizado'].mean()
+
+    if 'formulario' in tem:
+        g = grupo('formulario')
+        uso = g.size()
+        campos = g['nomeCampo'].nunique() if 'nomeCampo' in tem else None
+        n_fluxos = g['fluxo'].nunique() if 'fluxo' in tem else None
+        fluxos = _top_relacionados(df, 'formulario', 'fluxo') if 'fluxo' in tem else {}
+        componentes = _top_relacionados(df, 'formulario', 'tipo_componente') if 'tipo_componente' in tem else {}
+        for nome, n in uso.items():
+            nome = str(nome)
+            partes = [f"Formulário '{nome}': {int(n)} registros"]
+            if campos is not None:
+                partes.append(f"{int(campos[nome])} campos únicos")
+            if 'formulario' in padronizado:
+                partes.append(f"{_percentual(padronizado['formulario'][nome])} dos campos padronizados")
+            if n_fluxos is not None:
+                partes.append(f"usado em {int(n_fluxos[nome])} fluxo(s): {_lista(fluxos.get(nome, []), int(n_fluxos[nome]))}")
+            if componentes.get(nome):
+                partes.append(f"componentes mais comuns: {', '.join(componentes[nome])}")
+            fichas.append({'tipo': 'formulario', 'nome': nome, 'texto': nome, 'ficha': "; ".join(partes) + "."})
+
+    if 'nomeCampo' in tem:
+        g = grupo('nomeCampo')
+        uso = g.size()
+        n_formularios = g['formulario'].nunique() if 'formulario' in tem else None
+        n_fluxos = g['fluxo'].nunique() if 'fluxo' in tem else None
+        fluxos = _top_relacionados(df, 'nomeCampo', 'fluxo') if 'fluxo' in tem else {}
+        componente = _top_relacionados(df, 'nomeCampo', 'tipo_componente', 1) if 'tipo_componente' in tem else {}
+        legenda = _top_relacionados(df, 'nomeCampo', 'legenda', 1) if 'legenda' in tem else {}
+        for nome, n in uso.items():
+            nome = str(nome)
+            rotulo = legenda.get(nome, [""])[0]
+            partes = [f"Campo '{nome}'" + (f" (legenda '{rotulo}')" if rotulo else "") + f": {int(n)} ocorrências"]
+            if n_formularios is not None:
+                partes.append(f"aparece em {int(n_formularios[nome])} formulário(s)")
+            if 'nomeCampo' in padronizado:
+                taxa = padronizado['nomeCampo'][nome]
+                partes.append("padronizado" if taxa >= 1 else "não padronizado" if taxa <= 0
+                              else f"padronizado em {_percentual(taxa)} das ocorrências")
+            if componente.get(nome):
+                partes.append(f"tipo de componente: {componente[nome][0]}")
+            if n_fluxos is not None:
+                partes.append(f"usado em {int(n_fluxos[nome])} fluxo(s): {_lista(fluxos.get(nome, []), int(n_fluxos[nome]))}")
+            texto = " ".join(filter(None, [nome, rotulo, componente.get(nome, [""])[0]]))
+            fichas.append({'tipo': 'nomeCampo', 'nome': nome, 'texto': texto, 'ficha': "; ".join(partes) + "."})
+
+    if 'fluxo' in tem:
+        g = grupo('fluxo')
+        uso = g.size()
+        n_formularios = g['formulario'].nunique() if 'formulario' in tem else None
+        campos = g['nomeCampo'].nunique() if 'nomeCampo' in tem else None
+        servicos = _top_relacionados(df, 'fluxo', 'servico') if 'servico' in tem else {}
+        n_servicos = g['servico'].nunique() if 'servico' in tem else None
+        formularios = _top_relacionados(df, 'fluxo', 'formulario') if 'formulario' in tem else {}
+        for nome, n in uso.items():
+            nome = str(nome)
+            partes = [f"Fluxo '{nome}': {int(n)} registros"]
+            if n_formularios is not None:
+                partes.append(f"utiliza {int(n_formularios[nome])} formulário(s): "
+                              f"{_lista(formularios.get(nome, []), int(n_formularios[nome]))}")
+            if campos is not None:
+                partes.append(f"{int(campos[nome])} campos únicos")
+            if 'fluxo' in padronizado:
+                partes.append(f"{_percentual(padronizado['fluxo'][nome])} dos campos padronizados")
+            if n_servicos is not None:
+                partes.append(f"serviço(s): {_lista(servicos.get(nome, []), int(n_servicos[nome]))}")
+            fichas.append({'tipo': 'fluxo', 'nome': nome, 'texto': nome, 'ficha': "; ".join(partes) + "."})
+
+    if 'servico' in tem:
+        g = grupo('servico')
+        uso = g.size()
+        n_fluxos = g['fluxo'].nunique() if 'fluxo' in tem else None
+        n_formularios = g['formulario'].nunique() if 'formulario' in tem else None
+        fluxos = _top_relacionados(df, 'servico', 'fluxo') if 'fluxo' in tem else {}
+        for nome, n in uso.items():
+            nome = str(nome)
+            partes = [f"Serviço '{nome}': {int(n)} registros"]
+            if n_fluxos is not None:
+                partes.append(f"{int(n_fluxos[nome])} fluxo(s): {_lista(fluxos.get(nome, []), int(n_fluxos[nome]))}")
+            if n_formularios is not None:
+                partes.append(f"{int(n_formularios[nome])} formulário(s)")
+            if 'servico' in padronizado:
+                partes.append(f"{_percentual(padronizado['servico'][nome])} dos campos padronizados")
+            fichas.append({'tipo': 'servico', 'nome': nome, 'texto': nome, 'ficha': "; ".join(partes) + "."})
+
+    return fichas
+
+class RetrievalIndex:
+    """
+    Matriz TF-IDF (n-gramas de caracteres x fichas) em formato CSC.
+
+    Args:
+        fichas: Fichas indexadas (ver build_cards), na ordem das linhas da matriz
+        indptr: Início da lista de cada coluna em indices/pesos (N_COLUNAS + 1)
+        indices: Ficha de cada entrada
+        pesos: Peso TF-IDF normalizado de cada entrada
+        idf: IDF de cada coluna (usado para pesar a pergunta)
+    """
+
+    def __init__(self, fichas: List[Dict[str, str]], indptr: np.ndarray, indices: np.ndarray,
+                 pesos: np.ndarray, idf: np.ndarray):
+        self.fichas = fichas
+        self.indptr = indptr
+        self.indices = indices
+        self.pesos = pesos
+        self.idf = idf
+        self._tipos = np.array([TIPOS.index(f['tipo']) for f in fichas], dtype=np.int8)
+        self._por_nome = {(f['tipo'], f['nome']): i for i, f in enumerate(fichas)}
+
+    @classmethod
+    def from_cards(cls, fichas: List[Dict[str, str]]) -> 'RetrievalIndex':
+        """Constrói a matriz a partir das fichas (tf = 1 + log(contagem), linhas com norma 1)."""
+        linhas, colunas, contagens = [], [], []
+        for i, ficha in enumerate(fichas):
+            cols, n = np.unique(_colunas(_ngramas(normalizar_texto(ficha['texto']))), return_counts=True)
+            linhas.append(np.full(len(cols), i, dtype=np.int32))
+            colunas.append(cols)
+            contagens.append(n)
+
+        if not fichas:
+            return cls([], np.zeros(N_COLUNAS + 1, dtype=np.int64), np.zeros(0, dtype=np.int32),
+                       np.zeros(0, dtype=np.float32), np.zeros(N_COLUNAS, dtype=np.float32))
+
+        linhas = np.concatenate(linhas)
+        colunas = np.concatenate(colunas)
+        tf = 1 + np.log(np.concatenate(contagens).astype(np.float64))
+
+        df_coluna = np.bincount(colunas, minlength=N_COLUNAS)
+        idf = (np.log((1 + len(fichas)) / (1 + df_coluna)) + 1).astype(np.float32)
+        pesos = tf * idf[colunas]
+        normas = np.sqrt(np.bincount(linhas, weights=pesos ** 2, minlength=len(fichas)))
+        pesos = pesos / normas[linhas]
+
+        ordem = np.argsort(colunas, kind='stable')
+        indptr = np.zeros(N_COLUNAS + 1, dtype=np.int64)
+        np.cumsum(df_coluna, out=indptr[1:])
+        return cls(fichas, indptr, linhas[ordem], pesos[ordem].astype(np.float32), idf)
+
+    def to_artifact(self) -> Dict[str, Any]:
+        """Partes gravadas no armazenamento de artefatos (matriz CSC como arrays + fichas)."""
+        return {'fichas': self.fichas, 'indptr': self.indptr, 'indices': self.indices,
+                'pesos': self.pesos, 'idf': self.idf}
+
+    @classmethod
+    def from_artifact(cls, partes: Dict[str, Any]) -> 'RetrievalIndex':
+        """Reabre o índice gravado por to_artifact (arrays em memory-map)."""
+        return cls(partes['fichas'], partes['indptr'], partes['indices'], partes['pesos'], partes['idf'])
+
+    def __len__(self) -> int:
+        return len(self.fichas)
+
+    def card(self, tipo: str, nome: str) -> Optional[str]:
+        """Ficha de uma entidade pelo nome exato (None se não existir)."""
+        i = self._por_nome.get((tipo, nome))
+        return self.fichas[i]['ficha'] if i is not None else None
+
+    def search(self, pergunta: str, k: int = 8, tipos: Optional[Iterable[str]] = None,
+               score_minimo: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Fichas mais parecidas com a pergunta (similaridade do cosseno).
+
+        Args:
+            pergunta: Texto livre
+            k: Número máximo de fichas
+            tipos: Restringe aos tipos informados (padrão: todos)
+            score_minimo: Similaridade mínima para uma ficha entrar no resultado
+
+        Returns:
+            Lista de {'tipo', 'nome', 'ficha', 'score'} em ordem decrescente de score
+        """
+        palavras = [p for p in normalizar_texto(pergunta).split() if p not in _PALAVRAS_IGNORADAS]
+        ngramas = _ngramas(" ".join(palavras))
+        if not ngramas or not self.fichas:
+            return []
+
+        cols, n = np.unique(_colunas(ngramas), return_counts=True)
+        consulta = (1 + np.log(n)) * self.idf[cols]
+        consulta /= np.linalg.norm(consulta)
+
+        # Concatena as listas das colunas da pergunta sem laço em Python
+        inicios = self.indptr[cols]
+        tamanhos = self.indptr[cols + 1] - inicios
+        total = int(tamanhos.sum())
+        if total == 0:
+            return []
+        deslocamento = np.repeat(inicios - np.cumsum(tamanhos) + tamanhos, tamanhos)
+        posicoes = deslocamento + np.arange(total)
+        scores = np.bincount(self.indices[posicoes],
+                             weights=self.pesos[posicoes] * np.repeat(consulta, tamanhos),
+                             minlength=len(self.fichas))
+
+        if tipos is not None:
+            permitidos = [TIPOS.index(t) for t in tipos if t in TIPOS]
+            scores[~np.isin(self._tipos, permitidos)] = 0
+
+        k = min(k, len(scores))
+        candidatos = np.argpartition(-scores, k - 1)[:k]
+        candidatos = candidatos[np.argsort(-scores[candidatos], kind='stable')]
+        return [
+            {'tipo': self.fichas[i]['tipo'], 'nome': self.fichas[i]['nome'],
+             'ficha': self.fichas[i]['ficha'], 'score': round(float(scores[i]), 4)}
+            for i in candidatos if scores[i] > score_minimo
+        ]
+
+def save_retrieval_index(csv_path: str) -> RetrievalIndex:
+    """
+    Constrói o índice da versão atual dos dados e grava no armazenamento de
+    artefatos. Usado pelo scripts/process_data.py.
+
+    Args:
+        csv_path: Caminho do arquivo CSV original
+
+    Returns:
+        RetrievalIndex construído
+    """
+    versao = get_data_version(csv_path)
+    indice = cached_artifact(csv_path, 'recuperacao', (__name__, 'src.utils.entity_index'),
+                             lambda: RetrievalIndex.from_cards(build_cards(load_processed_data(csv_path))),
+                             RetrievalIndex.to_artifact, RetrievalIndex.from_artifact, rebuild=True)
+    _retrieval_index_cache[os.path.abspath(csv_path)] = (versao, indice)
+    return indice
+
+def get_retrieval_index(csv_path: str) -> RetrievalIndex:
+    """
+    Obtém o índice de recuperação, recarregado apenas quando a versão dos dados muda.
+    Ordem: memória do processo -> artefato gravado para o conteúdo atual dos
+    dados (memory-map) -> construção a partir dos dados processados.
+
+    Args:
+        csv_path: Caminho do arquivo CSV original
+
+    Returns:
+        RetrievalIndex dos dados processados
+    """
+    chave = os.path.abspath(csv_path)
+    versao = get_data_version(csv_path)
+    cached = _retrieval_index_cache.get(chave)
+    if cached is not None and cached[0] == versao:
+        return cached[1]
+
+    def build():
+        indice = RetrievalIndex.from_cards(build_cards(load_processed_data(csv_path)))
+        print(f"Índice de recuperação construído: {len(indice):,} fichas")
+        return indice
+
+    indice = cached_artifact(csv_path, 'recuperacao', (__name__, 'src.utils.entity_index'), build,
+                             RetrievalIndex.to_artifact, RetrievalIndex.from_artifact)
+
+    _retrieval_index_cache[chave] = (versao, indice)
+    return indice
@@ -0,0 +1,282 @@
+"""
+Armazenamento do histórico de conversa do chatbot por sessão.
+Sessões inativas expiram (TTL), o número de sessões é limitado (as menos
+recentes saem primeiro; ler o histórico também conta como atividade) e cada sessão tem limite de mensagens e de bytes.
+
+Backends:
+- memory: dicionário no processo (padrão fora do gunicorn)
+- sqlite: arquivo SQLite compartilhado, para que todos os workers do
+  gunicorn vejam o mesmo histórico
+
+Configurado por variáveis de ambiente (ver create_session_store).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+SESSION_BACKEND_ENV = "CHATBOT_SESSION_BACKEND"
+SESSION_DB_ENV = "CHATBOT_SESSION_DB"
+
+def _tamanho(mensagem: Dict) -> int:
+    """Bytes de uma mensagem serializada."""
+    return len(json.dumps(mensagem, ensure_ascii=False).encode("utf-8"))
+
+class SessionStore(ABC):
+    """
+    Interface comum dos backends de sessão. Um backend que não implementa
+    algum dos métodos abstratos falha já ao ser construído.
+
+    Args:
+        ttl: Segundos sem atividade até a sessão expirar
+        max_sessions: Máximo de sessões guardadas (remove as menos recentes)
+        max_mensagens: Máximo de mensagens por sessão (mantém as mais recentes)
+        max_bytes: Máximo de bytes por sessão (mantém as mais recentes)
+    """
+
+    def __init__(self, ttl: float = 3600, max_sessions: int = 1000,
+                 max_mensagens: int = 20, max_bytes: int = 64 * 1024):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_mensagens = max_mensagens
+        self.max_bytes = max_bytes
+        self.expiradas = 0
+        self.evictions = 0
+
+    def _limitar(self, mensagens: List[Dict]) -> List[Dict]:
+        """Corta as mensagens mais antigas até respeitar os limites da sessão."""
+        mensagens = mensagens[-self.max_mensagens:]
+        tamanhos = [_tamanho(m) for m in mensagens]
+        total = sum(tamanhos)
+        inicio = 0
+        while total > self.max_bytes and inicio < len(mensagens):
+            total -= tamanhos[inicio]
+            inicio += 1
+        return mensagens[inicio:]
+
+    @abstractmethod
+    def get(self, session_id: str) -> List[Dict]:
+        """
+        Histórico da sessão (lista nova; vazia se não existir ou expirou).
+        A leitura renova a atividade da sessão: uma conversa ativa não é
+        removida como a menos recente.
+        """
+        ...
+
+    @abstractmethod
+    def append(self, session_id: str, mensagens: List[Dict]):
+        """Acrescenta mensagens ao histórico da sessão, aplicando os limites."""
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Remove a sessão; retorna se ela existia."""
+        ...
+
+    @abstractmethod
+    def cleanup(self) -> int:
+        """Remove as sessões expiradas; retorna quantas foram removidas."""
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Número de sessões guardadas."""
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        """Ocupação e contadores de remoção."""
+        return {
+            "backend": self.backend,
+            "sessions": len(self),
+            "max_sessions": self.max_sessions,
+            "ttl": self.ttl,
+            "max_bytes_por_sessao": self.max_bytes,
+            "expiradas": self.expiradas,
+            "evictions": self.evictions
+        }
+
+class MemorySessionStore(SessionStore):
+    """Sessões em memória do processo (LRU por última atividade)."""
+
+    backend = "memory"
+
+    def __init__(self, **limites):
+        super().__init__(**limites)
+        self._sessoes: "OrderedDict[str, tuple]" = OrderedDict()  # id -> (ultima_atividade, mensagens)
+        self._lock = threading.RLock()
+
+    def _expirou(self, ultima_atividade: float, agora: float) -> bool:
+        return agora - ultima_atividade > self.ttl
+
+    def get(self, session_id: str) -> List[Dict]:
+        agora = time.time()
+        with self._lock:
+            sessao = self._sessoes.get(session_id)
+            if sessao is None:
+                return []
+            if self._expirou(sessao[0], agora):
+                del self._sessoes[session_id]
+                self.expiradas += 1
+                return []
+            # Renova a atividade (mantém a ordem por última atividade usada no cleanup)
+            self._sessoes[session_id] = (agora, sessao[1])
+            self._sessoes.move_to_end(session_id)
+            return list(sessao[1])
+
+    def append(self, session_id: str, mensagens: List[Dict]):
+        agora = time.time()
+        with self._lock:
+            atual = self.get(session_id)
+            self._sessoes.pop(session_id, None)
+            self._sessoes[session_id] = (agora, self._limitar(atual + list(mensagens)))
+            self.cleanup()
+            while len(self._sessoes) > self.max_sessions:
+                self._sessoes.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessoes.pop(session_id, None) is not None
+
+    def cleanup(self) -> int:
+        agora = time.time()
+        removidas = 0
+        with self._lock:
+            # Ordenadas por última atividade: para na primeira sessão ainda válida
+            while self._sessoes:
+                session_id, (ultima_atividade, _) = next(iter(self._sessoes.items()))
+                if not self._expirou(ultima_atividade, agora):
+                    break
+                del self._sessoes[session_id]
+                removidas += 1
+            self.expiradas += removidas
+        return removidas
+
+    def __len__(self) -> int:
+        return len(self._sessoes)
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessões em um arquivo SQLite compartilhado entre processos.
+    Cada thread usa sua própria conexão; o modo WAL permite leituras
+    concorrentes e as escritas são transações curtas.
+
+    Args:
+        path: Caminho do arquivo SQLite
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, **limites):
+        super().__init__(**limites)
+        self.path = path
+        self._local = threading.local()
+        diretorio = os.path.dirname(os.path.abspath(path))
+        os.makedirs(diretorio, exist_ok=True)
+        with self._conexao() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessoes ("
+                " session_id TEXT PRIMARY KEY,"
+                " atualizado REAL NOT NULL,"
+                " mensagens TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessoes_atualizado ON sessoes (atualizado)")
+
+    def _conexao(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            # Conexões não podem ser herdadas pelo fork: uma por processo e thread
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, session_id: str) -> List[Dict]:
+        linha = self._conexao().execute(
+            "SELECT atualizado, mensagens FROM sessoes WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if linha is None:
+            return []
+        agora = time.time()
+        if agora - linha[0] > self.ttl:
+            if self.delete(session_id):
+                self.expiradas += 1
+            return []
+        # Renova a atividade da sessão (TTL e ordem de remoção contam a partir da leitura)
+        self._conexao().execute("UPDATE sessoes SET atualizado = ? WHERE session_id = ?", (agora, session_id))
+        return json.loads(linha[1])
+
+    def append(self, session_id: str, mensagens: List[Dict]):
+        agora = time.time()
+        conn = self._conexao()
+        # BEGIN IMMEDIATE: leitura e escrita da sessão na mesma transação (sem perder
+        # mensagens de workers concorrentes)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            linha = conn.execute(
+                "SELECT atualizado, mensagens FROM sessoes WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            atual = json.loads(linha[1]) if linha is not None and agora - linha[0] <= self.ttl else []
+            historico = self._limitar(atual + list(mensagens))
+            conn.execute(
+                "INSERT OR REPLACE INTO sessoes (session_id, atualizado, mensagens) VALUES (?, ?, ?)",
+                (session_id, agora, json.dumps(historico, ensure_ascii=False))
+            )
+            expiradas = conn.execute("DELETE FROM sessoes WHERE atualizado < ?", (agora - self.ttl,)).rowcount
+            excedentes = conn.execute(
+                "DELETE FROM sessoes WHERE session_id IN ("
+                " SELECT session_id FROM sessoes ORDER BY atualizado DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,)
+            ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.expiradas += max(expiradas, 0)
+        self.evictions += max(excedentes, 0)
+
+    def delete(self, session_id: str) -> bool:
+        cursor = self._conexao().execute("DELETE FROM sessoes WHERE session_id = ?", (session_id,))
+        return cursor.rowcount > 0
+
+    def cleanup(self) -> int:
+        cursor = self._conexao().execute("DELETE FROM sessoes WHERE atualizado < ?", (time.time() - self.ttl,))
+        removidas = max(cursor.rowcount, 0)
+        self.expiradas += removidas
+        return removidas
+
+    def __len__(self) -> int:
+        return self._conexao().execute("SELECT COUNT(*) FROM sessoes").fetchone()[0]
+
+def create_session_store(max_mensagens: int = 20) -> SessionStore:
+    """
+    Cria o armazenamento de sessões conforme as variáveis de ambiente:
+    CHATBOT_SESSION_BACKEND (memory | sqlite), CHATBOT_SESSION_DB (arquivo do
+    backend sqlite), CHATBOT_SESSION_TTL, CHATBOT_MAX_SESSIONS e
+    CHATBOT_SESSION_MAX_BYTES.
+
+    Args:
+        max_mensagens: Máximo de mensagens por sessão
+
+    Returns:
+        SessionStore configurado
+    """
+    limites = {
+        "ttl": float(os.environ.get("CHATBOT_SESSION_TTL", "3600")),
+        "max_sessions": int(os.environ.get("CHATBOT_MAX_SESSIONS", "1000")),
+        "max_bytes": int(os.environ.get("CHATBOT_SESSION_MAX_BYTES", str(64 * 1024))),
+        "max_mensagens": max_mensagens
+    }
+    backend = os.environ.get(SESSION_BACKEND_ENV, "memory").strip().lower()
+    if backend == "sqlite":
+        path = os.environ.get(SESSION_DB_ENV, "").strip() or os.path.join("data", "sessions.sqlite3")
+        return SQLiteSessionStore(path, **limites)
+    if backend != "memory":
+        raise ValueError(f"{SESSION_BACKEND_ENV} inválido: {backend!r} (use 'memory' ou 'sqlite')")
+    return MemorySessionStore(**limites)
@@ -0,0 +1,167 @@
+"""
+Plano de dados compartilhado entre processos (workers do gunicorn).
+Os dados processados são gravados uma vez como arquivos .npy (uma coluna por
+arquivo, dimensões como códigos inteiros + dicionário no manifesto). Cada
+processo abre os arquivos com memory-map: as páginas ficam no cache do sistema
+operacional e são compartilhadas por todos os workers, sem cópia e sem
+reprocessar o Parquet a cada boot.
+
+Ativado pela variável de ambiente SHARED_DATA_DIR (definida pelo gunicorn.conf.py).
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+# Variável de ambiente que ativa o modo compartilhado
+SHARED_DATA_ENV = "SHARED_DATA_DIR"
+
+_MANIFESTO = "manifest.json"
+_FORMATO = 1
+
+def get_shared_data_dir() -> Optional[str]:
+    """Diretório do plano de dados compartilhado, ou None se o modo estiver desativado."""
+    diretorio = os.environ.get(SHARED_DATA_ENV, "").strip()
+    return diretorio or None
+
+def _snapshot_path(base_dir: str, versao: str) -> str:
+    """Subdiretório do snapshot de uma versão dos dados."""
+    return os.path.join(base_dir, hashlib.sha1(versao.encode("utf-8")).hexdigest()[:16])
+
+def has_snapshot(base_dir: str, versao: str) -> bool:
+    """Indica se já existe snapshot completo para a versão."""
+    return os.path.exists(os.path.join(_snapshot_path(base_dir, versao), _MANIFESTO))
+
+def write_columns(df: pd.DataFrame, diretorio: str, prefixo: str = "c") -> List[Dict[str, Any]]:
+    """
+    Grava cada coluna do DataFrame como um .npy no diretório: categóricas e
+    texto como códigos inteiros (dicionário na descrição), datas como int64.
+
+    Args:
+        df: DataFrame a gravar
+        diretorio: Diretório de destino (já existente)
+        prefixo: Prefixo dos nomes de arquivo
+
+    Returns:
+        Descrição das colunas (nome, arquivo, dicionário/dtype), para o manifesto
+    """
+    colunas = []
+    for i, col in enumerate(df.columns):
+        serie = df[col]
+        arquivo = f"{prefixo}{i:03d}.npy"
+        info = {"nome": col, "arquivo": arquivo}
+
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            valores = serie.cat.codes.to_numpy()
+            info["categorias"] = serie.cat.categories.tolist()
+        elif pd.api.types.is_datetime64_dtype(serie.dtype):
+            valores = serie.to_numpy().view(np.int64)
+            info["dtype"] = str(serie.dtype)
+        elif serie.dtype.kind in "biuf" and not pd.api.types.is_extension_array_dtype(serie.dtype):
+            valores = serie.to_numpy()
+        else:
+            # Texto (ou tipo de extensão) vira código + dicionário, como as dimensões
+            codes, uniques = pd.factorize(serie, sort=True)
+            valores = codes.astype(np.int32)
+            info["categorias"] = [str(u) for u in uniques]
+
+        np.save(os.path.join(diretorio, arquivo), np.ascontiguousarray(valores))
+        colunas.append(info)
+    return colunas
+
+def read_columns(diretorio: str, colunas: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Abre as colunas gravadas por write_columns como DataFrame apoiado em
+    memory-map (somente leitura, sem cópia dos dados).
+
+    Args:
+        diretorio: Diretório dos arquivos .npy
+        colunas: Descrição das colunas retornada por write_columns
+
+    Returns:
+        DataFrame com uma coluna por arquivo
+    """
+    dados = {}
+    for info in colunas:
+        valores = np.load(os.path.join(diretorio, info["arquivo"]), mmap_mode="r")
+        if "categorias" in info:
+            dados[info["nome"]] = pd.Categorical.from_codes(valores, categories=info["categorias"])
+        elif "dtype" in info:
+            dados[info["nome"]] = valores.view(info["dtype"])
+        else:
+            dados[info["nome"]] = valores
+
+    # copy=False mantém cada coluna como bloco próprio apontando para o memory-map
+    return pd.DataFrame(dados, copy=False)
+
+def export_snapshot(df: pd.DataFrame, base_dir: str, versao: str) -> str:
+    """
+    Grava o DataFrame como snapshot colunar (.npy por coluna + manifesto).
+    A gravação é atômica: o diretório temporário só é renomeado quando completo,
+    então processos concorrentes nunca enxergam um snapshot parcial.
+
+    Args:
+        df: DataFrame processado (dimensões já codificadas como category)
+        base_dir: Diretório do plano de dados compartilhado
+        versao: Versão dos dados (ver data_cache.get_data_version)
+
+    Returns:
+        Caminho do snapshot
+    """
+    destino = _snapshot_path(base_dir, versao)
+    if has_snapshot(base_dir, versao):
+        return destino
+
+    os.makedirs(base_dir, exist_ok=True)
+    temporario = tempfile.mkdtemp(prefix=".tmp-", dir=base_dir)
+    try:
+        colunas = write_columns(df, temporario)
+        manifesto = {"formato": _FORMATO, "versao": versao, "linhas": len(df), "colunas": colunas}
+        with open(os.path.join(temporario, _MANIFESTO), "w", encoding="utf-8") as f:
+            json.dump(manifesto, f, ensure_ascii=False)
+
+        try:
+            os.rename(temporario, destino)
+        except OSError:
+            # Outro processo publicou a mesma versão primeiro
+            shutil.rmtree(temporario, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+
+    _remove_old_snapshots(base_dir, manter=destino)
+    return destino
+
+def _remove_old_snapshots(base_dir: str, manter: str):
+    """Remove snapshots de versões anteriores (processos que ainda os mapeiam não são afetados)."""
+    for nome in os.listdir(base_dir):
+        caminho = os.path.join(base_dir, nome)
+        if caminho != manter and not nome.startswith(".tmp-") and os.path.isdir(caminho):
+            shutil.rmtree(caminho, ignore_errors=True)
+
+def attach_snapshot(base_dir: str, versao: str) -> Optional[pd.DataFrame]:
+    """
+    Abre o snapshot da versão como DataFrame apoiado em memory-map (somente leitura).
+
+    Args:
+        base_dir: Diretório do plano de dados compartilhado
+        versao: Versão dos dados
+
+    Returns:
+        DataFrame sem cópia dos dados, ou None se não houver snapshot para a versão
+    """
+    caminho = _snapshot_path(base_dir, versao)
+    try:
+        with open(os.path.join(caminho, _MANIFESTO), "r", encoding="utf-8") as f:
+            manifesto = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    if manifesto.get("formato") != _FORMATO or manifesto.get("versao") != versao:
+        return None
+
+    return read_columns(caminho, manifesto["colunas"])
@@ -0,0 +1,174 @@
+"""
+Coalescência de chamadas concorrentes iguais (single-flight).
+Quando várias requisições com a mesma chave chegam enquanto a primeira ainda
+está calculando, só a primeira (líder) executa; as demais esperam e recebem o
+mesmo resultado, ou a mesma exceção. Quem espera desiste após o timeout
+(TimeoutError), sem afetar o líder.
+
+Para respostas em streaming (do_stream), quem espera recebe cada trecho assim
+que o líder o produz, em vez de esperar o fim.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional
+
+class _Chamada:
+    """Estado de uma chamada em andamento, compartilhado entre líder e seguidores."""
+
+    __slots__ = ("condicao", "concluida", "resultado", "erro", "trechos")
+
+    def __init__(self):
+        self.condicao = threading.Condition()
+        self.concluida = False
+        self.resultado = None
+        self.erro: Optional[BaseException] = None
+        self.trechos = []
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes com a mesma chave em uma única execução.
+
+    Args:
+        timeout: Tempo máximo (s) que um seguidor espera pelo resultado (ou, no
+            streaming, pelo próximo trecho); None = sem limite
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+        self._chamadas: Dict[Hashable, _Chamada] = {}
+        self._streams: Dict[Hashable, _Chamada] = {}
+        self._lock = threading.Lock()
+        self.execucoes = 0
+        self.coalescidas = 0
+        self.timeouts = 0
+        self.erros = 0
+
+    def _entrar(self, tabela: Dict[Hashable, _Chamada], chave: Hashable):
+        """(chamada, é líder?) para a chave."""
+        with self._lock:
+            chamada = tabela.get(chave)
+            if chamada is not None:
+                self.coalescidas += 1
+                return chamada, False
+            chamada = tabela[chave] = _Chamada()
+            self.execucoes += 1
+            return chamada, True
+
+    def _concluir(self, tabela: Dict[Hashable, _Chamada], chave: Hashable, chamada: _Chamada,
+                  resultado: Any = None, erro: Optional[BaseException] = None):
+        """Publica o resultado (ou erro) para os seguidores e libera a chave."""
+        with self._lock:
+            if tabela.get(chave) is chamada:
+                del tabela[chave]
+            if erro is not None:
+                self.erros += 1
+        with chamada.condicao:
+            chamada.resultado = resultado
+            chamada.erro = erro
+            chamada.concluida = True
+            chamada.condicao.notify_all()
+
+    def _timeout(self, timeout: Optional[float]) -> Optional[float]:
+        return self.timeout if timeout is None else timeout
+
+    def do(self, chave: Hashable, funcao: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Executa funcao() uma vez por chave entre as chamadas concorrentes.
+
+        Args:
+            chave: Identifica chamadas equivalentes
+            funcao: Cálculo executado pelo líder
+            timeout: Espera máxima deste seguidor (padrão: o do SingleFlight)
+
+        Returns:
+            Resultado de funcao() (o mesmo objeto para líder e seguidores)
+
+        Raises:
+            TimeoutError: Seguidor esperou mais que o timeout
+            Exception: A exceção levantada por funcao() no líder
+        """
+        chamada, lider = self._entrar(self._chamadas, chave)
+        if lider:
+            try:
+                resultado = funcao()
+            except BaseException as erro:
+                self._concluir(self._chamadas, chave, chamada, erro=erro)
+                raise
+            self._concluir(self._chamadas, chave, chamada, resultado=resultado)
+            return resultado
+
+        with chamada.condicao:
+            if not chamada.condicao.wait_for(lambda: chamada.concluida, self._timeout(timeout)):
+                with self._lock:
+                    self.timeouts += 1
+                raise TimeoutError(f"Chamada em andamento não terminou em {self._timeout(timeout)}s")
+        if chamada.erro is not None:
+            raise chamada.erro
+        return chamada.resultado
+
+    def do_stream(self, chave: Hashable, fabrica: Callable[[], Iterable[Any]],
+                  timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        Versão em streaming de do(): o líder consome fabrica() e repassa cada
+        item; os seguidores recebem os itens já produzidos e os próximos assim
+        que chegam. Se o consumidor do líder desistir no meio, os seguidores
+        recebem um erro (o líder é quem conduz a chamada).
+
+        Args:
+            chave: Identifica chamadas equivalentes
+            fabrica: Cria o iterador consumido pelo líder
+            timeout: Espera máxima deste seguidor por cada item
+
+        Yields:
+            Itens produzidos pelo iterador do líder, na ordem
+
+        Raises:
+            TimeoutError: Seguidor esperou mais que o timeout por um item
+            Exception: A exceção levantada pelo iterador do líder
+        """
+        chamada, lider = self._entrar(self._streams, chave)
+        if lider:
+            try:
+                for item in fabrica():
+                    with chamada.condicao:
+                        chamada.trechos.append(item)
+                        chamada.condicao.notify_all()
+                    yield item
+            except GeneratorExit:
+                # Gerador fechado pelo consumidor do líder (ex.: cliente desconectou)
+                self._concluir(self._streams, chave, chamada, erro=RuntimeError("Chamada líder interrompida"))
+                raise
+            except BaseException as erro:
+                self._concluir(self._streams, chave, chamada, erro=erro)
+                raise
+            self._concluir(self._streams, chave, chamada, resultado=chamada.trechos)
+            return
+
+        limite = self._timeout(timeout)
+        entregues = 0
+        while True:
+            with chamada.condicao:
+                if not chamada.condicao.wait_for(
+                        lambda: len(chamada.trechos) > entregues or chamada.concluida, limite):
+                    with self._lock:
+                        self.timeouts += 1
+                    raise TimeoutError(f"Chamada em andamento sem novos trechos em {limite}s")
+                novos = chamada.trechos[entregues:]
+                terminou = chamada.concluida
+            for item in novos:
+                yield item
+            entregues += len(novos)
+            if terminou and entregues >= len(chamada.trechos):
+                break
+        if chamada.erro is not None:
+            raise chamada.erro
+
+    def stats(self) -> Dict[str, int]:
+        """Execuções reais, chamadas coalescidas, timeouts e erros."""
+        with self._lock:
+            return {
+                "em_andamento": len(self._chamadas) + len(self._streams),
+                "execucoes": self.execucoes,
+                "coalescidas": self.coalescidas,
+                "timeouts": self.timeouts,
+                "erros": self.erros
+            }
@@ -0,0 +1,157 @@
+"""
+Resultados dos callbacks por aba do painel.
+Só os callbacks da aba ativa disparam (as outras abas não estão no layout),
+mas trocar de aba recria o layout e dispara de novo o callback inteiro da aba.
+Aqui cada aba registra sua função de cálculo; o resultado fica guardado por
+(aba, versão dos dados, filtros), então voltar a uma aba com os mesmos filtros
+reaproveita o que já foi calculado. Depois que o painel fica ocioso, as outras
+abas são pré-calculadas em segundo plano para os últimos filtros usados.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from src.utils.data_cache import get_data_version, filter_cache_key
+from src.utils.lru_cache import LRUCache
+from src.utils.single_flight import SingleFlight
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
+
+class TabResults:
+    """
+    Cache de resultados por aba com pré-cálculo das abas inativas.
+
+    Args:
+        max_entries: Resultados (aba x filtros) guardados
+        prefetch: Pré-calcula as outras abas quando o painel fica ocioso
+        prefetch_delay: Segundos sem novas requisições antes de pré-calcular
+    """
+
+    def __init__(self, max_entries: int = 60, prefetch: bool = True, prefetch_delay: float = 2.0):
+        # Saídas dos callbacks (componentes Dash e figuras): limitadas por entradas
+        self._results = LRUCache(max_bytes=1, max_entries=max_entries, sizeof=lambda _: 0)
+        self._tabs: Dict[str, tuple] = {}  # aba -> (csv_path absoluto, função de cálculo)
+        self._em_andamento = SingleFlight()
+        self.prefetch = prefetch
+        self.prefetch_delay = prefetch_delay
+        self._cond = threading.Condition()
+        self._pendente: Optional[tuple] = None  # (aba que pediu, filtros) do último pedido
+        self._ultimo_pedido = 0.0
+        self._worker_pid = None
+        self.prefetched = 0
+        self.prefetch_cancelled = 0
+
+    def register(self, tab: str, csv_path: str, compute: Callable[[Dict[str, Any]], Any]):
+        """
+        Registra a função de cálculo de uma aba.
+
+        Args:
+            tab: Valor da aba em main-tabs (ex.: "fluxos-servicos")
+            csv_path: Caminho do CSV (relativo à raiz do projeto, como nos callbacks)
+            compute: Função que recebe os filtros e devolve as saídas do callback
+        """
+        if not os.path.isabs(csv_path):
+            csv_path = os.path.join(BASE_DIR, csv_path)
+        self._tabs[tab] = (csv_path, compute)
+
+    def _key(self, tab: str, filtros: Dict[str, Any]) -> tuple:
+        csv_path, _ = self._tabs[tab]
+        return (tab, get_data_version(csv_path), filter_cache_key(filtros))
+
+    def _compute(self, tab: str, filtros: Dict[str, Any]) -> Any:
+        """Resultado da aba (do cache ou calculado uma vez entre chamadas simultâneas)."""
+        key = self._key(tab, filtros)
+        resultado = self._results.get(key)
+        if resultado is not None:
+            return resultado
+
+        def calcular():
+            valor = self._tabs[tab][1](filtros)
+            self._results.put(key, valor)
+            return valor
+
+        # Aba pedida enquanto o pré-cálculo dela está em andamento: espera por ele
+        return self._em_andamento.do(key, calcular)
+
+    def get(self, tab: str, filtros: Dict[str, Any]) -> Any:
+        """
+        Saídas do callback da aba para os filtros. Exceções da função de
+        cálculo são propagadas (e o resultado não é guardado).
+
+        Args:
+            tab: Aba registrada
+            filtros: Filtros do painel (filtered-data-store)
+
+        Returns:
+            Saídas do callback
+        """
+        self._agendar_prefetch(tab, filtros)
+        return self._compute(tab, filtros)
+
+    def _agendar_prefetch(self, tab: str, filtros: Dict[str, Any]):
+        """Anota o último pedido; o pré-cálculo começa após prefetch_delay sem pedidos."""
+        if not self.prefetch:
+            return
+        with self._cond:
+            self._pendente = (tab, dict(filtros))
+            self._ultimo_pedido = time.monotonic()
+            # Thread criada sob demanda (e recriada após o fork dos workers do gunicorn)
+            if self._worker_pid != os.getpid():
+                self._worker_pid = os.getpid()
+                threading.Thread(target=self._prefetch_loop, name="tab-prefetch", daemon=True).start()
+            self._cond.notify()
+
+    def _prefetch_loop(self):
+        while True:
+            with self._cond:
+                while self._pendente is None:
+                    self._cond.wait()
+                # Espera o painel ficar ocioso (novos pedidos adiam o pré-cálculo)
+                while True:
+                    restante = self._ultimo_pedido + self.prefetch_delay - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._cond.wait(restante)
+                pedido = self._pendente
+                self._pendente = None
+                inicio = self._ultimo_pedido
+
+            tab_ativa, filtros = pedido
+            for tab in [t for t in self._tabs if t != tab_ativa]:
+                if self._ultimo_pedido != inicio:
+                    # Chegou um pedido novo: abandona os filtros antigos
+                    self.prefetch_cancelled += 1
+                    break
+                try:
+                    if self._key(tab, filtros) not in self._results:
+                        self._compute(tab, filtros)
+                        self.prefetched += 1
+                except Exception as e:
+                    print(f"Erro ao pré-calcular a aba {tab}: {e}")
+
+    def clear(self):
+        """Descarta os resultados guardados."""
+        self._results.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Acertos, ausências, remoções e pré-cálculos."""
+        stats = self._results.stats()
+        return {
+            "entries": stats["entries"],
+            "max_entries": stats["max_entries"],
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "evictions": stats["evictions"],
+            "hit_rate": stats["hit_rate"],
+            "prefetch": self.prefetch,
+            "prefetched": self.prefetched,
+            "prefetch_cancelled": self.prefetch_cancelled
+        }
+
+# Instância compartilhada pelos callbacks das abas
+tab_results = TabResults(
+    max_entries=int(os.environ.get("TAB_CACHE_MAX_ENTRIES", "60")),
+    prefetch=os.environ.get("TAB_PREFETCH", "True").lower() == "true",
+    prefetch_delay=float(os.environ.get("TAB_PREFETCH_DELAY", "2"))
+)